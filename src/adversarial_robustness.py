@@ -43,6 +43,7 @@ import math
 
 from logger import get_logger
 from errors import AnalysisError
+from embedding_service import get_embedding_service
 
 logger = get_logger(__name__)
 
@@ -99,6 +100,19 @@ HOMOGLYPHS = {
     'z': ['ᴢ', '2'],
 }
 
+# ============================================================================
+# KEYBOARD ADJACENCY (QWERTY) - Keys a typist is likely to hit instead
+# ============================================================================
+
+QWERTY_ADJACENT_KEYS = {
+    'q': 'wa', 'w': 'qeas', 'e': 'wrd', 'r': 'etf', 't': 'ryg',
+    'y': 'tuh', 'u': 'yij', 'i': 'uok', 'o': 'ipl', 'p': 'ol',
+    'a': 'qwsz', 's': 'awedxz', 'd': 'serfcx', 'f': 'drtgvc',
+    'g': 'ftyhbv', 'h': 'gyujnb', 'j': 'huikmn', 'k': 'jiolm',
+    'l': 'kop', 'z': 'asx', 'x': 'zsdc', 'c': 'xdfv', 'v': 'cfgb',
+    'b': 'vghn', 'n': 'bhjm', 'm': 'njk'
+}
+
 # ============================================================================
 # DATA CLASSES
 # ============================================================================
@@ -295,15 +309,7 @@ class AdversarialPerturbationGenerator:
         Returns:
             AdversarialExample with typosquatting
         """
-        # Keyboard adjacency (QWERTY)
-        adjacent_keys = {
-            'q': 'wa', 'w': 'qeas', 'e': 'wrd', 'r': 'etf', 't': 'ryg',
-            'y': 'tuh', 'u': 'yij', 'i': 'uok', 'o': 'ipl', 'p': 'ol',
-            'a': 'qwsz', 's': 'awedxz', 'd': 'serfcx', 'f': 'drtgvc',
-            'g': 'ftyhbv', 'h': 'gyujnb', 'j': 'huikmn', 'k': 'jiolm',
-            'l': 'kop', 'z': 'asx', 'x': 'zsdc', 'c': 'xdfv', 'v': 'cfgb',
-            'b': 'vghn', 'n': 'bhjm', 'm': 'njk'
-        }
+        adjacent_keys = QWERTY_ADJACENT_KEYS
         
         words = text.split()
         changes = []
@@ -579,20 +585,11 @@ class RobustnessEvaluator:
         Returns:
             Attack effectiveness score [0, 1]
         """
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        from sklearn.metrics.pairwise import cosine_similarity
-        
         # Measure similarity of adversarial input to original
-        vectorizer = TfidfVectorizer(max_features=500)
-        
         try:
-            texts = [attack.original_text, attack.adversarial_text]
-            embeddings = vectorizer.fit_transform(texts).toarray()
-            
-            perturb_similarity = cosine_similarity(
-                embeddings[0].reshape(1, -1),
-                embeddings[1].reshape(1, -1)
-            )[0][0]
+            perturb_similarity = get_embedding_service().similarity(
+                attack.original_text, attack.adversarial_text, max_features=500
+            )
             
             # Attack effective if small perturbation causes big change
             # Effectiveness = (1 - perturb_similarity) indicates attack strength
@@ -11,15 +11,25 @@ Features:
 - View list of available skills
 - Direct skill invocation with custom input
 - Token usage and cost tracking
+- Batch mode: run a JSONL/CSV file of (agent, input) rows concurrently and
+  stream per-row results (output, latency, tokens) to a JSONL file
+- Interactive mode: keep the client, skills and config warm and answer
+  inputs from stdin (REPL) or a local Unix socket with measured latency
 
 Usage:
     python3 test_agent.py <agent-name> <input-text>
     python3 test_agent.py --list
+    python3 test_agent.py --batch <rows.jsonl|rows.csv> [--output FILE] [--workers N]
+    python3 test_agent.py --repl [agent-name]
+    python3 test_agent.py --serve <socket-path> [agent-name]
 
 Examples:
     python3 test_agent.py english-to-french-translator "Hello world"
     python3 test_agent.py french-to-hebrew-translator "Bonjour le monde"
     python3 test_agent.py --list
+    python3 test_agent.py --batch data/agent_sweep.jsonl --workers 8
+    python3 test_agent.py --repl english-to-french-translator
+    python3 test_agent.py --serve /tmp/agent.sock
 
 Author: Agentic Turing Machine Team
 License: MIT
@@ -27,13 +37,28 @@ License: MIT
 
 import sys
 import os
+import argparse
+import copy
+import csv
+import json
+import socket
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, TextIO
 import anthropic
 
 # Import custom modules
+from config import get_config
 from logger import get_logger
-from errors import SkillNotFoundError, APIError, ValidationError
+from errors import SkillNotFoundError, APIError, FileOperationError, ValidationError
+from rate_limiter import ensure_resilient
+from llm_backend import get_llm_backend
+from skill_registry import get_skill_registry
+from tracing import get_tracer
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -43,7 +68,8 @@ def load_skill(agent_name: str) -> Dict[str, str]:
     """
     Load an agent skill definition from the skills directory.
 
-    Reads the SKILL.md file for the specified agent and returns
+    Reads the SKILL.md file for the specified agent (through the shared
+    SkillRegistry, which only re-reads it when it changes) and returns
     its content along with metadata.
 
     Args:
@@ -70,24 +96,8 @@ def load_skill(agent_name: str) -> Dict[str, str]:
     project_root = Path(__file__).parent.parent
     skill_path = project_root / "skills" / agent_name / "SKILL.md"
 
-    if not skill_path.exists():
-        logger.error(f"Skill not found: {skill_path}")
-        raise SkillNotFoundError(
-            f"Agent skill '{agent_name}' not found",
-            details={"skill_path": str(skill_path)}
-        )
-
     try:
-        with open(skill_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        logger.info(f"Loaded skill '{agent_name}': {len(content)} characters")
-
-        return {
-            "name": agent_name,
-            "content": content
-        }
-
+        entry = get_skill_registry(project_root / "skills").get(agent_name)
     except IOError as e:
         logger.error(f"Failed to read skill file: {e}")
         raise SkillNotFoundError(
@@ -95,13 +105,28 @@ def load_skill(agent_name: str) -> Dict[str, str]:
             details={"error": str(e), "path": str(skill_path)}
         ) from e
 
+    if entry is None:
+        logger.error(f"Skill not found: {skill_path}")
+        raise SkillNotFoundError(
+            f"Agent skill '{agent_name}' not found",
+            details={"skill_path": str(skill_path)}
+        )
+
+    logger.info(f"Loaded skill '{agent_name}': {len(entry.content)} characters")
+
+    return {
+        "name": agent_name,
+        "content": entry.content
+    }
+
 
 def list_agents() -> List[str]:
     """
     List all available agent skills in the skills directory.
 
     Scans the skills/ directory and identifies all valid agent skills
-    (directories containing a SKILL.md file).
+    (directories containing a SKILL.md file). The scan is cached by the
+    shared SkillRegistry until the directory changes.
 
     Returns:
         List[str]: Sorted list of agent names
@@ -121,17 +146,52 @@ def list_agents() -> List[str]:
         print("❌ No skills directory found")
         return []
 
-    agents = []
-    for skill_dir in skills_dir.iterdir():
-        if skill_dir.is_dir() and (skill_dir / "SKILL.md").exists():
-            agents.append(skill_dir.name)
-            logger.debug(f"Found agent: {skill_dir.name}")
-
-    agents_sorted = sorted(agents)
+    agents_sorted = get_skill_registry(skills_dir).names()
     logger.info(f"Found {len(agents_sorted)} agent skills")
     return agents_sorted
 
 
+def send_agent_request(client: Any, skill: Dict[str, str], input_text: str) -> Any:
+    """
+    Send one agent request through the rate-limited, retrying client.
+
+    Args:
+        client: Anthropic (or backend) client; wrapped in a ResilientClient
+        skill: Dictionary containing skill name and content
+        input_text: Text to be processed by the agent
+
+    Returns:
+        Messages API response
+    """
+    # Construct prompt; the skill instructions form a cacheable system prefix
+    system_block = {"type": "text", "text": skill['content']}
+    if get_config().prompt_caching_enabled:
+        system_block["cache_control"] = {"type": "ephemeral"}
+    system = [system_block]
+    prompt = f"""Please process the following input according to the skill instructions.
+Return ONLY the result, with no explanations or additional text.
+
+Input:
+{input_text}"""
+
+    with get_tracer().span("api_call", agent=skill['name']) as span:
+        response = ensure_resilient(client).messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=2000,
+            temperature=0,  # Deterministic
+            system=system,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        )
+        span.set(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens
+        )
+    return response
+
+
 def invoke_agent(
     client: anthropic.Anthropic,
     skill: Dict[str, str],
@@ -141,7 +201,9 @@ def invoke_agent(
     Invoke a Claude agent skill with given input text.
 
     Constructs a prompt from the skill definition and input text,
-    then sends it to the Claude API for processing.
+    then sends it to the Claude API for processing. The call goes through
+    a ResilientClient, so it shares the process-wide rate limits and
+    transient errors (429, overload, connection failures) are retried.
 
     Args:
         client: Initialized Anthropic API client
@@ -169,32 +231,13 @@ def invoke_agent(
         logger.error("Empty input text provided")
         raise ValidationError("Input text cannot be empty")
 
-    # Construct prompt
-    prompt = f"""{skill['content']}
-
----
-
-Please process the following input according to the skill instructions above.
-Return ONLY the result, with no explanations or additional text.
-
-Input:
-{input_text}"""
-
     print(f"\n📤 Invoking agent: {skill['name']}")
     print(f"📝 Input length: {len(input_text)} characters")
     print("⏳ Processing...")
 
     try:
         logger.debug("Sending request to Claude API")
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            temperature=0,  # Deterministic
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        response = send_agent_request(client, skill, input_text)
 
         output = response.content[0].text.strip()
 
@@ -227,6 +270,513 @@ Input:
         ) from e
 
 
+def iter_batch_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read (agent, input) rows from a JSONL or CSV file, one at a time.
+
+    JSONL files hold one object per line; CSV files need a header row.
+    Both need ``agent`` and ``input`` fields; an optional ``id`` field is
+    carried into the results (it defaults to the row number). Blank lines
+    are skipped.
+
+    Args:
+        path: Path of a ``.jsonl``/``.json`` or ``.csv`` file
+
+    Yields:
+        Dictionaries with 'row', 'id', 'agent' and 'input'
+
+    Raises:
+        ValidationError: If the format is unsupported or a row is malformed
+    """
+    suffix = path.suffix.lower()
+    with open(path, encoding="utf-8", newline="") as f:
+        if suffix == ".csv":
+            records = ((number, record) for number, record in enumerate(csv.DictReader(f), 2))
+        elif suffix in (".jsonl", ".json"):
+            records = (
+                (number, _parse_json_row(line, path, number))
+                for number, line in enumerate(f, 1) if line.strip()
+            )
+        else:
+            raise ValidationError(
+                f"Unsupported batch file format: {path.suffix}",
+                details={"path": str(path), "supported": [".jsonl", ".csv"]}
+            )
+
+        for row, (number, record) in enumerate(records):
+            agent = (record.get("agent") or "").strip()
+            input_text = record.get("input")
+            if not agent or input_text is None:
+                raise ValidationError(
+                    f"Batch row at line {number} needs 'agent' and 'input' fields",
+                    details={"path": str(path), "line": number}
+                )
+            yield {
+                "row": row,
+                "id": record.get("id") or row,
+                "agent": agent,
+                "input": input_text
+            }
+
+
+def _parse_json_row(line: str, path: Path, number: int) -> dict:
+    """Parse one JSONL batch row."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValidationError(
+            f"Invalid JSON at line {number} of {path}",
+            details={"path": str(path), "line": number, "error": str(e)}
+        ) from e
+    if not isinstance(record, dict):
+        raise ValidationError(
+            f"Batch row at line {number} is not an object",
+            details={"path": str(path), "line": number}
+        )
+    return record
+
+
+def run_batch_row(client: Any, row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one batch row; failures are reported in the result, not raised.
+
+    Args:
+        client: Shared API client
+        row: Row from ``iter_batch_rows``
+
+    Returns:
+        Result with the row fields plus 'output', 'error', 'latency_s',
+        'input_tokens' and 'output_tokens'
+    """
+    result = dict(row, output=None, error=None, latency_s=None,
+                  input_tokens=None, output_tokens=None)
+    started = time.perf_counter()
+    try:
+        if not str(row["input"]).strip():
+            raise ValidationError("Input text cannot be empty")
+        skill = load_skill(row["agent"])
+        response = send_agent_request(client, skill, row["input"])
+        result.update(
+            output=response.content[0].text.strip(),
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens
+        )
+    except Exception as e:
+        logger.error(f"Batch row {row['id']} ({row['agent']}) failed: {e}")
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_s"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(
+    input_path: Path,
+    output_path: Path,
+    max_workers: Optional[int] = None,
+    client: Any = None
+) -> Dict[str, Any]:
+    """
+    Run every row of a batch file concurrently and stream results to JSONL.
+
+    Rows are read lazily and at most ``2 * max_workers`` are in flight, so
+    arbitrarily large sweeps run in constant memory. One client (and one
+    skill registry) is shared by all rows; each result line is written and
+    flushed as soon as its row finishes, so results appear in completion
+    order (use 'row' or 'id' to match them to the input).
+
+    Args:
+        input_path: JSONL or CSV file of (agent, input) rows
+        output_path: JSONL file receiving one result per row
+        max_workers: Concurrent requests. If None, uses execution.max_concurrency
+        client: API client. If None, created from the configured LLM backend
+
+    Returns:
+        Summary with 'rows', 'succeeded', 'failed', 'input_tokens',
+        'output_tokens', 'mean_latency_s' and 'elapsed_s'
+
+    Raises:
+        ValidationError: If the batch file is malformed
+
+    Example:
+        >>> summary = run_batch(Path("sweep.jsonl"), Path("sweep.results.jsonl"), 8)
+        >>> print(summary["succeeded"], summary["failed"])
+    """
+    if max_workers is None:
+        max_workers = get_config().max_concurrency
+    max_workers = max(1, int(max_workers))
+    if client is None:
+        client = get_llm_backend().create_client()
+
+    summary = {"rows": 0, "succeeded": 0, "failed": 0, "input_tokens": 0, "output_tokens": 0}
+    latency_total = 0.0
+    started = time.perf_counter()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Running batch {input_path} with {max_workers} workers")
+
+    def write(result: Dict[str, Any]) -> None:
+        nonlocal latency_total
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        summary["rows"] += 1
+        summary["failed" if result["error"] else "succeeded"] += 1
+        summary["input_tokens"] += result["input_tokens"] or 0
+        summary["output_tokens"] += result["output_tokens"] or 0
+        latency_total += result["latency_s"]
+
+    with open(output_path, "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = set()
+        for row in iter_batch_rows(input_path):
+            if len(in_flight) >= 2 * max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            in_flight.add(pool.submit(run_batch_row, client, row))
+        for future in wait(in_flight).done:
+            write(future.result())
+
+    summary["mean_latency_s"] = latency_total / summary["rows"] if summary["rows"] else 0.0
+    summary["elapsed_s"] = time.perf_counter() - started
+    logger.info(f"Batch complete: {summary}")
+    return summary
+
+
+def run_batch_cli(argv: List[str]) -> None:
+    """
+    Handle ``--batch FILE [--output FILE] [--workers N]``.
+
+    Args:
+        argv: Command-line arguments after the program name
+
+    Exits:
+        0: Every row succeeded
+        1: Some rows failed, or the batch could not be run
+    """
+    parser = argparse.ArgumentParser(
+        prog="test_agent.py --batch",
+        description="Run a JSONL/CSV file of (agent, input) rows concurrently"
+    )
+    parser.add_argument("--batch", type=Path, required=True, metavar="FILE",
+                        help="JSONL or CSV file with 'agent' and 'input' fields")
+    parser.add_argument("--output", type=Path, default=None, metavar="FILE",
+                        help="Result JSONL (default: <FILE stem>.results.jsonl)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent requests (default: execution.max_concurrency)")
+    args = parser.parse_args(argv)
+
+    output_path = args.output or args.batch.with_name(f"{args.batch.stem}.results.jsonl")
+
+    backend = get_llm_backend()
+    if backend.requires_api_key and not os.environ.get("ANTHROPIC_API_KEY"):
+        logger.error("ANTHROPIC_API_KEY environment variable not set")
+        print("❌ Error: ANTHROPIC_API_KEY environment variable not set")
+        print("Set it with: export ANTHROPIC_API_KEY='your-key-here'")
+        sys.exit(1)
+
+    print(f"\n📦 Running batch: {args.batch}")
+    try:
+        summary = run_batch(args.batch, output_path, args.workers)
+    except (ValidationError, OSError) as e:
+        logger.error(f"Batch failed: {e}")
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"✅ {summary['succeeded']}/{summary['rows']} rows succeeded "
+          f"in {summary['elapsed_s']:.1f}s (mean latency {summary['mean_latency_s']:.2f}s)")
+    print(f"💰 Tokens used: input={summary['input_tokens']}, output={summary['output_tokens']}")
+    print(f"💾 Results: {output_path}")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+class _RequestCounter:
+    """Number of requests served, shared by a session and its connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def next(self) -> int:
+        """Count one more request and return its number."""
+        with self._lock:
+            self.value += 1
+            return self.value
+
+
+class AgentSession:
+    """
+    Long-lived agent tester state for interactive use.
+
+    Config, logger, skill registry and the API client are created once, so
+    every request after the first only costs the API round-trip.
+
+    Requests are lines of text:
+
+    - ``{"agent": ..., "input": ...}``: a JSON request, answered with a JSON
+      result (output, error, latency_s, input_tokens, output_tokens)
+    - ``:agent NAME``: switch the default agent; ``:agents`` lists agents
+    - ``:quit``: end the session (stdin only)
+    - anything else: input for the default agent
+
+    Attributes:
+        agent: Default agent for plain-text inputs
+        client: Shared API client
+        requests: Number of agent requests served (by this session and
+                  every session forked from it)
+    """
+
+    def __init__(self, agent: Optional[str] = None, client: Any = None):
+        """
+        Start a session.
+
+        Args:
+            agent: Default agent (defaults to the first available agent)
+            client: API client. If None, created from the configured LLM backend
+        """
+        self.client = client if client is not None else get_llm_backend().create_client()
+        self.agent = agent or next(iter(list_agents()), None)
+        self._counter = _RequestCounter()
+
+    @property
+    def requests(self) -> int:
+        """Number of agent requests served."""
+        return self._counter.value
+
+    def fork(self) -> "AgentSession":
+        """
+        Start a session for another connection.
+
+        The fork shares the client and the request counter, and has its own
+        default agent, so ``:agent`` only affects the connection sending it.
+
+        Returns:
+            New AgentSession
+        """
+        return copy.copy(self)
+
+    def request(self, agent: str, input_text: str) -> Dict[str, Any]:
+        """
+        Run one agent request.
+
+        Args:
+            agent: Agent name
+            input_text: Text to be processed
+
+        Returns:
+            Result dictionary as produced by ``run_batch_row``
+        """
+        number = self._counter.next()
+        row = {"row": number, "id": number, "agent": agent, "input": input_text}
+        return run_batch_row(self.client, row)
+
+    def handle(self, line: str) -> Optional[str]:
+        """
+        Handle one request line.
+
+        Args:
+            line: Request line (JSON, command or plain text)
+
+        Returns:
+            Response text, or None for blank lines
+        """
+        line = line.strip()
+        if not line:
+            return None
+
+        if line.startswith("{"):
+            try:
+                request = json.loads(line)
+                agent, input_text = request.get("agent") or self.agent, request["input"]
+            except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                return json.dumps({"error": f"Invalid request: {e}"})
+            return json.dumps(self.request(agent, input_text), ensure_ascii=False)
+
+        if line == ":agents":
+            return "\n".join(list_agents())
+        if line.startswith(":agent"):
+            name = line[len(":agent"):].strip()
+            if name not in list_agents():
+                return f"❌ Unknown agent: {name or '(none)'}"
+            self.agent = name
+            return f"✓ Agent: {name}"
+        if self.agent is None:
+            return "❌ No agent selected (use :agent NAME)"
+
+        result = self.request(self.agent, line)
+        if result["error"]:
+            return f"❌ {result['error']} ({result['latency_s'] * 1000:.0f} ms)"
+        return (f"{result['output']}\n"
+                f"⏱  {result['latency_s'] * 1000:.0f} ms, tokens: "
+                f"input={result['input_tokens']}, output={result['output_tokens']}")
+
+
+def run_repl(
+    session: AgentSession,
+    stdin: Optional[TextIO] = None,
+    stdout: Optional[TextIO] = None
+) -> int:
+    """
+    Answer requests read from stdin until EOF or ``:quit``.
+
+    Args:
+        session: Warm agent session
+        stdin: Input stream (default: sys.stdin)
+        stdout: Output stream (default: sys.stdout)
+
+    Returns:
+        Number of agent requests served
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    interactive = stdin.isatty()
+    if interactive:
+        stdout.write(f"Agent tester REPL ({session.agent}); :agents, :agent NAME, :quit\n")
+    while True:
+        if interactive:
+            stdout.write(f"{session.agent}> ")
+            stdout.flush()
+        line = stdin.readline()
+        if not line or line.strip() == ":quit":
+            break
+        response = session.handle(line)
+        if response is not None:
+            stdout.write(response + "\n")
+            stdout.flush()
+    logger.info(f"REPL finished after {session.requests} requests")
+    return session.requests
+
+
+class _SessionRequestHandler(socketserver.StreamRequestHandler):
+    """Answers newline-delimited requests on one socket connection."""
+
+    def handle(self) -> None:
+        session = self.server.session.fork()
+        for raw in self.rfile:
+            response = session.handle(raw.decode("utf-8"))
+            if response is not None:
+                self.wfile.write((response + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+
+class AgentSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server sharing one AgentSession between connections.
+
+    Each connection sends newline-delimited requests (see AgentSession)
+    and receives one response line per request; connections are served
+    concurrently. Connections share the session's client and request
+    numbering, and each has its own default agent (``AgentSession.fork``).
+
+    Attributes:
+        session: Shared agent session
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, session: AgentSession):
+        """
+        Bind the socket.
+
+        Args:
+            socket_path: Filesystem path of the Unix socket (replaced if stale)
+            session: Shared agent session
+
+        Raises:
+            FileOperationError: If the path exists and is not a socket, or
+                                another server is listening on it
+        """
+        self.session = session
+        self.socket_path = Path(socket_path)
+        _remove_stale_socket(self.socket_path)
+        super().__init__(str(self.socket_path), _SessionRequestHandler)
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        if self.socket_path.is_socket():
+            self.socket_path.unlink()
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """
+    Remove a socket file left behind by a server that is no longer running.
+
+    Args:
+        path: Socket path about to be bound
+
+    Raises:
+        FileOperationError: If the path is not a socket or a server still
+                            accepts connections on it
+    """
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileOperationError(
+            f"Refusing to replace {path}: not a Unix socket", details={"path": str(path)}
+        )
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()
+            logger.info(f"Removed stale socket {path}")
+            return
+    raise FileOperationError(
+        f"Another server is listening on {path}", details={"path": str(path)}
+    )
+
+
+def run_interactive_cli(argv: List[str]) -> None:
+    """
+    Handle ``--repl [agent]`` and ``--serve SOCKET [agent]``.
+
+    Args:
+        argv: Command-line arguments after the program name
+
+    Exits:
+        0: Session ended
+        1: Invalid arguments or missing API key
+    """
+    mode, rest = argv[0], argv[1:]
+    if mode == "--serve" and not rest:
+        print("❌ Error: --serve needs a socket path")
+        sys.exit(1)
+    socket_path = Path(rest.pop(0)) if mode == "--serve" else None
+    agent = rest[0] if rest else None
+
+    backend = get_llm_backend()
+    if backend.requires_api_key and not os.environ.get("ANTHROPIC_API_KEY"):
+        logger.error("ANTHROPIC_API_KEY environment variable not set")
+        print("❌ Error: ANTHROPIC_API_KEY environment variable not set")
+        print("Set it with: export ANTHROPIC_API_KEY='your-key-here'")
+        sys.exit(1)
+    if agent is not None and agent not in list_agents():
+        print(f"❌ Unknown agent: {agent}")
+        sys.exit(1)
+
+    session = AgentSession(agent)
+    if socket_path is None:
+        run_repl(session)
+        sys.exit(0)
+
+    try:
+        server = AgentSocketServer(socket_path, session)
+    except FileOperationError as e:
+        logger.error(str(e))
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    print(f"🔌 Serving agent requests on {socket_path} (Ctrl+C to stop)")
+    logger.info(f"Agent socket server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n✓ Served {session.requests} requests")
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
 def main() -> None:
     """
     Main entry point for the agent tester CLI.
@@ -237,6 +787,9 @@ def main() -> None:
     Command-line Usage:
         python3 test_agent.py <agent-name> <input-text>
         python3 test_agent.py --list
+        python3 test_agent.py --batch <rows.jsonl|rows.csv> [--output FILE] [--workers N]
+        python3 test_agent.py --repl [agent-name]
+        python3 test_agent.py --serve <socket-path> [agent-name]
 
     Exits:
         0: Success
@@ -258,6 +811,9 @@ def main() -> None:
         print("Usage:")
         print("  python3 test_agent.py <agent-name> <input-text>")
         print("  python3 test_agent.py --list")
+        print("  python3 test_agent.py --batch <rows.jsonl|rows.csv> [--output FILE] [--workers N]")
+        print("  python3 test_agent.py --repl [agent-name]")
+        print("  python3 test_agent.py --serve <socket-path> [agent-name]")
         print()
         print("Examples:")
         print('  python3 test_agent.py english-to-french-translator "Hello world"')
@@ -275,6 +831,14 @@ def main() -> None:
         print()
         sys.exit(1)
     
+    # Batch file mode
+    if sys.argv[1] == "--batch":
+        run_batch_cli(sys.argv[1:])
+
+    # Interactive REPL / Unix socket mode
+    if sys.argv[1] in ("--repl", "--serve"):
+        run_interactive_cli(sys.argv[1:])
+
     # List agents
     if sys.argv[1] == "--list":
         logger.info("Listing available agents")
@@ -303,9 +867,9 @@ def main() -> None:
     input_text = " ".join(sys.argv[2:])
     logger.debug(f"Input text: {input_text[:50]}...")
 
-    # Check API key
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
+    # Check API key (not needed by offline backends)
+    backend = get_llm_backend()
+    if backend.requires_api_key and not os.environ.get("ANTHROPIC_API_KEY"):
         logger.error("ANTHROPIC_API_KEY environment variable not set")
         print("❌ Error: ANTHROPIC_API_KEY environment variable not set")
         print("Set it with: export ANTHROPIC_API_KEY='your-key-here'")
@@ -324,8 +888,8 @@ def main() -> None:
         print(f"✓ Skill loaded: {len(skill['content'])} characters")
 
         # Initialize client
-        logger.debug("Initializing Anthropic API client")
-        client = anthropic.Anthropic(api_key=api_key)
+        logger.debug(f"Initializing {backend.name} API client")
+        client = backend.create_client()
 
         # Invoke agent
         output = invoke_agent(client, skill, input_text)
@@ -9,6 +9,8 @@ Uses:
 - TF-IDF vectorization for semantic embeddings (sklearn)
 - Cosine similarity for distance measurement
 - Simple text metrics (character-level similarity, word overlap)
+- A batch engine computing all four metrics for every pair of N texts
+  (``pairwise_drift_metrics``)
 
 Requirements:
 - Python 3.7+
@@ -26,15 +28,18 @@ import os
 import json
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 import difflib
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 
 # Import custom modules
 from logger import get_logger
 from errors import AnalysisError, FileOperationError
+from tracing import get_tracer, traced
+from embedding_service import get_embedding_service, sparse_cosine_similarity
+from similarity import RAPIDFUZZ_AVAILABLE, indel_ratio, indel_ratio_matrix
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -46,47 +51,47 @@ ORIGINAL_CLEAN = "The artificial intelligence system can efficiently process nat
 NOISE_LEVELS = [0, 10, 20, 25, 30, 40, 50]
 
 
-def get_local_embedding(texts: List[str]) -> np.ndarray:
+# TF-IDF parameters used for all embeddings of the analysis
+TFIDF_PARAMS = {
+    "max_features": 1000,
+    "ngram_range": (1, 3),  # Use unigrams, bigrams, and trigrams
+    "lowercase": True,
+    "stop_words": None  # Keep all words for semantic preservation
+}
+
+
+@traced("analysis.embeddings")
+def get_sparse_embedding(texts: List[str]) -> sparse.csr_matrix:
     """
-    Get vector embeddings using TF-IDF (completely local, no API needed).
+    Get TF-IDF embeddings as a sparse CSR matrix.
 
-    This function creates semantic embeddings using Term Frequency-Inverse Document
-    Frequency (TF-IDF) vectorization. The embeddings capture semantic relationships
-    between texts without requiring external API calls.
+    Same embeddings as ``get_local_embedding`` without materializing the
+    mostly-zero dense matrix; use this for large corpora. The matrix is
+    shared with other callers and must not be modified.
 
     Args:
         texts: List of text strings to embed
 
     Returns:
-        numpy.ndarray: Matrix of TF-IDF embeddings (shape: [n_texts, n_features])
+        scipy.sparse.csr_matrix of shape [n_texts, n_features] with
+        L2-normalized rows
 
     Raises:
         AnalysisError: If embedding generation fails
         ValueError: If texts list is empty
-
-    Example:
-        >>> texts = ["Hello world", "Goodbye world"]
-        >>> embeddings = get_local_embedding(texts)
-        >>> print(embeddings.shape)
-        (2, 1000)
     """
-    logger.debug(f"Generating TF-IDF embeddings for {len(texts)} texts")
+    logger.debug(f"Generating sparse TF-IDF embeddings for {len(texts)} texts")
 
     if not texts:
         logger.error("Cannot generate embeddings from empty text list")
         raise ValueError("texts list cannot be empty")
 
     try:
-        # Use TF-IDF to create embeddings
-        vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 3),  # Use unigrams, bigrams, and trigrams
-            lowercase=True,
-            stop_words=None  # Keep all words for semantic preservation
+        # Use TF-IDF to create embeddings (shared, cached per corpus)
+        embeddings = get_embedding_service().embed(texts, **TFIDF_PARAMS)
+        logger.info(
+            f"Generated embeddings with shape {embeddings.shape} ({embeddings.nnz} non-zeros)"
         )
-
-        embeddings = vectorizer.fit_transform(texts).toarray()
-        logger.info(f"Generated embeddings with shape {embeddings.shape}")
         return embeddings
 
     except Exception as e:
@@ -97,7 +102,38 @@ def get_local_embedding(texts: List[str]) -> np.ndarray:
         ) from e
 
 
-def calculate_cosine_distance(vec1: np.ndarray, vec2: np.ndarray) -> float:
+def get_local_embedding(texts: List[str]) -> np.ndarray:
+    """
+    Get vector embeddings using TF-IDF (completely local, no API needed).
+
+    This function creates semantic embeddings using Term Frequency-Inverse Document
+    Frequency (TF-IDF) vectorization. The embeddings capture semantic relationships
+    between texts without requiring external API calls. This is the dense form of
+    ``get_sparse_embedding``; prefer the sparse one beyond a handful of texts.
+
+    Args:
+        texts: List of text strings to embed
+
+    Returns:
+        numpy.ndarray: Matrix of TF-IDF embeddings (shape: [n_texts, n_features])
+
+    Raises:
+        AnalysisError: If embedding generation fails
+        ValueError: If texts list is empty
+
+    Example:
+        >>> texts = ["Hello world", "Goodbye world"]
+        >>> embeddings = get_local_embedding(texts)
+        >>> print(embeddings.shape)
+        (2, 1000)
+    """
+    return get_sparse_embedding(texts).toarray()
+
+
+def calculate_cosine_distance(
+    vec1: Union[np.ndarray, sparse.spmatrix],
+    vec2: Union[np.ndarray, sparse.spmatrix]
+) -> float:
     """
     Calculate cosine distance between two vectors.
 
@@ -105,8 +141,8 @@ def calculate_cosine_distance(vec1: np.ndarray, vec2: np.ndarray) -> float:
     angular distance between two vectors in n-dimensional space.
 
     Args:
-        vec1: First embedding vector (1-D numpy array)
-        vec2: Second embedding vector (1-D numpy array, same length as vec1)
+        vec1: First embedding vector (1-D numpy array or a sparse row)
+        vec2: Second embedding vector (same kind and length as vec1)
 
     Returns:
         float: Cosine distance value
@@ -134,7 +170,7 @@ def calculate_cosine_distance(vec1: np.ndarray, vec2: np.ndarray) -> float:
             )
 
         similarity = cosine_similarity(vec1, vec2)[0][0]
-        distance = 1 - similarity
+        distance = float(1 - similarity)
         logger.debug(f"Calculated cosine distance: {distance:.6f}")
         return distance
 
@@ -179,6 +215,37 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
         return 0.0
 
 
+def calculate_indel_similarity(text1: str, text2: str) -> float:
+    """
+    Calculate character-level similarity as the Indel ratio.
+
+    The ratio is 2 * LCS / (len(text1) + len(text2)), computed with the
+    bit-parallel kernel of ``similarity.indel_ratio``. It uses the formula
+    of ``calculate_text_similarity`` with an optimal alignment, so it is
+    never lower and stays meaningful on long texts, where difflib's
+    autojunk heuristic understates similarity. It is reported as its own
+    metric, ``indel_similarity``.
+
+    Args:
+        text1: First text string to compare
+        text2: Second text string to compare
+
+    Returns:
+        float: Similarity ratio between 0.0 and 1.0
+
+    Example:
+        >>> calculate_indel_similarity("hello", "helo")
+        0.8888888888888888
+    """
+    try:
+        similarity = indel_ratio(text1.lower(), text2.lower())
+        logger.debug(f"Indel similarity: {similarity:.6f}")
+        return similarity
+    except Exception as e:
+        logger.warning(f"Indel similarity calculation failed: {e}")
+        return 0.0
+
+
 def calculate_word_overlap(text1: str, text2: str) -> float:
     """
     Calculate word overlap ratio using Jaccard similarity.
@@ -225,6 +292,181 @@ def calculate_word_overlap(text1: str, text2: str) -> float:
         return 0.0
 
 
+def cosine_distance_matrix(
+    texts: List[str],
+    embeddings: Optional[Union[np.ndarray, sparse.spmatrix]] = None
+) -> np.ndarray:
+    """
+    Calculate the cosine distance between every pair of texts.
+
+    The TF-IDF matrix stays sparse, so all N×N distances come from one
+    normalized sparse matrix product instead of N separate vector
+    comparisons, and dense embeddings are never built.
+
+    Args:
+        texts: Texts to compare
+        embeddings: Precomputed embeddings (dense or sparse, one row per
+                    text). If None, TF-IDF embeddings are fitted on texts
+
+    Returns:
+        numpy.ndarray: N×N matrix of cosine distances (0.0 on the diagonal)
+
+    Raises:
+        AnalysisError: If the distance calculation fails
+    """
+    try:
+        if embeddings is None:
+            embeddings = get_embedding_service().embed(texts, **TFIDF_PARAMS)
+        distances = 1.0 - sparse_cosine_similarity(embeddings)
+        np.clip(distances, 0.0, 2.0, out=distances)
+        np.fill_diagonal(distances, 0.0)
+        return distances
+    except Exception as e:
+        logger.error(f"Failed to calculate cosine distance matrix: {e}", exc_info=True)
+        raise AnalysisError(
+            "Cosine distance matrix calculation failed",
+            details={"error": str(e), "num_texts": len(texts)}
+        ) from e
+
+
+def text_similarity_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Calculate the character-level similarity of every pair of texts.
+
+    Values equal ``calculate_text_similarity(texts[i], texts[j])``. Each
+    text is lowercased once, and the SequenceMatcher index of each column
+    text is built once and reused for the whole column instead of once per
+    pair.
+
+    Args:
+        texts: Texts to compare
+
+    Returns:
+        numpy.ndarray: N×N matrix of similarity ratios between 0.0 and 1.0
+    """
+    lowered = [text.lower() for text in texts]
+    n = len(lowered)
+    similarities = np.eye(n)
+    matcher = difflib.SequenceMatcher(None)
+    for j in range(n):
+        matcher.set_seq2(lowered[j])
+        for i in range(n):
+            if i != j:
+                matcher.set_seq1(lowered[i])
+                similarities[i, j] = matcher.ratio()
+    return similarities
+
+
+def indel_similarity_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Calculate the Indel similarity of every pair of texts.
+
+    Values equal ``calculate_indel_similarity(texts[i], texts[j])``. The
+    matrix is symmetric, so each pair is compared once, and each row text
+    is compared with the rest of its row in one batch
+    (``similarity.indel_ratios``).
+
+    Args:
+        texts: Texts to compare
+
+    Returns:
+        numpy.ndarray: N×N matrix of similarity ratios between 0.0 and 1.0
+    """
+    return indel_ratio_matrix([text.lower() for text in texts])
+
+
+def word_overlap_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Calculate the Jaccard word overlap of every pair of texts.
+
+    Values equal ``calculate_word_overlap(texts[i], texts[j])``. All texts
+    are mapped onto one shared vocabulary index as a sparse binary
+    text×word matrix B; B·Bᵀ holds every intersection size and the unions
+    follow from the set sizes.
+
+    Args:
+        texts: Texts to compare
+
+    Returns:
+        numpy.ndarray: N×N matrix of Jaccard similarities (0.0 where either
+        text has no words)
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, columns = [], []
+    for row, text in enumerate(texts):
+        for word in set(text.lower().split()):
+            rows.append(row)
+            columns.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(texts), max(len(vocabulary), 1))
+    )
+    intersections = (incidence @ incidence.T).toarray()
+    sizes = np.asarray(incidence.sum(axis=1)).ravel()
+    unions = sizes[:, None] + sizes[None, :] - intersections
+
+    overlaps = np.zeros_like(intersections)
+    nonempty = (sizes[:, None] > 0) & (sizes[None, :] > 0)
+    np.divide(intersections, unions, out=overlaps, where=nonempty)
+    return overlaps
+
+
+def metric_versions() -> Dict[str, str]:
+    """
+    Describe how each drift metric is computed, for the results file.
+
+    Returns:
+        Dictionary mapping each metric of ``pairwise_drift_metrics`` to its
+        algorithm
+    """
+    return {
+        "cosine_distance": "tfidf-cosine",
+        "text_similarity": "difflib.SequenceMatcher.ratio",
+        "indel_similarity": "indel-lcs/" + ("rapidfuzz" if RAPIDFUZZ_AVAILABLE else "bit-parallel"),
+        "word_overlap": "jaccard"
+    }
+
+
+@traced("analysis.pairwise")
+def pairwise_drift_metrics(
+    texts: List[str],
+    embeddings: Optional[Union[np.ndarray, sparse.spmatrix]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate all drift metrics for every pair of texts in one pass.
+
+    Args:
+        texts: Texts to compare (e.g., the original followed by the final
+               output of each noise level, or a whole corpus)
+        embeddings: Precomputed embeddings for the cosine distance. If None,
+                    TF-IDF embeddings are fitted on texts
+
+    Returns:
+        Dictionary mapping 'cosine_distance', 'text_similarity',
+        'indel_similarity' and 'word_overlap' to N×N matrices
+
+    Raises:
+        ValueError: If texts is empty
+        AnalysisError: If the cosine distance calculation fails
+
+    Example:
+        >>> metrics = pairwise_drift_metrics([ORIGINAL_CLEAN, final_text])
+        >>> print(metrics["word_overlap"][0, 1])
+    """
+    if not texts:
+        raise ValueError("texts list cannot be empty")
+
+    logger.debug(f"Calculating pairwise drift metrics for {len(texts)} texts")
+    return {
+        "cosine_distance": cosine_distance_matrix(texts, embeddings),
+        "text_similarity": text_similarity_matrix(texts),
+        "indel_similarity": indel_similarity_matrix(texts),
+        "word_overlap": word_overlap_matrix(texts)
+    }
+
+
+@traced("analysis.load_outputs")
 def load_final_outputs() -> Dict[int, str]:
     """
     Load the final English outputs from each noise level experiment.
@@ -292,6 +534,7 @@ def load_final_outputs() -> Dict[int, str]:
     return outputs
 
 
+@traced("analysis")
 def analyze_semantic_drift() -> None:
     """
     Main analysis function to measure semantic drift across noise levels.
@@ -347,16 +590,10 @@ def analyze_semantic_drift() -> None:
         all_texts = [ORIGINAL_CLEAN] + [
             final_outputs[n] for n in sorted(final_outputs.keys())
         ]
-        embeddings = get_local_embedding(all_texts)
-
-        original_embedding = embeddings[0]
-        final_embeddings = {
-            noise: embeddings[i+1]
-            for i, noise in enumerate(sorted(final_outputs.keys()))
-        }
+        embeddings = get_sparse_embedding(all_texts)
 
-        print(f"Embedding dimension: {len(original_embedding)}")
-        logger.info(f"Embedding dimension: {len(original_embedding)}")
+        print(f"Embedding dimension: {embeddings.shape[1]}")
+        logger.info(f"Embedding dimension: {embeddings.shape[1]}")
         print()
 
         # Calculate distances for each noise level
@@ -364,38 +601,41 @@ def analyze_semantic_drift() -> None:
         logger.info("Calculating semantic distances")
         print("-" * 70)
 
-        distances = {}
-        text_similarities = {}
-        word_overlaps = {}
+        with get_tracer().span("analysis.distances"):
+            # Every pair at once; row 0 compares the original to each output
+            pairwise = pairwise_drift_metrics(all_texts, embeddings)
+            distances = {}
+            text_similarities = {}
+            indel_similarities = {}
+            word_overlaps = {}
 
-        for noise in sorted(final_outputs.keys()):
-            final_text = final_outputs[noise]
-            final_embedding = final_embeddings[noise]
+            for i, noise in enumerate(sorted(final_outputs.keys()), start=1):
+                final_text = final_outputs[noise]
 
-            # Calculate cosine distance (TF-IDF based)
-            distance = calculate_cosine_distance(original_embedding, final_embedding)
-            distances[noise] = distance
+                distance = float(pairwise["cosine_distance"][0, i])
+                distances[noise] = distance
 
-            # Calculate text similarity
-            text_sim = calculate_text_similarity(ORIGINAL_CLEAN, final_text)
-            text_similarities[noise] = text_sim
+                text_sim = float(pairwise["text_similarity"][0, i])
+                text_similarities[noise] = text_sim
 
-            # Calculate word overlap
-            word_overlap = calculate_word_overlap(ORIGINAL_CLEAN, final_text)
-            word_overlaps[noise] = word_overlap
+                indel_similarities[noise] = float(pairwise["indel_similarity"][0, i])
 
-            logger.info(
-                f"Noise {noise}%: distance={distance:.6f}, "
-                f"similarity={text_sim:.6f}, overlap={word_overlap:.6f}"
-            )
+                word_overlap = float(pairwise["word_overlap"][0, i])
+                word_overlaps[noise] = word_overlap
 
-            print(f"Noise {noise:2d}%:")
-            print(f"  Cosine Distance:  {distance:.6f}")
-            print(f"  Text Similarity:  {text_sim:.6f}")
-            print(f"  Word Overlap:     {word_overlap:.6f}")
-            print(f"  Original: {ORIGINAL_CLEAN[:55]}...")
-            print(f"  Final:    {final_text[:55]}...")
-            print()
+                logger.info(
+                    f"Noise {noise}%: distance={distance:.6f}, "
+                    f"similarity={text_sim:.6f}, overlap={word_overlap:.6f}"
+                )
+
+                print(f"Noise {noise:2d}%:")
+                print(f"  Cosine Distance:  {distance:.6f}")
+                print(f"  Text Similarity:  {text_sim:.6f}")
+                print(f"  Indel Similarity: {indel_similarities[noise]:.6f}")
+                print(f"  Word Overlap:     {word_overlap:.6f}")
+                print(f"  Original: {ORIGINAL_CLEAN[:55]}...")
+                print(f"  Final:    {final_text[:55]}...")
+                print()
 
         print("-" * 70)
         print()
@@ -416,9 +656,15 @@ def analyze_semantic_drift() -> None:
             "final_outputs": final_outputs,
             "semantic_distances": distances,
             "text_similarities": text_similarities,
+            "indel_similarities": indel_similarities,
             "word_overlaps": word_overlaps,
+            "pairwise": {
+                "labels": ["original"] + [f"noise_{n}" for n in sorted(final_outputs.keys())],
+                **{metric: matrix.tolist() for metric, matrix in pairwise.items()}
+            },
             "embedding_method": "TF-IDF (local, no API)",
             "distance_metric": "cosine_distance",
+            "metric_versions": metric_versions(),
             "api_provider": "NONE - All local computation"
         }
 
@@ -458,6 +704,7 @@ def analyze_semantic_drift() -> None:
         ) from e
 
 
+@traced("analysis.graph")
 def generate_graph(
     distances: Dict[int, float],
     text_similarities: Dict[int, float],
@@ -692,6 +939,12 @@ def main():
         # Run analysis
         analyze_semantic_drift()
         logger.info("Analysis completed successfully")
+
+        tracer = get_tracer()
+        tracer.print_summary()
+        exported = tracer.export()
+        if exported:
+            print(f"Trace saved to: {exported[0]}")
     except Exception as e:
         logger.error(f"Analysis failed: {e}", exc_info=True)
         print(f"\n❌ Fatal error: {e}")
@@ -0,0 +1,361 @@
+"""
+Asynchronous Execution Engine
+
+This module runs the translation chain for many noise levels at the same
+time using ``anthropic.AsyncAnthropic``. Each chain still executes its
+stages strictly in order (stage N+1 consumes the output of stage N), but
+independent chains are interleaved so that a full sweep costs roughly the
+latency of one chain instead of the sum of all of them.
+
+A shared ``asyncio.Semaphore`` bounds the number of in-flight API requests
+(``execution.max_concurrency`` in config.yaml).
+
+Usage:
+    python3 run_with_skills.py --all --parallel
+    python3 run_with_skills.py --all --parallel --concurrency 4
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import anthropic
+
+import pipeline
+from config import get_config
+from errors import (
+    APIError,
+    ConfigurationError,
+    InvalidNoiseLevel,
+    TranslationError
+)
+from logger import get_logger
+from translation_dag import SOURCE
+from tracing import get_tracer
+from budget import get_budget_controller
+from run_manifest import RunManifest, get_run_manifest
+from rate_limiter import ensure_async_resilient
+from llm_backend import get_llm_backend
+from client_factory import get_client_factory
+
+config = get_config()
+logger = get_logger(__name__)
+
+
+async def _request(client, params: dict, stream: bool, **attributes):
+    """Send one request in an api_call span; returns (response, duration, TTFT)."""
+    with get_tracer().span("api_call", stream=stream, **attributes) as span:
+        if stream:
+            response, timing = await client.messages.create_streamed(**params)
+            duration_s, ttft_s = timing.duration_s, timing.ttft_s
+        else:
+            started = time.perf_counter()
+            response = await client.messages.create(**params)
+            duration_s, ttft_s = time.perf_counter() - started, None
+        span.set(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            ttft_s=ttft_s
+        )
+    return response, duration_s, ttft_s
+
+
+async def run_translation_with_skill_async(
+    client: anthropic.AsyncAnthropic,
+    skill_name: str,
+    input_text: str,
+    stage: int,
+    noise_level: int = 0,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    stream: Optional[bool] = None
+) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Run a single translation stage asynchronously.
+
+    Mirrors ``pipeline.run_translation_with_skill`` but awaits the API call,
+    holding ``semaphore`` (if given) only for the duration of the request.
+    The client is wrapped in an AsyncResilientClient so the request shares
+    the process-wide rate limits and transient errors are retried.
+
+    Args:
+        client: Initialized AsyncAnthropic API client
+        skill_name: Name of the skill to use
+        input_text: Text to translate
+        stage: Pipeline stage number
+        noise_level: Noise level percentage for cost tracking
+        semaphore: Optional semaphore bounding concurrent API requests
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
+
+    Returns:
+        Tuple of (translated text, input tokens, output tokens)
+
+    Raises:
+        SkillNotFoundError: If the specified skill doesn't exist
+        APIError: If the Claude API call fails
+        TranslationError: If translation fails for any other reason
+    """
+    logger.info(f"[noise {noise_level}%] Stage {stage}: Starting translation with {skill_name}")
+
+    skill = pipeline.load_skill(skill_name)
+
+    params = pipeline.build_message_params(
+        skill_name, skill['content'], input_text, skill.get('system_prompt')
+    )
+
+    cache_key = pipeline.translation_cache_key(params)
+    cached = pipeline.response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        logger.info(f"[noise {noise_level}%] Stage {stage}: Served from response cache")
+        return cached["output"], None, None
+    client = ensure_async_resilient(client)
+    if stream is None:
+        stream = config.streaming_enabled
+
+    # Refuse the call if it would exceed the API budget; slow down near the cap
+    budget = get_budget_controller()
+    reservation = budget.admit(params)
+    if reservation is not None and reservation.delay:
+        await asyncio.sleep(reservation.delay)
+
+    attributes = {"stage": stage, "noise_level": noise_level, "skill": skill_name}
+    try:
+        if semaphore is None:
+            response, duration_s, ttft_s = await _request(client, params, stream, **attributes)
+        else:
+            async with semaphore:
+                response, duration_s, ttft_s = await _request(
+                    client, params, stream, **attributes
+                )
+
+        output, input_tokens, output_tokens = pipeline.record_translation_response(
+            response, stage, noise_level, duration_s, ttft_s
+        )
+        if cache_key:
+            pipeline.response_cache.put(cache_key, {
+                "output": output,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens
+            })
+        logger.info(
+            f"[noise {noise_level}%] Stage {stage}: Translation successful ({len(output)} chars)"
+        )
+        return output, input_tokens, output_tokens
+
+    except anthropic.APIError as e:
+        logger.error(f"API error in stage {stage} (noise {noise_level}%): {e}", exc_info=True)
+        raise APIError(
+            f"Claude API call failed at stage {stage}",
+            details={"stage": stage, "skill": skill_name, "error": str(e)}
+        ) from e
+    except Exception as e:
+        logger.error(
+            f"Unexpected error in stage {stage} (noise {noise_level}%): {e}",
+            exc_info=True
+        )
+        raise TranslationError(
+            f"Translation failed at stage {stage}",
+            details={"stage": stage, "skill": skill_name, "error": str(e)}
+        ) from e
+    finally:
+        budget.release(reservation)
+
+
+async def run_translation_chain_async(
+    client: anthropic.AsyncAnthropic,
+    noise_level: int,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    manifest: Optional[RunManifest] = None,
+    resume: bool = False,
+    stream: Optional[bool] = None
+) -> str:
+    """
+    Run the translation DAG for one noise level asynchronously.
+
+    Each stage starts as soon as its input is available, so the stages of a
+    chain run in order while independent branches overlap. Every output is
+    saved to ``outputs/noise_N/`` and recorded in the run manifest before
+    being passed on.
+
+    Args:
+        client: Initialized AsyncAnthropic API client
+        noise_level: Noise level percentage (must be a key of NOISY_INPUTS)
+        semaphore: Optional semaphore bounding concurrent API requests
+        manifest: Run manifest shared by all chains (opened from config if None)
+        resume: Reuse stages already completed by a previous run
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
+
+    Returns:
+        Final output of the main chain
+
+    Raises:
+        InvalidNoiseLevel: If noise_level is not in the valid set
+        TranslationError: If any translation stage fails
+    """
+    if noise_level not in pipeline.NOISY_INPUTS:
+        raise InvalidNoiseLevel(
+            f"Invalid noise level {noise_level}",
+            details={
+                "noise_level": noise_level,
+                "valid_levels": list(pipeline.NOISY_INPUTS.keys())
+            }
+        )
+
+    output_dir = config.output_dir / f"noise_{noise_level}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if manifest is None:
+        manifest = get_run_manifest(config.output_dir, pipeline.current_endpoint())
+
+    dag = pipeline.TRANSLATION_DAG
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_node(node) -> str:
+        if node.input == SOURCE:
+            stage_input = pipeline.NOISY_INPUTS[noise_level]
+        else:
+            stage_input = await tasks[node.input]
+
+        with get_tracer().span(
+            "stage", stage=node.stage, noise_level=noise_level, skill=node.skill
+        ) as span:
+            return await run_stage(node, stage_input, span)
+
+    async def run_stage(node, stage_input: str, span) -> str:
+        stage_output = (
+            manifest.load_completed(noise_level, node.stage, stage_input) if resume else None
+        )
+        span.set(resumed=stage_output is not None)
+        if stage_output is not None:
+            logger.info(f"[noise {noise_level}%] Stage {node.stage}: Resumed from saved output")
+        else:
+            (stage_output, _, _), shared = await pipeline.get_stage_memo().run_async(
+                pipeline.stage_memo_key(node.skill, stage_input),
+                lambda: run_translation_with_skill_async(
+                    client,
+                    node.skill,
+                    stage_input,
+                    stage=node.stage,
+                    noise_level=noise_level,
+                    semaphore=semaphore,
+                    stream=stream
+                )
+            )
+            span.set(memoized=shared)
+            if shared:
+                logger.info(f"[noise {noise_level}%] Stage {node.stage}: Reused memoized output")
+                pipeline.cost_tracker.track_saved_call(node.stage, noise_level)
+            output_path = pipeline.save_stage_output(output_dir, node.output, stage_output)
+            manifest.record(noise_level, node.stage, output_path, stage_input, stage_output)
+        return stage_output
+
+    # One task per node; each waits only for its own input, so independent
+    # branches run concurrently
+    with get_tracer().span("chain", noise_level=noise_level, stream=stream, resume=resume):
+        for node in dag.nodes:
+            tasks[node.id] = asyncio.ensure_future(run_node(node))
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+    logger.info(f"Translation chain completed successfully for noise level {noise_level}%")
+    return tasks[dag.main_path()[-1].id].result()
+
+
+async def run_all_levels_async(
+    noise_levels: List[int],
+    max_concurrency: Optional[int] = None,
+    client: Optional[anthropic.AsyncAnthropic] = None,
+    resume: bool = False,
+    stream: Optional[bool] = None
+) -> Dict[int, Union[str, Exception]]:
+    """
+    Run translation chains for several noise levels concurrently.
+
+    Args:
+        noise_levels: Noise levels to run
+        max_concurrency: Maximum in-flight API requests.
+                         If None, uses ``execution.max_concurrency``
+        client: Optional AsyncAnthropic client (created by the configured LLM backend if None)
+        resume: Reuse stages already completed by a previous run
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
+
+    Returns:
+        Dictionary mapping each noise level to its final output, or to the
+        exception that stopped its chain. A failing level never cancels
+        the others.
+
+    Raises:
+        ConfigurationError: If the backend needs an API key and it is not set
+    """
+    if max_concurrency is None:
+        max_concurrency = config.max_concurrency
+    if max_concurrency < 1:
+        raise ConfigurationError(
+            "max_concurrency must be at least 1",
+            details={"max_concurrency": max_concurrency}
+        )
+
+    owns_client = client is None
+    if owns_client:
+        backend = get_llm_backend()
+        if backend.requires_api_key and not config.api_key:
+            raise ConfigurationError("ANTHROPIC_API_KEY environment variable not set")
+        client = backend.create_async_client()
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    manifest = get_run_manifest(config.output_dir, pipeline.current_endpoint())
+    logger.info(
+        f"Running {len(noise_levels)} noise levels concurrently "
+        f"(max_concurrency={max_concurrency})"
+    )
+
+    try:
+        outcomes = await asyncio.gather(
+            *(
+                run_translation_chain_async(client, level, semaphore, manifest, resume, stream)
+                for level in noise_levels
+            ),
+            return_exceptions=True
+        )
+    finally:
+        if owns_client:
+            # Pooled connections belong to this loop; close them before it ends
+            await get_client_factory().aclose_async_client()
+
+    results: Dict[int, Union[str, Exception]] = {}
+    for level, outcome in zip(noise_levels, outcomes):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, Exception):
+            logger.error(f"Error at noise level {level}: {outcome}")
+        results[level] = outcome
+    return results
+
+
+def run_all_levels(
+    noise_levels: Optional[List[int]] = None,
+    max_concurrency: Optional[int] = None,
+    resume: bool = False,
+    stream: Optional[bool] = None
+) -> Dict[int, Union[str, Exception]]:
+    """
+    Synchronous entry point for ``run_all_levels_async``.
+
+    Args:
+        noise_levels: Noise levels to run. If None, uses config.noise_levels
+        max_concurrency: Maximum in-flight API requests
+        resume: Reuse stages already completed by a previous run
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
+
+    Returns:
+        Dictionary mapping noise level to final output or exception
+
+    Example:
+        >>> results = run_all_levels([0, 25, 50], max_concurrency=3)
+        >>> print(results[25])
+    """
+    if noise_levels is None:
+        noise_levels = list(config.noise_levels)
+    return asyncio.run(run_all_levels_async(
+        noise_levels, max_concurrency, resume=resume, stream=stream
+    ))
@@ -0,0 +1,339 @@
+"""
+Batch Execution Module
+
+This module runs a noise sweep through the Anthropic Message Batches API.
+Instead of one request per (noise level, stage), every stage is submitted as
+a single batch covering all noise levels: all stage-1 requests, then all
+stage-2 requests built from the stage-1 outputs, then stage 3. Batches are
+billed at a discount (``batch.price_ratio`` of the standard price) and avoid
+per-request connection overhead, at the cost of interactive latency. Each
+batch is admitted against the API budget as a whole before it is submitted.
+
+Outputs are written to the usual ``outputs/noise_N/agentK_*.txt`` files and
+recorded in the run manifest, so ``--resume`` and the response cache work
+exactly as in the sequential mode. With ``--base-url`` (e.g. the local fake
+batch server) the run is sandboxed like an offline backend, so its results
+never reach the real outputs, cache or cost ledger.
+
+Usage:
+    python3 run_with_skills.py --all --batch
+    python3 run_with_skills.py --all --batch --base-url http://127.0.0.1:8765
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import anthropic
+
+import pipeline
+from budget import get_budget_controller
+from client_factory import get_client_factory
+from config import get_config
+from errors import (
+    APIError,
+    BudgetExceededError,
+    ConfigurationError,
+    InvalidNoiseLevel,
+    TranslationError
+)
+from logger import get_logger
+from run_manifest import get_run_manifest
+
+config = get_config()
+logger = get_logger(__name__)
+
+
+def batch_custom_id(noise_level: int, stage: int) -> str:
+    """
+    Build the custom_id identifying one request inside a batch.
+
+    Args:
+        noise_level: Noise level of the chain
+        stage: Stage number
+
+    Returns:
+        Identifier such as ``noise_25-stage_1``
+    """
+    return f"noise_{noise_level}-stage_{stage}"
+
+
+def parse_custom_id(custom_id: str) -> Tuple[int, int]:
+    """
+    Recover the noise level and stage from a batch custom_id.
+
+    Args:
+        custom_id: Identifier built by ``batch_custom_id``
+
+    Returns:
+        Tuple of (noise level, stage)
+    """
+    noise_part, stage_part = custom_id.split("-")
+    return int(noise_part.split("_")[1]), int(stage_part.split("_")[1])
+
+
+def wait_for_batch(
+    client: anthropic.Anthropic,
+    batch_id: str,
+    poll_interval: Optional[float] = None,
+    max_wait: Optional[float] = None
+):
+    """
+    Poll a message batch until it has finished processing.
+
+    Args:
+        client: Anthropic API client
+        batch_id: ID of the submitted batch
+        poll_interval: Seconds between status checks.
+                       If None, uses ``batch.poll_interval``
+        max_wait: Maximum seconds to wait. If None, uses ``batch.max_wait``
+
+    Returns:
+        The ended MessageBatch
+
+    Raises:
+        APIError: If the batch does not end within ``max_wait`` seconds
+    """
+    if poll_interval is None:
+        poll_interval = float(config.get("batch.poll_interval", 30))
+    if max_wait is None:
+        max_wait = float(config.get("batch.max_wait", 86400))
+
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            logger.info(f"Batch {batch_id} ended: {batch.request_counts}")
+            return batch
+
+        if time.monotonic() >= deadline:
+            raise APIError(
+                f"Batch {batch_id} did not finish within {max_wait:.0f}s",
+                details={"batch_id": batch_id, "status": batch.processing_status}
+            )
+
+        logger.debug(f"Batch {batch_id} is {batch.processing_status}; polling again")
+        time.sleep(poll_interval)
+
+
+def run_stage_batch(
+    client: anthropic.Anthropic,
+    stage: int,
+    skill_name: str,
+    inputs: Dict[int, str],
+    poll_interval: Optional[float] = None,
+    max_wait: Optional[float] = None
+) -> Dict[int, Union[str, Exception]]:
+    """
+    Translate the inputs of several noise levels for one stage in a single batch.
+
+    Requests already in the response cache are answered locally and never
+    submitted. The remaining requests are admitted against the API budget
+    as one batch; succeeded results are tracked by the cost tracker at the
+    batch price and stored in the response cache.
+
+    Args:
+        client: Anthropic API client
+        stage: Stage number
+        skill_name: Skill used by this stage
+        inputs: Stage input text keyed by noise level
+        poll_interval: Seconds between status checks
+        max_wait: Maximum seconds to wait for the batch
+
+    Returns:
+        Dictionary mapping each noise level to its stage output, or to a
+        TranslationError if its request did not succeed (BudgetExceededError
+        for every submitted level if the batch does not fit the budget)
+
+    Raises:
+        SkillNotFoundError: If the skill doesn't exist
+        APIError: If the batch cannot be created, polled or downloaded
+    """
+    skill = pipeline.load_skill(skill_name)
+
+    outputs: Dict[int, Union[str, Exception]] = {}
+    requests = []
+    cache_keys: Dict[int, Optional[str]] = {}
+    for noise_level, input_text in inputs.items():
+        params = pipeline.build_message_params(
+            skill_name, skill['content'], input_text, skill.get('system_prompt')
+        )
+        cache_key = pipeline.translation_cache_key(params)
+        cached = pipeline.response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            logger.info(f"[noise {noise_level}%] Stage {stage}: Served from response cache")
+            outputs[noise_level] = cached["output"]
+            continue
+
+        cache_keys[noise_level] = cache_key
+        requests.append({
+            "custom_id": batch_custom_id(noise_level, stage),
+            "params": params
+        })
+
+    if not requests:
+        return outputs
+
+    # Refuse the whole batch before submitting it if it would exceed the budget
+    price_ratio = float(config.get("batch.price_ratio", 0.5))
+    budget = get_budget_controller()
+    try:
+        reservation = budget.admit_batch(
+            [request["params"] for request in requests], price_ratio
+        )
+    except BudgetExceededError as e:
+        logger.error(f"Stage {stage}: batch of {len(requests)} requests refused: {e}")
+        for request in requests:
+            outputs[parse_custom_id(request["custom_id"])[0]] = e
+        return outputs
+    if reservation is not None and reservation.delay:
+        time.sleep(reservation.delay)
+
+    print(f"  Stage {stage}: Submitting batch of {len(requests)} requests to {skill_name}...")
+    try:
+        try:
+            batch = client.messages.batches.create(requests=requests)
+            logger.info(f"Stage {stage}: Submitted batch {batch.id} ({len(requests)} requests)")
+            wait_for_batch(client, batch.id, poll_interval, max_wait)
+            results = list(client.messages.batches.results(batch.id))
+        except anthropic.APIError as e:
+            logger.error(f"Batch API error in stage {stage}: {e}", exc_info=True)
+            raise APIError(
+                f"Message batch failed at stage {stage}",
+                details={"stage": stage, "skill": skill_name, "error": str(e)}
+            ) from e
+
+        for result in results:
+            noise_level, _ = parse_custom_id(result.custom_id)
+            if result.result.type != "succeeded":
+                error = getattr(result.result, "error", None)
+                logger.error(
+                    f"[noise {noise_level}%] Stage {stage}: batch request {result.result.type}"
+                )
+                outputs[noise_level] = TranslationError(
+                    f"Batch request {result.result.type} at stage {stage}",
+                    details={"stage": stage, "skill": skill_name, "error": str(error)}
+                )
+                continue
+
+            output, input_tokens, output_tokens = pipeline.record_translation_response(
+                result.result.message, stage, noise_level, price_ratio=price_ratio
+            )
+            if cache_keys.get(noise_level):
+                pipeline.response_cache.put(cache_keys[noise_level], {
+                    "output": output,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens
+                })
+            outputs[noise_level] = output
+    finally:
+        budget.release(reservation)
+
+    for noise_level in inputs:
+        if noise_level not in outputs:
+            outputs[noise_level] = TranslationError(
+                f"Batch returned no result at stage {stage}",
+                details={"stage": stage, "skill": skill_name, "noise_level": noise_level}
+            )
+
+    succeeded = sum(1 for output in outputs.values() if isinstance(output, str))
+    print(f"  ✓ Stage {stage} batch complete: {succeeded}/{len(inputs)} succeeded")
+    return outputs
+
+
+def run_batch_sweep(
+    noise_levels: List[int],
+    client: Optional[anthropic.Anthropic] = None,
+    resume: bool = False,
+    poll_interval: Optional[float] = None,
+    max_wait: Optional[float] = None
+) -> Dict[int, Union[str, Exception]]:
+    """
+    Run the translation chain for several noise levels using one batch per stage.
+
+    A noise level whose request fails at some stage drops out of the later
+    batches; the other levels carry on.
+
+    Args:
+        noise_levels: Noise levels to run
+        client: Optional Anthropic client (the pooled client if None)
+        resume: Reuse stages already completed by a previous run
+        poll_interval: Seconds between batch status checks
+        max_wait: Maximum seconds to wait for each batch
+
+    Returns:
+        Dictionary mapping each noise level to its final output, or to the
+        exception that stopped its chain
+
+    Raises:
+        ConfigurationError: If no client is given and the API key is not set
+        InvalidNoiseLevel: If a noise level is not in the valid set
+        APIError: If a batch cannot be created, polled or downloaded
+
+    Example:
+        >>> results = run_batch_sweep([0, 25, 50])
+        >>> print(results[25])
+    """
+    for noise_level in noise_levels:
+        if noise_level not in pipeline.NOISY_INPUTS:
+            raise InvalidNoiseLevel(
+                f"Invalid noise level {noise_level}",
+                details={
+                    "noise_level": noise_level,
+                    "valid_levels": list(pipeline.NOISY_INPUTS.keys())
+                }
+            )
+
+    if client is None:
+        api_key = config.api_key
+        if not api_key:
+            raise ConfigurationError("ANTHROPIC_API_KEY environment variable not set")
+        # Batch calls are not rate-limited by ResilientClient; keep the SDK's retries
+        client = get_client_factory().get_client().with_options(max_retries=2)
+
+    if not pipeline.TRANSLATION_DAG.is_linear():
+        logger.warning("Batch mode runs the main chain only; DAG branches are skipped")
+
+    manifest = get_run_manifest(config.output_dir, pipeline.current_endpoint())
+    results: Dict[int, Union[str, Exception]] = {}
+    stage_inputs: Dict[int, str] = {
+        noise_level: pipeline.NOISY_INPUTS[noise_level] for noise_level in noise_levels
+    }
+
+    for stage, skill_name, filename in pipeline.TRANSLATION_STAGES:
+        stage_outputs: Dict[int, Union[str, Exception]] = {}
+        pending: Dict[int, str] = {}
+        for noise_level, stage_input in stage_inputs.items():
+            saved = (
+                manifest.load_completed(noise_level, stage, stage_input) if resume else None
+            )
+            if saved is not None:
+                logger.info(f"[noise {noise_level}%] Stage {stage}: Resumed from saved output")
+                stage_outputs[noise_level] = saved
+            else:
+                pending[noise_level] = stage_input
+
+        if pending:
+            batch_outputs = run_stage_batch(
+                client, stage, skill_name, pending, poll_interval, max_wait
+            )
+            for noise_level, output in batch_outputs.items():
+                if isinstance(output, str):
+                    output_dir = config.output_dir / f"noise_{noise_level}"
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    output_path = pipeline.save_stage_output(output_dir, filename, output)
+                    manifest.record(noise_level, stage, output_path, pending[noise_level], output)
+                stage_outputs[noise_level] = output
+
+        stage_inputs = {}
+        for noise_level, output in stage_outputs.items():
+            if isinstance(output, Exception):
+                logger.error(f"Error at noise level {noise_level}: {output}")
+                results[noise_level] = output
+            else:
+                stage_inputs[noise_level] = output
+
+    results.update(stage_inputs)
+    logger.info(
+        f"Batch sweep finished: {len(stage_inputs)}/{len(noise_levels)} noise levels completed"
+    )
+    return {noise_level: results[noise_level] for noise_level in noise_levels}
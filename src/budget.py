@@ -0,0 +1,537 @@
+"""
+Budget Module
+
+CostTracker only learns what a call cost after it completed. This module
+estimates requests before they are sent, so sweeps can be projected and
+kept under a spending cap:
+
+- ``TokenEstimator`` estimates the input, prompt-cache and output tokens of
+  a Messages API request locally (no API call) and prices them with
+  ``CostTracker._calculate_cost`` and the ``cost_tracking.pricing`` table
+- ``BudgetController`` enforces ``budget.max_cost_usd`` / ``budget.max_tokens``:
+  every request is admitted against the cap (spent plus in-flight
+  estimates), requests are throttled once usage nears the cap
+  (``budget.warn_ratio``) and refused with BudgetExceededError past it.
+  Sweeps are ordered by priority and trimmed to what the remaining budget
+  can pay for
+
+Token counts are estimated from UTF-8 bytes (``rate_limiter.CHARS_PER_TOKEN``
+bytes per token), which also covers scripts such as Hebrew that tokenize
+more densely than English. Output tokens are projected as
+``budget.output_ratio`` times the user message tokens (a translation is
+about as long as its input), capped at ``max_tokens``.
+
+Usage:
+    >>> from budget import get_budget_controller
+    >>> budget = get_budget_controller()
+    >>> reservation = budget.admit(params)  # raises BudgetExceededError
+    >>> try:
+    ...     response = client.messages.create(**params)
+    ... finally:
+    ...     budget.release(reservation)
+"""
+
+import hashlib
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import get_config
+from cost_tracker import CostTracker, get_cost_tracker
+from errors import BudgetExceededError
+from logger import get_logger
+from rate_limiter import CHARS_PER_TOKEN
+
+logger = get_logger(__name__)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the tokens of a text without calling the API.
+
+    Args:
+        text: Any text
+
+    Returns:
+        Estimated token count (0 for empty text)
+
+    Example:
+        >>> estimate_text_tokens("Hello world")
+        3
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text.encode("utf-8")) / CHARS_PER_TOKEN)
+
+
+def _block_text(block) -> str:
+    """Text of a system or message content block (or plain string)."""
+    if isinstance(block, str):
+        return block
+    return block.get("text", "")
+
+
+def _content_text(content) -> str:
+    """Flatten message content (a string or a list of blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(_block_text(block) for block in content)
+
+
+@dataclass
+class RequestEstimate:
+    """
+    Estimated token usage and cost of one or more requests.
+
+    Attributes:
+        input_tokens: Uncached input tokens
+        output_tokens: Output tokens
+        cache_write_tokens: Input tokens written to the prompt cache
+        cache_read_tokens: Input tokens read from the prompt cache
+        cost: Estimated cost in USD
+        requests: Number of requests covered
+    """
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_write_tokens: int = 0
+    cache_read_tokens: int = 0
+    cost: float = 0.0
+    requests: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """All billed tokens (input, cache and output)."""
+        return (
+            self.input_tokens + self.output_tokens
+            + self.cache_write_tokens + self.cache_read_tokens
+        )
+
+    def __add__(self, other: "RequestEstimate") -> "RequestEstimate":
+        return RequestEstimate(
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cache_write_tokens=self.cache_write_tokens + other.cache_write_tokens,
+            cache_read_tokens=self.cache_read_tokens + other.cache_read_tokens,
+            cost=self.cost + other.cost,
+            requests=self.requests + other.requests
+        )
+
+    def __sub__(self, other: "RequestEstimate") -> "RequestEstimate":
+        return RequestEstimate(
+            input_tokens=self.input_tokens - other.input_tokens,
+            output_tokens=self.output_tokens - other.output_tokens,
+            cache_write_tokens=self.cache_write_tokens - other.cache_write_tokens,
+            cache_read_tokens=self.cache_read_tokens - other.cache_read_tokens,
+            cost=self.cost - other.cost,
+            requests=self.requests - other.requests
+        )
+
+
+class TokenEstimator:
+    """
+    Local token and cost estimator for Messages API requests.
+
+    System blocks carrying a ``cache_control`` breakpoint are counted as a
+    prompt-cache write the first time the estimator sees them and as a
+    cache read afterwards, mirroring what the API bills for a warm cache.
+
+    Attributes:
+        output_ratio: Projected output tokens per user message token
+        tracker: CostTracker whose pricing is used
+    """
+
+    def __init__(self, output_ratio: Optional[float] = None, tracker: Optional[CostTracker] = None):
+        """
+        Initialize the estimator.
+
+        Args:
+            output_ratio: Output/input token ratio. If None, uses ``budget.output_ratio``
+            tracker: CostTracker for pricing. If None, uses the global tracker
+        """
+        if output_ratio is None:
+            output_ratio = float(get_config().get("budget.output_ratio", 1.3))
+        self.output_ratio = output_ratio
+        self.tracker = tracker or get_cost_tracker()
+        self._warm_prefixes = set()
+        self._lock = threading.Lock()
+
+    def estimate(self, params: dict) -> RequestEstimate:
+        """
+        Estimate one request.
+
+        Args:
+            params: Keyword arguments of ``messages.create``
+
+        Returns:
+            RequestEstimate of the request
+        """
+        system = params.get("system") or []
+        if isinstance(system, str):
+            system = [system]
+
+        input_tokens = cache_write = cache_read = 0
+        for block in system:
+            tokens = estimate_text_tokens(_block_text(block))
+            if isinstance(block, dict) and block.get("cache_control"):
+                digest = hashlib.sha256(_block_text(block).encode("utf-8")).digest()
+                with self._lock:
+                    warm = digest in self._warm_prefixes
+                    self._warm_prefixes.add(digest)
+                if warm:
+                    cache_read += tokens
+                else:
+                    cache_write += tokens
+            else:
+                input_tokens += tokens
+
+        message_tokens = sum(
+            estimate_text_tokens(_content_text(message.get("content", "")))
+            for message in params.get("messages", [])
+        )
+        input_tokens += message_tokens
+        output_tokens = math.ceil(message_tokens * self.output_ratio)
+        if params.get("max_tokens"):
+            output_tokens = min(output_tokens, int(params["max_tokens"]))
+
+        cost = self.tracker._calculate_cost(
+            params.get("model") or get_config().model_name,
+            input_tokens, output_tokens, cache_write, cache_read
+        )
+        return RequestEstimate(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_write_tokens=cache_write,
+            cache_read_tokens=cache_read,
+            cost=cost,
+            requests=1
+        )
+
+
+def bisection_order(levels: Sequence[int]) -> List[int]:
+    """
+    Order noise levels so that every prefix covers the range evenly.
+
+    The extremes come first, then the midpoints of the widest gaps, so a
+    sweep cut short by the budget still spans the whole noise range.
+
+    Args:
+        levels: Noise levels in any order
+
+    Returns:
+        Levels in priority order
+
+    Example:
+        >>> bisection_order([0, 10, 20, 25, 30, 40, 50])
+        [0, 50, 25, 10, 30, 20, 40]
+    """
+    ordered = sorted(set(levels))
+    if len(ordered) <= 2:
+        return ordered
+
+    result = [ordered[0], ordered[-1]]
+    spans = [(0, len(ordered) - 1)]
+    while spans:
+        next_spans = []
+        for low, high in spans:
+            if high - low < 2:
+                continue
+            middle = (low + high) // 2
+            result.append(ordered[middle])
+            next_spans.extend([(low, middle), (middle, high)])
+        spans = next_spans
+    return result
+
+
+@dataclass
+class Reservation:
+    """
+    An admitted request.
+
+    Attributes:
+        estimate: Estimate reserved against the budget
+        delay: Seconds the caller should wait before sending (throttling)
+    """
+    estimate: RequestEstimate
+    delay: float = 0.0
+
+
+class BudgetController:
+    """
+    Keeps API usage under a USD and/or token cap.
+
+    Usage is what the cost tracker has recorded plus the estimates of
+    requests in flight. A request is refused when it would take usage past
+    a cap and throttled when usage is beyond ``warn_ratio`` of a cap.
+
+    Attributes:
+        max_cost_usd: Spending cap in USD (None: unlimited)
+        max_tokens: Token cap (None: unlimited)
+        warn_ratio: Fraction of a cap from which requests are throttled
+        throttle_delay: Seconds each request waits once throttled
+        estimator: TokenEstimator used for admissions and projections
+        tracker: CostTracker holding the actual spend
+    """
+
+    def __init__(
+        self,
+        max_cost_usd: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        warn_ratio: Optional[float] = None,
+        throttle_delay: Optional[float] = None,
+        tracker: Optional[CostTracker] = None
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_cost_usd: USD cap. If None, uses ``budget.max_cost_usd``
+            max_tokens: Token cap. If None, uses ``budget.max_tokens``
+            warn_ratio: Throttling threshold. If None, uses ``budget.warn_ratio``
+            throttle_delay: Delay per throttled request. If None, uses
+                            ``budget.throttle_delay``
+            tracker: CostTracker. If None, uses the global tracker
+        """
+        config = get_config()
+        self.max_cost_usd = (
+            max_cost_usd if max_cost_usd is not None else config.get("budget.max_cost_usd")
+        )
+        self.max_tokens = (
+            max_tokens if max_tokens is not None else config.get("budget.max_tokens")
+        )
+        self.warn_ratio = float(
+            warn_ratio if warn_ratio is not None else config.get("budget.warn_ratio", 0.8)
+        )
+        self.throttle_delay = float(
+            throttle_delay if throttle_delay is not None
+            else config.get("budget.throttle_delay", 1.0)
+        )
+        self.tracker = tracker or get_cost_tracker()
+        self.estimator = TokenEstimator(tracker=self.tracker)
+
+        self._reserved = RequestEstimate()
+        self._untracked = RequestEstimate()
+        self._warned = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any cap is configured."""
+        return self.max_cost_usd is not None or self.max_tokens is not None
+
+    def spent(self) -> Tuple[float, int]:
+        """
+        Get the usage recorded so far.
+
+        Without cost tracking, admitted estimates count as spent.
+
+        Returns:
+            Tuple of (USD, tokens)
+        """
+        if not self.tracker.enabled:
+            return self._untracked.cost, self._untracked.total_tokens
+        cache = self.tracker.get_prompt_cache_stats()
+        tokens = (
+            self.tracker.get_total_tokens()["total"]
+            + cache["cache_write_tokens"] + cache["cache_read_tokens"]
+        )
+        return self.tracker.get_total_cost(), tokens
+
+    def remaining(self) -> Tuple[Optional[float], Optional[int]]:
+        """
+        Get the budget left after recorded and in-flight usage.
+
+        Returns:
+            Tuple of (USD, tokens); None for caps that are not set
+        """
+        cost, tokens = self.spent()
+        with self._lock:
+            cost += self._reserved.cost
+            tokens += self._reserved.total_tokens
+        return (
+            None if self.max_cost_usd is None else self.max_cost_usd - cost,
+            None if self.max_tokens is None else self.max_tokens - tokens
+        )
+
+    def _usage_ratio(self, cost: float, tokens: int) -> float:
+        """Highest fraction of a cap used by the given usage."""
+        ratios = []
+        if self.max_cost_usd is not None:
+            ratios.append(cost / self.max_cost_usd if self.max_cost_usd > 0 else math.inf)
+        if self.max_tokens is not None:
+            ratios.append(tokens / self.max_tokens if self.max_tokens > 0 else math.inf)
+        return max(ratios, default=0.0)
+
+    def admit(self, params: dict) -> Optional[Reservation]:
+        """
+        Admit a request against the budget and reserve its estimate.
+
+        Args:
+            params: Keyword arguments of ``messages.create``
+
+        Returns:
+            Reservation to pass to ``release`` once the call finished (its
+            ``delay`` is the throttling wait), or None without caps
+
+        Raises:
+            BudgetExceededError: If the request would exceed a cap
+        """
+        if not self.enabled:
+            return None
+        return self._reserve(self.estimator.estimate(params))
+
+    def admit_batch(
+        self,
+        requests: Sequence[dict],
+        price_ratio: float = 1.0
+    ) -> Optional[Reservation]:
+        """
+        Admit all requests of a message batch at once.
+
+        The batch is refused as a whole if its summed estimate would exceed
+        a cap, before anything is submitted.
+
+        Args:
+            requests: Keyword arguments of ``messages.create``, one per request
+            price_ratio: Fraction of the standard price the batch is billed at
+
+        Returns:
+            Reservation to pass to ``release`` once the batch's results are
+            recorded, or None without caps
+
+        Raises:
+            BudgetExceededError: If the batch would exceed a cap
+        """
+        if not self.enabled:
+            return None
+        estimate = RequestEstimate()
+        for params in requests:
+            estimate = estimate + self.estimator.estimate(params)
+        estimate.cost *= price_ratio
+        return self._reserve(estimate)
+
+    def _reserve(self, estimate: RequestEstimate) -> Reservation:
+        """Reserve an estimate unless it would exceed a cap."""
+        cost, tokens = self.spent()
+        with self._lock:
+            projected_cost = cost + self._reserved.cost + estimate.cost
+            projected_tokens = tokens + self._reserved.total_tokens + estimate.total_tokens
+            ratio = self._usage_ratio(projected_cost, projected_tokens)
+            if ratio > 1.0:
+                raise BudgetExceededError(
+                    "Request would exceed the API budget",
+                    details={
+                        "spent_usd": round(cost, 6),
+                        "max_cost_usd": self.max_cost_usd,
+                        "spent_tokens": tokens,
+                        "max_tokens": self.max_tokens,
+                        "estimated_usd": round(estimate.cost, 6),
+                        "requests": estimate.requests
+                    }
+                )
+            self._reserved = self._reserved + estimate
+            throttled = ratio >= self.warn_ratio
+            warn = throttled and not self._warned
+            self._warned = self._warned or throttled
+
+        if warn:
+            logger.warning(
+                f"API usage at {ratio:.0%} of the budget; throttling requests "
+                f"by {self.throttle_delay:.1f}s"
+            )
+            print(f"⚠ Budget {ratio:.0%} used; throttling remaining requests")
+        return Reservation(estimate, self.throttle_delay if throttled else 0.0)
+
+    def release(self, reservation: Optional[Reservation]) -> None:
+        """
+        Release a reservation once its request finished (or failed).
+
+        Args:
+            reservation: Value returned by ``admit``
+        """
+        if reservation is None:
+            return
+        estimate = reservation.estimate
+        with self._lock:
+            self._reserved = self._reserved - estimate
+            if not self.tracker.enabled:
+                self._untracked = self._untracked + estimate
+
+    def prioritize(self, noise_levels: Sequence[int]) -> List[int]:
+        """
+        Order noise levels by importance.
+
+        Uses ``budget.priority`` (levels listed there first, in that order)
+        and ``bisection_order`` for the rest.
+
+        Args:
+            noise_levels: Levels to order
+
+        Returns:
+            Levels in priority order
+        """
+        configured = get_config().get("budget.priority") or []
+        first = [level for level in configured if level in noise_levels]
+        rest = [level for level in bisection_order(noise_levels) if level not in first]
+        return first + rest
+
+    def plan(self, projections: Dict[int, RequestEstimate]) -> Tuple[List[int], List[int]]:
+        """
+        Choose the noise levels the remaining budget can pay for.
+
+        Levels are taken in priority order while their projected cost and
+        tokens still fit; the others are skipped.
+
+        Args:
+            projections: Projected usage per noise level
+
+        Returns:
+            Tuple of (levels to run in priority order, skipped levels)
+        """
+        ordered = self.prioritize(list(projections))
+        if not self.enabled:
+            return ordered, []
+
+        cost_left, tokens_left = self.remaining()
+        selected, skipped = [], []
+        for level in ordered:
+            estimate = projections[level]
+            fits = (
+                (cost_left is None or estimate.cost <= cost_left)
+                and (tokens_left is None or estimate.total_tokens <= tokens_left)
+            )
+            if fits:
+                selected.append(level)
+                if cost_left is not None:
+                    cost_left -= estimate.cost
+                if tokens_left is not None:
+                    tokens_left -= estimate.total_tokens
+            else:
+                skipped.append(level)
+
+        if skipped:
+            logger.warning(f"Budget too small for noise levels {skipped}; skipping them")
+        return selected, skipped
+
+
+# Global budget controller instance
+_controller: Optional[BudgetController] = None
+
+
+def get_budget_controller() -> BudgetController:
+    """
+    Get global budget controller instance (singleton pattern).
+
+    Returns:
+        Global BudgetController instance
+    """
+    global _controller
+    if _controller is None:
+        _controller = BudgetController()
+    return _controller
+
+
+def reset_budget_controller():
+    """Reset the global budget controller (useful for testing)."""
+    global _controller
+    _controller = None
@@ -0,0 +1,324 @@
+"""
+Client Factory Module
+
+This module owns the process-wide Anthropic clients. Instead of building a
+new ``anthropic.Anthropic`` per noise level (and paying for a new TCP/TLS
+connection each time), every module asks the factory, which hands out one
+long-lived client per process (and one async client per event loop) backed
+by a tuned connection pool:
+
+- keep-alive connections, expiring after ``http_client.keepalive_expiry``
+- at most ``execution.max_concurrency`` connections (plus headroom), so
+  the pool matches the number of requests that can be in flight
+- HTTP/2 when the optional ``h2`` package is installed
+
+An async client is replaced when it is requested from another event loop;
+the replaced client is closed on the loop that owns its connections (or
+right away if that loop is idle). Runs that own their loop close its client
+with ``aclose_async_client`` before the loop ends.
+
+Connection reuse is measured per request through the HTTP transport's
+trace hook: a request that has to open a TCP connection counts as a new
+connection, every other request reused a pooled one.
+
+Usage:
+    >>> from client_factory import get_client_factory
+    >>> client = get_client_factory().get_client()
+    >>> get_client_factory().connection_stats()
+    {'requests': 21, 'new_connections': 1, 'reused_connections': 20, ...}
+"""
+
+import asyncio
+import importlib.util
+import threading
+from typing import Any, Dict, Optional
+
+import anthropic
+
+try:
+    import httpx
+except ImportError:  # newer SDK builds ship their HTTP client as httpx2
+    import httpx2 as httpx
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters of pooled connection usage.
+
+    Attributes:
+        requests: HTTP requests sent
+        new_connections: Requests that opened a new TCP connection
+        tls_handshakes: Requests that performed a TLS handshake
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def on_request(self, request: Any) -> None:
+        """Count a request and attach the trace hook to it."""
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def on_request_async(self, request: Any) -> None:
+        """Async variant of ``on_request`` for async event hooks."""
+        self.on_request(request)
+        request.extensions["trace"] = self._trace_async
+
+    def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def _trace_async(self, event: str, info: dict) -> None:
+        self._trace(event, info)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get the current counters.
+
+        Returns:
+            Dictionary with 'requests', 'new_connections', 'reused_connections',
+            'tls_handshakes' and 'reuse_ratio'
+        """
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0
+            }
+
+
+class ClientFactory:
+    """
+    Builds and caches pooled Anthropic clients.
+
+    Attributes:
+        max_connections: Maximum open connections per client
+        max_keepalive_connections: Idle connections kept in the pool
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Whether HTTP/2 is negotiated
+        stats: Connection reuse counters shared by all clients
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        """
+        Initialize the factory.
+
+        Args:
+            max_connections: Connection pool size. If None, uses
+                             ``http_client.max_connections`` or the
+                             concurrency limit plus ``http_client.headroom``
+            keepalive_expiry: Idle connection lifetime in seconds. If None,
+                              uses ``http_client.keepalive_expiry``
+            http2: Negotiate HTTP/2. If None, enabled when ``h2`` is installed
+                   and ``http_client.http2`` is true
+        """
+        config = get_config()
+        if max_connections is None:
+            max_connections = config.get("http_client.max_connections") or (
+                config.max_concurrency + int(config.get("http_client.headroom", 4))
+            )
+        if keepalive_expiry is None:
+            keepalive_expiry = float(config.get("http_client.keepalive_expiry", 30))
+        if http2 is None:
+            http2 = bool(config.get("http_client.http2", True))
+
+        self.max_connections = int(max_connections)
+        self.max_keepalive_connections = self.max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.stats = ConnectionStats()
+
+        self._client = None
+        self._async_client = None
+        self._async_loop = None
+        self._closing = set()  # Close tasks of replaced async clients
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"Client factory initialized (max_connections={self.max_connections}, "
+            f"keepalive_expiry={self.keepalive_expiry}s, http2={self.http2})"
+        )
+
+    @property
+    def limits(self) -> "httpx.Limits":
+        """Connection pool limits shared by sync and async clients."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        # Retries are handled by rate_limiter.ResilientClient
+        return {"api_key": get_config().api_key, "max_retries": 0}
+
+    def get_client(self) -> anthropic.Anthropic:
+        """
+        Get the process-wide synchronous client.
+
+        Returns:
+            Pooled ``anthropic.Anthropic`` client (SDK retries disabled)
+        """
+        with self._lock:
+            if self._client is None:
+                http_client = anthropic.DefaultHttpxClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    event_hooks={"request": [self.stats.on_request]}
+                )
+                self._client = anthropic.Anthropic(
+                    http_client=http_client, **self._client_kwargs()
+                )
+                logger.debug("Created pooled Anthropic client")
+            return self._client
+
+    def get_async_client(self) -> anthropic.AsyncAnthropic:
+        """
+        Get the async client of the running event loop.
+
+        Async connections belong to the loop that opened them, so one client
+        is kept per loop: calls within a loop share it, and a new loop (for
+        example a new ``asyncio.run``) gets a fresh pool while the previous
+        client is closed (see ``_discard_async_client``).
+
+        Returns:
+            Pooled ``anthropic.AsyncAnthropic`` client (SDK retries disabled)
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        replaced = None
+        with self._lock:
+            if self._async_client is None or loop is None or loop is not self._async_loop:
+                replaced = (self._async_client, self._async_loop)
+                http_client = anthropic.DefaultAsyncHttpxClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    event_hooks={"request": [self.stats.on_request_async]}
+                )
+                self._async_client = anthropic.AsyncAnthropic(
+                    http_client=http_client, **self._client_kwargs()
+                )
+                self._async_loop = loop
+                logger.debug("Created pooled AsyncAnthropic client")
+            client = self._async_client
+
+        if replaced is not None:
+            self._discard_async_client(*replaced)
+        return client
+
+    def _discard_async_client(self, client: Any, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        Close a replaced async client on the loop that owns its connections.
+
+        A client of a loop that is already closed cannot be closed any more;
+        its connections died with the loop, so it is only dropped.
+        """
+        if client is None:
+            return
+        if loop is None or loop.is_closed():
+            logger.debug("Dropped async client of a closed event loop")
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if loop is running:
+            task = loop.create_task(client.close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.close(), loop)
+        else:
+            # An idle loop cannot run inside this thread's running loop; use a helper thread
+            closer = threading.Thread(target=loop.run_until_complete, args=(client.close(),))
+            closer.start()
+            closer.join()
+        logger.debug("Closed replaced AsyncAnthropic client")
+
+    async def aclose_async_client(self) -> None:
+        """
+        Close the async client of the running event loop, if any.
+
+        Call before the loop ends; the next request on any loop gets a new client.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async_client is None or self._async_loop is not loop:
+                return
+            client, self._async_client, self._async_loop = self._async_client, None, None
+        await client.close()
+        logger.debug("Closed pooled AsyncAnthropic client")
+
+    def connection_stats(self) -> Dict[str, float]:
+        """
+        Get connection reuse statistics of all clients built by the factory.
+
+        Returns:
+            Dictionary with request, new/reused connection and TLS handshake
+            counts plus the reuse ratio
+        """
+        return self.stats.snapshot()
+
+    def close(self) -> None:
+        """Close the synchronous client's connections and discard the async client."""
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+            async_loop, self._async_loop = self._async_loop, None
+        self._discard_async_client(async_client, async_loop)
+        if client is not None and hasattr(client, "close"):
+            client.close()
+
+
+# Global factory instance
+_factory: Optional[ClientFactory] = None
+
+
+def get_client_factory() -> ClientFactory:
+    """
+    Get global client factory instance (singleton pattern).
+
+    Returns:
+        Global ClientFactory instance
+    """
+    global _factory
+    if _factory is None:
+        _factory = ClientFactory()
+    return _factory
+
+
+def reset_client_factory():
+    """Reset the global client factory (useful for testing)."""
+    global _factory
+    if _factory is not None:
+        _factory.close()
+    _factory = None
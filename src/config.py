@@ -27,6 +27,8 @@ class Config:
 
     Attributes:
         project_root (Path): Root directory of the project
+        data_root (Path): Root of run state (outputs, results, caches);
+            the project root unless a sandbox is in use
         config_data (Dict): Loaded configuration data
     """
 
@@ -39,6 +41,7 @@ class Config:
                         If None, uses default location (config/config.yaml)
         """
         self.project_root = Path(__file__).parent.parent
+        self.data_root = self.project_root
 
         # Load environment variables from .env file
         env_file = self.project_root / ".env"
@@ -186,6 +189,16 @@ class Config:
         """Get maximum tokens per request"""
         return self.get("model.max_tokens", 2000)
 
+    @property
+    def prompt_caching_enabled(self) -> bool:
+        """Check if skill instructions are sent as a cacheable prompt prefix"""
+        return self.get("model.prompt_caching", True)
+
+    @property
+    def max_concurrency(self) -> int:
+        """Get maximum number of concurrent API requests"""
+        return self.get("execution.max_concurrency", 7)
+
     @property
     def noise_levels(self) -> list:
         """Get list of noise levels to test"""
@@ -205,13 +218,13 @@ class Config:
     def output_dir(self) -> Path:
         """Get output directory path"""
         output_dir = self.get("paths.output_dir", "outputs")
-        return self.project_root / output_dir
+        return self.data_root / output_dir
 
     @property
     def results_dir(self) -> Path:
         """Get results directory path"""
         results_dir = self.get("paths.results_dir", "results")
-        return self.project_root / results_dir
+        return self.data_root / results_dir
 
     @property
     def skills_dir(self) -> Path:
@@ -219,6 +232,11 @@ class Config:
         skills_dir = self.get("paths.skills_dir", "skills")
         return self.project_root / skills_dir
 
+    @property
+    def streaming_enabled(self) -> bool:
+        """Check if stage responses are read from the streaming Messages API"""
+        return self.get("streaming.enabled", False)
+
     @property
     def cost_tracking_enabled(self) -> bool:
         """Check if cost tracking is enabled"""
@@ -229,6 +247,45 @@ class Config:
         """Check if plugins are enabled"""
         return self.get("plugins.enabled", True)
 
+    def resolve_path(self, path: Any) -> Path:
+        """
+        Resolve a configured path to run state (cache, ledger, report, trace).
+
+        Args:
+            path: Absolute path, or path relative to data_root
+
+        Returns:
+            Absolute path
+        """
+        path = Path(path)
+        return path if path.is_absolute() else self.data_root / path
+
+    def use_sandbox(self, name: Optional[str]) -> Path:
+        """
+        Keep the run state of a non-production endpoint apart from real runs.
+
+        Outputs, results, the response cache, the cost ledger and traces of
+        offline backends (or local fake servers) are redirected to
+        ``llm_backend.sandbox_dir/<name>``, so their pseudo-translations and
+        simulated costs never mix with those of the Anthropic API.
+
+        Args:
+            name: Sandbox name (e.g. the backend name), or None to use the
+                  project root again
+
+        Returns:
+            The new data root
+        """
+        if name is None:
+            self.data_root = self.project_root
+        else:
+            self.data_root = (
+                self.project_root
+                / self.get("llm_backend.sandbox_dir", ".cache/offline")
+                / name
+            )
+        return self.data_root
+
     def validate(self) -> tuple[bool, list[str]]:
         """
         Validate configuration.
@@ -0,0 +1,476 @@
+"""
+Corpus Execution Module
+
+This module runs the translation chain over a whole corpus of sentences
+instead of the single configured sentence. Sentences are streamed from a
+text or JSONL file, expanded into one noisy variant per noise level, pushed
+through the translation chain by a fixed pool of async workers, and written
+to a columnar store in fixed-size row groups.
+
+Memory use is bounded by the worker pool, the work queue and one row group,
+regardless of corpus size.
+
+The store has one column per stage of the main chain of the translation
+DAG, named after the stage's output file (``agent1_french.txt`` gives
+``french``).
+
+Input formats:
+    - ``.jsonl``: one object per line with a ``text`` (or ``sentence``)
+      field and an optional non-negative integer ``id``; a record with an
+      invalid id is stored as an error row instead of being translated
+    - anything else: one sentence per line; blank lines and ``#`` comments
+      are skipped and a leading ``LABEL:`` prefix (as in
+      ``data/input_data.txt``) is stripped
+
+Usage:
+    python3 run_with_skills.py --corpus data/sentences.jsonl
+    python3 run_with_skills.py --corpus data/input_data.txt --concurrency 16
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import anthropic
+import numpy as np
+
+import pipeline
+from async_engine import run_translation_with_skill_async
+from config import get_config
+from errors import BudgetExceededError, ConfigurationError, ValidationError
+from llm_backend import get_llm_backend
+from budget import get_budget_controller
+from client_factory import get_client_factory
+from logger import get_logger
+from noise_generator import NoiseGenerator
+
+config = get_config()
+logger = get_logger(__name__)
+
+_LABEL_PREFIX = re.compile(r"^[A-Z][A-Z0-9_]*:\s*")
+_AGENT_PREFIX = re.compile(r"^agent\d+_")
+
+# Columns that do not hold stage outputs
+_FIXED_COLUMNS = ("sentence_id", "noise_level", "original", "noisy", "error")
+
+
+def stage_columns(stages: List[Tuple[int, str, str]]) -> Dict[int, str]:
+    """
+    Name the corpus store column of each stage.
+
+    A column is named after the stage's output file without its extension
+    and ``agentN_`` prefix; clashing names get the stage number appended.
+
+    Args:
+        stages: (stage, skill, output file) tuples of the chain
+
+    Returns:
+        Dictionary mapping stage number to column name
+
+    Example:
+        >>> stage_columns([(1, "english-to-french-translator", "agent1_french.txt")])
+        {1: 'french'}
+    """
+    columns: Dict[int, str] = {}
+    for stage, _, output in stages:
+        column = _AGENT_PREFIX.sub("", Path(output).stem)
+        if column in columns.values() or column in _FIXED_COLUMNS:
+            column = f"{column}_{stage}"
+        columns[stage] = column
+    return columns
+
+# Columns of the corpus store, in order: one per stage of the main chain
+STAGE_COLUMNS = stage_columns(pipeline.TRANSLATION_STAGES)
+CORPUS_COLUMNS = [*_FIXED_COLUMNS[:4], *STAGE_COLUMNS.values(), "error"]
+
+
+@dataclass
+class CorpusSentence:
+    """
+    A sentence read from a corpus file.
+
+    Attributes:
+        sentence_id: Position of the sentence in the corpus (or its JSONL id)
+        text: Clean sentence text
+        error: Why the record cannot be translated (empty if it can)
+    """
+    sentence_id: int
+    text: str
+    error: str = ""
+
+
+def _parse_sentence_id(value) -> Optional[int]:
+    """Non-negative integer id of a JSONL record, or None if it is not one."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def iter_corpus(path: Path) -> Iterator[CorpusSentence]:
+    """
+    Stream the sentences of a corpus file.
+
+    Args:
+        path: Text or JSONL corpus file
+
+    Yields:
+        CorpusSentence objects, one at a time; a JSONL record with an
+        invalid ``id`` keeps its position as id and carries an error
+
+    Raises:
+        ValidationError: If a JSONL line is not valid JSON or has no text
+    """
+    path = Path(path)
+    is_jsonl = path.suffix.lower() == ".jsonl"
+    index = 0
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if is_jsonl:
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValidationError(
+                        f"Invalid JSON in corpus line {line_number}",
+                        details={"path": str(path), "error": str(e)}
+                    ) from e
+                text = record.get("text") or record.get("sentence")
+                if not text:
+                    raise ValidationError(
+                        f"Corpus line {line_number} has no 'text' field",
+                        details={"path": str(path)}
+                    )
+                sentence_id = _parse_sentence_id(record.get("id", index))
+                if sentence_id is None:
+                    logger.warning(f"Corpus line {line_number} has an invalid id: {record['id']!r}")
+                    yield CorpusSentence(
+                        index, text, error=f"Invalid sentence id {record['id']!r} on line {line_number}"
+                    )
+                    index += 1
+                    continue
+            else:
+                text = _LABEL_PREFIX.sub("", line)
+                sentence_id = index
+
+            yield CorpusSentence(sentence_id, text)
+            index += 1
+
+
+def make_noisy_variant(text: str, noise_level: int, seed: int, sentence_id: int) -> str:
+    """
+    Create the noisy variant of a sentence for one noise level.
+
+    Variants are reproducible: the same (seed, sentence, noise level) always
+    yields the same text, independently of processing order.
+
+    Args:
+        text: Clean sentence
+        noise_level: Percentage of words to perturb (0 returns the text unchanged)
+        seed: Corpus-wide random seed
+        sentence_id: Non-negative identifier of the sentence
+
+    Returns:
+        Noisy sentence
+    """
+    if noise_level <= 0:
+        return text
+    generator = NoiseGenerator(seed=[seed, sentence_id, noise_level])
+    return generator.variants(text, noise_level / 100, 1)[0]
+
+
+class CorpusStore:
+    """
+    Append-only columnar store for corpus results.
+
+    Rows are buffered and written as compressed ``.npz`` parts of at most
+    ``row_group_size`` rows, one array per column. ``_metadata.json`` lists
+    the parts and their row counts.
+
+    Attributes:
+        directory: Directory holding the parts
+        row_group_size: Maximum rows per part
+        rows_written: Number of rows flushed so far
+    """
+
+    def __init__(self, directory: Path, row_group_size: int = 1000):
+        """
+        Create (or truncate) a store.
+
+        Args:
+            directory: Directory for the parts
+            row_group_size: Rows buffered before a part is written
+        """
+        self.directory = Path(directory)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: Dict[str, list] = {column: [] for column in CORPUS_COLUMNS}
+        self._parts: List[dict] = []
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for old_part in self.directory.glob("part-*.npz"):
+            old_part.unlink()
+
+    def append(self, row: dict) -> None:
+        """
+        Add one row, flushing a part when the buffer is full.
+
+        Args:
+            row: Mapping of column name to value (missing columns are empty)
+        """
+        for column in CORPUS_COLUMNS:
+            self._buffer[column].append(row.get(column, ""))
+        if len(self._buffer["sentence_id"]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows as a new part."""
+        count = len(self._buffer["sentence_id"])
+        if count == 0:
+            return
+
+        name = f"part-{len(self._parts):05d}.npz"
+        arrays = {
+            "sentence_id": np.asarray(self._buffer["sentence_id"], dtype=np.int64),
+            "noise_level": np.asarray(self._buffer["noise_level"], dtype=np.int16)
+        }
+        for column in CORPUS_COLUMNS[2:]:
+            arrays[column] = np.asarray(self._buffer[column], dtype=np.str_)
+        np.savez_compressed(self.directory / name, **arrays)
+
+        self._parts.append({"file": name, "rows": count})
+        self.rows_written += count
+        self._buffer = {column: [] for column in CORPUS_COLUMNS}
+        self._write_metadata()
+
+    def close(self) -> None:
+        """Flush remaining rows."""
+        self.flush()
+        self._write_metadata()
+
+    def _write_metadata(self) -> None:
+        metadata = {
+            "columns": CORPUS_COLUMNS,
+            "rows": self.rows_written,
+            "parts": self._parts
+        }
+        with open(self.directory / "_metadata.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+
+def read_corpus_store(directory: Path, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Load columns of a corpus store.
+
+    Args:
+        directory: Store directory
+        columns: Columns to load. If None, loads all columns
+
+    Returns:
+        Dictionary mapping column name to a concatenated array
+    """
+    directory = Path(directory)
+    with open(directory / "_metadata.json", 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    columns = columns or metadata["columns"]
+    chunks: Dict[str, list] = {column: [] for column in columns}
+    for part in metadata["parts"]:
+        with np.load(directory / part["file"]) as data:
+            for column in columns:
+                chunks[column].append(data[column])
+
+    return {
+        column: np.concatenate(parts) if parts else np.array([])
+        for column, parts in chunks.items()
+    }
+
+
+async def _translate_unit(
+    client: anthropic.AsyncAnthropic,
+    sentence: CorpusSentence,
+    noise_level: int,
+    seed: int
+) -> dict:
+    """Run the translation chain for one (sentence, noise level) unit."""
+    row = {
+        "sentence_id": sentence.sentence_id,
+        "noise_level": noise_level,
+        "original": sentence.text
+    }
+    if sentence.error:
+        row["error"] = sentence.error
+        return row
+
+    noisy = make_noisy_variant(sentence.text, noise_level, seed, sentence.sentence_id)
+    row["noisy"] = noisy
+
+    stage_input = noisy
+    try:
+        for stage, skill_name, _ in pipeline.TRANSLATION_STAGES:
+            stage_input, _, _ = await run_translation_with_skill_async(
+                client, skill_name, stage_input, stage=stage, noise_level=noise_level
+            )
+            row[STAGE_COLUMNS[stage]] = stage_input
+    except BudgetExceededError:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Corpus sentence {sentence.sentence_id} at noise {noise_level}% failed: {e}"
+        )
+        row["error"] = str(e)
+    return row
+
+
+async def run_corpus_async(
+    corpus_path: Path,
+    output_dir: Path,
+    noise_levels: Optional[List[int]] = None,
+    max_concurrency: Optional[int] = None,
+    client: Optional[anthropic.AsyncAnthropic] = None,
+    seed: Optional[int] = None,
+    row_group_size: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Translate every sentence of a corpus at every noise level.
+
+    A producer streams (sentence, noise level) units into a bounded queue
+    consumed by ``max_concurrency`` workers; finished rows go straight to
+    the columnar store. With a budget cap, noise levels are run in priority
+    order and the run stops scheduling units once the budget is exhausted
+    (the remaining units are counted as skipped).
+
+    Args:
+        corpus_path: Text or JSONL corpus file
+        output_dir: Directory of the columnar store
+        noise_levels: Noise levels per sentence. If None, uses config.noise_levels
+        max_concurrency: Number of workers. If None, uses execution.max_concurrency
+        client: Optional AsyncAnthropic client (created by the configured LLM backend if None)
+        seed: Seed for noise generation. If None, uses ``corpus.seed``
+        row_group_size: Rows per part. If None, uses ``corpus.row_group_size``
+
+    Returns:
+        Dictionary with 'sentences', 'rows', 'errors' and 'skipped' counts
+
+    Raises:
+        ConfigurationError: If the backend needs an API key and it is not set,
+                            or if max_concurrency is less than 1
+    """
+    if noise_levels is None:
+        noise_levels = list(config.noise_levels)
+    if max_concurrency is None:
+        max_concurrency = config.max_concurrency
+    if max_concurrency < 1:
+        raise ConfigurationError(
+            "max_concurrency must be at least 1",
+            details={"max_concurrency": max_concurrency}
+        )
+    if seed is None:
+        seed = int(config.get("corpus.seed", 42))
+    if row_group_size is None:
+        row_group_size = int(config.get("corpus.row_group_size", 1000))
+
+    owns_client = client is None
+    if owns_client:
+        backend = get_llm_backend()
+        if backend.requires_api_key and not config.api_key:
+            raise ConfigurationError("ANTHROPIC_API_KEY environment variable not set")
+        client = backend.create_async_client()
+
+    if not pipeline.TRANSLATION_DAG.is_linear():
+        logger.warning("Corpus mode runs the main chain only; DAG branches are skipped")
+
+    budget = get_budget_controller()
+    if budget.enabled:
+        noise_levels = budget.prioritize(noise_levels)
+
+    store = CorpusStore(output_dir, row_group_size)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+    counts = {"sentences": 0, "rows": 0, "errors": 0, "skipped": 0}
+    exhausted = asyncio.Event()
+
+    async def produce():
+        for sentence in iter_corpus(corpus_path):
+            if exhausted.is_set():
+                break
+            counts["sentences"] += 1
+            for noise_level in noise_levels:
+                await queue.put((sentence, noise_level))
+        for _ in range(max_concurrency):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            unit = await queue.get()
+            if unit is None:
+                return
+            if exhausted.is_set():
+                counts["skipped"] += 1
+                continue
+            try:
+                row = await _translate_unit(client, unit[0], unit[1], seed)
+            except BudgetExceededError as e:
+                if not exhausted.is_set():
+                    logger.error(f"Budget exhausted; no further corpus units are scheduled: {e}")
+                    exhausted.set()
+                counts["skipped"] += 1
+                continue
+            store.append(row)
+            counts["rows"] += 1
+            if row.get("error"):
+                counts["errors"] += 1
+            if counts["rows"] % row_group_size == 0:
+                logger.info(f"Corpus progress: {counts['rows']} rows written")
+
+    logger.info(
+        f"Running corpus {corpus_path} at noise levels {noise_levels} "
+        f"with {max_concurrency} workers"
+    )
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(max_concurrency)))
+    finally:
+        store.close()
+        if owns_client:
+            await get_client_factory().aclose_async_client()
+
+    logger.info(f"Corpus run finished: {counts}")
+    return counts
+
+
+def run_corpus(
+    corpus_path: Path,
+    output_dir: Optional[Path] = None,
+    noise_levels: Optional[List[int]] = None,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Synchronous entry point for ``run_corpus_async``.
+
+    Args:
+        corpus_path: Text or JSONL corpus file
+        output_dir: Store directory. If None, uses ``outputs/corpus``
+        noise_levels: Noise levels per sentence. If None, uses config.noise_levels
+        max_concurrency: Number of workers
+
+    Returns:
+        Dictionary with 'sentences', 'rows' and 'errors' counts
+
+    Example:
+        >>> counts = run_corpus(Path("data/sentences.jsonl"), max_concurrency=16)
+        >>> columns = read_corpus_store(config.output_dir / "corpus", ["noise_level", "english"])
+    """
+    if output_dir is None:
+        output_dir = config.output_dir / config.get("corpus.output_subdir", "corpus")
+    return asyncio.run(
+        run_corpus_async(corpus_path, output_dir, noise_levels, max_concurrency)
+    )
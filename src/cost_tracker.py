@@ -3,11 +3,21 @@ Cost Tracking Module
 
 This module tracks API token usage and calculates costs for Claude API calls.
 Provides detailed cost analysis and reporting for experiment runs.
+
+Totals and per-stage / per-noise-level breakdowns are maintained
+incrementally as calls are tracked, so summaries cost the same after ten
+calls as after a million. Every call is also appended to a JSONL ledger
+(``cost_tracking.ledger_file``) as it happens: a crash loses nothing, only
+the most recent calls are kept in memory, and reports stream the call
+breakdown back from the ledger.
 """
 
 import json
+import threading
+import uuid
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Iterator, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
@@ -17,7 +27,7 @@ from logger import get_logger
 logger = get_logger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class APICall:
     """
     Represents a single API call with token usage and cost information.
@@ -27,9 +37,13 @@ class APICall:
         model: Model name used
         stage: Pipeline stage (1, 2, or 3)
         noise_level: Noise level being tested
-        input_tokens: Number of input tokens
+        input_tokens: Number of input tokens (excluding prompt-cache tokens)
         output_tokens: Number of output tokens
         cost: Total cost in USD
+        cache_write_tokens: Input tokens written to the prompt cache
+        cache_read_tokens: Input tokens read from the prompt cache
+        duration_s: Request latency in seconds (None if not measured)
+        ttft_s: Time to first token in seconds (streamed calls only)
     """
     timestamp: str
     model: str
@@ -38,21 +52,45 @@ class APICall:
     input_tokens: int
     output_tokens: int
     cost: float
+    cache_write_tokens: int = 0
+    cache_read_tokens: int = 0
+    duration_s: Optional[float] = None
+    ttft_s: Optional[float] = None
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
         return asdict(self)
 
 
+@dataclass
+class _StageLatency:
+    """Running latency sums of the timed calls of one stage."""
+    calls: int = 0
+    duration_s: float = 0.0
+    generation_s: float = 0.0
+    output_tokens: int = 0
+    streamed: int = 0
+    ttft_s: float = 0.0
+
+
 class CostTracker:
     """
     Tracks and analyzes costs for API calls.
 
     Maintains a running total of token usage and costs,
-    provides detailed breakdowns, and generates reports.
+    provides detailed breakdowns, and generates reports. Calls may be
+    tracked from several threads at once.
+
+    Each tracker writes its calls to the ledger under its own run id, so
+    several runs (or processes) can share one ledger file.
 
     Attributes:
-        calls: List of API calls made
+        calls: API calls made; with a ledger only the most recent
+               ``cost_tracking.max_calls_in_memory``. Assigning a new list
+               resets the tracker to those calls (without writing them to
+               the ledger again)
+        run_id: Id of this tracker's calls in the ledger
+        saved_calls: Calls avoided by the stage memo, counted by stage
         config: Configuration instance
         enabled: Whether cost tracking is enabled
     """
@@ -61,17 +99,120 @@ class CostTracker:
         """Initialize the cost tracker."""
         self.config = get_config()
         self.enabled = self.config.cost_tracking_enabled
-        self.calls: List[APICall] = []
+        self._lock = threading.RLock()
+        self._ledger = None
+        self._ledger_path: Optional[Path] = None
+        self._ledger_offset = 0
+        self._max_calls_in_memory = int(
+            self.config.get("cost_tracking.max_calls_in_memory", 1000)
+        )
+        self.calls = []
+        self.saved_calls: Dict[int, int] = {}
 
         logger.info(f"Cost tracking initialized (enabled={self.enabled})")
 
+    @property
+    def calls(self) -> Deque[APICall]:
+        """API calls tracked so far."""
+        return self._calls
+
+    @calls.setter
+    def calls(self, calls: List[APICall]) -> None:
+        with self._lock:
+            # The replaced calls stay in the ledger under the previous run id.
+            # The assigned calls are already in the ledger (or were never
+            # made by this process), so they are reported from memory
+            # instead of being appended again
+            self.run_id = uuid.uuid4().hex[:12]
+            if self._ledger is not None:
+                self._ledger_offset = self._ledger.tell()
+            self._assigned_calls = list(calls)
+            self._calls = deque(calls, maxlen=self._memory_limit())
+            self._total_calls = 0
+            self._total_cost = 0.0
+            self._input_tokens = 0
+            self._output_tokens = 0
+            self._cache_write_tokens = 0
+            self._cache_read_tokens = 0
+            self._cost_by_stage: Dict[int, float] = {}
+            self._cost_by_noise_level: Dict[int, float] = {}
+            self._latency_by_stage: Dict[int, _StageLatency] = {}
+            for call in calls:
+                self._accumulate(call)
+
+    @property
+    def max_calls_in_memory(self) -> int:
+        """Most recent calls kept in memory when calls go to a ledger."""
+        return self._max_calls_in_memory
+
+    @max_calls_in_memory.setter
+    def max_calls_in_memory(self, value: int) -> None:
+        with self._lock:
+            self._max_calls_in_memory = int(value)
+            self._calls = deque(self._calls, maxlen=self._memory_limit())
+
+    def _memory_limit(self) -> Optional[int]:
+        """Bound of the in-memory calls (None keeps every call: no ledger)."""
+        if not self.config.get("cost_tracking.ledger_file"):
+            return None
+        return self._max_calls_in_memory
+
+    def _open_ledger(self):
+        """Open the ledger for appending on first use (None if disabled)."""
+        if self._ledger is None:
+            ledger_file = self.config.get("cost_tracking.ledger_file")
+            if not ledger_file:
+                return None
+            path = self.config.resolve_path(ledger_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._ledger = open(path, "a", encoding="utf-8")
+            self._ledger_path = path
+            self._ledger_offset = self._ledger.tell()
+        return self._ledger
+
+    def _append_to_ledger(self, call: APICall) -> bool:
+        """Write one call to the ledger (caller holds the lock); False without a ledger."""
+        ledger = self._open_ledger()
+        if ledger is None:
+            return False
+        ledger.write(json.dumps({"run_id": self.run_id, **call.to_dict()}) + "\n")
+        ledger.flush()
+        return True
+
+    def _accumulate(self, call: APICall) -> None:
+        """Add a call to the running totals (caller holds the lock)."""
+        self._total_calls += 1
+        self._total_cost += call.cost
+        self._input_tokens += call.input_tokens
+        self._output_tokens += call.output_tokens
+        self._cache_write_tokens += call.cache_write_tokens
+        self._cache_read_tokens += call.cache_read_tokens
+        self._cost_by_stage[call.stage] = self._cost_by_stage.get(call.stage, 0.0) + call.cost
+        self._cost_by_noise_level[call.noise_level] = (
+            self._cost_by_noise_level.get(call.noise_level, 0.0) + call.cost
+        )
+        if call.duration_s is not None:
+            latency = self._latency_by_stage.setdefault(call.stage, _StageLatency())
+            latency.calls += 1
+            latency.duration_s += call.duration_s
+            latency.generation_s += call.duration_s - (call.ttft_s or 0.0)
+            latency.output_tokens += call.output_tokens
+            if call.ttft_s is not None:
+                latency.streamed += 1
+                latency.ttft_s += call.ttft_s
+
     def track_call(
         self,
         model: str,
         stage: int,
         noise_level: int,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        cache_write_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        duration_s: Optional[float] = None,
+        ttft_s: Optional[float] = None,
+        price_ratio: float = 1.0
     ) -> float:
         """
         Track an API call and calculate its cost.
@@ -80,8 +221,14 @@ class CostTracker:
             model: Model name (e.g., "claude-sonnet-4-20250514")
             stage: Pipeline stage number (1, 2, or 3)
             noise_level: Noise level percentage
-            input_tokens: Number of input tokens used
+            input_tokens: Number of uncached input tokens used
             output_tokens: Number of output tokens generated
+            cache_write_tokens: Input tokens written to the prompt cache
+            cache_read_tokens: Input tokens read from the prompt cache
+            duration_s: Request latency in seconds
+            ttft_s: Time to first token in seconds (streamed calls)
+            price_ratio: Fraction of the standard price billed (e.g. 0.5
+                         for Message Batches requests)
 
         Returns:
             Cost of the call in USD
@@ -95,7 +242,9 @@ class CostTracker:
             return 0.0
 
         # Calculate cost
-        cost = self._calculate_cost(model, input_tokens, output_tokens)
+        cost = self._calculate_cost(
+            model, input_tokens, output_tokens, cache_write_tokens, cache_read_tokens
+        ) * price_ratio
 
         # Record the call
         call = APICall(
@@ -105,9 +254,17 @@ class CostTracker:
             noise_level=noise_level,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
-            cost=cost
+            cost=cost,
+            cache_write_tokens=cache_write_tokens,
+            cache_read_tokens=cache_read_tokens,
+            duration_s=duration_s,
+            ttft_s=ttft_s
         )
-        self.calls.append(call)
+        with self._lock:
+            self._accumulate(call)
+            self._append_to_ledger(call)
+            # Calls on disk need not stay in memory: the deque drops the oldest
+            self._calls.append(call)
 
         logger.debug(
             f"API call tracked: stage={stage}, noise={noise_level}, "
@@ -116,19 +273,41 @@ class CostTracker:
 
         return cost
 
+    def track_saved_call(self, stage: int, noise_level: int) -> None:
+        """
+        Record a call that was avoided by reusing an identical stage request.
+
+        Args:
+            stage: Pipeline stage number
+            noise_level: Noise level percentage
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.saved_calls[stage] = self.saved_calls.get(stage, 0) + 1
+        logger.debug(f"API call saved: stage={stage}, noise={noise_level}")
+
     def _calculate_cost(
         self,
         model: str,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        cache_write_tokens: int = 0,
+        cache_read_tokens: int = 0
     ) -> float:
         """
         Calculate cost for a single API call.
 
+        Prompt-cache writes and reads are billed at their own rates. When a
+        model has no explicit cache prices configured, the standard ratios
+        (1.25x input for writes, 0.1x input for reads) are used.
+
         Args:
             model: Model name
-            input_tokens: Number of input tokens
+            input_tokens: Number of uncached input tokens
             output_tokens: Number of output tokens
+            cache_write_tokens: Input tokens written to the prompt cache
+            cache_read_tokens: Input tokens read from the prompt cache
 
         Returns:
             Cost in USD
@@ -139,12 +318,18 @@ class CostTracker:
 
         input_price_per_m = pricing.get("input", 3.00)  # Default to sonnet pricing
         output_price_per_m = pricing.get("output", 15.00)
+        cache_write_price_per_m = pricing.get("cache_write", input_price_per_m * 1.25)
+        cache_read_price_per_m = pricing.get("cache_read", input_price_per_m * 0.1)
 
         # Calculate cost (tokens / 1,000,000 * price_per_million)
         input_cost = (input_tokens / 1_000_000) * input_price_per_m
         output_cost = (output_tokens / 1_000_000) * output_price_per_m
+        cache_cost = (
+            (cache_write_tokens / 1_000_000) * cache_write_price_per_m
+            + (cache_read_tokens / 1_000_000) * cache_read_price_per_m
+        )
 
-        return input_cost + output_cost
+        return input_cost + output_cost + cache_cost
 
     def _get_model_key(self, model: str) -> str:
         """
@@ -171,7 +356,7 @@ class CostTracker:
         Returns:
             Total cost in USD
         """
-        return sum(call.cost for call in self.calls)
+        return self._total_cost
 
     def get_total_tokens(self) -> Dict[str, int]:
         """
@@ -180,8 +365,8 @@ class CostTracker:
         Returns:
             Dictionary with 'input', 'output', and 'total' token counts
         """
-        input_tokens = sum(call.input_tokens for call in self.calls)
-        output_tokens = sum(call.output_tokens for call in self.calls)
+        with self._lock:
+            input_tokens, output_tokens = self._input_tokens, self._output_tokens
 
         return {
             "input": input_tokens,
@@ -189,6 +374,55 @@ class CostTracker:
             "total": input_tokens + output_tokens
         }
 
+    def get_prompt_cache_stats(self) -> Dict[str, float]:
+        """
+        Get prompt-cache usage across all calls.
+
+        The hit ratio is the share of all prompt tokens (uncached, written
+        and read) that were served from the prompt cache.
+
+        Returns:
+            Dictionary with 'cache_write_tokens', 'cache_read_tokens' and
+            'hit_ratio'
+        """
+        with self._lock:
+            cache_write, cache_read = self._cache_write_tokens, self._cache_read_tokens
+            prompt_tokens = self._input_tokens + cache_write + cache_read
+
+        return {
+            "cache_write_tokens": cache_write,
+            "cache_read_tokens": cache_read,
+            "hit_ratio": cache_read / prompt_tokens if prompt_tokens else 0.0
+        }
+
+    def get_latency_by_stage(self) -> Dict[int, Dict[str, float]]:
+        """
+        Get the latency breakdown of timed calls by pipeline stage.
+
+        Tokens per second are measured over the generation phase (after the
+        first token) for streamed calls and over the whole request otherwise.
+
+        Returns:
+            Dictionary mapping stage number to 'calls', 'mean_duration_s',
+            'mean_ttft_s' (None without streamed calls) and 'tokens_per_second'
+        """
+        breakdown: Dict[int, Dict[str, float]] = {}
+        with self._lock:
+            for stage in sorted(self._latency_by_stage):
+                latency = self._latency_by_stage[stage]
+                breakdown[stage] = {
+                    "calls": latency.calls,
+                    "mean_duration_s": latency.duration_s / latency.calls,
+                    "mean_ttft_s": (
+                        latency.ttft_s / latency.streamed if latency.streamed else None
+                    ),
+                    "tokens_per_second": (
+                        latency.output_tokens / latency.generation_s
+                        if latency.generation_s > 0 else 0.0
+                    )
+                }
+        return breakdown
+
     def get_cost_by_stage(self) -> Dict[int, float]:
         """
         Get cost breakdown by pipeline stage.
@@ -197,8 +431,8 @@ class CostTracker:
             Dictionary mapping stage number to cost
         """
         costs = {1: 0.0, 2: 0.0, 3: 0.0}
-        for call in self.calls:
-            costs[call.stage] += call.cost
+        with self._lock:
+            costs.update(self._cost_by_stage)
         return costs
 
     def get_cost_by_noise_level(self) -> Dict[int, float]:
@@ -208,12 +442,8 @@ class CostTracker:
         Returns:
             Dictionary mapping noise level to cost
         """
-        costs: Dict[int, float] = {}
-        for call in self.calls:
-            if call.noise_level not in costs:
-                costs[call.noise_level] = 0.0
-            costs[call.noise_level] += call.cost
-        return costs
+        with self._lock:
+            return dict(self._cost_by_noise_level)
 
     def get_summary(self) -> Dict:
         """
@@ -228,25 +458,73 @@ class CostTracker:
             >>> summary = tracker.get_summary()
             >>> print(f"Total: ${summary['total_cost']:.2f}")
         """
-        tokens = self.get_total_tokens()
+        # One consistent snapshot even while other threads track calls
+        with self._lock:
+            total_cost = self.get_total_cost()
+            total_calls = self._total_calls
+            return {
+                "total_cost": total_cost,
+                "total_calls": total_calls,
+                "total_tokens": self.get_total_tokens(),
+                "cost_by_stage": self.get_cost_by_stage(),
+                "cost_by_noise_level": self.get_cost_by_noise_level(),
+                "prompt_cache": self.get_prompt_cache_stats(),
+                "latency_by_stage": self.get_latency_by_stage(),
+                "saved_calls": sum(self.saved_calls.values()),
+                "saved_calls_by_stage": dict(sorted(self.saved_calls.items())),
+                "average_cost_per_call": total_cost / total_calls if total_calls else 0.0,
+                "currency": self.config.get("cost_tracking.cost_currency", "USD")
+            }
+
+    def iter_calls(self) -> Iterator[dict]:
+        """
+        Iterate over every call tracked by this tracker, oldest first.
 
-        return {
-            "total_cost": self.get_total_cost(),
-            "total_calls": len(self.calls),
-            "total_tokens": tokens,
-            "cost_by_stage": self.get_cost_by_stage(),
-            "cost_by_noise_level": self.get_cost_by_noise_level(),
-            "average_cost_per_call": (
-                self.get_total_cost() / len(self.calls)
-                if self.calls else 0.0
-            ),
-            "currency": self.config.get("cost_tracking.cost_currency", "USD")
-        }
+        Calls are streamed from the ledger when there is one (so calls no
+        longer held in memory are included) and taken from memory otherwise.
+
+        Yields:
+            Call dictionaries (see ``APICall.to_dict``)
+        """
+        with self._lock:
+            if self._ledger is None:
+                calls = list(self._calls)
+            else:
+                self._ledger.flush()
+                path, offset, run_id = self._ledger_path, self._ledger_offset, self.run_id
+                calls = None
+            assigned = self._assigned_calls
+
+        if calls is not None:
+            for call in calls:
+                yield call.to_dict()
+            return
+
+        for call in assigned:
+            yield call.to_dict()
+
+        with open(path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            for line in f:
+                record = json.loads(line)
+                if record.pop("run_id", None) == run_id:
+                    yield record
+
+    def close(self) -> None:
+        """Close the ledger file (it is reopened if more calls are tracked)."""
+        with self._lock:
+            if self._ledger is not None:
+                self._ledger.close()
+                self._ledger = None
 
     def save_report(self, output_file: Optional[Path] = None) -> Path:
         """
         Save cost report to JSON file.
 
+        The summary comes from the running totals and the call breakdown is
+        streamed from the ledger one call per line, so writing the report
+        does not load the calls into memory.
+
         Args:
             output_file: Optional path for output file.
                         If None, uses config value
@@ -262,23 +540,25 @@ class CostTracker:
                 "cost_tracking.report.filename",
                 "results/cost_analysis.json"
             )
-            output_file = self.config.project_root / report_filename
+            output_file = self.config.resolve_path(report_filename)
 
         # Ensure directory exists
         output_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Prepare report data
-        report = {
-            "generated_at": datetime.now().isoformat(),
-            "summary": self.get_summary(),
-            "calls": [call.to_dict() for call in self.calls]
-            if self.config.get("cost_tracking.report.include_breakdown", True)
-            else []
-        }
+        generated_at = datetime.now().isoformat()
+        summary = json.dumps(self.get_summary(), indent=2).replace("\n", "\n  ")
+        include_breakdown = self.config.get("cost_tracking.report.include_breakdown", True)
 
-        # Save to file
+        # Save to file: one object whose "calls" array is streamed
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2)
+            f.write("{\n")
+            f.write(f'  "generated_at": {json.dumps(generated_at)},\n')
+            f.write(f'  "summary": {summary},\n')
+            f.write('  "calls": [')
+            if include_breakdown:
+                for index, call in enumerate(self.iter_calls()):
+                    f.write(("," if index else "") + "\n    " + json.dumps(call))
+            f.write("\n  ]\n}\n")
 
         logger.info(f"Cost report saved to {output_file}")
         return output_file
@@ -302,12 +582,30 @@ class CostTracker:
         print(f"Total Tokens: {summary['total_tokens']['total']:,}")
         print(f"  • Input: {summary['total_tokens']['input']:,}")
         print(f"  • Output: {summary['total_tokens']['output']:,}")
+        if summary['saved_calls']:
+            by_stage = ", ".join(
+                f"stage {stage}: {count}"
+                for stage, count in summary['saved_calls_by_stage'].items()
+            )
+            print(f"Saved API Calls: {summary['saved_calls']} ({by_stage})")
         print(f"Average Cost per Call: ${summary['average_cost_per_call']:.4f}")
+        prompt_cache = summary['prompt_cache']
+        print(f"Prompt Cache: {prompt_cache['cache_read_tokens']:,} tokens read, "
+              f"{prompt_cache['cache_write_tokens']:,} written "
+              f"({prompt_cache['hit_ratio']:.0%} hit ratio)")
 
         print("\nCost by Stage:")
         for stage, cost in sorted(summary['cost_by_stage'].items()):
             print(f"  Stage {stage}: ${cost:.4f}")
 
+        if summary['latency_by_stage']:
+            print("\nLatency by Stage:")
+            for stage, latency in sorted(summary['latency_by_stage'].items()):
+                ttft = latency['mean_ttft_s']
+                ttft_text = f", TTFT {ttft * 1000:.0f} ms" if ttft is not None else ""
+                print(f"  Stage {stage}: {latency['mean_duration_s'] * 1000:.0f} ms"
+                      f"{ttft_text}, {latency['tokens_per_second']:.1f} tokens/s")
+
         print("\nCost by Noise Level:")
         for noise, cost in sorted(summary['cost_by_noise_level'].items()):
             print(f"  {noise}% noise: ${cost:.4f}")
@@ -0,0 +1,298 @@
+"""
+Embedding Service Module
+
+The analyzers measure semantic distance with TF-IDF embeddings of small
+corpora (usually an original text and one translation). Each of them used
+to build and fit its own ``TfidfVectorizer`` per comparison, tokenizing the
+same texts again every time. This module serves those embeddings from one
+place:
+
+- Each text is tokenized (lowercasing, n-grams, stop words) once per
+  analysis configuration; the token lists are cached by text hash
+- A vectorizer configuration is fitted once per corpus; the sparse
+  embeddings are cached by (configuration, text hashes)
+
+Fitting still happens on the caller's corpus, so IDF weights and the
+``max_features`` vocabulary are exactly those of a fresh ``TfidfVectorizer``
+and results do not change. Embeddings stay in CSR form: a TF-IDF row of a
+short text has a few dozen non-zeros out of ``max_features`` columns, and
+``sparse_cosine_similarity`` compares rows without densifying them.
+
+When the on-disk ``EmbeddingStore`` is enabled, fitted bulk corpora (at
+least ``analysis.embedding_store.min_corpus_size`` texts) are also appended
+to it, so a later run (or another process) maps them from disk instead of
+fitting again. Small corpora such as text pairs refit faster than a segment
+is written, so they only use the in-memory cache.
+
+Usage:
+    >>> from embedding_service import get_embedding_service
+    >>> service = get_embedding_service()
+    >>> embeddings = service.embed([original, translation], ngram_range=(1, 3))
+    >>> similarity = service.similarity(original, translation, max_features=500)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from config import get_config
+from embedding_store import EmbeddingStore, get_embedding_store
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# TfidfVectorizer parameters that control how a text is turned into terms;
+# the remaining ones (max_features, norm, idf weighting, ...) apply to fitting
+ANALYSIS_PARAMS = frozenset({
+    "input", "encoding", "decode_error", "strip_accents", "lowercase",
+    "preprocessor", "tokenizer", "analyzer", "stop_words", "token_pattern",
+    "ngram_range"
+})
+
+
+def text_hash(text: str) -> bytes:
+    """
+    Hash a text for use in cache keys.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        16-byte digest of the UTF-8 text
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def sparse_cosine_similarity(
+    X: sparse.spmatrix,
+    Y: Optional[sparse.spmatrix] = None,
+    dense_output: bool = True
+):
+    """
+    Cosine similarity between the rows of sparse matrices.
+
+    Rows are L2-normalized in CSR form and compared with one sparse matrix
+    product, so only non-zero terms are touched and no dense copy of the
+    embeddings is made. Rows without terms have similarity 0.
+
+    Args:
+        X: Sparse (or dense) matrix, one row per text
+        Y: Second matrix. If None, X is compared with itself
+        dense_output: Return a dense array. With False the result stays
+                      sparse (pairs sharing no term are not stored), which
+                      keeps all-pairs results of large corpora small
+
+    Returns:
+        len(X)×len(Y) similarity matrix (numpy.ndarray or CSR matrix)
+
+    Example:
+        >>> sparse_cosine_similarity(service.embed(texts))[0, 1]
+    """
+    X = normalize(sparse.csr_matrix(X, dtype=np.float64))
+    Y = X if Y is None else normalize(sparse.csr_matrix(Y, dtype=np.float64))
+    similarities = X @ Y.T
+    return similarities.toarray() if dense_output else similarities.tocsr()
+
+
+def _params_key(params: Dict[str, Any]) -> Tuple:
+    """Hashable key of vectorizer parameters (independent of their order)."""
+    return tuple(sorted((name, repr(value)) for name, value in params.items()))
+
+
+class EmbeddingService:
+    """
+    Shared, cached TF-IDF embeddings.
+
+    Returned matrices are shared between callers and must not be modified.
+
+    Attributes:
+        max_entries: Corpora (and, separately, tokenized texts) kept in the
+                     LRU caches
+        hits: Corpus lookups served from the cache
+        stored: Corpora loaded from the embedding store
+        misses: Corpora fitted
+        store_min_texts: Smallest corpus read from and written to the store
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, store: Optional[EmbeddingStore] = None):
+        """
+        Initialize the service.
+
+        Args:
+            max_entries: Cache size. If None, uses
+                         ``analysis.embedding_cache.max_entries``
+            store: On-disk embedding store. If None, uses the global store
+        """
+        if max_entries is None:
+            max_entries = get_config().get("analysis.embedding_cache.max_entries", 10000)
+        self.max_entries = int(max_entries)
+        self.store = store if store is not None else get_embedding_store()
+        self.store_min_texts = int(
+            get_config().get("analysis.embedding_store.min_corpus_size", 1000)
+        )
+        self.hits = 0
+        self.stored = 0
+        self.misses = 0
+        self._embeddings: "OrderedDict[Tuple, sparse.csr_matrix]" = OrderedDict()
+        self._tokens: "OrderedDict[Tuple, List[str]]" = OrderedDict()
+        self._analyzers: Dict[Tuple, Callable[[str], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _cached_analyzer(self, analysis_params: Dict[str, Any]) -> Callable[[str], List[str]]:
+        """Analyzer of one configuration that tokenizes each distinct text once."""
+        key = _params_key(analysis_params)
+        with self._lock:
+            cached = self._analyzers.get(key)
+        if cached is not None:
+            return cached
+
+        analyze = TfidfVectorizer(**analysis_params).build_analyzer()
+
+        def analyzer(text: str) -> List[str]:
+            token_key = (key, text_hash(text))
+            with self._lock:
+                tokens = self._tokens.get(token_key)
+                if tokens is not None:
+                    self._tokens.move_to_end(token_key)
+                    return tokens
+            tokens = analyze(text)
+            with self._lock:
+                self._tokens[token_key] = tokens
+                if len(self._tokens) > self.max_entries:
+                    self._tokens.popitem(last=False)
+            return tokens
+
+        with self._lock:
+            return self._analyzers.setdefault(key, analyzer)
+
+    def embed(self, texts: List[str], **params) -> sparse.csr_matrix:
+        """
+        Get the TF-IDF embeddings of a corpus.
+
+        Args:
+            texts: Corpus to fit and transform
+            **params: TfidfVectorizer parameters (e.g., max_features=500,
+                      ngram_range=(1, 3))
+
+        Returns:
+            Sparse matrix with one L2-normalized row per text
+
+        Raises:
+            ValueError: If the corpus has no terms (as TfidfVectorizer)
+
+        Example:
+            >>> service.embed(["Hello world", "Goodbye world"]).shape
+            (2, 3)
+        """
+        hashes = [text_hash(text) for text in texts]
+        key = (_params_key(params), tuple(hashes))
+        with self._lock:
+            embeddings = self._embeddings.get(key)
+            if embeddings is not None:
+                self._embeddings.move_to_end(key)
+                self.hits += 1
+                return embeddings
+
+        # TF-IDF rows depend on the whole fitted corpus, so each (configuration,
+        # corpus) pair is its own space in the store
+        space = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        use_store = len(texts) >= self.store_min_texts
+        if use_store:
+            embeddings = self.store.get(space, hashes)
+            if embeddings is not None:
+                self._remember(key, embeddings, stored=True)
+                return embeddings
+
+        analysis_params = {k: v for k, v in params.items() if k in ANALYSIS_PARAMS}
+        fit_params = {k: v for k, v in params.items() if k not in ANALYSIS_PARAMS}
+        vectorizer = TfidfVectorizer(
+            analyzer=self._cached_analyzer(analysis_params),
+            token_pattern=None,
+            **fit_params
+        )
+        embeddings = vectorizer.fit_transform(texts).tocsr()
+        if use_store:
+            self.store.append(space, hashes, embeddings)
+
+        self._remember(key, embeddings, stored=False)
+        return embeddings
+
+    def _remember(self, key: Tuple, embeddings: sparse.csr_matrix, stored: bool) -> None:
+        """Add a corpus to the in-memory LRU cache."""
+        with self._lock:
+            if stored:
+                self.stored += 1
+            else:
+                self.misses += 1
+            self._embeddings[key] = embeddings
+            if len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+
+    def similarity(self, text1: str, text2: str, **params) -> float:
+        """
+        Get the cosine similarity of two texts embedded as a two-text corpus.
+
+        Args:
+            text1: First text
+            text2: Second text
+            **params: TfidfVectorizer parameters
+
+        Returns:
+            Cosine similarity between 0.0 and 1.0
+
+        Raises:
+            ValueError: If neither text has any terms
+        """
+        embeddings = self.embed([text1, text2], **params)
+        return float(sparse_cosine_similarity(embeddings[0], embeddings[1])[0, 0])
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with 'hits', 'stored', 'misses', 'corpora' and 'texts' counts
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stored": self.stored,
+                "misses": self.misses,
+                "corpora": len(self._embeddings),
+                "texts": len(self._tokens)
+            }
+
+    def clear(self) -> None:
+        """Drop all cached embeddings and token lists (the on-disk store is kept)."""
+        with self._lock:
+            self._embeddings.clear()
+            self._tokens.clear()
+
+
+# Global embedding service instance
+_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get global embedding service instance (singleton pattern).
+
+    Returns:
+        Global EmbeddingService instance
+    """
+    global _service
+    if _service is None:
+        _service = EmbeddingService()
+    return _service
+
+
+def reset_embedding_service():
+    """Reset the global embedding service (useful for testing)."""
+    global _service
+    _service = None
@@ -0,0 +1,466 @@
+"""
+Embedding Store Module
+
+This module persists embeddings on disk so analysis runs do not recompute
+them from raw text. Embeddings are appended in segments of ``.npy`` files
+that are opened with ``np.memmap`` (``np.load(mmap_mode="r")``): loading a
+segment maps it into memory without copying, so millions of embeddings can
+be served from a store larger than RAM.
+
+Every row is indexed by (space, text hash). A space identifies what the
+vectors mean, e.g. a TF-IDF vectorizer configuration fitted on one corpus
+(see ``EmbeddingService``); vectors of different spaces are never mixed.
+
+Layout of the store directory::
+
+    segments.jsonl            a generation header, then one line per segment
+                              (space, rows, columns, format, bytes)
+    segments.lock             held exclusively while the index is written
+    seg-3f2a....keys.npy      16-byte text hashes, one per row
+    seg-3f2a....data.npy      CSR components of sparse segments
+    seg-3f2a....indices.npy
+    seg-3f2a....indptr.npy
+    seg-9c01....dense.npy     float32 rows of dense segments
+
+A segment's arrays are written before its line in ``segments.jsonl``, so an
+interrupted append leaves no partial entries in the index. Segment names are
+random, so processes sharing a store never write the same files, and each
+process picks up the lines appended by the others as the index grows.
+
+The store is bounded by ``analysis.embedding_store.max_size_mb``: once the
+segments outgrow it, the oldest ones are dropped from the index and deleted.
+Appends and evictions hold an exclusive ``flock`` on ``segments.lock``, so
+an eviction never loses a line another process is appending. An eviction
+rewrites the index under a new generation; readers that see a different
+generation read the index again from the start.
+
+Usage:
+    >>> from embedding_store import get_embedding_store
+    >>> store = get_embedding_store()
+    >>> store.append("tfidf-v1", [text_hash(t) for t in texts], embeddings)
+    >>> embeddings = store.get("tfidf-v1", [text_hash(t) for t in texts])
+"""
+
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from config import get_config
+from logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends and evictions are only locked per process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+INDEX_FILENAME = "segments.jsonl"
+LOCK_FILENAME = "segments.lock"
+
+Embeddings = Union[np.ndarray, sparse.csr_matrix]
+
+
+def _slice_rows(embeddings: Embeddings, start: int, stop: int) -> Embeddings:
+    """Rows start:stop as a view of the mapped arrays (scipy's own slicing copies)."""
+    if not sparse.issparse(embeddings):
+        return embeddings[start:stop]
+    first, last = embeddings.indptr[start], embeddings.indptr[stop]
+    return sparse.csr_matrix(
+        (
+            embeddings.data[first:last],
+            embeddings.indices[first:last],
+            embeddings.indptr[start:stop + 1] - first
+        ),
+        shape=(stop - start, embeddings.shape[1]),
+        copy=False
+    )
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk store of memory-mapped embeddings.
+
+    Attributes:
+        directory: Directory holding the segments and their index
+        enabled: Whether lookups and appends are performed
+        max_size_bytes: Total segment size beyond which the oldest segments
+                        are deleted
+        hits: Lookups served from the store
+        misses: Lookups with at least one missing row
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        enabled: Optional[bool] = None,
+        max_size_bytes: Optional[int] = None
+    ):
+        """
+        Initialize the embedding store.
+
+        Args:
+            directory: Store directory. If None, uses analysis.embedding_store.directory
+            enabled: Whether the store is active. If None, uses
+                     analysis.embedding_store.enabled
+            max_size_bytes: Size limit. If None, uses
+                            analysis.embedding_store.max_size_mb
+        """
+        config = get_config()
+
+        if directory is None:
+            directory = config.project_root / config.get(
+                "analysis.embedding_store.directory", ".cache/embeddings"
+            )
+        if enabled is None:
+            enabled = config.get("analysis.embedding_store.enabled", False)
+        if max_size_bytes is None:
+            max_size_bytes = int(
+                config.get("analysis.embedding_store.max_size_mb", 1024) * 1024 * 1024
+            )
+
+        self.directory = Path(directory)
+        self.enabled = enabled
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._segments: Optional[List[dict]] = None
+        self._index_offset = 0  # Bytes of segments.jsonl already read
+        self._index_stat: Optional[Tuple[int, int, int]] = None  # (inode, size, mtime)
+        self._generation: Optional[str] = None
+        self._rows: Dict[str, Dict[bytes, Tuple[int, int]]] = {}  # space -> key -> (segment, row)
+        self._mapped: Dict[int, Tuple[np.ndarray, Embeddings]] = {}
+
+    @contextmanager
+    def _index_lock(self):
+        """Hold the store's cross-process lock while the index is written."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / LOCK_FILENAME, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self) -> List[dict]:
+        """
+        Read the segment index lines not read yet (caller holds the lock).
+
+        Lines appended by other processes are registered as they appear. An
+        index with another generation header was rewritten by an eviction
+        and is read again from the start.
+        """
+        index_file = self.directory / INDEX_FILENAME
+        try:
+            stat = index_file.stat()
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+
+        if self._segments is not None and signature == self._index_stat:
+            return self._segments  # Unchanged since the last read
+
+        if signature is None:
+            self._reset_index()
+            self._index_stat = None
+            return self._segments
+
+        with open(index_file, "rb") as f:
+            generation = self._read_generation(f.readline())
+            if self._segments is None or generation != self._generation:
+                self._reset_index()
+                self._generation = generation
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Another process is still writing this line
+                self._index_offset += len(line)
+                record = json.loads(line) if line.strip() else None
+                if record is not None and "generation" not in record:
+                    self._register(record)
+        self._index_stat = signature
+        logger.debug(f"Embedding store index has {len(self._segments)} segments")
+        return self._segments
+
+    @staticmethod
+    def _read_generation(line: bytes) -> Optional[str]:
+        """Generation named by an index's first line (None without a header)."""
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            return json.loads(line).get("generation")
+        except ValueError:
+            return None
+
+    def _reset_index(self) -> None:
+        """Forget every registered segment (caller holds the lock)."""
+        self._segments = []
+        self._rows = {}
+        self._mapped = {}
+        self._index_offset = 0
+        self._generation = None
+
+    def _register(self, segment: dict) -> None:
+        """Add a segment and its rows to the in-memory index (caller holds the lock)."""
+        number = len(self._segments)
+        self._segments.append(segment)
+        try:
+            keys = np.load(self.directory / f"{segment['name']}.keys.npy", mmap_mode="r")
+        except FileNotFoundError:
+            # Evicted by another process after this index was read
+            logger.debug(f"Embedding segment {segment['name']} is gone")
+            return
+        rows = self._rows.setdefault(segment["space"], {})
+        for row, key in enumerate(keys.tolist()):
+            rows[key] = (number, row)
+
+    def _map(self, number: int) -> Tuple[np.ndarray, Embeddings]:
+        """Memory-map a segment's keys and embeddings (caller holds the lock)."""
+        mapped = self._mapped.get(number)
+        if mapped is None:
+            segment = self._segments[number]
+            base = self.directory / segment["name"]
+            keys = np.load(f"{base}.keys.npy", mmap_mode="r")
+            if segment["format"] == "csr":
+                embeddings = sparse.csr_matrix(
+                    (
+                        np.load(f"{base}.data.npy", mmap_mode="r"),
+                        np.load(f"{base}.indices.npy", mmap_mode="r"),
+                        np.load(f"{base}.indptr.npy", mmap_mode="r")
+                    ),
+                    shape=(segment["rows"], segment["columns"]),
+                    copy=False
+                )
+            else:
+                embeddings = np.load(f"{base}.dense.npy", mmap_mode="r")
+            mapped = self._mapped[number] = (keys, embeddings)
+        return mapped
+
+    def append(self, space: str, keys: Sequence[bytes], embeddings: Embeddings) -> Optional[str]:
+        """
+        Append embeddings as a new segment.
+
+        Sparse matrices are stored as CSR components in their own dtype;
+        dense arrays are stored as float32.
+
+        Args:
+            space: Embedding space the vectors belong to
+            keys: Text hash of each row (see ``embedding_service.text_hash``)
+            embeddings: Sparse matrix or 2-D array, one row per key
+
+        Returns:
+            Name of the written segment, or None if the store is disabled
+
+        Raises:
+            ValueError: If keys and embeddings differ in length
+        """
+        if not self.enabled:
+            return None
+        if len(keys) != embeddings.shape[0]:
+            raise ValueError(
+                f"{len(keys)} keys for {embeddings.shape[0]} embeddings"
+            )
+
+        with self._lock:
+            name = f"seg-{uuid.uuid4().hex}"
+            base = self.directory / name
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            np.save(f"{base}.keys.npy", np.asarray(keys, dtype="S16"))
+            if sparse.issparse(embeddings):
+                embeddings = sparse.csr_matrix(embeddings)
+                np.save(f"{base}.data.npy", embeddings.data)
+                np.save(f"{base}.indices.npy", embeddings.indices)
+                np.save(f"{base}.indptr.npy", embeddings.indptr)
+                storage = "csr"
+            else:
+                np.save(f"{base}.dense.npy", np.asarray(embeddings, dtype=np.float32))
+                storage = "dense"
+
+            segment = {
+                "name": name,
+                "space": space,
+                "rows": int(embeddings.shape[0]),
+                "columns": int(embeddings.shape[1]),
+                "format": storage,
+                "bytes": sum(path.stat().st_size for path in self._segment_files(name))
+            }
+            with self._index_lock():
+                index_file = self.directory / INDEX_FILENAME
+                with open(index_file, "a", encoding="utf-8") as f:
+                    if f.tell() == 0:
+                        f.write(json.dumps({"generation": uuid.uuid4().hex}) + "\n")
+                    f.write(json.dumps(segment) + "\n")
+                self._load_index()
+                self._evict()
+
+        logger.debug(f"Stored {segment['rows']} embeddings in {name} (space {space[:12]})")
+        return name
+
+    def _segment_files(self, name: str) -> List[Path]:
+        """Files of one segment."""
+        return sorted(self.directory.glob(f"{name}.*.npy"))
+
+    def _evict(self) -> None:
+        """
+        Delete the oldest segments until the store fits its size limit.
+
+        The caller holds both locks and has just read the index, so every
+        segment of every process is accounted for.
+        """
+        total = sum(segment.get("bytes", 0) for segment in self._segments)
+        if total <= self.max_size_bytes:
+            return
+
+        kept = list(self._segments)
+        evicted = []
+        # The newest segment is kept even if it alone is over the limit
+        while len(kept) > 1 and total > self.max_size_bytes:
+            segment = kept.pop(0)
+            evicted.append(segment)
+            total -= segment.get("bytes", 0)
+
+        index_file = self.directory / INDEX_FILENAME
+        tmp_path = index_file.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": uuid.uuid4().hex}) + "\n")
+            for segment in kept:
+                f.write(json.dumps(segment) + "\n")
+        os.replace(tmp_path, index_file)
+
+        # Mapped arrays of deleted files stay readable until they are released
+        for segment in evicted:
+            for path in self._segment_files(segment["name"]):
+                path.unlink(missing_ok=True)
+        self._load_index()
+        logger.debug(f"Evicted {len(evicted)} embedding segments")
+
+    def get(self, space: str, keys: Sequence[bytes]) -> Optional[Embeddings]:
+        """
+        Look up the embeddings of several texts.
+
+        Rows that are contiguous in one segment (e.g. a whole stored corpus)
+        are returned as a zero-copy view of the memory-mapped files.
+
+        Args:
+            space: Embedding space
+            keys: Text hashes, in the order of the returned rows
+
+        Returns:
+            CSR matrix or float32 array (as stored), or None unless every
+            key is stored in the space
+        """
+        if not self.enabled or not keys:
+            return None
+
+        with self._lock:
+            self._load_index()
+            rows = self._rows.get(space, {})
+            locations = [rows.get(key) for key in keys]
+            if any(location is None for location in locations):
+                self.misses += 1
+                return None
+
+            segments = {number for number, _ in locations}
+            first = locations[0][1]
+            try:
+                if len(segments) == 1 and [row for _, row in locations] == list(
+                    range(first, first + len(locations))
+                ):
+                    _, embeddings = self._map(locations[0][0])
+                    self.hits += 1
+                    return _slice_rows(embeddings, first, first + len(locations))
+
+                parts = [self._map(number)[1][row:row + 1] for number, row in locations]
+            except FileNotFoundError:
+                # Evicted by another process: read the index again next time
+                self._segments = None
+                self.misses += 1
+                return None
+            self.hits += 1
+        if sparse.issparse(parts[0]):
+            return sparse.vstack(parts, format="csr")
+        return np.vstack(parts)
+
+    def iter_segments(self, space: str) -> Iterator[Tuple[np.ndarray, Embeddings]]:
+        """
+        Iterate over every stored segment of a space without copying.
+
+        Args:
+            space: Embedding space
+
+        Yields:
+            Tuples of (text hashes, embeddings) of one memory-mapped segment
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            names = [
+                segment["name"] for segment in self._load_index()
+                if segment["space"] == space
+            ]
+        for name in names:
+            with self._lock:
+                number = next(
+                    (number for number, segment in enumerate(self._load_index())
+                     if segment["name"] == name),
+                    None
+                )
+                if number is None:
+                    continue  # Evicted since the index was read
+                try:
+                    mapped = self._map(number)
+                except FileNotFoundError:
+                    continue
+            yield mapped
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with 'hits', 'misses', 'segments', 'rows' and 'bytes' counts
+        """
+        with self._lock:
+            segments = self._load_index() if self.enabled else []
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "segments": len(segments),
+                "rows": sum(segment["rows"] for segment in segments),
+                "bytes": sum(segment.get("bytes", 0) for segment in segments)
+            }
+
+
+# Global embedding store instance
+_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """
+    Get global embedding store instance (singleton pattern).
+
+    Returns:
+        Global EmbeddingStore instance
+    """
+    global _store
+    if _store is None:
+        _store = EmbeddingStore()
+    return _store
+
+
+def reset_embedding_store():
+    """Reset the global embedding store (useful for testing)."""
+    global _store
+    _store = None
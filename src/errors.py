@@ -72,3 +72,8 @@ class FileOperationError(AgenticTuringMachineError):
 class PluginError(AgenticTuringMachineError):
     """Raised when plugin operations fail."""
     pass
+
+
+class BudgetExceededError(AgenticTuringMachineError):
+    """Raised when an API request would exceed the configured budget."""
+    pass
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Fake Message Batches Server
+===========================
+
+A local stand-in for the Anthropic Message Batches API, used to exercise
+``pipeline.py --batch`` offline (tests, demos, CI without an API key).
+
+It implements the three endpoints the batch runner needs:
+
+- ``POST /v1/messages/batches``               create a batch
+- ``GET  /v1/messages/batches/{id}``          poll batch status
+- ``GET  /v1/messages/batches/{id}/results``  download JSONL results
+
+Every request is answered with a deterministic pseudo-translation of its
+input text, so repeated runs produce identical outputs.
+
+Usage:
+    python3 src/fake_batch_server.py --port 8765
+    python3 run_with_skills.py --all --batch --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from llm_backend import _text_of, pseudo_translate
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _now() -> str:
+    """Current UTC time in RFC 3339 format."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _BatchStore:
+    """In-memory state shared by the request handlers."""
+
+    def __init__(self, processing_delay: float):
+        self.processing_delay = processing_delay
+        self.batches: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    def create(self, requests: list) -> dict:
+        """Register a new batch and answer all of its requests."""
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        created = datetime.now(timezone.utc)
+        results = [self._answer(request) for request in requests]
+        batch = {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "in_progress",
+            "request_counts": {
+                "processing": len(requests),
+                "succeeded": 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0
+            },
+            "created_at": created.isoformat(),
+            "expires_at": (created + timedelta(hours=24)).isoformat(),
+            "ended_at": None,
+            "cancel_initiated_at": None,
+            "archived_at": None,
+            "results_url": None
+        }
+        with self.lock:
+            self.batches[batch_id] = {
+                "batch": batch,
+                "results": results,
+                "ready_at": time.monotonic() + self.processing_delay
+            }
+        return batch
+
+    def retrieve(self, batch_id: str, base_url: str) -> Optional[dict]:
+        """Return the batch, marking it ended once its processing delay has passed."""
+        with self.lock:
+            entry = self.batches.get(batch_id)
+            if entry is None:
+                return None
+            batch = entry["batch"]
+            if batch["processing_status"] != "ended" and time.monotonic() >= entry["ready_at"]:
+                succeeded = sum(1 for r in entry["results"] if r["result"]["type"] == "succeeded")
+                batch["processing_status"] = "ended"
+                batch["ended_at"] = _now()
+                batch["results_url"] = f"{base_url}/v1/messages/batches/{batch_id}/results"
+                batch["request_counts"].update({
+                    "processing": 0,
+                    "succeeded": succeeded,
+                    "errored": len(entry["results"]) - succeeded
+                })
+            return dict(batch)
+
+    def results(self, batch_id: str) -> Optional[list]:
+        """Return the results of an ended batch."""
+        with self.lock:
+            entry = self.batches.get(batch_id)
+            if entry is None or entry["batch"]["processing_status"] != "ended":
+                return None
+            return entry["results"]
+
+    @staticmethod
+    def _answer(request: dict) -> dict:
+        """Build the succeeded result for one batch request."""
+        params = request.get("params", {})
+        prompt = "\n".join(
+            _text_of(part)
+            for part in [params.get("system", "")] + [
+                message.get("content", "") for message in params.get("messages", [])
+            ]
+        )
+        text = pseudo_translate(prompt)
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": params.get("model", "fake-model"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": max(1, len(prompt) // 4),
+                "output_tokens": max(1, len(text) // 4)
+            }
+        }
+        return {
+            "custom_id": request.get("custom_id"),
+            "result": {"type": "succeeded", "message": message}
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP handler implementing the batch endpoints."""
+
+    server: "FakeBatchServer._HTTPServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+
+    def log_message(self, format, *args):  # noqa: A002 - signature defined by BaseHTTPRequestHandler
+        logger.debug("fake batch server: " + format % args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self) -> None:
+        self._send_json(404, {
+            "type": "error",
+            "error": {"type": "not_found_error", "message": f"Not found: {self.path}"}
+        })
+
+    def do_POST(self):  # noqa: N802 - name defined by BaseHTTPRequestHandler
+        if self.path.rstrip("/") != "/v1/messages/batches":
+            self._not_found()
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        batch = self.server.store.create(payload.get("requests", []))
+        logger.info(f"Fake batch {batch['id']} created with {len(payload.get('requests', []))} requests")
+        self._send_json(200, batch)
+
+    def do_GET(self):  # noqa: N802 - name defined by BaseHTTPRequestHandler
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) not in (4, 5):
+            self._not_found()
+            return
+
+        batch_id = parts[3]
+        if len(parts) == 4:
+            batch = self.server.store.retrieve(batch_id, self.server.base_url)
+            if batch is None:
+                self._not_found()
+            else:
+                self._send_json(200, batch)
+            return
+
+        results = self.server.store.results(batch_id) if parts[4] == "results" else None
+        if results is None:
+            self._not_found()
+            return
+        body = "".join(json.dumps(result) + "\n" for result in results).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeBatchServer:
+    """
+    Local Message Batches endpoint running in a background thread.
+
+    Attributes:
+        host: Interface the server listens on
+        port: Bound port (chosen automatically when 0 is given)
+        processing_delay: Seconds before a batch reports ``ended``
+
+    Example:
+        >>> with FakeBatchServer() as server:
+        ...     client = anthropic.Anthropic(api_key="test", base_url=server.base_url)
+        ...     run_batch_sweep([0, 25], client=client)
+    """
+
+    class _HTTPServer(ThreadingHTTPServer):
+        daemon_threads = True
+        store: _BatchStore
+        base_url: str
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, processing_delay: float = 0.0):
+        """
+        Create the server (it starts listening on ``start()``).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 = any free port)
+            processing_delay: Seconds each batch stays ``in_progress``
+        """
+        self.host = host
+        self.port = port
+        self.processing_delay = processing_delay
+        self._httpd: Optional[FakeBatchServer._HTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to ``anthropic.Anthropic(base_url=...)``."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeBatchServer":
+        """Start serving in a background thread."""
+        self._httpd = self._HTTPServer((self.host, self.port), _Handler)
+        self.port = self._httpd.server_address[1]
+        self._httpd.store = _BatchStore(self.processing_delay)
+        self._httpd.base_url = self.base_url
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake batch server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and release the port."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeBatchServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    """Run the fake batch server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Message Batches API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind")
+    parser.add_argument(
+        "--processing-delay",
+        type=float,
+        default=2.0,
+        help="Seconds each batch stays in_progress before ending"
+    )
+    args = parser.parse_args()
+
+    server = FakeBatchServer(args.host, args.port, args.processing_delay).start()
+    print(f"Fake batch server listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
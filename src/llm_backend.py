@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+LLM Backend Module
+==================
+
+This module decouples the pipeline from the Anthropic API. A backend hands
+out synchronous and asynchronous clients exposing ``messages.create``:
+
+- ``AnthropicBackend``: the real API (requires ANTHROPIC_API_KEY)
+- ``MockBackend``: a local, deterministic stand-in with configurable
+  latency distributions and injected errors / 429 responses, for load
+  testing concurrency, retries and caching without network access
+
+Clients of both backends are wrapped in the shared rate limiter, so retries
+and backoff behave the same way against the mock as against the API.
+
+The backend is selected with ``llm_backend.name`` in config.yaml (or the
+``LLM_BACKEND_NAME`` environment variable, or ``pipeline.py --backend``).
+
+Usage:
+    LLM_BACKEND_NAME=mock python3 run_with_skills.py --all --parallel
+    python3 src/llm_backend.py --benchmark --calls 10000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import anthropic
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # newer SDK builds ship their HTTP client as httpx2
+    import httpx2 as httpx
+
+from client_factory import get_client_factory
+from config import get_config
+from errors import ConfigurationError
+from logger import get_logger
+from rate_limiter import AsyncResilientClient, RateLimiter, ResilientClient
+
+logger = get_logger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+_SKILL_PATTERN = re.compile(r'You are using the "([^"]+)" skill')
+# Input markers of pipeline and agent_tester prompts
+_INPUT_MARKERS = ("Input text:\n", "\nInput:\n")
+_MOCK_URL = "http://mock-llm.local/v1/messages"
+
+
+def pseudo_translate(prompt: str) -> str:
+    """
+    Produce a deterministic stand-in translation for a pipeline request.
+
+    The input text (everything after ``Input text:``, or ``Input:`` in
+    agent_tester prompts) is tagged with the skill that was invoked, e.g.
+    ``[english-to-french-translator] Hello``.
+
+    Args:
+        prompt: System and user prompt text of the request
+
+    Returns:
+        Pseudo-translated text
+    """
+    match = _SKILL_PATTERN.search(prompt)
+    skill = match.group(1) if match else "translator"
+    text = prompt
+    for marker in _INPUT_MARKERS:
+        if marker in prompt:
+            text = prompt.rsplit(marker, 1)[-1]
+            break
+    text = text.strip()
+    return f"[{skill}] {text}"
+
+
+def _text_of(content) -> str:
+    """Flatten a string or a list of text content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def _status_error(status_code: int, message: str, headers: Optional[dict] = None):
+    """Build the exception the Anthropic SDK raises for an HTTP error status."""
+    request = httpx.Request("POST", _MOCK_URL)
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    body = {"type": "error", "error": {"type": "mock_error", "message": message}}
+    if status_code == 429:
+        return anthropic.RateLimitError(message, response=response, body=body)
+    if status_code == 500:
+        return anthropic.InternalServerError(message, response=response, body=body)
+    return anthropic.APIStatusError(message, response=response, body=body)
+
+
+class MockLLM:
+    """
+    Deterministic fake model shared by the mock clients.
+
+    Responses depend only on the request. Prompt caching is simulated: the
+    first request with a given system prompt reports its tokens as
+    ``cache_creation_input_tokens``, later ones as ``cache_read_input_tokens``.
+
+    Attributes:
+        latency: Latency distribution (one of LATENCY_DISTRIBUTIONS)
+        latency_ms: Mean latency (time to first token) in milliseconds
+        latency_sigma: Shape of the lognormal distribution
+        token_latency_ms: Delay between streamed text deltas in milliseconds
+        error_rate: Probability of an injected 500/529 error per call
+        rate_limit_rate: Probability of an injected 429 per call
+        retry_after: retry-after header (seconds) sent with injected 429s
+        stats: Counters of calls and injected failures
+    """
+
+    def __init__(
+        self,
+        latency: str = "lognormal",
+        latency_ms: float = 200.0,
+        latency_sigma: float = 0.5,
+        token_latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.5,
+        seed: int = 42
+    ):
+        """
+        Initialize the fake model.
+
+        Args:
+            latency: Latency distribution (constant, uniform, exponential, lognormal)
+            latency_ms: Mean latency in milliseconds
+            latency_sigma: Sigma of the lognormal distribution
+            token_latency_ms: Delay between streamed text deltas in milliseconds
+            error_rate: Probability of an injected server error per call
+            rate_limit_rate: Probability of an injected 429 per call
+            retry_after: retry-after value (seconds) of injected 429s
+            seed: Random seed for latencies and injected failures
+
+        Raises:
+            ConfigurationError: If the latency distribution is unknown
+        """
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ConfigurationError(
+                f"Unknown latency distribution: {latency}",
+                details={"valid": list(LATENCY_DISTRIBUTIONS)}
+            )
+
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.token_latency_ms = token_latency_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.stats = {"calls": 0, "errors": 0, "rate_limited": 0, "succeeded": 0}
+
+        self._rng = np.random.default_rng(seed)
+        self._cached_prefixes: set = set()
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """
+        Draw one request latency.
+
+        Returns:
+            Latency in seconds
+        """
+        mean = self.latency_ms / 1000.0
+        with self._lock:
+            if self.latency == "constant":
+                return mean
+            if self.latency == "uniform":
+                return float(self._rng.uniform(0.0, 2.0 * mean))
+            if self.latency == "exponential":
+                return float(self._rng.exponential(mean))
+            mu = np.log(max(mean, 1e-9)) - self.latency_sigma ** 2 / 2
+            return float(self._rng.lognormal(mu, self.latency_sigma))
+
+    def check_failure(self) -> Optional[Exception]:
+        """
+        Decide whether the current call fails.
+
+        Returns:
+            The injected API error, or None if the call succeeds
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            draw = self._rng.random()
+            if draw < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return _status_error(
+                    429, "Injected rate limit", {"retry-after": str(self.retry_after)}
+                )
+            if draw < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                status = 529 if self._rng.random() < 0.5 else 500
+                return _status_error(status, "Injected server error")
+            self.stats["succeeded"] += 1
+            return None
+
+    def respond(self, params: dict) -> dict:
+        """
+        Build the Messages API response body for a request.
+
+        Args:
+            params: Keyword arguments of ``messages.create``
+
+        Returns:
+            Message JSON (as returned by the API)
+        """
+        system = _text_of(params.get("system", ""))
+        user = "\n".join(
+            _text_of(message.get("content", "")) for message in params.get("messages", [])
+        )
+        text = pseudo_translate(system + "\n" + user)
+
+        system_tokens = len(system) // 4
+        cache_write = cache_read = 0
+        if system and isinstance(params.get("system"), list) and any(
+            "cache_control" in block for block in params["system"]
+        ):
+            with self._lock:
+                if system in self._cached_prefixes:
+                    cache_read = system_tokens
+                else:
+                    self._cached_prefixes.add(system)
+                    cache_write = system_tokens
+            input_tokens = max(1, len(user) // 4)
+        else:
+            input_tokens = max(1, (len(system) + len(user)) // 4)
+
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": params.get("model", "mock-model"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": max(1, len(text) // 4),
+                "cache_creation_input_tokens": cache_write,
+                "cache_read_input_tokens": cache_read
+            }
+        }
+
+
+def stream_events(message: dict) -> List[Any]:
+    """
+    Split a Message JSON body into the events of a streamed response.
+
+    The text is emitted as one ``text_delta`` per word (with its trailing
+    whitespace), as the streaming Messages API would.
+
+    Args:
+        message: Message JSON (as built by MockLLM.respond)
+
+    Returns:
+        List of raw stream event objects, from message_start to message_stop
+    """
+    types = anthropic.types
+    text = message["content"][0]["text"]
+    start = dict(message, content=[], stop_reason=None)
+    start["usage"] = dict(message["usage"], output_tokens=1)
+
+    events = [
+        types.RawMessageStartEvent.model_validate({"type": "message_start", "message": start}),
+        types.RawContentBlockStartEvent.model_validate({
+            "type": "content_block_start", "index": 0,
+            "content_block": {"type": "text", "text": ""}
+        })
+    ]
+    events.extend(
+        types.RawContentBlockDeltaEvent.model_validate({
+            "type": "content_block_delta", "index": 0,
+            "delta": {"type": "text_delta", "text": chunk}
+        })
+        for chunk in re.findall(r"\S+\s*|\s+", text)
+    )
+    events.extend([
+        types.RawContentBlockStopEvent.model_validate({"type": "content_block_stop", "index": 0}),
+        types.RawMessageDeltaEvent.model_validate({
+            "type": "message_delta",
+            "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+            "usage": {"output_tokens": message["usage"]["output_tokens"]}
+        }),
+        types.RawMessageStopEvent.model_validate({"type": "message_stop"})
+    ])
+    return events
+
+
+class _MockMessages:
+    """``messages`` resource of MockAnthropic."""
+
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    def create(self, stream: bool = False, **params):
+        time.sleep(self._llm.sample_latency())
+        error = self._llm.check_failure()
+        if error is not None:
+            raise error
+        body = self._llm.respond(params)
+        if stream:
+            return self._stream(stream_events(body))
+        return anthropic.types.Message.model_validate(body)
+
+    def _stream(self, events: List[Any]) -> Iterator[Any]:
+        for event in events:
+            if event.type == "content_block_delta" and self._llm.token_latency_ms:
+                time.sleep(self._llm.token_latency_ms / 1000.0)
+            yield event
+
+
+class _AsyncMockMessages:
+    """``messages`` resource of AsyncMockAnthropic."""
+
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    async def create(self, stream: bool = False, **params):
+        await asyncio.sleep(self._llm.sample_latency())
+        error = self._llm.check_failure()
+        if error is not None:
+            raise error
+        body = self._llm.respond(params)
+        if stream:
+            return self._stream(stream_events(body))
+        return anthropic.types.Message.model_validate(body)
+
+    async def _stream(self, events: List[Any]) -> AsyncIterator[Any]:
+        for event in events:
+            if event.type == "content_block_delta" and self._llm.token_latency_ms:
+                await asyncio.sleep(self._llm.token_latency_ms / 1000.0)
+            yield event
+
+
+class MockAnthropic:
+    """Drop-in replacement for ``anthropic.Anthropic`` backed by a MockLLM."""
+
+    def __init__(self, llm: Optional[MockLLM] = None):
+        self.llm = llm or MockLLM()
+        self.messages = _MockMessages(self.llm)
+
+
+class AsyncMockAnthropic:
+    """Drop-in replacement for ``anthropic.AsyncAnthropic`` backed by a MockLLM."""
+
+    def __init__(self, llm: Optional[MockLLM] = None):
+        self.llm = llm or MockLLM()
+        self.messages = _AsyncMockMessages(self.llm)
+
+
+class LLMBackend(ABC):
+    """
+    Base class of LLM backends.
+
+    Attributes:
+        name: Backend name used in configuration
+        requires_api_key: Whether ANTHROPIC_API_KEY must be set
+        offline: Whether responses are simulated; runs of offline backends
+                 keep their outputs, caches and costs in a sandbox
+                 (``Config.use_sandbox``)
+    """
+
+    name = "base"
+    requires_api_key = False
+    offline = False
+
+    @abstractmethod
+    def create_client(self) -> Any:
+        """Create a synchronous client exposing ``messages.create``."""
+
+    @abstractmethod
+    def create_async_client(self) -> Any:
+        """Create an asynchronous client exposing ``await messages.create``."""
+
+
+class AnthropicBackend(LLMBackend):
+    """The Anthropic Messages API, through the pooled clients of ClientFactory."""
+
+    name = "anthropic"
+    requires_api_key = True
+
+    def create_client(self) -> ResilientClient:
+        # Pooled process-wide client; retries are handled by the rate-limited wrapper
+        return ResilientClient(get_client_factory().get_client())
+
+    def create_async_client(self) -> AsyncResilientClient:
+        return AsyncResilientClient(get_client_factory().get_async_client())
+
+
+class MockBackend(LLMBackend):
+    """
+    Local fake backend; all clients share one MockLLM.
+
+    Attributes:
+        llm: The shared fake model (its ``stats`` cover every client)
+    """
+
+    name = "mock"
+    offline = True
+
+    def __init__(self, llm: Optional[MockLLM] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            llm: Fake model. If None, built from ``llm_backend.mock.*``
+        """
+        if llm is None:
+            config = get_config()
+            llm = MockLLM(
+                latency=config.get("llm_backend.mock.latency", "lognormal"),
+                latency_ms=float(config.get("llm_backend.mock.latency_ms", 200)),
+                latency_sigma=float(config.get("llm_backend.mock.latency_sigma", 0.5)),
+                token_latency_ms=float(config.get("llm_backend.mock.token_latency_ms", 0.0)),
+                error_rate=float(config.get("llm_backend.mock.error_rate", 0.0)),
+                rate_limit_rate=float(config.get("llm_backend.mock.rate_limit_rate", 0.0)),
+                retry_after=float(config.get("llm_backend.mock.retry_after", 0.5)),
+                seed=int(config.get("llm_backend.mock.seed", 42))
+            )
+        self.llm = llm
+
+    def create_client(self) -> ResilientClient:
+        return ResilientClient(MockAnthropic(self.llm))
+
+    def create_async_client(self) -> AsyncResilientClient:
+        return AsyncResilientClient(AsyncMockAnthropic(self.llm))
+
+
+BACKENDS = {
+    AnthropicBackend.name: AnthropicBackend,
+    MockBackend.name: MockBackend
+}
+
+# Global backend instance
+_backend: Optional[LLMBackend] = None
+
+
+def create_llm_backend(name: str) -> LLMBackend:
+    """
+    Create a backend by name.
+
+    Args:
+        name: Backend name (see BACKENDS)
+
+    Returns:
+        New backend instance
+
+    Raises:
+        ConfigurationError: If the name is unknown
+    """
+    if name not in BACKENDS:
+        raise ConfigurationError(
+            f"Unknown LLM backend: {name}",
+            details={"valid": list(BACKENDS)}
+        )
+    return BACKENDS[name]()
+
+
+def get_llm_backend() -> LLMBackend:
+    """
+    Get global LLM backend instance (singleton pattern).
+
+    Returns:
+        Backend selected by ``llm_backend.name`` (default: anthropic)
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_llm_backend(get_config().get("llm_backend.name", "anthropic"))
+    return _backend
+
+
+def set_llm_backend(name: str) -> LLMBackend:
+    """
+    Replace the global backend (e.g. from a ``--backend`` CLI flag).
+
+    Args:
+        name: Backend name
+
+    Returns:
+        The new global backend
+    """
+    global _backend
+    _backend = create_llm_backend(name)
+    logger.info(f"LLM backend set to {name}")
+    return _backend
+
+
+def reset_llm_backend():
+    """Reset the global LLM backend (useful for testing)."""
+    global _backend
+    _backend = None
+
+
+async def _benchmark(
+    llm: MockLLM,
+    calls: int,
+    concurrency: int,
+    requests_per_minute: float
+) -> Dict[str, Any]:
+    """Fire ``calls`` requests at the mock through the resilient client."""
+    limiter = RateLimiter(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=1e12,
+        retry_delay=0.05
+    )
+    client = AsyncResilientClient(AsyncMockAnthropic(llm), limiter)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        params = {
+            "model": "mock-model",
+            "max_tokens": 100,
+            "system": [{"type": "text", "text": 'You are using the "benchmark" skill.',
+                        "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": f"Input text:\nsentence {i}"}]
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.messages.create(**params)
+            except anthropic.APIError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "calls": calls,
+        "elapsed_s": elapsed,
+        "calls_per_minute": calls / elapsed * 60,
+        "retries": client.retries,
+        "failures": failures,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "mock_stats": dict(llm.stats),
+        "final_concurrency_limit": limiter.concurrency.limit
+    }
+
+
+def main():
+    """Benchmark the retrying client against the mock backend."""
+    parser = argparse.ArgumentParser(description="Offline load test against the mock LLM backend")
+    parser.add_argument("--benchmark", action="store_true", help="Run the load test")
+    parser.add_argument("--calls", type=int, default=10000, help="Number of requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum in-flight requests")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mean latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected 500/529 rate")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Injected 429 rate")
+    parser.add_argument("--rpm", type=float, default=1e9, help="Client-side requests per minute")
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    llm = MockLLM(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=0.05
+    )
+    result = asyncio.run(_benchmark(llm, args.calls, args.concurrency, args.rpm))
+    for key, value in result.items():
+        print(f"{key}: {value:,.1f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,16 @@ Requirements:
 """
 
 import os
+import re
 import sys
 import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 import anthropic
 
 # Import configuration management
@@ -31,10 +37,21 @@ from errors import (
     InvalidNoiseLevel,
     TranslationError,
     APIError,
+    BudgetExceededError,
     ConfigurationError
 )
 from logger import get_logger
 from cost_tracker import get_cost_tracker
+from response_cache import ResponseCache, get_response_cache
+from run_manifest import get_run_manifest
+from noise_generator import generate_noisy_inputs
+from rate_limiter import ensure_resilient
+from client_factory import get_client_factory
+from llm_backend import BACKENDS, get_llm_backend, set_llm_backend
+from translation_dag import SOURCE, load_translation_dag
+from tracing import get_tracer, propagate_context
+from budget import RequestEstimate, TokenEstimator, get_budget_controller
+from skill_registry import SYSTEM_PROMPT_TEMPLATE, get_skill_registry
 
 # Get configuration instance
 config = get_config()
@@ -45,10 +62,26 @@ logger = get_logger(__name__)
 # Get cost tracker
 cost_tracker = get_cost_tracker()
 
+# Get response cache
+response_cache = get_response_cache()
+
 # Load constants from configuration (backward compatibility)
 SKILLS_DIR = config.skills_dir
 ORIGINAL_CLEAN = config.original_sentence
-NOISY_INPUTS = config.noisy_inputs
+if config.get("experiment.noise_source", "config") == "generated":
+    NOISY_INPUTS = generate_noisy_inputs(
+        ORIGINAL_CLEAN, config.noise_levels, int(config.get("experiment.noise_seed", 42))
+    )
+else:
+    NOISY_INPUTS = config.noisy_inputs
+
+# Translation graph from the agents: section of config.yaml
+TRANSLATION_DAG = load_translation_dag()
+
+# Main chain in execution order: (stage number, skill name, output file)
+TRANSLATION_STAGES = [
+    (node.stage, node.skill, node.output) for node in TRANSLATION_DAG.main_path()
+]
 
 
 def load_skill(skill_name: str) -> dict:
@@ -57,6 +90,8 @@ def load_skill(skill_name: str) -> dict:
 
     This function loads the skill definition file which contains the instructions
     and behavior for a specific translation agent (e.g., English→French translator).
+    Skills are served from the shared SkillRegistry, so the file is only read
+    again when it changes on disk.
 
     Args:
         skill_name: Name of the skill directory (e.g., "english-to-french-translator")
@@ -65,6 +100,7 @@ def load_skill(skill_name: str) -> dict:
         Dictionary containing:
             - name (str): The skill name
             - content (str): The skill file content
+            - system_prompt (str): Precomputed translation system prompt
 
     Raises:
         SkillNotFoundError: If the skill file doesn't exist
@@ -77,29 +113,445 @@ def load_skill(skill_name: str) -> dict:
     """
     skill_path = SKILLS_DIR / skill_name / "SKILL.md"
 
-    if not skill_path.exists():
+    try:
+        entry = get_skill_registry(SKILLS_DIR).get(skill_name)
+    except IOError as e:
+        logger.error(f"Failed to read skill file: {skill_path}", exc_info=True)
+        raise SkillNotFoundError(
+            f"Cannot read skill file: {skill_name}",
+            details={"path": str(skill_path), "error": str(e)}
+        )
+
+    if entry is None:
         logger.error(f"Skill not found: {skill_path}")
         raise SkillNotFoundError(
             f"Skill not found: {skill_name}",
             details={"path": str(skill_path)}
         )
 
-    try:
-        with open(skill_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+    return entry.to_dict()
 
-        logger.debug(f"Loaded skill: {skill_name} ({len(content)} characters)")
 
-        return {
-            "name": skill_name,
-            "content": content
-        }
-    except IOError as e:
-        logger.error(f"Failed to read skill file: {skill_path}", exc_info=True)
-        raise SkillNotFoundError(
-            f"Cannot read skill file: {skill_name}",
-            details={"path": str(skill_path), "error": str(e)}
+def build_skill_system_prompt(skill_name: str, skill_content: str) -> str:
+    """
+    Build the system prompt carrying a skill's instructions.
+
+    The system prompt depends only on the skill, so it is byte-identical
+    across every call to that skill and can be served from the prompt cache.
+
+    Args:
+        skill_name: Name of the skill being invoked
+        skill_content: Full SKILL.md content of the skill
+
+    Returns:
+        System prompt containing the skill instructions
+    """
+    return SYSTEM_PROMPT_TEMPLATE.format(name=skill_name, content=skill_content)
+
+
+def build_translation_prompt(input_text: str) -> str:
+    """
+    Build the user prompt sent to Claude for a single translation stage.
+
+    Args:
+        input_text: Text to translate
+
+    Returns:
+        Prompt asking for a translation of the input text
+    """
+    return f"""Please translate the following text according to the skill instructions.
+Return ONLY the translation, with no explanations or additional text.
+
+Input text:
+{input_text}"""
+
+
+def build_message_params(
+    skill_name: str,
+    skill_content: str,
+    input_text: str,
+    system_prompt: Optional[str] = None
+) -> dict:
+    """
+    Build the Messages API parameters for a single translation stage.
+
+    Used by the sequential, asynchronous and batch execution paths so that
+    every mode sends exactly the same request. The skill instructions go in
+    the system prompt; with ``model.prompt_caching`` enabled it carries an
+    ephemeral ``cache_control`` breakpoint, so only the short user message
+    is processed at the full input price after the first call per skill.
+
+    Args:
+        skill_name: Name of the skill being invoked
+        skill_content: Full SKILL.md content of the skill
+        input_text: Text to translate
+        system_prompt: Precomputed system prompt (``load_skill()["system_prompt"]``).
+                       If None, it is built from the skill content
+
+    Returns:
+        Keyword arguments for ``client.messages.create``
+    """
+    if system_prompt is None:
+        system_prompt = build_skill_system_prompt(skill_name, skill_content)
+    system_block = {
+        "type": "text",
+        "text": system_prompt
+    }
+    if config.prompt_caching_enabled:
+        system_block["cache_control"] = {"type": "ephemeral"}
+
+    return {
+        "model": config.model_name,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,  # Deterministic for consistency
+        "system": [system_block],
+        "messages": [{
+            "role": "user",
+            "content": build_translation_prompt(input_text)
+        }]
+    }
+
+
+# Endpoint answering requests when it is not the LLM backend (set by use_endpoint)
+_endpoint: Optional[str] = None
+
+
+def current_endpoint() -> str:
+    """
+    Identify the endpoint answering this run's requests.
+
+    The endpoint is part of response cache keys and run manifest units, so
+    results of offline backends or local fake servers are never served to
+    (or resumed into) runs against the Anthropic API.
+
+    Returns:
+        Endpoint set by ``use_endpoint``, or the LLM backend name
+    """
+    return _endpoint or get_llm_backend().name
+
+
+def use_endpoint(endpoint: str, sandbox: bool) -> None:
+    """
+    Select the endpoint of this run and, for non-production endpoints, its sandbox.
+
+    With ``sandbox=True`` outputs, the run manifest, results, the response
+    cache, the cost ledger and traces move to ``llm_backend.sandbox_dir``
+    (see ``Config.use_sandbox``), so a mock or fake-server run leaves the
+    real ``outputs/``, ``results/`` and ``.cache/responses`` untouched.
+
+    Args:
+        endpoint: Endpoint identifier (e.g. "mock" or "batch@127.0.0.1:8765")
+        sandbox: Keep the run state apart from production runs
+    """
+    global _endpoint, response_cache
+    _endpoint = endpoint
+    if sandbox:
+        root = config.use_sandbox(re.sub(r"[^A-Za-z0-9_.-]+", "_", endpoint))
+        response_cache = ResponseCache(
+            cache_dir=config.resolve_path(
+                config.get("response_cache.directory", ".cache/responses")
+            ),
+            enabled=response_cache.enabled
+        )
+        logger.info(f"Endpoint {endpoint} is not production; run state kept in {root}")
+
+
+def translation_cache_key(params: dict) -> Optional[str]:
+    """
+    Get the response cache key for a translation request.
+
+    The key covers the request as it is sent: the rendered system prompt
+    (skill instructions in SYSTEM_PROMPT_TEMPLATE) and the rendered user
+    prompt, so changing either template never serves responses produced
+    by the old prompts. Only deterministic requests (temperature 0) are
+    cached; sampling at a higher temperature is expected to produce a
+    fresh output on every call.
+
+    Args:
+        params: Messages API parameters from ``build_message_params``
+
+    Returns:
+        Cache key, or None if the cache is disabled or the request should
+        not be cached
+    """
+    if not response_cache.enabled or params["temperature"] != 0:
+        return None
+    return ResponseCache.make_key(
+        params["model"],
+        params["temperature"],
+        params["max_tokens"],
+        "".join(block["text"] for block in params["system"]),
+        "".join(message["content"] for message in params["messages"]),
+        endpoint=current_endpoint()
+    )
+
+
+class StageMemo:
+    """
+    Single-flight memo of stage results, keyed on the exact stage request.
+
+    Stage outputs of different noise levels often converge (identical noisy
+    inputs, or first-stage translations that erase small typos). The memo
+    makes every unique (skill, input) request run once per process: later
+    requests reuse the stored output, and requests arriving while an
+    identical one is in flight wait for it instead of calling the API
+    again. Downstream stages therefore run once per unique intermediate.
+
+    Works for threads (``run``) and coroutines (``run_async``); a failed
+    request is not memoized, so the next caller retries it.
+
+    Attributes:
+        executed: Requests that were actually executed
+        saved: Requests answered by the memo or by an in-flight twin
+    """
+
+    def __init__(self):
+        """Initialize an empty memo."""
+        self.executed = 0
+        self.saved = 0
+        self._results: dict = {}
+        self._events: dict = {}
+        self._tasks: dict = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Optional[str], compute):
+        """
+        Run a request once per key, from any thread.
+
+        Args:
+            key: Memo key (None disables memoization for this request)
+            compute: Callable producing the result
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result was
+            produced by an earlier or concurrent identical request
+        """
+        if key is None:
+            return compute(), False
+
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self.saved += 1
+                    return self._results[key], True
+                event = self._events.get(key)
+                owner = event is None
+                if owner:
+                    event = self._events[key] = threading.Event()
+            if owner:
+                break
+            # Wait for the in-flight twin, then re-check (it may have failed)
+            event.wait()
+
+        try:
+            result = compute()
+            with self._lock:
+                self._results[key] = result
+                self.executed += 1
+            return result, False
+        finally:
+            with self._lock:
+                del self._events[key]
+            event.set()
+
+    async def run_async(self, key: Optional[str], compute):
+        """
+        Run a request once per key, from coroutines of one event loop.
+
+        Args:
+            key: Memo key (None disables memoization for this request)
+            compute: Zero-argument coroutine function producing the result
+
+        Returns:
+            Tuple of (result, shared), as for ``run``
+        """
+        if key is None:
+            return await compute(), False
+
+        async def compute_and_store():
+            try:
+                result = await compute()
+                with self._lock:
+                    self._results[key] = result
+                    self.executed += 1
+                return result
+            finally:
+                with self._lock:
+                    if self._tasks.get(key) is task:
+                        del self._tasks[key]
+
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self.saved += 1
+                    return self._results[key], True
+                task = self._tasks.get(key)
+                if task is not None and task.done():
+                    # Cancelled before it started, so it never cleaned up
+                    del self._tasks[key]
+                    task = None
+                owner = task is None
+                if owner:
+                    task = self._tasks[key] = asyncio.ensure_future(compute_and_store())
+            if owner:
+                return await task, False
+            # Wait for the in-flight twin without taking on its exception or
+            # cancellation, then re-check (it may have failed)
+            await asyncio.wait([task])
+
+    def get_stats(self) -> dict:
+        """
+        Get memo statistics.
+
+        Returns:
+            Dictionary with 'executed', 'saved' and 'unique' counts
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "saved": self.saved,
+                "unique": len(self._results)
+            }
+
+
+# Global stage memo instance
+_stage_memo: Optional[StageMemo] = None
+
+
+def get_stage_memo() -> StageMemo:
+    """
+    Get global stage memo instance (singleton pattern).
+
+    Returns:
+        Global StageMemo instance
+    """
+    global _stage_memo
+    if _stage_memo is None:
+        _stage_memo = StageMemo()
+    return _stage_memo
+
+
+def reset_stage_memo():
+    """Reset the global stage memo (useful for testing)."""
+    global _stage_memo
+    _stage_memo = None
+
+
+def stage_memo_key(skill_name: str, input_text: str) -> Optional[str]:
+    """
+    Get the stage memo key of a translation request.
+
+    Like the response cache, only deterministic requests (temperature 0)
+    are shared. The memo lives for one process, so the skill is identified
+    by name rather than by its SKILL.md content.
+
+    Args:
+        skill_name: Skill run by the stage
+        input_text: Exact stage input
+
+    Returns:
+        Memo key, or None if the memo is disabled or the request is not
+        deterministic
+    """
+    if not config.get("execution.stage_memo", True) or config.temperature != 0:
+        return None
+    return ResponseCache.make_key(
+        config.model_name,
+        config.temperature,
+        config.max_tokens,
+        skill_name,
+        input_text
+    )
+
+
+def _usage_count(usage, field: str) -> int:
+    """
+    Read an optional token count from a response's usage block.
+
+    Prompt-cache counters are absent or None when caching is not in play.
+
+    Args:
+        usage: Usage object of a Messages API response
+        field: Name of the usage field
+
+    Returns:
+        Token count, or 0 if not reported
+    """
+    value = getattr(usage, field, 0)
+    return value if isinstance(value, int) else 0
+
+
+def record_translation_response(
+    response,
+    stage: int,
+    noise_level: int,
+    duration_s: Optional[float] = None,
+    ttft_s: Optional[float] = None,
+    price_ratio: float = 1.0
+) -> Tuple[str, int, int]:
+    """
+    Extract the translation from an API response and track its cost.
+
+    Shared by the synchronous and asynchronous execution paths so that
+    both report token usage identically.
+
+    Args:
+        response: Messages API response object
+        stage: Pipeline stage number
+        noise_level: Noise level percentage for cost tracking
+        duration_s: Request latency in seconds, for the latency breakdown
+        ttft_s: Time to first token in seconds (streamed requests)
+        price_ratio: Fraction of the standard price billed (batch requests)
+
+    Returns:
+        Tuple of (translated text, input tokens, output tokens)
+    """
+    output = response.content[0].text.strip()
+
+    input_tokens = response.usage.input_tokens
+    output_tokens = response.usage.output_tokens
+    cache_write_tokens = _usage_count(response.usage, "cache_creation_input_tokens")
+    cache_read_tokens = _usage_count(response.usage, "cache_read_input_tokens")
+
+    if cost_tracker.enabled:
+        cost = cost_tracker.track_call(
+            model=config.model_name,
+            stage=stage,
+            noise_level=noise_level,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_write_tokens=cache_write_tokens,
+            cache_read_tokens=cache_read_tokens,
+            duration_s=duration_s,
+            ttft_s=ttft_s,
+            price_ratio=price_ratio
         )
+        logger.debug(
+            f"API call completed: {input_tokens}+{output_tokens} tokens "
+            f"(prompt cache: {cache_write_tokens} written, {cache_read_tokens} read), "
+            f"cost=${cost:.4f}"
+        )
+
+    return output, input_tokens, output_tokens
+
+
+def save_stage_output(output_dir: Path, filename: str, text: str) -> Path:
+    """
+    Write a stage's output to disk.
+
+    Args:
+        output_dir: Directory for the current noise level
+        filename: Output file name (e.g., "agent1_french.txt")
+        text: Stage output text
+
+    Returns:
+        Path of the written file
+    """
+    output_path = output_dir / filename
+    with get_tracer().span("file_write", file=filename, chars=len(text)):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    return output_path
 
 
 def run_translation_with_skill(
@@ -107,7 +559,8 @@ def run_translation_with_skill(
     skill_name: str,
     input_text: str,
     stage: int,
-    noise_level: int = 0
+    noise_level: int = 0,
+    stream: Optional[bool] = None
 ) -> Tuple[str, Optional[int], Optional[int]]:
     """
     Run a single translation using a specific Claude Agent skill.
@@ -116,18 +569,26 @@ def run_translation_with_skill(
     instructions and input text, calls the Claude API, and returns the translated
     output along with token usage information for cost tracking.
 
+    The client is wrapped in a ResilientClient (if it is not one already), so
+    the call shares the process-wide rate limits and transient errors such as
+    429 or overload responses are retried with exponential backoff.
+
+    With streaming, the response is read from the streaming Messages API and
+    its time to first token is recorded alongside the request latency.
+
     Args:
         client: Initialized Anthropic API client with valid API key
         skill_name: Name of the skill to use (must exist in skills directory)
         input_text: Text to translate (can contain spelling errors)
         stage: Pipeline stage number (1=English→French, 2=French→Hebrew, 3=Hebrew→English)
         noise_level: Noise level percentage for cost tracking (default: 0)
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
 
     Returns:
         Tuple containing:
             - Translated text (str)
-            - Input tokens used (int or None if tracking disabled)
-            - Output tokens generated (int or None if tracking disabled)
+            - Input tokens used (int, or None if served from the response cache)
+            - Output tokens generated (int, or None if served from the response cache)
 
     Raises:
         SkillNotFoundError: If the specified skill doesn't exist
@@ -151,54 +612,57 @@ def run_translation_with_skill(
         logger.error(f"Failed to load skill: {e}")
         raise
 
-    # Construct the prompt with skill instructions and input
-    prompt = f"""You are using the "{skill_name}" skill.
-
-{skill['content']}
-
----
-
-Please translate the following text according to the skill instructions above.
-Return ONLY the translation, with no explanations or additional text.
+    # Construct the request with skill instructions and input
+    params = build_message_params(
+        skill_name, skill['content'], input_text, skill.get('system_prompt')
+    )
 
-Input text:
-{input_text}"""
+    # Serve byte-identical requests from the response cache (no API call, no cost)
+    cache_key = translation_cache_key(params)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        print(f"  ✓ Stage {stage} complete (cached): {len(cached['output'])} characters")
+        logger.info(f"Stage {stage}: Served from response cache")
+        return cached["output"], None, None
 
     print(f"  Stage {stage}: Invoking {skill_name}...")
     logger.debug(f"Calling API with {len(input_text)} character input")
 
-    try:
-        # Call Claude API
-        response = client.messages.create(
-            model=config.model_name,
-            max_tokens=config.max_tokens,
-            temperature=config.temperature,  # Deterministic for consistency
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+    client = ensure_resilient(client)
+    if stream is None:
+        stream = config.streaming_enabled
 
-        # Extract the text content
-        output = response.content[0].text.strip()
-
-        # Extract token usage
-        input_tokens = response.usage.input_tokens
-        output_tokens = response.usage.output_tokens
-
-        # Track cost if enabled
-        if cost_tracker.enabled:
-            cost = cost_tracker.track_call(
-                model=config.model_name,
-                stage=stage,
-                noise_level=noise_level,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens
-            )
-            logger.debug(
-                f"API call completed: {input_tokens}+{output_tokens} tokens, "
-                f"cost=${cost:.4f}"
+    # Refuse the call if it would exceed the API budget; slow down near the cap
+    budget = get_budget_controller()
+    reservation = budget.admit(params)
+    if reservation is not None and reservation.delay:
+        time.sleep(reservation.delay)
+
+    try:
+        # Call Claude API (retries performed by the client count on the span)
+        with get_tracer().span(
+            "api_call", stage=stage, noise_level=noise_level, skill=skill_name, stream=stream
+        ) as span:
+            if stream:
+                response, timing = client.messages.create_streamed(**params)
+                duration_s, ttft_s = timing.duration_s, timing.ttft_s
+            else:
+                started = time.perf_counter()
+                response = client.messages.create(**params)
+                duration_s, ttft_s = time.perf_counter() - started, None
+
+            # Extract the text content and track token usage
+            output, input_tokens, output_tokens = record_translation_response(
+                response, stage, noise_level, duration_s, ttft_s
             )
+            span.set(input_tokens=input_tokens, output_tokens=output_tokens, ttft_s=ttft_s)
+
+        if cache_key:
+            response_cache.put(cache_key, {
+                "output": output,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens
+            })
 
         print(f"  ✓ Stage {stage} complete: {len(output)} characters")
         logger.info(f"Stage {stage}: Translation successful ({len(output)} chars)")
@@ -219,22 +683,107 @@ Input text:
             f"Translation failed at stage {stage}",
             details={"stage": stage, "skill": skill_name, "error": str(e)}
         )
+    finally:
+        budget.release(reservation)
+
+
+def project_sweep(noise_levels: List[int]) -> Dict[int, RequestEstimate]:
+    """
+    Project the tokens and cost of running the DAG at each noise level.
+
+    Every stage is estimated with the noisy source sentence as its input
+    (translations are about as long as their source). Prompt-cache writes
+    are counted once per skill across the sweep, and levels whose input
+    repeats an earlier level are free when the stage memo would share them.
+
+    Args:
+        noise_levels: Noise levels of the sweep
+
+    Returns:
+        Dictionary mapping noise level to its projected RequestEstimate
+
+    Raises:
+        SkillNotFoundError: If a stage's skill does not exist
+    """
+    estimator = TokenEstimator(tracker=cost_tracker)
+    projections: Dict[int, RequestEstimate] = {}
+    seen_inputs = set()
+    for noise_level in noise_levels:
+        input_text = NOISY_INPUTS[noise_level]
+        projection = RequestEstimate()
+        first_skill = TRANSLATION_DAG.nodes[0].skill
+        shared = (
+            input_text in seen_inputs and stage_memo_key(first_skill, input_text) is not None
+        )
+        if not shared:
+            for node in TRANSLATION_DAG.nodes:
+                skill = load_skill(node.skill)
+                params = build_message_params(
+                    node.skill, skill['content'], input_text, skill.get('system_prompt')
+                )
+                projection = projection + estimator.estimate(params)
+        seen_inputs.add(input_text)
+        projections[noise_level] = projection
+    return projections
+
+
+def print_sweep_projection(
+    projections: Dict[int, RequestEstimate],
+    skipped: Optional[List[int]] = None
+) -> None:
+    """
+    Print a projected sweep cost table.
+
+    Args:
+        projections: Projected usage per noise level
+        skipped: Levels left out because of the budget
+    """
+    skipped = skipped or []
+    total = RequestEstimate()
+    print("Projected sweep cost (estimated locally, before any API call):")
+    for noise_level, estimate in projections.items():
+        note = "  (skipped: over budget)" if noise_level in skipped else ""
+        print(f"  {noise_level:>3}% noise: {estimate.requests} calls, "
+              f"~{estimate.total_tokens:,} tokens, ~${estimate.cost:.4f}{note}")
+        if noise_level not in skipped:
+            total = total + estimate
+    print(f"  Total: {total.requests} calls, ~{total.total_tokens:,} tokens, ~${total.cost:.4f}")
+    budget = get_budget_controller()
+    if budget.enabled:
+        caps = []
+        if budget.max_cost_usd is not None:
+            caps.append(f"${budget.max_cost_usd:.2f}")
+        if budget.max_tokens is not None:
+            caps.append(f"{budget.max_tokens:,} tokens")
+        print(f"  Budget: {' / '.join(caps)}")
+    print()
 
 
-def run_translation_chain(noise_level: int):
+def run_translation_chain(noise_level: int, resume: bool = False, stream: Optional[bool] = None):
     """
-    Run the complete three-stage translation chain for a given noise level.
+    Run the translation DAG for a given noise level.
 
-    This function orchestrates the entire translation pipeline:
+    With the default configuration this is the three-stage round trip:
     1. English → French (handles noisy input)
     2. French → Hebrew (bridges language families)
     3. Hebrew → English (completes round-trip)
 
-    Each stage's output is saved to disk and used as input for the next stage.
+    Any graph defined in the ``agents:`` section is supported: each stage's
+    output is saved to disk and used as input for every stage reading it,
+    and independent branches run concurrently.
+    Every completed stage is recorded in the run manifest; with ``resume=True``
+    stages whose saved outputs are still valid are reused instead of re-run.
     Token usage and costs are tracked automatically if cost tracking is enabled.
 
+    When streaming with ``streaming.pipeline_stages`` enabled, each stage is
+    started as soon as the previous stream ends; saving outputs and updating
+    the manifest happen on a background writer and are finished before the
+    function returns.
+
     Args:
         noise_level: Percentage of spelling errors in input (0, 10, 20, 25, 30, 40, or 50)
+        resume: Reuse stages already completed by a previous run (default: False)
+        stream: Use the streaming Messages API. If None, uses streaming.enabled
 
     Raises:
         ConfigurationError: If API key is not configured
@@ -252,17 +801,17 @@ def run_translation_chain(noise_level: int):
     """
     logger.info(f"Starting translation chain for noise level {noise_level}%")
 
-    # Validate API key using configuration
-    api_key = config.api_key
-    if not api_key:
+    # Validate API key using configuration (not needed by offline backends)
+    backend = get_llm_backend()
+    if backend.requires_api_key and not config.api_key:
         error_msg = "ANTHROPIC_API_KEY environment variable not set"
         logger.error(error_msg)
         print(f"Error: {error_msg}")
         print("Please set it with: export ANTHROPIC_API_KEY='your-key-here'")
         raise ConfigurationError(error_msg)
 
-    # Initialize Anthropic client
-    client = anthropic.Anthropic(api_key=api_key)
+    # Initialize client (retries are handled by the rate-limited wrapper)
+    client = backend.create_client()
 
     # Validate noise level
     if noise_level not in NOISY_INPUTS:
@@ -291,60 +840,96 @@ def run_translation_chain(noise_level: int):
         logger.error(f"Failed to create output directory: {e}", exc_info=True)
         raise
 
-    # Stage 1: English → French
-    french_output, _, _ = run_translation_with_skill(
-        client,
-        "english-to-french-translator",
-        input_text,
-        stage=1,
-        noise_level=noise_level
-    )
-    
-    # Save French output
-    with open(output_dir / "agent1_french.txt", 'w', encoding='utf-8') as f:
-        f.write(french_output + "\n")
-    
-    print(f"  Saved: {output_dir}/agent1_french.txt")
-    print()
-    
-    # Stage 2: French → Hebrew
-    hebrew_output, _, _ = run_translation_with_skill(
-        client,
-        "french-to-hebrew-translator",
-        french_output,
-        stage=2,
-        noise_level=noise_level
-    )
+    manifest = get_run_manifest(config.output_dir, current_endpoint())
 
-    # Save Hebrew output
-    with open(output_dir / "agent2_hebrew.txt", 'w', encoding='utf-8') as f:
-        f.write(hebrew_output + "\n")
+    def persist(stage, filename, stage_input, stage_output):
+        output_path = save_stage_output(output_dir, filename, stage_output)
+        manifest.record(noise_level, stage, output_path, stage_input, stage_output)
 
-    print(f"  Saved: {output_dir}/agent2_hebrew.txt")
-    print()
-
-    # Stage 3: Hebrew → English
-    english_output, _, _ = run_translation_with_skill(
-        client,
-        "hebrew-to-english-translator",
-        hebrew_output,
-        stage=3,
-        noise_level=noise_level
+    if stream is None:
+        stream = config.streaming_enabled
+    writer = (
+        ThreadPoolExecutor(max_workers=1)
+        if stream and config.get("streaming.pipeline_stages", True) else None
     )
+    pending = []
+    outputs = {SOURCE: input_text}
+
+    def run_node(node):
+        with get_tracer().span(
+            "stage", stage=node.stage, noise_level=noise_level, skill=node.skill
+        ) as span:
+            return run_stage(node, span)
+
+    def run_stage(node, span):
+        stage, filename = node.stage, node.output
+        stage_input = outputs[node.input]
+        stage_output = (
+            manifest.load_completed(noise_level, stage, stage_input) if resume else None
+        )
+        span.set(resumed=stage_output is not None)
 
-    # Save English output
-    with open(output_dir / "agent3_english.txt", 'w', encoding='utf-8') as f:
-        f.write(english_output + "\n")
+        if stage_output is not None:
+            print(f"  ↺ Stage {stage}: reusing {output_dir}/{filename}")
+            logger.info(f"Stage {stage}: Resumed from saved output")
+        else:
+            (stage_output, _, _), shared = get_stage_memo().run(
+                stage_memo_key(node.skill, stage_input),
+                lambda: run_translation_with_skill(
+                    client,
+                    node.skill,
+                    stage_input,
+                    stage=stage,
+                    noise_level=noise_level,
+                    stream=stream
+                )
+            )
+            span.set(memoized=shared)
+            if shared:
+                print(f"  ♻ Stage {stage}: identical input already translated, call saved")
+                logger.info(f"Stage {stage}: Reused memoized output")
+                cost_tracker.track_saved_call(stage, noise_level)
+
+            if writer is not None:
+                pending.append(writer.submit(
+                    propagate_context(persist), stage, filename, stage_input, stage_output
+                ))
+            else:
+                persist(stage, filename, stage_input, stage_output)
+
+            print(f"  Saved: {output_dir}/{filename}")
+        print()
+        return stage_output
+
+    # Run the DAG level by level, feeding every output into its children;
+    # independent branches of a level run concurrently
+    with get_tracer().span("chain", noise_level=noise_level, stream=stream, resume=resume):
+        try:
+            for level in TRANSLATION_DAG.levels():
+                if len(level) == 1:
+                    outputs[level[0].id] = run_node(level[0])
+                    continue
+                with ThreadPoolExecutor(max_workers=len(level)) as branches:
+                    results = branches.map(propagate_context(run_node), level)
+                    for node, output in zip(level, results):
+                        outputs[node.id] = output
+        finally:
+            if writer is not None:
+                writer.shutdown(wait=True)
+        for future in pending:
+            future.result()
+
+    english_output = outputs[TRANSLATION_DAG.main_path()[-1].id]
 
-    print(f"  Saved: {output_dir}/agent3_english.txt")
-    print()
-    
     # Summary
     print("-" * 70)
     print("TRANSLATION CHAIN COMPLETE")
     print("-" * 70)
     print(f"Original: {ORIGINAL_CLEAN}")
     print(f"Final:    {english_output}")
+    for leaf in TRANSLATION_DAG.leaves():
+        if leaf.id != TRANSLATION_DAG.main_path()[-1].id:
+            print(f"Branch:   {leaf.id}: {outputs[leaf.id]}")
     print()
     print(f"All outputs saved to: {output_dir}")
 
@@ -374,10 +959,34 @@ def main():
     Command-line arguments:
         --noise LEVEL: Run experiment with specific noise level (0-50%)
         --all: Run experiment with all noise levels (0, 10, 20, 25, 30, 40, 50%)
+        --parallel: With --all, run all noise-level chains concurrently
+        --concurrency N: Maximum in-flight API requests for --parallel
+        --no-cache: Bypass the on-disk response cache
+        --resume: Skip stages already completed by a previous run
+        --batch: Submit each stage as one Message Batch over all selected levels
+        --base-url URL: With --batch, send requests to another endpoint
+                        (e.g. the local fake_batch_server.py); its run state
+                        is sandboxed like an offline backend's
+        --stream: Stream stage responses and report time to first token and
+                  tokens/sec per stage in the cost report
+        --backend NAME: anthropic (default) or mock, a deterministic offline
+                        backend for load testing without network access
+        --corpus FILE: Translate every sentence of a text/JSONL corpus at all
+                       noise levels into a columnar store (outputs/corpus)
+        --budget USD: Stop issuing API calls before spending more than USD;
+                      --all runs the most important noise levels that fit first
+        --estimate: Print the projected tokens and cost of the run and exit
 
     Examples:
         $ python3 run_with_skills.py --noise 25
         $ python3 run_with_skills.py --all
+        $ python3 run_with_skills.py --all --parallel --concurrency 4
+        $ python3 run_with_skills.py --all --batch
+        $ python3 run_with_skills.py --corpus data/sentences.jsonl --concurrency 16
+        $ python3 run_with_skills.py --all --parallel --backend mock
+        $ python3 run_with_skills.py --noise 25 --stream
+        $ python3 run_with_skills.py --all --estimate
+        $ python3 run_with_skills.py --all --budget 0.50
 
     Exit codes:
         0: Success
@@ -392,24 +1001,102 @@ def main():
     parser.add_argument(
         "--noise",
         type=int,
-        choices=[0, 10, 20, 25, 30, 40, 50],
-        help="Noise level percentage (0, 10, 20, 25, 30, 40, or 50)"
+        choices=list(NOISY_INPUTS.keys()),
+        help=f"Noise level percentage ({', '.join(str(level) for level in NOISY_INPUTS)})"
     )
     parser.add_argument(
         "--all",
         action="store_true",
         help="Run all noise levels (0%%, 10%%, 20%%, 25%%, 30%%, 40%%, 50%%)"
     )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Run all noise-level chains concurrently (use with --all)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Maximum concurrent API requests for --parallel "
+             "(default: execution.max_concurrency)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of serving repeated requests from the response cache"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse stages recorded in outputs/run_manifest.json and only run missing ones"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit each stage as one Message Batch (cheaper, not interactive)"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="API base URL for --batch (e.g. http://127.0.0.1:8765 for fake_batch_server.py)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream stage responses and record time-to-first-token and tokens/sec per stage"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKENDS),
+        default=None,
+        help="LLM backend: the Anthropic API or the offline mock (default: llm_backend.name)"
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Translate every sentence of a text or JSONL corpus at all noise levels"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        metavar="USD",
+        help="Spending cap for this run (default: budget.max_cost_usd)"
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Print the projected tokens and cost per noise level without calling the API"
+    )
 
     args = parser.parse_args()
 
     # Validate arguments
-    if not args.noise and not args.all:
+    if not args.noise and not args.all and not args.corpus:
         parser.print_help()
-        print("\nError: Specify --noise LEVEL or --all")
+        print("\nError: Specify --noise LEVEL or --all (or --corpus FILE)")
         logger.error("No noise level specified")
         sys.exit(1)
 
+    if args.backend:
+        set_llm_backend(args.backend)
+    backend = get_llm_backend()
+    if backend.offline:
+        use_endpoint(backend.name, sandbox=True)
+        print(f"Offline backend '{backend.name}': outputs, caches and costs go to {config.data_root}")
+        print()
+    elif args.batch and args.base_url:
+        use_endpoint(f"batch@{urlparse(args.base_url).netloc or args.base_url}", sandbox=True)
+        print(f"Batch endpoint {args.base_url}: outputs, caches and costs go to {config.data_root}")
+        print()
+
+    if args.no_cache:
+        response_cache.enabled = False
+        logger.info("Response cache disabled (--no-cache)")
+
     # Validate skills directory exists
     if not SKILLS_DIR.exists():
         error_msg = f"Skills directory not found: {SKILLS_DIR}"
@@ -418,16 +1105,86 @@ def main():
         print("Please ensure the skills/ directory exists with SKILL.md files")
         sys.exit(1)
 
+    chain_kwargs = {"resume": True} if args.resume else {}
+    stream_kwargs = {"stream": True} if args.stream else {}
+
+    # Project the sweep and fit it to the budget before any API call
+    budget = get_budget_controller()
+    if args.budget is not None:
+        budget.max_cost_usd = args.budget
+    noise_levels = list(config.noise_levels) if args.all else [args.noise]
+    if not args.corpus and (args.estimate or budget.enabled):
+        projections = project_sweep(noise_levels)
+        selected, skipped = budget.plan(projections)
+        print_sweep_projection(projections, skipped)
+        if args.estimate:
+            sys.exit(0)
+        if not selected:
+            print("Error: The budget does not cover any of the requested noise levels")
+            logger.error("Budget too small for the requested run")
+            sys.exit(1)
+        noise_levels = selected
+
     # Run experiment(s)
     try:
-        if args.all:
+        if args.corpus:
+            from corpus_runner import run_corpus
+
+            print(f"Running corpus {args.corpus} at all noise levels...")
+            print()
+            logger.info(f"Running corpus mode for {args.corpus}")
+
+            counts = run_corpus(args.corpus, max_concurrency=args.concurrency)
+            print(f"✓ {counts['sentences']} sentences, {counts['rows']} rows "
+                  f"({counts['errors']} errors, {counts['skipped']} skipped) written to "
+                  f"{config.output_dir / config.get('corpus.output_subdir', 'corpus')}")
+        elif args.batch:
+            from batch_runner import run_batch_sweep
+
+            print(f"Running {len(noise_levels)} noise level(s) through the Message Batches API...")
+            print()
+            logger.info(f"Running batch sweep for noise levels {noise_levels}")
+
+            client = None
+            if args.base_url:
+                client = anthropic.Anthropic(
+                    api_key=config.api_key or "local",
+                    base_url=args.base_url
+                )
+            results = run_batch_sweep(noise_levels, client=client, **chain_kwargs)
+            for noise_level, outcome in results.items():
+                if isinstance(outcome, Exception):
+                    print(f"⚠ Error at noise level {noise_level}: {outcome}")
+                else:
+                    print(f"✓ Noise {noise_level}%: {outcome}")
+        elif args.all and args.parallel:
+            from async_engine import run_all_levels
+
+            print("Running full experiment with all noise levels in parallel...")
+            print()
+            logger.info("Running experiments for all noise levels concurrently")
+
+            results = run_all_levels(
+                noise_levels, args.concurrency, **chain_kwargs, **stream_kwargs
+            )
+            for noise_level, outcome in results.items():
+                if isinstance(outcome, Exception):
+                    print(f"⚠ Error at noise level {noise_level}: {outcome}")
+                else:
+                    print(f"✓ Noise {noise_level}%: {outcome}")
+        elif args.all:
             print("Running full experiment with all noise levels...")
             print()
             logger.info("Running experiments for all noise levels")
 
-            for noise_level in config.noise_levels:
+            for noise_level in noise_levels:
                 try:
-                    run_translation_chain(noise_level)
+                    run_translation_chain(noise_level, **chain_kwargs, **stream_kwargs)
+                except BudgetExceededError as e:
+                    logger.error(f"Budget exhausted at noise level {noise_level}: {e}")
+                    print(f"⚠ Budget exhausted at noise level {noise_level}: {e}")
+                    print("Stopping the sweep.")
+                    break
                 except Exception as e:
                     logger.error(
                         f"Error at noise level {noise_level}: {e}",
@@ -438,12 +1195,15 @@ def main():
                     continue
         else:
             logger.info(f"Running experiment for noise level {args.noise}%")
-            run_translation_chain(args.noise)
+            run_translation_chain(args.noise, **chain_kwargs, **stream_kwargs)
 
     except KeyboardInterrupt:
         logger.warning("Experiment interrupted by user")
         print("\n\n⚠ Experiment interrupted by user")
         sys.exit(130)
+    except BudgetExceededError as e:
+        logger.error(f"Budget exhausted: {e}")
+        print(f"\n⚠ Budget exhausted: {e}")
 
     # Generate and save cost report if enabled
     if cost_tracker.enabled and len(cost_tracker.calls) > 0:
@@ -458,6 +1218,36 @@ def main():
             logger.error(f"Failed to save cost report: {e}", exc_info=True)
             print(f"⚠ Warning: Could not save cost report: {e}")
 
+    tracer = get_tracer()
+    if tracer.enabled and tracer.spans:
+        tracer.print_summary()
+        try:
+            trace_path, histogram_path = tracer.export()
+            print(f"🧭 Trace saved to: {trace_path} (histograms: {histogram_path})")
+        except Exception as e:
+            logger.error(f"Failed to export traces: {e}", exc_info=True)
+            print(f"⚠ Warning: Could not export traces: {e}")
+
+    memo_stats = get_stage_memo().get_stats()
+    if memo_stats["saved"]:
+        print(f"♻  Stage memo: {memo_stats['saved']} API calls saved "
+              f"({memo_stats['executed']} executed for {memo_stats['unique']} unique stage inputs)")
+        logger.info(f"Stage memo stats: {memo_stats}")
+
+    cache_stats = response_cache.get_stats()
+    if cache_stats["hits"] or cache_stats["misses"]:
+        print(f"🗄  Response cache: {cache_stats['hits']} hits, "
+              f"{cache_stats['misses']} misses "
+              f"({cache_stats['hit_ratio']:.0%} hit ratio)")
+        logger.info(f"Response cache stats: {cache_stats}")
+
+    connection_stats = get_client_factory().connection_stats()
+    if connection_stats["requests"]:
+        print(f"🔌 Connections: {connection_stats['requests']} requests over "
+              f"{connection_stats['new_connections']} connections "
+              f"({connection_stats['reuse_ratio']:.0%} reused)")
+        logger.info(f"Connection pool stats: {connection_stats}")
+
     print()
     print("✓ Experiment complete!")
     print(f"📊 Next step: python3 analyze_results_local.py")
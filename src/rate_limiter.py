@@ -0,0 +1,755 @@
+"""
+Rate Limiting and Retry Module
+
+This module wraps Anthropic clients so that every Messages API call made by
+the pipeline and the agent tester shares one rate-limit budget:
+
+- Token buckets for requests/minute and tokens/minute
+- Exponential backoff with full jitter on 429, overload (529), 5xx and
+  connection errors, honouring ``retry-after`` headers
+- AIMD (additive-increase / multiplicative-decrease) concurrency that
+  backs off when the API returns 429 and slowly grows again on success
+
+Streamed requests are read to completion inside the rate-limited section:
+the concurrency slot is held until the stream is drained, the token bucket
+is corrected from the usage reported by the stream, errors raised while
+reading the stream are retried like any other, and the stream is closed
+whether or not it was read successfully.
+
+Limits are read from the ``rate_limits`` section of config.yaml; retry
+settings from ``model.max_retries``, ``model.retry_delay`` and
+``model.timeout``.
+
+Usage:
+    >>> client = ResilientClient(anthropic.Anthropic(api_key="...", max_retries=0))
+    >>> response = client.messages.create(model=..., max_tokens=..., messages=[...])
+    >>> message, timing = client.messages.create_streamed(model=..., messages=[...])
+"""
+
+import asyncio
+import inspect
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+import anthropic
+
+from config import get_config
+from logger import get_logger
+from streaming import consume_stream, consume_stream_async
+from tracing import current_span
+
+logger = get_logger(__name__)
+
+# HTTP status codes worth retrying (rate limited, server errors, overloaded)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Error types of streamed ``error`` events worth retrying (the HTTP status is 200)
+RETRYABLE_ERROR_TYPES = {"rate_limit_error", "overloaded_error", "api_error"}
+
+# Rough characters-per-token ratio used to reserve token budget before a call
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at a per-minute rate.
+
+    The balance may go negative when actual usage exceeds the amount
+    reserved up front (see ``adjust``); callers then wait for the refill.
+
+    Attributes:
+        rate_per_minute: Refill rate (units per minute)
+        capacity: Maximum balance (burst size)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate_per_minute: Refill rate in units per minute
+            capacity: Burst size. If None, equals one minute of refill
+        """
+        self.rate_per_minute = float(rate_per_minute)
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0)
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Take ``amount`` units if available.
+
+        Args:
+            amount: Units to take (clamped to the bucket capacity)
+
+        Returns:
+            0.0 if the units were taken, otherwise seconds to wait before retrying
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) * 60.0 / self.rate_per_minute
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until ``amount`` units have been taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1.0) -> None:
+        """Wait (without blocking the event loop) until ``amount`` units have been taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta: float) -> None:
+        """
+        Correct the balance after the real cost of a call is known.
+
+        Args:
+            delta: Units to add back (positive) or take additionally (negative)
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    @property
+    def available(self) -> float:
+        """Current balance."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def _resolve_waiter(waiter: asyncio.Future) -> None:
+    """Wake a coroutine waiting for a concurrency slot (on its own loop)."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Concurrency limit that adapts to rate limiting.
+
+    Each success raises the limit by ``increase / limit`` (about +1 per full
+    window of requests); each 429 multiplies it by ``decrease_factor``.
+
+    Attributes:
+        limit: Current (fractional) concurrency limit
+        min_limit: Lower bound of the limit
+        max_limit: Upper bound of the limit
+        in_flight: Number of requests currently holding a slot
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Minimum concurrency limit
+            max_limit: Maximum concurrency limit
+            increase: Additive increase per window of successful requests
+            decrease_factor: Multiplier applied on a rate-limit response
+        """
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.limit = min(max(float(initial_limit), self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        # Coroutines waiting for a slot: (event loop, future to resolve)
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _has_slot(self) -> bool:
+        """Check whether another request may start (caller holds the lock)."""
+        return self.in_flight < max(1, int(self.limit))
+
+    def acquire(self) -> None:
+        """Block until a concurrency slot is available."""
+        with self._condition:
+            while not self._has_slot():
+                self._condition.wait()
+            self.in_flight += 1
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting."""
+        with self._condition:
+            if self._has_slot():
+                self.in_flight += 1
+                return True
+            return False
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a concurrency slot is available."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._has_slot():
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def _notify(self) -> None:
+        """Wake every waiting thread and coroutine (caller holds the lock)."""
+        self._condition.notify_all()
+        for loop, waiter in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+            except RuntimeError:
+                pass  # The waiter's event loop is closed
+        self._async_waiters.clear()
+
+    def release(self) -> None:
+        """Return a concurrency slot."""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._notify()
+
+    def on_success(self) -> None:
+        """Additively increase the limit after a successful request."""
+        with self._condition:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self._notify()
+
+    def on_rate_limited(self) -> None:
+        """Multiplicatively decrease the limit after a 429 response."""
+        with self._condition:
+            previous = self.limit
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        logger.info(f"Rate limited: concurrency limit {previous:.2f} -> {self.limit:.2f}")
+
+
+class RateLimiter:
+    """
+    Shared rate-limit budget for all Anthropic calls in the process.
+
+    Attributes:
+        requests: Requests-per-minute bucket
+        tokens: Tokens-per-minute bucket
+        concurrency: Adaptive concurrency limiter
+        max_retries: Maximum retries per call
+        retry_delay: Base backoff delay in seconds
+        max_retry_delay: Upper bound of a single backoff delay
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+        concurrency: Optional[AIMDConcurrencyLimiter] = None
+    ):
+        """
+        Initialize the rate limiter from arguments or configuration.
+
+        Args:
+            requests_per_minute: Request budget (rate_limits.requests_per_minute)
+            tokens_per_minute: Token budget (rate_limits.tokens_per_minute)
+            max_retries: Retries per call (model.max_retries)
+            retry_delay: Base backoff delay (model.retry_delay)
+            timeout: Per-request timeout (model.timeout)
+            concurrency: Concurrency limiter (rate_limits.adaptive_concurrency)
+        """
+        config = get_config()
+
+        self.requests = TokenBucket(
+            requests_per_minute or config.get("rate_limits.requests_per_minute", 50)
+        )
+        self.tokens = TokenBucket(
+            tokens_per_minute or config.get("rate_limits.tokens_per_minute", 40000)
+        )
+        self.max_retries = (
+            max_retries if max_retries is not None else config.get("model.max_retries", 3)
+        )
+        self.retry_delay = (
+            retry_delay if retry_delay is not None else config.get("model.retry_delay", 1)
+        )
+        self.max_retry_delay = config.get("rate_limits.max_retry_delay", 60)
+        self.timeout = timeout if timeout is not None else config.get("model.timeout", 60)
+
+        if concurrency is None:
+            concurrency = AIMDConcurrencyLimiter(
+                initial_limit=config.get("rate_limits.adaptive_concurrency.initial", 4),
+                min_limit=config.get("rate_limits.adaptive_concurrency.min", 1),
+                max_limit=config.get("rate_limits.adaptive_concurrency.max", 32)
+            )
+        self.concurrency = concurrency
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Compute the delay before retry number ``attempt`` (0-based).
+
+        Uses the server's ``retry-after`` header when present, otherwise
+        exponential backoff with full jitter.
+
+        Args:
+            attempt: Retry attempt number
+            error: The error that triggered the retry
+
+        Returns:
+            Delay in seconds
+        """
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_delay)
+        ceiling = min(self.max_retry_delay, self.retry_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def estimate_tokens(request: dict) -> int:
+        """
+        Estimate the tokens a request will consume (prompt plus max output).
+
+        Args:
+            request: Keyword arguments of messages.create
+
+        Returns:
+            Estimated token count
+        """
+        chars = len(str(request.get("system", "")))
+        for message in request.get("messages", []):
+            chars += len(str(message.get("content", "")))
+        return chars // CHARS_PER_TOKEN + int(request.get("max_tokens", 0))
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether an API error is transient and worth retrying.
+
+    Args:
+        error: Exception raised by the Anthropic client
+
+    Returns:
+        True for rate limits, overloads, server errors and connection failures
+    """
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return (
+            error.status_code in RETRYABLE_STATUS_CODES
+            or _error_type(error) in RETRYABLE_ERROR_TYPES
+        )
+    return False
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an error is a 429 rate-limit response (or stream error event)."""
+    return isinstance(error, anthropic.APIStatusError) and (
+        error.status_code == 429 or _error_type(error) == "rate_limit_error"
+    )
+
+
+def _error_type(error: anthropic.APIStatusError) -> Optional[str]:
+    """Error type of an API error body, e.g. ``overloaded_error``."""
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+        if isinstance(body, dict):
+            return body.get("type")
+    return None
+
+
+def _retry_after_seconds(error: Optional[Exception]) -> Optional[float]:
+    """Extract a ``retry-after`` header value (seconds) from an API error."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _actual_tokens(response: Any) -> Optional[int]:
+    """
+    Read total token usage, if reported.
+
+    Accepts a Message, a (Message, StreamTiming) tuple of a consumed stream,
+    or the list of events of a drained stream (input tokens from
+    ``message_start``, output tokens from the last ``message_delta``).
+    """
+    if isinstance(response, tuple):
+        response = response[0]
+    if isinstance(response, list):
+        input_tokens = output_tokens = None
+        for event in response:
+            if event.type == "message_start":
+                input_tokens = getattr(event.message.usage, "input_tokens", None)
+                output_tokens = getattr(event.message.usage, "output_tokens", None)
+            elif event.type == "message_delta":
+                output_tokens = getattr(event.usage, "output_tokens", output_tokens)
+    else:
+        usage = getattr(response, "usage", None)
+        input_tokens = getattr(usage, "input_tokens", None)
+        output_tokens = getattr(usage, "output_tokens", None)
+    if isinstance(input_tokens, int) and isinstance(output_tokens, int):
+        return input_tokens + output_tokens
+    return None
+
+
+def _drain_stream(events: Any, started: float) -> List[Any]:
+    """Read a synchronous event stream into a list."""
+    return list(events)
+
+
+async def _drain_stream_async(events: Any, started: float) -> List[Any]:
+    """Read an asynchronous event stream into a list."""
+    return [event async for event in events]
+
+
+def _close_stream(events: Any) -> None:
+    """Close a synchronous stream, releasing its connection."""
+    close = getattr(events, "close", None)
+    if close is not None:
+        close()
+
+
+async def _close_stream_async(events: Any) -> None:
+    """Close an asynchronous stream, releasing its connection."""
+    close = getattr(events, "aclose", None) or getattr(events, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+class _Messages:
+    """``messages`` namespace of ResilientClient."""
+
+    def __init__(self, owner: "ResilientClient"):
+        self._owner = owner
+
+    def create(self, **kwargs) -> Any:
+        """
+        Rate-limited, retried equivalent of ``client.messages.create``.
+
+        With ``stream=True`` the stream is read to completion under the rate
+        limits and its events are returned as a list.
+        """
+        consume = _drain_stream if kwargs.get("stream") else None
+        return self._owner._call(self._owner.client.messages.create, kwargs, consume)
+
+    def create_streamed(self, on_text: Optional[Callable[[str], None]] = None, **kwargs) -> Any:
+        """
+        Send a streamed request and read it to completion under the rate limits.
+
+        Args:
+            on_text: Optional callback receiving each text delta as it arrives
+            **kwargs: Keyword arguments of ``messages.create`` (without ``stream``)
+
+        Returns:
+            Tuple of (completed Message, StreamTiming), see ``streaming.consume_stream``
+        """
+        return self._owner._call(
+            self._owner.client.messages.create,
+            {**kwargs, "stream": True},
+            lambda events, started: consume_stream(events, started, on_text)
+        )
+
+
+class ResilientClient:
+    """
+    Synchronous Anthropic client wrapper with rate limiting and retries.
+
+    Exposes ``messages.create`` with the same signature as the wrapped
+    client; every other attribute is delegated unchanged.
+
+    Attributes:
+        client: Wrapped ``anthropic.Anthropic`` client
+        limiter: Shared RateLimiter
+        retries: Total number of retries performed
+    """
+
+    def __init__(self, client: Any, limiter: Optional[RateLimiter] = None):
+        """
+        Wrap a client.
+
+        Args:
+            client: Anthropic client (the SDK's own retries should be disabled
+                    with ``max_retries=0`` to avoid retrying twice)
+            limiter: Rate limiter. If None, uses the process-wide limiter
+        """
+        self.client = client
+        self.limiter = limiter or get_rate_limiter()
+        self.retries = 0
+        self.messages = _Messages(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _call(
+        self,
+        create: Callable[..., Any],
+        request: dict,
+        consume: Optional[Callable[[Any, float], Any]] = None
+    ) -> Any:
+        """
+        Run one request under the rate limits, retrying transient errors.
+
+        ``consume(stream, started)`` reads a streamed response while the
+        request still holds its slot; the stream is closed afterwards.
+        """
+        limiter = self.limiter
+        request.setdefault("timeout", limiter.timeout)
+        estimated = limiter.estimate_tokens(request)
+
+        attempt = 0
+        while True:
+            limiter.requests.acquire(1)
+            limiter.tokens.acquire(estimated)
+            limiter.concurrency.acquire()
+            try:
+                stream = None
+                try:
+                    started = time.perf_counter()
+                    response = create(**request)
+                    if consume is not None:
+                        stream = response
+                        response = consume(stream, started)
+                finally:
+                    if stream is not None:
+                        _close_stream(stream)
+            except Exception as e:
+                limiter.concurrency.release()
+                # A failed attempt is not billed: return its token reservation
+                limiter.tokens.adjust(estimated)
+                if is_rate_limited(e):
+                    limiter.concurrency.on_rate_limited()
+                if not is_retryable(e) or attempt >= limiter.max_retries:
+                    raise
+                delay = limiter.backoff_delay(attempt, e)
+                attempt += 1
+                self.retries += 1
+                span = current_span()
+                if span is not None:
+                    span.increment("retries")
+                logger.warning(
+                    f"Transient API error ({e}); retry {attempt}/{limiter.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            limiter.concurrency.release()
+            limiter.concurrency.on_success()
+            actual = _actual_tokens(response)
+            if actual is not None:
+                limiter.tokens.adjust(estimated - actual)
+            return response
+
+
+class _AsyncMessages:
+    """``messages`` namespace of AsyncResilientClient."""
+
+    def __init__(self, owner: "AsyncResilientClient"):
+        self._owner = owner
+
+    async def create(self, **kwargs) -> Any:
+        """
+        Rate-limited, retried equivalent of ``client.messages.create``.
+
+        With ``stream=True`` the stream is read to completion under the rate
+        limits and its events are returned as a list.
+        """
+        consume = _drain_stream_async if kwargs.get("stream") else None
+        return await self._owner._call(self._owner.client.messages.create, kwargs, consume)
+
+    async def create_streamed(
+        self,
+        on_text: Optional[Callable[[str], None]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Send a streamed request and read it to completion under the rate limits.
+
+        Args:
+            on_text: Optional callback receiving each text delta as it arrives
+            **kwargs: Keyword arguments of ``messages.create`` (without ``stream``)
+
+        Returns:
+            Tuple of (completed Message, StreamTiming), see ``streaming.consume_stream_async``
+        """
+        return await self._owner._call(
+            self._owner.client.messages.create,
+            {**kwargs, "stream": True},
+            lambda events, started: consume_stream_async(events, started, on_text)
+        )
+
+
+class AsyncResilientClient:
+    """
+    Asynchronous Anthropic client wrapper with rate limiting and retries.
+
+    Same behaviour as ResilientClient for ``anthropic.AsyncAnthropic``.
+
+    Attributes:
+        client: Wrapped ``anthropic.AsyncAnthropic`` client
+        limiter: Shared RateLimiter
+        retries: Total number of retries performed
+    """
+
+    def __init__(self, client: Any, limiter: Optional[RateLimiter] = None):
+        """
+        Wrap an async client.
+
+        Args:
+            client: AsyncAnthropic client (preferably with ``max_retries=0``)
+            limiter: Rate limiter. If None, uses the process-wide limiter
+        """
+        self.client = client
+        self.limiter = limiter or get_rate_limiter()
+        self.retries = 0
+        self.messages = _AsyncMessages(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    async def _call(
+        self,
+        create: Callable[..., Any],
+        request: dict,
+        consume: Optional[Callable[[Any, float], Any]] = None
+    ) -> Any:
+        """
+        Run one request under the rate limits, retrying transient errors.
+
+        ``await consume(stream, started)`` reads a streamed response while
+        the request still holds its slot; the stream is closed afterwards.
+        """
+        limiter = self.limiter
+        request.setdefault("timeout", limiter.timeout)
+        estimated = limiter.estimate_tokens(request)
+
+        attempt = 0
+        while True:
+            await limiter.requests.acquire_async(1)
+            await limiter.tokens.acquire_async(estimated)
+            await limiter.concurrency.acquire_async()
+            try:
+                stream = None
+                try:
+                    started = time.perf_counter()
+                    response = await create(**request)
+                    if consume is not None:
+                        stream = response
+                        response = await consume(stream, started)
+                finally:
+                    if stream is not None:
+                        await _close_stream_async(stream)
+            except Exception as e:
+                limiter.concurrency.release()
+                # A failed attempt is not billed: return its token reservation
+                limiter.tokens.adjust(estimated)
+                if is_rate_limited(e):
+                    limiter.concurrency.on_rate_limited()
+                if not is_retryable(e) or attempt >= limiter.max_retries:
+                    raise
+                delay = limiter.backoff_delay(attempt, e)
+                attempt += 1
+                self.retries += 1
+                span = current_span()
+                if span is not None:
+                    span.increment("retries")
+                logger.warning(
+                    f"Transient API error ({e}); retry {attempt}/{limiter.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            limiter.concurrency.release()
+            limiter.concurrency.on_success()
+            actual = _actual_tokens(response)
+            if actual is not None:
+                limiter.tokens.adjust(estimated - actual)
+            return response
+
+
+def ensure_resilient(client: Any) -> Any:
+    """
+    Wrap a synchronous client unless it is already wrapped.
+
+    Args:
+        client: Anthropic client or ResilientClient
+
+    Returns:
+        ResilientClient sharing the process-wide rate limiter
+    """
+    if isinstance(client, ResilientClient):
+        return client
+    return ResilientClient(client)
+
+
+def ensure_async_resilient(client: Any) -> Any:
+    """
+    Wrap an asynchronous client unless it is already wrapped.
+
+    Args:
+        client: AsyncAnthropic client or AsyncResilientClient
+
+    Returns:
+        AsyncResilientClient sharing the process-wide rate limiter
+    """
+    if isinstance(client, AsyncResilientClient):
+        return client
+    return AsyncResilientClient(client)
+
+
+# Global rate limiter instance
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get global rate limiter instance (singleton pattern).
+
+    Returns:
+        Global RateLimiter instance
+    """
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+
+def reset_rate_limiter():
+    """Reset the global rate limiter (useful for testing)."""
+    global _limiter
+    _limiter = RateLimiter()
@@ -0,0 +1,270 @@
+"""
+Response Cache Module
+
+This module provides a persistent, content-addressed cache for translation
+responses. Each entry is keyed by a SHA-256 hash of everything that
+determines the model's output (model, temperature, max_tokens, the
+rendered system prompt with the skill instructions, the rendered user
+prompt with the input text, and the endpoint answering it), so
+byte-identical requests are served from disk instead of the API.
+
+Entries are stored as small JSON files. When the cache grows beyond its
+configured size, the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk LRU cache of translation responses.
+
+    Attributes:
+        cache_dir: Directory holding one JSON file per cached response
+        max_size_bytes: Maximum total size of cached entries
+        enabled: Whether lookups and stores are performed
+        hits: Number of successful lookups
+        misses: Number of failed lookups
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            cache_dir: Cache directory. If None, uses response_cache.directory
+            max_size_bytes: Size limit. If None, uses response_cache.max_size_mb
+            enabled: Whether the cache is active. If None, uses response_cache.enabled
+        """
+        config = get_config()
+
+        if cache_dir is None:
+            cache_dir = config.resolve_path(config.get(
+                "response_cache.directory", ".cache/responses"
+            ))
+        if max_size_bytes is None:
+            max_size_bytes = int(config.get("response_cache.max_size_mb", 100) * 1024 * 1024)
+        if enabled is None:
+            enabled = config.get("response_cache.enabled", True)
+
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, list]] = None  # key -> [size, last_used_ns]
+        self._last_used_ns = 0
+
+        logger.info(f"Response cache initialized (enabled={self.enabled}, dir={self.cache_dir})")
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        skill_content: str,
+        input_text: str,
+        endpoint: str = "anthropic"
+    ) -> str:
+        """
+        Build the content-addressed key for a request.
+
+        Args:
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Maximum output tokens
+            skill_content: Skill instructions as sent (the rendered system prompt)
+            input_text: Input as sent (the rendered user prompt)
+            endpoint: Backend answering the request, so responses of offline
+                      backends or fake servers are never served to real runs
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+
+        Example:
+            >>> key = ResponseCache.make_key("claude-sonnet-4", 0, 2000, "skill", "Hello")
+            >>> len(key)
+            64
+        """
+        payload = json.dumps(
+            [model, temperature, max_tokens, skill_content, input_text, endpoint],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key produced by make_key()
+
+        Returns:
+            Cached entry (output, input_tokens, output_tokens), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            path = self._entry_path(key)
+
+            if key not in index:
+                self.misses += 1
+                return None
+
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable cache entry {key[:12]}: {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._touch(key, path)
+            self.hits += 1
+
+        logger.debug(f"Response cache hit: {key[:12]}")
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Store a response and evict old entries if the cache is over its size limit.
+
+        Args:
+            key: Key produced by make_key()
+            entry: JSON-serializable response data
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            index = self._load_index()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            path = self._entry_path(key)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+            index[key] = [path.stat().st_size, 0]
+            self._touch(key, path)
+            self._evict()
+
+        logger.debug(f"Response cached: {key[:12]}")
+
+    def clear(self) -> None:
+        """Remove all cached entries and reset counters."""
+        with self._lock:
+            for key in list(self._load_index()):
+                self._remove(key)
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, hit_ratio, entries and size_bytes
+        """
+        with self._lock:
+            index = self._load_index() if self.enabled else {}
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(index),
+                "size_bytes": sum(size for size, _ in index.values())
+            }
+
+    def _entry_path(self, key: str) -> Path:
+        """Get the file path for a cache key."""
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self) -> Dict[str, list]:
+        """Scan the cache directory once and build the in-memory LRU index."""
+        if self._index is None:
+            self._index = {}
+            if self.cache_dir.exists():
+                for path in self.cache_dir.glob("*.json"):
+                    stat = path.stat()
+                    self._index[path.stem] = [stat.st_size, stat.st_mtime_ns]
+                    self._last_used_ns = max(self._last_used_ns, stat.st_mtime_ns)
+        return self._index
+
+    def _touch(self, key: str, path: Path) -> None:
+        """Mark an entry as most recently used (persisted through its mtime)."""
+        now = max(time.time_ns(), self._last_used_ns + 1)
+        self._last_used_ns = now
+        self._index[key][1] = now
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry from disk and from the index."""
+        self._index.pop(key, None)
+        try:
+            self._entry_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits its size limit."""
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_size_bytes:
+            return
+
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size_bytes:
+                break
+            self._remove(key)
+            total -= size
+            logger.debug(f"Evicted cache entry {key[:12]} ({size} bytes)")
+
+
+# Global response cache instance
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get global response cache instance (singleton pattern).
+
+    Returns:
+        Global ResponseCache instance
+    """
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def reset_response_cache():
+    """Reset the global response cache (useful for testing)."""
+    global _cache
+    _cache = ResponseCache()
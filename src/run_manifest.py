@@ -0,0 +1,217 @@
+"""
+Run Manifest Module
+
+This module records which (noise level, stage) units of a translation sweep
+have completed, together with content hashes of their inputs and outputs.
+A rerun with ``--resume`` consults the manifest, reuses every stage whose
+saved output is still intact and whose input is unchanged, and only calls
+the API for the missing stages.
+
+Units also record the endpoint (LLM backend or batch server) that produced
+them, so outputs of an offline backend are never resumed into a real run.
+
+The manifest is stored as ``outputs/run_manifest.json``.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = "run_manifest.json"
+
+
+def content_hash(text: str) -> str:
+    """
+    Compute the SHA-256 hash of a text.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        Hex digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """
+    Persistent record of completed translation units.
+
+    Each unit is stored under ``units[noise_level][stage]`` with the output
+    file (relative to the manifest directory), the hash of the stage input,
+    the hash of the stage output, the endpoint that produced it, and a
+    completion timestamp.
+
+    Attributes:
+        path: Location of the manifest JSON file
+        endpoint: Endpoint of this run; units of other endpoints are not reused
+        units: Completed units keyed by noise level and stage (as strings)
+    """
+
+    def __init__(self, path: Path, endpoint: str = "anthropic"):
+        """
+        Initialize the manifest, loading any existing file.
+
+        Args:
+            path: Path of the manifest JSON file
+            endpoint: Endpoint answering this run's requests
+        """
+        self.path = Path(path)
+        self.endpoint = endpoint
+        self.units: Dict[str, Dict[str, dict]] = {}
+        # Branches of the translation DAG record units from several threads
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load units from disk; an unreadable manifest is treated as empty."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.units = data.get("units", {})
+            logger.debug(f"Loaded run manifest with {len(self.completed_units())} units")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable run manifest {self.path}: {e}")
+            self.units = {}
+
+    def save(self) -> None:
+        """
+        Write the manifest atomically.
+
+        Failing to checkpoint never aborts a run; the error is logged and the
+        affected stages will simply be recomputed on the next resume.
+        """
+        with self._lock:
+            data = {
+                "updated_at": datetime.now().isoformat(),
+                "units": self.units
+            }
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not update run manifest {self.path}: {e}")
+
+    def record(
+        self,
+        noise_level: int,
+        stage: int,
+        output_path: Path,
+        input_text: str,
+        output_text: str
+    ) -> None:
+        """
+        Record a completed unit and persist the manifest.
+
+        Args:
+            noise_level: Noise level of the chain
+            stage: Completed stage number
+            output_path: File the stage output was written to
+            input_text: Text the stage consumed
+            output_text: Text the stage produced
+        """
+        try:
+            relative = Path(output_path).relative_to(self.path.parent)
+        except ValueError:
+            relative = Path(output_path)
+
+        with self._lock:
+            self.units.setdefault(str(noise_level), {})[str(stage)] = {
+                "file": relative.as_posix(),
+                "input_sha256": content_hash(input_text),
+                "output_sha256": content_hash(output_text),
+                "endpoint": self.endpoint,
+                "completed_at": datetime.now().isoformat()
+            }
+            self.save()
+
+    def load_completed(
+        self,
+        noise_level: int,
+        stage: int,
+        input_text: str
+    ) -> Optional[str]:
+        """
+        Return the saved output of a completed unit, if it can be reused.
+
+        A unit is reusable only when it was recorded by the same endpoint for
+        the same stage input, and its output file still exists with the
+        recorded content hash.
+
+        Args:
+            noise_level: Noise level of the chain
+            stage: Stage number
+            input_text: Text the stage would consume now
+
+        Returns:
+            Saved stage output, or None if the stage must be (re)executed
+        """
+        unit = self.units.get(str(noise_level), {}).get(str(stage))
+        if unit is None:
+            return None
+
+        if unit.get("endpoint", "anthropic") != self.endpoint:
+            logger.info(
+                f"Noise {noise_level}% stage {stage}: recorded by another endpoint "
+                f"({unit.get('endpoint')}), recomputing"
+            )
+            return None
+
+        if unit.get("input_sha256") != content_hash(input_text):
+            logger.info(f"Noise {noise_level}% stage {stage}: input changed, recomputing")
+            return None
+
+        output_path = self.path.parent / unit["file"]
+        try:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                output_text = f.read().rstrip("\n")
+        except OSError:
+            logger.info(f"Noise {noise_level}% stage {stage}: output file missing, recomputing")
+            return None
+
+        if content_hash(output_text) != unit.get("output_sha256"):
+            logger.info(f"Noise {noise_level}% stage {stage}: output file modified, recomputing")
+            return None
+
+        return output_text
+
+    def completed_units(self) -> List[Tuple[int, int]]:
+        """
+        List recorded units.
+
+        Returns:
+            Sorted list of (noise_level, stage) tuples
+        """
+        return sorted(
+            (int(level), int(stage))
+            for level, stages in self.units.items()
+            for stage in stages
+        )
+
+
+def get_run_manifest(output_dir: Path, endpoint: str = "anthropic") -> RunManifest:
+    """
+    Open the run manifest for an output directory.
+
+    Args:
+        output_dir: Root output directory (contains the noise_N folders)
+        endpoint: Endpoint answering this run's requests
+
+    Returns:
+        RunManifest stored at ``output_dir/run_manifest.json``
+    """
+    return RunManifest(Path(output_dir) / MANIFEST_FILENAME, endpoint)
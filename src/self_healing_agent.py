@@ -45,13 +45,12 @@ from typing import Dict, List, Tuple, Optional, Any, Callable
 from dataclasses import dataclass, asdict, field
 from abc import ABC, abstractmethod
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import difflib
 import math
 
 from logger import get_logger
 from errors import AnalysisError
+from embedding_service import get_embedding_service
 
 logger = get_logger(__name__)
 
@@ -158,7 +157,7 @@ class ConfidenceEstimator:
     
     def __init__(self):
         """Initialize confidence estimator."""
-        self.vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1, 3))
+        self.tfidf_params = {"max_features": 1000, "ngram_range": (1, 3)}
         self.logger = logger
     
     def estimate_confidence(
@@ -272,15 +271,7 @@ class ConfidenceEstimator:
     def _semantic_confidence(self, source: str, target: str) -> float:
         """Calculate semantic similarity confidence using TF-IDF."""
         try:
-            texts = [source, target]
-            embeddings = self.vectorizer.fit_transform(texts).toarray()
-            
-            similarity = cosine_similarity(
-                embeddings[0].reshape(1, -1),
-                embeddings[1].reshape(1, -1)
-            )[0][0]
-            
-            return float(similarity)
+            return get_embedding_service().similarity(source, target, **self.tfidf_params)
         except:
             return 0.5
     
@@ -24,13 +24,12 @@ from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass, asdict
 from scipy import stats
 from scipy.stats import f_oneway, chi2_contingency, spearmanr, kendalltau
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import warnings
 import math
 
 from logger import get_logger
 from errors import AnalysisError
+from embedding_service import get_embedding_service
 
 logger = get_logger(__name__)
 
@@ -200,20 +199,14 @@ class SensitivityAnalyzer:
             # Compute distances for each noise level with this dimension
             for noise_str, final_text in final_outputs.items():
                 try:
-                    vectorizer = TfidfVectorizer(
+                    distance = 1 - get_embedding_service().similarity(
+                        original_text,
+                        final_text,
                         max_features=dim,
                         ngram_range=(1, 3),
                         lowercase=True
                     )
                     
-                    texts = [original_text, final_text]
-                    embeddings = vectorizer.fit_transform(texts).toarray()
-                    
-                    distance = 1 - cosine_similarity(
-                        embeddings[0].reshape(1, -1),
-                        embeddings[1].reshape(1, -1)
-                    )[0][0]
-                    
                     distances.append(distance)
                     
                 except Exception as e:
@@ -308,20 +301,14 @@ class SensitivityAnalyzer:
             
             for noise_str, final_text in final_outputs.items():
                 try:
-                    vectorizer = TfidfVectorizer(
+                    distance = 1 - get_embedding_service().similarity(
+                        original_text,
+                        final_text,
                         max_features=1000,
                         ngram_range=ngram_range,
                         lowercase=True
                     )
                     
-                    texts = [original_text, final_text]
-                    embeddings = vectorizer.fit_transform(texts).toarray()
-                    
-                    distance = 1 - cosine_similarity(
-                        embeddings[0].reshape(1, -1),
-                        embeddings[1].reshape(1, -1)
-                    )[0][0]
-                    
                     distances.append(distance)
                     
                 except Exception as e:
@@ -0,0 +1,219 @@
+"""
+Edit-Distance Similarity Module
+
+The default character-level similarity, ``text_similarity``, is
+``difflib.SequenceMatcher.ratio()``, a pure-Python Ratcliff/Obershelp
+matcher whose cost grows quickly with text length. This module computes the
+Indel similarity ratio, reported as the separate ``indel_similarity``
+metric:
+
+    ratio = 2 * LCS(a, b) / (len(a) + len(b))
+
+where LCS is the length of the longest common subsequence. The formula is
+the one difflib uses with its matched characters in place of the LCS.
+difflib's matching blocks are a greedy common subsequence, so both ratios
+agree whenever difflib finds an optimal alignment, and the Indel ratio is
+never lower than difflib's.
+
+The LCS is computed with the bit-parallel algorithm of Hyyrö (2004): the
+characters of ``a`` are bits of a machine word, and each character of ``b``
+updates all of them with a handful of word operations. A single pair uses
+Python integers as arbitrarily long bit vectors, so a comparison costs
+O(len(b) × len(a) / 64) native word operations instead of a Python-level
+dynamic program. One string against many (``indel_ratios``, and the rows of
+``indel_ratio_matrix``) runs the same recurrence on a NumPy array of uint64
+words with one row per choice, advancing every choice by one character per
+step. When the optional ``rapidfuzz`` package is installed, its compiled
+implementation of the same ratio is used.
+
+Usage:
+    >>> from similarity import indel_ratio, indel_ratios
+    >>> indel_ratio("hello", "helo")
+    0.8888888888888888
+    >>> indel_ratios("hello", ["helo", "world", "hello"])
+    array([0.88888889, 0.2       , 1.        ])
+"""
+
+import importlib.util
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+RAPIDFUZZ_AVAILABLE = importlib.util.find_spec("rapidfuzz") is not None
+
+if RAPIDFUZZ_AVAILABLE:
+    from rapidfuzz.distance import Indel
+
+# Below this many choices the per-step NumPy overhead outweighs the batching
+VECTORIZED_MIN_CHOICES = 256
+
+_WORD_BITS = 64
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """Bit mask of the positions of each character of pattern."""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def _lcs_length(masks: Dict[str, int], length: int, text: str) -> int:
+    """LCS of a pattern (given by its masks and length) and text (Hyyrö's bit-vector algorithm)."""
+    full = (1 << length) - 1
+    vector = full
+    for char in text:
+        matches = vector & masks.get(char, 0)
+        vector = ((vector + matches) | (vector - matches)) & full
+    return length - vector.bit_count()
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of each row of a uint64 array."""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def _lcs_lengths(pattern: str, texts: Sequence[str]) -> np.ndarray:
+    """
+    LCS of a pattern and each of several texts, all advanced in lockstep.
+
+    The bit vector of every text is a row of uint64 words. Texts shorter
+    than the longest one are padded with a character absent from the
+    pattern, which leaves their vectors unchanged.
+    """
+    length = len(pattern)
+    if not length or not texts:
+        return np.zeros(len(texts), dtype=np.int64)
+
+    words = (length + _WORD_BITS - 1) // _WORD_BITS
+    codes = {char: code for code, char in enumerate(dict.fromkeys(pattern), start=1)}
+    masks = np.zeros((len(codes) + 1, words), dtype=np.uint64)
+    for position, char in enumerate(pattern):
+        word, bit = divmod(position, _WORD_BITS)
+        masks[codes[char], word] |= np.uint64(1 << bit)
+
+    longest = max(len(text) for text in texts)
+    encoded = np.zeros((len(texts), longest), dtype=np.intp)
+    for row, text in enumerate(texts):
+        encoded[row, :len(text)] = [codes.get(char, 0) for char in text]
+
+    top = np.uint64((1 << (length - (words - 1) * _WORD_BITS)) - 1)
+    vector = np.full((len(texts), words), np.iinfo(np.uint64).max, dtype=np.uint64)
+    vector[:, -1] = top
+    for step in range(longest):
+        matches = vector & masks[encoded[:, step]]
+        # matches is a submask of vector, so vector - matches has no borrow
+        kept = vector & ~matches
+        carry = np.zeros(len(texts), dtype=np.uint64)
+        for word in range(words):
+            current = vector[:, word]
+            total = current + matches[:, word] + carry
+            # The sum wrapped, or matches + carry was exactly 2**64
+            overflow = (total < current) | ((total == current) & (carry == 1))
+            carry = overflow.astype(np.uint64)
+            vector[:, word] = total | kept[:, word]
+        vector[:, -1] &= top
+    return length - _popcount(vector)
+
+
+def lcs_length(a: str, b: str) -> int:
+    """
+    Length of the longest common subsequence of two strings.
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        Number of characters in the longest common subsequence
+
+    Example:
+        >>> lcs_length("kitten", "sitting")
+        4
+    """
+    if len(a) < len(b):
+        a, b = b, a  # The longer string's bits are processed in parallel
+    return _lcs_length(_pattern_masks(a), len(a), b)
+
+
+def indel_ratio(a: str, b: str) -> float:
+    """
+    Indel similarity ratio of two strings.
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        2 * LCS / (len(a) + len(b)), between 0.0 and 1.0 (1.0 for two
+        empty strings, like difflib)
+
+    Example:
+        >>> indel_ratio("hello", "helo")
+        0.8888888888888888
+    """
+    return float(indel_ratios(a, [b])[0])
+
+
+def indel_ratios(query: str, choices: Sequence[str]) -> np.ndarray:
+    """
+    Indel similarity ratios of one string against many.
+
+    The bit masks of ``query`` are built once and reused for every choice;
+    with at least ``VECTORIZED_MIN_CHOICES`` choices, all of them are
+    compared at once on NumPy arrays.
+
+    Args:
+        query: String to compare
+        choices: Strings to compare it with
+
+    Returns:
+        numpy.ndarray of ratios, one per choice
+
+    Example:
+        >>> indel_ratios("hello", ["helo", "hello"])
+        array([0.88888889, 1.        ])
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        return np.array(
+            [Indel.normalized_similarity(query, choice) for choice in choices],
+            dtype=np.float64
+        )
+
+    totals = np.array([len(query) + len(choice) for choice in choices], dtype=np.float64)
+    if len(choices) >= VECTORIZED_MIN_CHOICES:
+        lcs = _lcs_lengths(query, choices)
+    else:
+        masks = _pattern_masks(query)
+        lcs = np.array(
+            [_lcs_length(masks, len(query), choice) for choice in choices], dtype=np.int64
+        )
+    ratios = np.ones(len(choices))
+    np.divide(2.0 * lcs, totals, out=ratios, where=totals > 0)
+    return ratios
+
+
+def indel_ratio_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Indel similarity ratio of every pair of texts.
+
+    Args:
+        texts: Texts to compare
+
+    Returns:
+        numpy.ndarray: symmetric N×N matrix of ratios (1.0 on the diagonal)
+    """
+    n = len(texts)
+    similarities = np.eye(n)
+    for i in range(n - 1):
+        row = indel_ratios(texts[i], texts[i + 1:])
+        similarities[i, i + 1:] = row
+        similarities[i + 1:, i] = row
+    logger.debug(f"Computed {n * (n - 1) // 2} pairwise Indel ratios")
+    return similarities
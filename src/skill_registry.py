@@ -0,0 +1,215 @@
+"""
+Skill Registry Module
+
+This module keeps every skill's SKILL.md in memory so that translation calls
+do not re-open and re-read the file each time. Entries are validated with a
+single ``stat`` per lookup and reloaded only when the file's modification
+time or size changes, so edits to a skill are still picked up immediately.
+
+One registry exists per skills directory and is shared by the pipeline, the
+async and batch engines and the agent tester.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+SKILL_FILENAME = "SKILL.md"
+
+# System prompt sent with every translation (see pipeline.build_message_params)
+SYSTEM_PROMPT_TEMPLATE = """You are using the "{name}" skill.
+
+{content}"""
+
+
+@dataclass
+class SkillEntry:
+    """
+    A loaded skill together with its precomputed prompt.
+
+    Attributes:
+        name: Skill directory name
+        path: Path of the SKILL.md file
+        content: Full SKILL.md content
+        system_prompt: Translation system prompt built from the content
+        mtime_ns: Modification time of the file when it was loaded
+        size: Size of the file when it was loaded
+    """
+    name: str
+    path: Path
+    content: str
+    system_prompt: str
+    mtime_ns: int
+    size: int
+
+    def to_dict(self) -> Dict[str, str]:
+        """Return the skill in the ``{"name", "content", "system_prompt"}`` form."""
+        return {
+            "name": self.name,
+            "content": self.content,
+            "system_prompt": self.system_prompt
+        }
+
+
+def _skill_file_stat(skill_dir: Path) -> Optional[Tuple[int, int]]:
+    """Modification time and size of a skill's SKILL.md (None if it has none)."""
+    try:
+        stat = (skill_dir / SKILL_FILENAME).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SkillRegistry:
+    """
+    In-memory, mtime-validated cache of the skills in one directory.
+
+    Attributes:
+        skills_dir: Directory containing one sub-directory per skill
+        loads: Number of times a SKILL.md file was actually read
+    """
+
+    def __init__(self, skills_dir: Path):
+        """
+        Initialize an empty registry; skills are loaded on first use.
+
+        Args:
+            skills_dir: Directory containing one sub-directory per skill
+        """
+        self.skills_dir = Path(skills_dir)
+        self.loads = 0
+        self._entries: Dict[str, SkillEntry] = {}
+        self._listing: Optional[Tuple[tuple, List[str]]] = None  # (validation key, names)
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[SkillEntry]:
+        """
+        Get a skill, reading its file only if it is new or has changed.
+
+        Args:
+            name: Skill directory name
+
+        Returns:
+            The skill entry, or None if the skill has no SKILL.md
+
+        Raises:
+            IOError: If the skill file exists but cannot be read
+        """
+        path = self.skills_dir / name / SKILL_FILENAME
+        try:
+            stat = path.stat()
+        except OSError:
+            with self._lock:
+                self._entries.pop(name, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                return entry
+
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            entry = SkillEntry(
+                name=name,
+                path=path,
+                content=content,
+                system_prompt=SYSTEM_PROMPT_TEMPLATE.format(name=name, content=content),
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size
+            )
+            self._entries[name] = entry
+            self.loads += 1
+
+        logger.debug(f"Loaded skill into registry: {name} ({len(content)} characters)")
+        return entry
+
+    def names(self) -> List[str]:
+        """
+        List the skills in the directory.
+
+        The result is validated like ``get``: one ``scandir`` of the skills
+        directory and one ``stat`` of each sub-directory's SKILL.md. Adding,
+        removing or renaming a skill directory, or adding or deleting the
+        SKILL.md inside one, therefore changes the key and the listing is
+        rebuilt. Comparing entries rather than the directory's mtime keeps
+        changes made within one mtime tick visible.
+
+        Returns:
+            Sorted list of skill names with a SKILL.md file
+        """
+        try:
+            with os.scandir(self.skills_dir) as entries:
+                key = tuple(sorted(
+                    (entry.name, _skill_file_stat(Path(entry.path)))
+                    for entry in entries if entry.is_dir()
+                ))
+        except OSError:
+            return []
+
+        with self._lock:
+            if self._listing is not None and self._listing[0] == key:
+                return list(self._listing[1])
+
+            names = [name for name, skill_stat in key if skill_stat is not None]
+            self._listing = (key, names)
+            return list(names)
+
+    def preload(self) -> int:
+        """
+        Load every skill in the directory.
+
+        Returns:
+            Number of skills loaded
+        """
+        names = self.names()
+        for name in names:
+            self.get(name)
+        return len(names)
+
+    def invalidate(self) -> None:
+        """Drop all cached skills and the cached directory listing."""
+        with self._lock:
+            self._entries.clear()
+            self._listing = None
+
+
+# Global registries, one per skills directory
+_registries: Dict[Path, SkillRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_skill_registry(skills_dir: Optional[Path] = None) -> SkillRegistry:
+    """
+    Get the shared registry for a skills directory.
+
+    Args:
+        skills_dir: Skills directory. If None, uses config.skills_dir
+
+    Returns:
+        SkillRegistry shared by every caller using the same directory
+    """
+    if skills_dir is None:
+        skills_dir = get_config().skills_dir
+    key = Path(skills_dir).resolve()
+
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = SkillRegistry(key)
+            _registries[key] = registry
+        return registry
+
+
+def reset_skill_registry():
+    """Reset all global skill registries (useful for testing)."""
+    with _registries_lock:
+        _registries.clear()
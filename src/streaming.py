@@ -0,0 +1,144 @@
+"""
+Streaming Module
+
+This module consumes streamed Messages API responses
+(``messages.create(..., stream=True)``) and measures per-stage latency:
+
+- time to first token (TTFT): request start until the first text delta
+- duration: request start until the final ``message_stop`` event
+- output tokens per second over the generation phase
+
+The text deltas are collected in a list and joined once when the stream
+ends, and the ``message_start`` message is completed in place, so callers
+receive a regular ``Message`` that ``pipeline.record_translation_response``
+handles exactly like a non-streamed response.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional
+
+from anthropic.types import TextBlock
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class StreamTiming:
+    """
+    Latency breakdown of one streamed request.
+
+    Attributes:
+        ttft_s: Seconds from request start to the first text token
+                (None if the response contained no text)
+        duration_s: Seconds from request start to the end of the stream
+        output_tokens: Output tokens reported by the stream
+    """
+    ttft_s: Optional[float]
+    duration_s: float
+    output_tokens: int
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Output tokens per second after the first token arrived."""
+        generation = self.duration_s - (self.ttft_s or 0.0)
+        return self.output_tokens / generation if generation > 0 else 0.0
+
+
+class _StreamCollector:
+    """Accumulates stream events into a final message and timing."""
+
+    def __init__(self, started: float, on_text: Optional[Callable[[str], None]]):
+        self.started = started
+        self.on_text = on_text
+        self.message = None
+        self.chunks: List[str] = []
+        self.ttft_s: Optional[float] = None
+        self.output_tokens = 0
+
+    def handle(self, event: Any) -> None:
+        if event.type == "message_start":
+            self.message = event.message
+            self.output_tokens = getattr(event.message.usage, "output_tokens", 0) or 0
+        elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+            if self.ttft_s is None:
+                self.ttft_s = time.perf_counter() - self.started
+            self.chunks.append(event.delta.text)
+            if self.on_text is not None:
+                self.on_text(event.delta.text)
+        elif event.type == "message_delta":
+            self.output_tokens = event.usage.output_tokens
+            if self.message is not None:
+                self.message.stop_reason = event.delta.stop_reason
+
+    def finish(self):
+        if self.message is None:
+            raise ValueError("Stream ended without a message_start event")
+        duration = time.perf_counter() - self.started
+        self.message.content = [TextBlock(type="text", text="".join(self.chunks))]
+        self.message.usage.output_tokens = self.output_tokens
+        timing = StreamTiming(self.ttft_s, duration, self.output_tokens)
+        logger.debug(
+            f"Stream finished: ttft={timing.ttft_s}, duration={duration:.3f}s, "
+            f"{timing.tokens_per_second:.1f} tokens/s"
+        )
+        return self.message, timing
+
+
+def consume_stream(
+    events: Iterable[Any],
+    started: Optional[float] = None,
+    on_text: Optional[Callable[[str], None]] = None
+):
+    """
+    Read a synchronous event stream to completion.
+
+    Args:
+        events: Stream returned by ``messages.create(..., stream=True)``
+        started: ``time.perf_counter()`` value when the request was sent
+                 (defaults to now)
+        on_text: Optional callback receiving each text delta as it arrives
+
+    Returns:
+        Tuple of (completed Message, StreamTiming)
+
+    Raises:
+        ValueError: If the stream contains no message_start event
+
+    Example:
+        >>> started = time.perf_counter()
+        >>> stream = client.messages.create(**params, stream=True)
+        >>> message, timing = consume_stream(stream, started)
+        >>> print(f"TTFT {timing.ttft_s:.2f}s, {timing.tokens_per_second:.0f} tok/s")
+    """
+    collector = _StreamCollector(started if started is not None else time.perf_counter(), on_text)
+    for event in events:
+        collector.handle(event)
+    return collector.finish()
+
+
+async def consume_stream_async(
+    events: AsyncIterable[Any],
+    started: Optional[float] = None,
+    on_text: Optional[Callable[[str], None]] = None
+):
+    """
+    Read an asynchronous event stream to completion.
+
+    Args:
+        events: Stream returned by ``await messages.create(..., stream=True)``
+        started: ``time.perf_counter()`` value when the request was sent
+        on_text: Optional callback receiving each text delta as it arrives
+
+    Returns:
+        Tuple of (completed Message, StreamTiming)
+
+    Raises:
+        ValueError: If the stream contains no message_start event
+    """
+    collector = _StreamCollector(started if started is not None else time.perf_counter(), on_text)
+    async for event in events:
+        collector.handle(event)
+    return collector.finish()
@@ -0,0 +1,376 @@
+"""
+Tracing Module
+
+This module records OpenTelemetry-style spans for the work a run performs,
+so the time spent on API latency, disk I/O and analysis can be told apart:
+
+- ``chain``: one noise level through the translation DAG
+- ``stage``: one DAG node (including memo reuse and resumed stages)
+- ``api_call``: one Messages API request, with token and retry counts
+- ``file_write``: writing a stage output
+- ``analysis.*``: the steps of the semantic drift analysis
+
+Spans nest through a context variable: a span opened while another is
+active becomes its child, across ``await`` points and (with
+``propagate_context``) worker threads. Finished spans are kept in memory
+and ``Tracer.export`` appends them to a JSONL trace file and rolls their
+durations into p50/p95/p99 latency histograms in ``results/``.
+
+Usage:
+    >>> from tracing import get_tracer
+    >>> tracer = get_tracer()
+    >>> with tracer.span("api_call", stage=1) as span:
+    ...     span.set(output_tokens=75)
+    >>> tracer.export()
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """
+    One timed unit of work.
+
+    Attributes:
+        name: Operation name (e.g., "api_call")
+        trace_id: Id shared by all spans of one root span
+        span_id: Unique span id
+        parent_id: Id of the enclosing span (None for root spans)
+        start_time: Wall-clock start time (ISO 8601)
+        duration_s: Duration in seconds (None while the span is open)
+        status: "ok" or "error"
+        attributes: Span attributes (stage, noise level, tokens, retries, ...)
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: str
+    duration_s: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes) -> None:
+        """Set span attributes."""
+        self.attributes.update(attributes)
+
+    def increment(self, attribute: str, amount: int = 1) -> None:
+        """Increment a counter attribute (e.g., retries)."""
+        self.attributes[attribute] = self.attributes.get(attribute, 0) + amount
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+def current_span() -> Optional[Span]:
+    """
+    Get the innermost open span of the current context.
+
+    Returns:
+        Active Span, or None outside any span
+    """
+    return _current_span.get()
+
+
+def propagate_context(func: Callable) -> Callable:
+    """
+    Bind a callable to the current span context for use in worker threads.
+
+    Thread pools do not inherit context variables, so spans opened by a
+    worker would otherwise become root spans.
+
+    Args:
+        func: Callable to run in another thread
+
+    Returns:
+        Wrapper running func in a copy of the caller's context
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+class Tracer:
+    """
+    Collects spans and exports traces and latency histograms.
+
+    Attributes:
+        enabled: Whether spans are recorded
+        spans: Finished spans (the most recent ``max_spans``)
+        max_spans: Finished spans kept in memory before the oldest are dropped
+        dropped: Spans dropped from memory because of ``max_spans``
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_spans: Optional[int] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: Record spans. If None, uses ``tracing.enabled``
+            max_spans: In-memory span limit. If None, uses ``tracing.max_spans``
+        """
+        config = get_config()
+        self.enabled = (
+            enabled if enabled is not None else bool(config.get("tracing.enabled", True))
+        )
+        self.max_spans = int(
+            max_spans if max_spans is not None else config.get("tracing.max_spans", 100000)
+        )
+        self.spans: Deque[Span] = deque(maxlen=self.max_spans)
+        self.dropped = 0
+        self._unexported: Deque[Span] = deque(maxlen=self.max_spans)
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, **attributes) -> Tuple[Span, contextvars.Token, float]:
+        """Open a span as a child of the current one; use ``span`` instead where possible."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_time=datetime.now().isoformat(),
+            attributes=attributes
+        )
+        return span, _current_span.set(span), time.perf_counter()
+
+    def end_span(self, span: Span, token: contextvars.Token, started: float) -> None:
+        """Close a span opened with ``start_span`` and record it."""
+        span.duration_s = time.perf_counter() - started
+        _current_span.reset(token)
+        if not self.enabled:
+            return
+        with self._lock:
+            # Bounded deques drop their oldest span in O(1)
+            if len(self.spans) == self.max_spans:
+                self.dropped += 1
+            self.spans.append(span)
+            self._unexported.append(span)
+
+    def span(self, name: str, **attributes) -> "_SpanContext":
+        """
+        Context manager timing a block as a span.
+
+        Exceptions are recorded as an "error" status (with the exception
+        type) and re-raised. Works in threads and coroutines alike.
+
+        Args:
+            name: Operation name
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the Span (not recorded when disabled)
+
+        Example:
+            >>> with get_tracer().span("file_write", file="agent1_french.txt"):
+            ...     path.write_text(text)
+        """
+        return _SpanContext(self, name, attributes)
+
+    def get_histograms(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize span durations by operation.
+
+        Spans with a ``stage`` attribute are additionally grouped per stage
+        (e.g. ``api_call.stage1``).
+
+        Returns:
+            Dictionary mapping operation to 'count', 'mean_ms', 'p50_ms',
+            'p95_ms', 'p99_ms', 'max_ms' and 'buckets' (bucket upper bound
+            in ms, or "inf", to span count)
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        durations: Dict[str, List[float]] = {}
+        for span in spans:
+            if span.duration_s is None:
+                continue
+            keys = [span.name]
+            if "stage" in span.attributes:
+                keys.append(f"{span.name}.stage{span.attributes['stage']}")
+            for key in keys:
+                durations.setdefault(key, []).append(span.duration_s * 1000)
+
+        histograms = {}
+        for key in sorted(durations):
+            values = np.asarray(durations[key])
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            counts = np.bincount(
+                np.searchsorted(HISTOGRAM_BUCKETS_MS, values),
+                minlength=len(HISTOGRAM_BUCKETS_MS) + 1
+            )
+            bounds = [str(bound) for bound in HISTOGRAM_BUCKETS_MS] + ["inf"]
+            histograms[key] = {
+                "count": int(values.size),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+                "buckets": {bound: int(count) for bound, count in zip(bounds, counts)}
+            }
+        return histograms
+
+    def export(
+        self,
+        trace_file: Optional[Path] = None,
+        histogram_file: Optional[Path] = None
+    ) -> Optional[Tuple[Path, Path]]:
+        """
+        Append finished spans to the trace file and save latency histograms.
+
+        Histograms cover every span recorded by this tracer; exported spans
+        are kept for them and only written to the trace file once.
+
+        Args:
+            trace_file: JSONL trace file. If None, uses ``tracing.trace_file``
+            histogram_file: Histogram JSON. If None, uses ``tracing.histogram_file``
+
+        Returns:
+            Tuple of (trace file, histogram file), or None if there is nothing
+            to export
+        """
+        config = get_config()
+        if trace_file is None:
+            trace_file = config.resolve_path(config.get(
+                "tracing.trace_file", "results/traces.jsonl"
+            ))
+        if histogram_file is None:
+            histogram_file = config.resolve_path(config.get(
+                "tracing.histogram_file", "results/latency_histograms.json"
+            ))
+
+        with self._lock:
+            pending, self._unexported = self._unexported, deque(maxlen=self.max_spans)
+            if not self.spans:
+                return None
+
+        trace_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_file, "a", encoding="utf-8") as f:
+            for span in pending:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+        histogram_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(histogram_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.now().isoformat(),
+                "spans": len(self.spans),
+                "dropped_spans": self.dropped,
+                "histograms": self.get_histograms()
+            }, f, indent=2)
+
+        logger.info(f"Exported {len(pending)} spans to {trace_file}")
+        return trace_file, histogram_file
+
+    def print_summary(self) -> None:
+        """Print p50/p95/p99 latencies of every operation."""
+        histograms = self.get_histograms()
+        if not histograms:
+            return
+        print("\nLatency (p50 / p95 / p99):")
+        for key, histogram in histograms.items():
+            print(f"  {key:<22} {histogram['p50_ms']:>9.1f} / {histogram['p95_ms']:>9.1f} / "
+                  f"{histogram['p99_ms']:>9.1f} ms  ({histogram['count']} spans)")
+
+
+class _SpanContext:
+    """Context manager returned by ``Tracer.span`` (sync and async ``with``)."""
+
+    def __init__(self, tracer: Tracer, name: str, attributes: dict):
+        self._tracer = tracer
+        self._name = name
+        self._attributes = attributes
+        self._open = None
+
+    def __enter__(self) -> Span:
+        self._open = self._tracer.start_span(self._name, **self._attributes)
+        return self._open[0]
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        span = self._open[0]
+        if exc_type is not None:
+            span.status = "error"
+            span.set(error=exc_type.__name__)
+        self._tracer.end_span(*self._open)
+        return False
+
+    async def __aenter__(self) -> Span:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return self.__exit__(exc_type, exc, tb)
+
+
+# Global tracer instance
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get global tracer instance (singleton pattern).
+
+    Returns:
+        Global Tracer instance
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator running every call of a function in a span of the global tracer.
+
+    Args:
+        name: Operation name
+
+    Returns:
+        Decorator
+
+    Example:
+        >>> @traced("analysis.embeddings")
+        ... def get_local_embedding(texts): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset_tracer():
+    """Reset the global tracer (useful for testing)."""
+    global _tracer
+    _tracer = None
@@ -0,0 +1,265 @@
+"""
+Translation DAG Module
+
+This module turns the ``agents:`` section of config.yaml into the graph of
+translation stages the pipeline executes. Every agent is a node that runs
+one skill on the output of its ``input`` node (or on the noisy source
+sentence), so the graph can be a chain of any length or a tree with
+branches, e.g. several pivot languages fanning out from the French output:
+
+    agents:
+      english_to_french:
+        name: "english-to-french-translator"
+        stage: 1
+        output: "agent1_french.txt"
+      french_to_hebrew:
+        name: "french-to-hebrew-translator"
+        stage: 2
+        output: "agent2_hebrew.txt"
+      french_to_spanish:
+        name: "french-to-spanish-translator"
+        stage: 4
+        input: english_to_french
+        output: "agent4_spanish.txt"
+
+``input`` defaults to the previous agent in the list (the first agent reads
+the source), which keeps plain chains free of wiring. Every node runs once
+per noise level and its output feeds all of its children, so experiments
+sharing a prefix (such as chains of length 3 and 5 through the same first
+stages) share those upstream calls.
+
+The ``stage`` number identifies a node in output files, the run manifest and
+cost tracking; it defaults to the node's position in the list.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import get_config
+from errors import ConfigurationError
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Input name of nodes that read the noisy source sentence
+SOURCE = "source"
+
+# The round-trip chain used when config.yaml defines no agents
+DEFAULT_AGENTS = {
+    "english_to_french": {
+        "name": "english-to-french-translator", "stage": 1, "output": "agent1_french.txt"
+    },
+    "french_to_hebrew": {
+        "name": "french-to-hebrew-translator", "stage": 2, "output": "agent2_hebrew.txt"
+    },
+    "hebrew_to_english": {
+        "name": "hebrew-to-english-translator", "stage": 3, "output": "agent3_english.txt"
+    }
+}
+
+
+@dataclass(frozen=True)
+class DagNode:
+    """
+    One translation stage of the DAG.
+
+    Attributes:
+        id: Agent key in config.yaml
+        skill: Skill run by the node
+        stage: Unique stage number
+        output: Output file name inside ``outputs/noise_N/``
+        input: Id of the upstream node, or SOURCE
+        description: Human-readable description
+    """
+    id: str
+    skill: str
+    stage: int
+    output: str
+    input: str = SOURCE
+    description: str = ""
+
+
+class TranslationDAG:
+    """
+    Validated, topologically ordered translation graph.
+
+    Attributes:
+        nodes: Nodes in topological order (parents before children)
+    """
+
+    def __init__(self, nodes: List[DagNode]):
+        """
+        Validate and order the nodes.
+
+        Args:
+            nodes: Nodes in any order
+
+        Raises:
+            ConfigurationError: If the graph is empty, has duplicate ids or
+                                stage numbers, unknown inputs or a cycle
+        """
+        if not nodes:
+            raise ConfigurationError("The translation DAG has no stages")
+
+        by_id: Dict[str, DagNode] = {}
+        stages = set()
+        for node in nodes:
+            if node.id in by_id or node.id == SOURCE:
+                raise ConfigurationError(
+                    f"Duplicate or reserved stage id: {node.id}", details={"id": node.id}
+                )
+            if node.stage in stages:
+                raise ConfigurationError(
+                    f"Duplicate stage number: {node.stage}", details={"id": node.id}
+                )
+            by_id[node.id] = node
+            stages.add(node.stage)
+
+        for node in nodes:
+            if node.input != SOURCE and node.input not in by_id:
+                raise ConfigurationError(
+                    f"Stage '{node.id}' reads unknown input '{node.input}'",
+                    details={"id": node.id, "input": node.input}
+                )
+
+        # Kahn's algorithm, keeping the configured order among ready nodes
+        ordered: List[DagNode] = []
+        done = {SOURCE}
+        remaining = list(nodes)
+        while remaining:
+            ready = [node for node in remaining if node.input in done]
+            if not ready:
+                raise ConfigurationError(
+                    "The translation DAG contains a cycle",
+                    details={"stages": [node.id for node in remaining]}
+                )
+            for node in ready:
+                ordered.append(node)
+                done.add(node.id)
+                remaining.remove(node)
+
+        self.nodes = ordered
+        self._by_id = by_id
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, node_id: str) -> DagNode:
+        """Get a node by id."""
+        return self._by_id[node_id]
+
+    def children(self, node_id: str) -> List[DagNode]:
+        """
+        Get the nodes reading a node's output.
+
+        Args:
+            node_id: Node id, or SOURCE for the nodes reading the source
+
+        Returns:
+            Child nodes in topological order
+        """
+        return [node for node in self.nodes if node.input == node_id]
+
+    def leaves(self) -> List[DagNode]:
+        """Get the nodes whose output nobody reads."""
+        parents = {node.input for node in self.nodes}
+        return [node for node in self.nodes if node.id not in parents]
+
+    def depth(self, node_id: str) -> int:
+        """Get a node's distance from the source (1 for source readers)."""
+        node = self._by_id[node_id]
+        return 1 if node.input == SOURCE else 1 + self.depth(node.input)
+
+    def levels(self) -> List[List[DagNode]]:
+        """
+        Group nodes by depth; nodes of one level are independent.
+
+        Returns:
+            List of node lists, shallowest first
+        """
+        grouped: Dict[int, List[DagNode]] = {}
+        for node in self.nodes:
+            grouped.setdefault(self.depth(node.id), []).append(node)
+        return [grouped[depth] for depth in sorted(grouped)]
+
+    def main_path(self) -> List[DagNode]:
+        """
+        Get the main chain: from the source, always follow the first child.
+
+        For a plain chain this is every node. Modes that only support a
+        linear chain (batch, corpus) run this path.
+
+        Returns:
+            Nodes of the main chain in order
+        """
+        path: List[DagNode] = []
+        children = self.children(SOURCE)
+        while children:
+            path.append(children[0])
+            children = self.children(children[0].id)
+        return path
+
+    def is_linear(self) -> bool:
+        """Check whether the DAG is a single chain."""
+        return len(self.main_path()) == len(self.nodes)
+
+
+def dag_from_agents(agents: Dict[str, dict]) -> TranslationDAG:
+    """
+    Build a DAG from an ``agents:`` mapping.
+
+    Args:
+        agents: Mapping of agent id to its settings (name, stage, input,
+                output, description)
+
+    Returns:
+        Validated TranslationDAG
+
+    Raises:
+        ConfigurationError: If an agent has no skill name or the graph is invalid
+    """
+    nodes: List[DagNode] = []
+    previous = SOURCE
+    for position, (agent_id, settings) in enumerate(agents.items(), start=1):
+        settings = settings or {}
+        skill = settings.get("name")
+        if not skill:
+            raise ConfigurationError(
+                f"Agent '{agent_id}' has no skill name", details={"id": agent_id}
+            )
+        stage = int(settings.get("stage", position))
+        nodes.append(DagNode(
+            id=agent_id,
+            skill=skill,
+            stage=stage,
+            output=settings.get("output", f"agent{stage}_{agent_id}.txt"),
+            input=settings.get("input", previous),
+            description=settings.get("description", "")
+        ))
+        previous = agent_id
+    return TranslationDAG(nodes)
+
+
+def load_translation_dag(agents: Optional[Dict[str, dict]] = None) -> TranslationDAG:
+    """
+    Load the translation DAG from configuration.
+
+    Args:
+        agents: Agent mapping. If None, uses the ``agents:`` section
+                (or DEFAULT_AGENTS when it is missing)
+
+    Returns:
+        Validated TranslationDAG
+
+    Example:
+        >>> dag = load_translation_dag()
+        >>> [node.skill for node in dag.main_path()]
+        ['english-to-french-translator', 'french-to-hebrew-translator', 'hebrew-to-english-translator']
+    """
+    if agents is None:
+        agents = get_config().get("agents") or DEFAULT_AGENTS
+    dag = dag_from_agents(agents)
+    logger.debug(
+        f"Translation DAG loaded: {len(dag)} stages, {len(dag.leaves())} leaves"
+    )
+    return dag
@@ -10,10 +10,19 @@ import shutil
 from pathlib import Path
 from unittest.mock import Mock, MagicMock
 import sys
+import os
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+# Keep the on-disk response cache out of tests; tests that exercise it
+# construct their own ResponseCache in a temporary directory
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+# Mocked API calls should never wait on the shared rate limiter
+os.environ["RATE_LIMITS_REQUESTS_PER_MINUTE"] = "1000000"
+os.environ["RATE_LIMITS_TOKENS_PER_MINUTE"] = "1000000000"
+
 from tests.fixtures.mock_data import (
     MOCK_SKILL_ENGLISH_TO_FRENCH,
     MOCK_SKILL_FRENCH_TO_HEBREW,
@@ -125,11 +134,57 @@ def mock_analysis_outputs(temp_dir):
 
 
 @pytest.fixture(autouse=True)
-def reset_environment(monkeypatch):
+def reset_environment(monkeypatch, tmp_path):
     """Reset environment variables for each test"""
     # Set a dummy API key for tests that don't mock it
     monkeypatch.setenv("ANTHROPIC_API_KEY", "test-api-key-123")
 
+    # Spans of one test must not show up in the next; exports stay out of results/
+    monkeypatch.setenv("TRACING_TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setenv("TRACING_HISTOGRAM_FILE", str(tmp_path / "latency_histograms.json"))
+    from tracing import reset_tracer
+    reset_tracer()
+
+    # Cost ledgers of test runs stay out of results/
+    monkeypatch.setenv("COST_TRACKING_LEDGER_FILE", str(tmp_path / "cost_ledger.jsonl"))
+
+    # Embeddings stored by one test must not be served to the next
+    monkeypatch.setenv("ANALYSIS_EMBEDDING_STORE_DIRECTORY", str(tmp_path / "embeddings"))
+
+    # Tests that patch builtins.open must not leave mocked skill content cached
+    from skill_registry import reset_skill_registry
+    reset_skill_registry()
+
+    # A --backend flag parsed in one test must not select the backend of the next
+    from llm_backend import reset_llm_backend
+    reset_llm_backend()
+
+    # An offline run in one test must not move the run state of the next
+    import pipeline
+    from config import get_config
+    for instance in {id(c): c for c in (get_config(), pipeline.config)}.values():
+        monkeypatch.setattr(instance, "data_root", instance.project_root)
+    monkeypatch.setattr(pipeline, "_endpoint", None)
+    monkeypatch.setattr(pipeline, "response_cache", pipeline.response_cache)
+
+    # Pooled clients are built from anthropic.Anthropic, which tests patch
+    from client_factory import reset_client_factory
+    reset_client_factory()
+
+    # Memoized stage outputs must not leak between tests
+    from pipeline import reset_stage_memo
+    reset_stage_memo()
+
+    # Embeddings cached by one test must not hide fitting in the next
+    from embedding_service import reset_embedding_service
+    from embedding_store import reset_embedding_store
+    reset_embedding_service()
+    reset_embedding_store()
+
+    # Budget caps set by one test (or --budget) must not limit the next
+    from budget import reset_budget_controller
+    reset_budget_controller()
+
 
 @pytest.fixture
 def mock_embedding_vectors():
@@ -7,6 +7,8 @@ Tests cover:
 - Agent invocation
 - CLI interface
 - Error handling
+- Batch file mode
+- Interactive REPL and Unix socket modes
 """
 
 import pytest
@@ -94,6 +96,20 @@ class TestInvokeAgent:
         assert "Tokens used" in captured.out
 
 
+    def test_prompt_caching_follows_config(self, mock_anthropic_client, monkeypatch):
+        """Test that the skill block is only marked cacheable with prompt caching on"""
+        skill = {"name": "test", "content": "content"}
+
+        invoke_agent(mock_anthropic_client, skill, "input")
+        system = mock_anthropic_client.messages.create.call_args.kwargs["system"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+
+        monkeypatch.setenv("MODEL_PROMPT_CACHING", "false")
+        invoke_agent(mock_anthropic_client, skill, "input")
+        system = mock_anthropic_client.messages.create.call_args.kwargs["system"]
+        assert "cache_control" not in system[0]
+
+
 class TestInvokeAgentErrorHandling:
     """Test invoke_agent error handling"""
 
@@ -266,3 +282,318 @@ class TestListAgentsExtended:
 
             # Should return empty list
             assert isinstance(agents, list)
+
+
+class TestBatchMode:
+    """Test running a file of (agent, input) rows"""
+
+    AGENTS = [
+        "english-to-french-translator",
+        "french-to-hebrew-translator",
+        "hebrew-to-english-translator"
+    ]
+
+    @pytest.fixture
+    def mock_backend(self, monkeypatch):
+        """Use the offline mock backend."""
+        import llm_backend
+        from llm_backend import MockBackend, MockLLM
+
+        backend = MockBackend(MockLLM(latency="constant", latency_ms=20))
+        monkeypatch.setattr(llm_backend, "_backend", backend)
+        return backend
+
+    def write_jsonl(self, path, rows):
+        """Write rows as JSONL."""
+        import json
+        path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+        return path
+
+    def test_read_jsonl_and_csv(self, temp_dir):
+        """Test that both formats yield numbered rows"""
+        from agent_tester import iter_batch_rows
+
+        jsonl = self.write_jsonl(temp_dir / "rows.jsonl", [
+            {"agent": "a", "input": "x", "id": "first"},
+            {"agent": "b", "input": "y"}
+        ])
+        csv_file = temp_dir / "rows.csv"
+        csv_file.write_text("agent,input\na,\"x, with comma\"\n", encoding="utf-8")
+
+        assert [(r["row"], r["id"], r["agent"]) for r in iter_batch_rows(jsonl)] == [
+            (0, "first", "a"), (1, 1, "b")
+        ]
+        assert list(iter_batch_rows(csv_file)) == [
+            {"row": 0, "id": 0, "agent": "a", "input": "x, with comma"}
+        ]
+
+    @pytest.mark.parametrize("name,content", [
+        ("rows.jsonl", "not json\n"),
+        ("rows.jsonl", '{"input": "missing agent"}\n'),
+        ("rows.jsonl", '["a", "b"]\n'),
+        ("rows.txt", "agent,input\n")
+    ])
+    def test_malformed_files(self, temp_dir, name, content):
+        """Test that malformed rows and unknown formats are rejected"""
+        from agent_tester import iter_batch_rows
+        from errors import ValidationError
+
+        path = temp_dir / name
+        path.write_text(content, encoding="utf-8")
+        with pytest.raises(ValidationError):
+            list(iter_batch_rows(path))
+
+    def test_run_batch(self, temp_dir, mock_backend):
+        """Test that every row gets a result line with latency and tokens"""
+        import json
+        from agent_tester import run_batch
+
+        rows = [{"agent": agent, "input": f"sentence {i}"}
+                for i in range(4) for agent in self.AGENTS]
+        rows += [{"agent": "missing-agent", "input": "x"}, {"agent": self.AGENTS[0], "input": " "}]
+        output = temp_dir / "out" / "results.jsonl"
+
+        summary = run_batch(self.write_jsonl(temp_dir / "rows.jsonl", rows), output, max_workers=4)
+
+        results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+        assert summary["rows"] == len(results) == 14
+        assert summary["succeeded"] == 12 and summary["failed"] == 2
+        assert mock_backend.llm.stats["calls"] == 12
+        assert sorted(r["row"] for r in results) == list(range(14))
+        ok = [r for r in results if not r["error"]]
+        assert all(r["latency_s"] > 0 and r["output_tokens"] > 0 for r in ok)
+        assert summary["input_tokens"] == sum(r["input_tokens"] for r in ok)
+        failed = {r["agent"]: r["error"] for r in results if r["error"]}
+        assert failed["missing-agent"].startswith("SkillNotFoundError")
+
+    def test_rows_run_concurrently(self, temp_dir, mock_backend):
+        """Test that the worker pool overlaps requests"""
+        from agent_tester import run_batch
+
+        rows = [{"agent": self.AGENTS[0], "input": f"s{i}"} for i in range(16)]
+        path = self.write_jsonl(temp_dir / "rows.jsonl", rows)
+
+        summary = run_batch(path, temp_dir / "results.jsonl", max_workers=8)
+
+        assert summary["succeeded"] == 16
+        assert summary["elapsed_s"] < 16 * 0.02 / 2
+
+    def test_main_batch(self, temp_dir, mock_backend, monkeypatch, capsys):
+        """Test the --batch CLI with the default output path"""
+        from agent_tester import main
+
+        path = self.write_jsonl(temp_dir / "sweep.jsonl", [
+            {"agent": agent, "input": "Hello"} for agent in self.AGENTS
+        ])
+        monkeypatch.setattr(sys, "argv", ["test_agent.py", "--batch", str(path), "--workers", "2"])
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code == 0
+        assert "3/3 rows succeeded" in capsys.readouterr().out
+        assert len((temp_dir / "sweep.results.jsonl").read_text().splitlines()) == 3
+
+    def test_main_batch_failures_exit_nonzero(self, temp_dir, mock_backend, monkeypatch):
+        """Test that failed rows make the batch exit with status 1"""
+        from agent_tester import main
+
+        path = self.write_jsonl(temp_dir / "sweep.jsonl", [{"agent": "missing", "input": "x"}])
+        monkeypatch.setattr(sys, "argv", ["test_agent.py", "--batch", str(path)])
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 1
+
+
+class TestInteractiveMode:
+    """Test the warm REPL and socket modes"""
+
+    @pytest.fixture
+    def session(self, monkeypatch):
+        """Create a session on the offline mock backend."""
+        import llm_backend
+        from agent_tester import AgentSession
+        from llm_backend import MockBackend, MockLLM
+
+        backend = MockBackend(MockLLM(latency="constant", latency_ms=1))
+        monkeypatch.setattr(llm_backend, "_backend", backend)
+        return AgentSession("english-to-french-translator")
+
+    def test_plain_text(self, session):
+        """Test that plain text goes to the default agent with latency and tokens"""
+        response = session.handle("Hello world\n")
+
+        first_line, timing = response.splitlines()
+        assert first_line == "[translator] Hello world"
+        assert " ms, tokens: input=" in timing
+        assert session.handle("   ") is None
+
+    def test_json_request(self, session):
+        """Test JSON requests and their JSON results"""
+        import json
+
+        result = json.loads(session.handle(
+            '{"agent": "hebrew-to-english-translator", "input": "shalom"}'
+        ))
+
+        assert result["agent"] == "hebrew-to-english-translator"
+        assert result["error"] is None
+        assert result["latency_s"] > 0
+        assert "error" in json.loads(session.handle('{"agent": "x"}'))
+
+    def test_switch_agent(self, session):
+        """Test the :agent and :agents commands"""
+        assert "french-to-hebrew-translator" in session.handle(":agents")
+        assert session.handle(":agent french-to-hebrew-translator").startswith("✓")
+        assert session.agent == "french-to-hebrew-translator"
+        assert session.handle(":agent nope").startswith("❌")
+        assert session.agent == "french-to-hebrew-translator"
+
+    def test_client_created_once(self, session):
+        """Test that requests reuse the session's client"""
+        client = session.client
+        session.handle("one")
+        session.handle("two")
+        assert session.client is client
+        assert session.requests == 2
+
+    def test_repl(self, session):
+        """Test that the REPL answers every line until :quit"""
+        import io
+        from agent_tester import run_repl
+
+        stdin = io.StringIO(
+            "Hello\n\n:agent hebrew-to-english-translator\nshalom\n:quit\nignored\n"
+        )
+        stdout = io.StringIO()
+        served = run_repl(session, stdin, stdout)
+
+        assert served == 2
+        output = stdout.getvalue()
+        assert "[translator] Hello" in output
+        assert "[translator] shalom" in output
+        assert session.agent == "hebrew-to-english-translator"
+        assert "ignored" not in output
+
+    def test_socket_server(self, session, tmp_path):
+        """Test request/response round trips over the Unix socket"""
+        import json
+        import socket
+        import threading
+        from agent_tester import AgentSocketServer
+
+        socket_path = tmp_path / "agent.sock"
+        server = AgentSocketServer(socket_path, session)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.connect(str(socket_path))
+                stream = conn.makefile("rw", encoding="utf-8")
+                for text in ("one", "two"):
+                    stream.write(json.dumps({"input": text}) + "\n")
+                    stream.flush()
+                    result = json.loads(stream.readline())
+                    assert result["input"] == text
+                    assert result["output"] == f"[translator] {text}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert session.requests == 2
+        assert not socket_path.exists()
+
+    def test_socket_connections_keep_their_agent(self, session, tmp_path):
+        """Test that :agent on one connection leaves the others' default agent alone"""
+        import json
+        import socket
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from agent_tester import AgentSocketServer
+
+        socket_path = tmp_path / "agent.sock"
+        server = AgentSocketServer(socket_path, session)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def connect():
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(str(socket_path))
+            return conn, conn.makefile("rw", encoding="utf-8")
+
+        def ask(stream, line):
+            stream.write(line + "\n")
+            stream.flush()
+            return stream.readline()
+
+        def send_requests(_):
+            conn, stream = connect()
+            with conn:
+                return [json.loads(ask(stream, json.dumps({"input": "x"})))["id"]
+                        for _ in range(5)]
+
+        try:
+            first, first_stream = connect()
+            second, second_stream = connect()
+            with first, second:
+                assert ask(first_stream, ":agent hebrew-to-english-translator").startswith("✓")
+                result = json.loads(ask(second_stream, json.dumps({"input": "hi"})))
+                assert result["agent"] == "english-to-french-translator"
+
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                ids = [i for batch in pool.map(send_requests, range(4)) for i in batch]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert len(set(ids)) == len(ids) == 20
+        assert session.agent == "english-to-french-translator"
+        assert session.requests == 21
+
+    def test_socket_server_path_safety(self, session, tmp_path):
+        """Test that only stale sockets are replaced when binding"""
+        from agent_tester import AgentSocketServer
+        from errors import FileOperationError
+
+        regular_file = tmp_path / "notes.txt"
+        regular_file.write_text("keep me", encoding="utf-8")
+        with pytest.raises(FileOperationError):
+            AgentSocketServer(regular_file, session)
+        assert regular_file.read_text(encoding="utf-8") == "keep me"
+
+        socket_path = tmp_path / "agent.sock"
+        first = AgentSocketServer(socket_path, session)
+        try:
+            with pytest.raises(FileOperationError):
+                AgentSocketServer(socket_path, session)
+        finally:
+            first.socket.close()  # Leaves a stale socket file behind
+
+        assert socket_path.is_socket()
+        second = AgentSocketServer(socket_path, session)
+        second.server_close()
+        assert not socket_path.exists()
+
+    def test_main_repl(self, session, monkeypatch, capsys):
+        """Test that --repl reads stdin and exits cleanly"""
+        import io
+        from agent_tester import main
+
+        monkeypatch.setattr(sys, "argv", ["test_agent.py", "--repl", "english-to-french-translator"])
+        monkeypatch.setattr(sys, "stdin", io.StringIO("Hello\n"))
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code == 0
+        assert "[translator] Hello" in capsys.readouterr().out
+
+    def test_main_unknown_agent(self, session, monkeypatch):
+        """Test that an unknown default agent is rejected"""
+        from agent_tester import main
+
+        monkeypatch.setattr(sys, "argv", ["test_agent.py", "--repl", "nope"])
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 1
@@ -4,7 +4,7 @@ Unit tests for src/analysis.py
 Tests cover:
 - Vector embedding creation
 - Cosine distance calculation
-- Text similarity metrics
+- Text similarity metrics (difflib and Indel)
 - Word overlap calculation
 - Analysis workflow
 """
@@ -21,6 +21,7 @@ from analysis import (
     get_local_embedding,
     calculate_cosine_distance,
     calculate_text_similarity,
+    calculate_indel_similarity,
     calculate_word_overlap,
     ORIGINAL_CLEAN,
     NOISE_LEVELS
@@ -115,6 +116,34 @@ class TestCalculateTextSimilarity:
 
         assert 0 <= similarity <= 1
 
+    def test_similarity_is_difflib_ratio(self):
+        """Test that text_similarity stays difflib's SequenceMatcher ratio"""
+        import difflib
+
+        text1 = ORIGINAL_CLEAN * 10
+        text2 = text1.replace("semantic", "semantik")
+        expected = difflib.SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+
+        assert calculate_text_similarity(text1, text2) == expected
+
+
+class TestCalculateIndelSimilarity:
+    """Test the Indel similarity metric"""
+
+    def test_identical_and_case_insensitive(self):
+        """Test that identical texts, ignoring case, score 1.0"""
+        assert calculate_indel_similarity("Hello World", "hello world") == 1.0
+
+    def test_never_below_text_similarity(self):
+        """Test that the optimal alignment scores at least difflib's ratio"""
+        text1 = ORIGINAL_CLEAN * 10
+        text2 = text1.replace("semantic", "semantik")
+
+        indel = calculate_indel_similarity(text1, text2)
+
+        assert indel >= calculate_text_similarity(text1, text2)
+        assert indel > 0.99
+
 
 class TestCalculateWordOverlap:
     """Test word overlap (Jaccard similarity) calculation"""
@@ -309,3 +338,109 @@ class TestCalculateCosineDistanceErrors:
 
         with pytest.raises(AnalysisError):
             calculate_cosine_distance(vec1, vec2)
+
+
+class TestPairwiseDriftMetrics:
+    """Test the all-pairs metric engine"""
+
+    TEXTS = [
+        ORIGINAL_CLEAN,
+        "The artifical intelligence systm can process natural language.",
+        "the ARTIFICIAL intelligence system",
+        "Completely unrelated words here",
+        "",
+        ORIGINAL_CLEAN,
+    ]
+
+    def test_matches_pairwise_functions(self):
+        """Test that every matrix entry equals the single-pair metric"""
+        from analysis import pairwise_drift_metrics
+
+        embeddings = get_local_embedding(self.TEXTS)
+        metrics = pairwise_drift_metrics(self.TEXTS, embeddings)
+
+        for i, text1 in enumerate(self.TEXTS):
+            for j, text2 in enumerate(self.TEXTS):
+                assert metrics["text_similarity"][i, j] == pytest.approx(
+                    calculate_text_similarity(text1, text2)
+                )
+                assert metrics["indel_similarity"][i, j] == pytest.approx(
+                    calculate_indel_similarity(text1, text2)
+                )
+                assert metrics["word_overlap"][i, j] == pytest.approx(
+                    calculate_word_overlap(text1, text2)
+                )
+                if i != j and text1 and text2:
+                    assert metrics["cosine_distance"][i, j] == pytest.approx(
+                        calculate_cosine_distance(embeddings[i], embeddings[j])
+                    )
+
+    def test_every_metric_has_a_version(self):
+        """Test that the results file can name the algorithm of each metric"""
+        from analysis import metric_versions, pairwise_drift_metrics
+
+        metrics = pairwise_drift_metrics(self.TEXTS[:2])
+
+        assert set(metric_versions()) == set(metrics)
+        assert metric_versions()["text_similarity"] == "difflib.SequenceMatcher.ratio"
+
+    def test_sparse_and_dense_embeddings_agree(self):
+        """Test that fitting TF-IDF internally matches dense embeddings"""
+        from analysis import cosine_distance_matrix
+
+        texts = self.TEXTS[:4]
+
+        fitted = cosine_distance_matrix(texts)
+        dense = cosine_distance_matrix(texts, get_local_embedding(texts))
+
+        np.testing.assert_allclose(fitted, dense, atol=1e-12)
+        assert fitted.shape == (4, 4)
+        assert np.all(np.diag(fitted) == 0.0)
+
+    def test_word_overlap_without_words(self):
+        """Test that texts without words overlap with nothing"""
+        from analysis import word_overlap_matrix
+
+        overlaps = word_overlap_matrix(["", "   "])
+
+        assert np.all(overlaps == 0.0)
+
+    def test_empty_texts(self):
+        """Test error with an empty text list"""
+        from analysis import pairwise_drift_metrics
+
+        with pytest.raises(ValueError):
+            pairwise_drift_metrics([])
+
+
+class TestSparseEmbedding:
+    """Test that embeddings stay sparse"""
+
+    def test_sparse_matches_dense(self):
+        """Test that the CSR embeddings equal the dense ones"""
+        from analysis import get_sparse_embedding
+
+        texts = [ORIGINAL_CLEAN, "Hello world", "Goodbye world"]
+        embeddings = get_sparse_embedding(texts)
+
+        assert embeddings.format == "csr"
+        np.testing.assert_array_equal(embeddings.toarray(), get_local_embedding(texts))
+
+    def test_cosine_distance_of_sparse_rows(self):
+        """Test that sparse rows give the same distance as dense vectors"""
+        from analysis import get_sparse_embedding
+
+        texts = [ORIGINAL_CLEAN, "The artificial intelligence system"]
+        embeddings = get_sparse_embedding(texts)
+        dense = embeddings.toarray()
+
+        assert calculate_cosine_distance(embeddings[0], embeddings[1]) == pytest.approx(
+            calculate_cosine_distance(dense[0], dense[1])
+        )
+
+    def test_empty_texts(self):
+        """Test error with an empty text list"""
+        from analysis import get_sparse_embedding
+
+        with pytest.raises(ValueError):
+            get_sparse_embedding([])
@@ -0,0 +1,155 @@
+"""
+Unit tests for src/async_engine.py
+
+Tests cover:
+- Single-stage async translation
+- Stage ordering within a chain
+- Concurrency limit across chains
+- Per-level error isolation
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from async_engine import (
+    run_translation_with_skill_async,
+    run_translation_chain_async,
+    run_all_levels_async
+)
+
+
+def make_response(text, input_tokens=100, output_tokens=50):
+    """Build a mock Messages API response."""
+    return Mock(
+        content=[Mock(text=text)],
+        usage=Mock(input_tokens=input_tokens, output_tokens=output_tokens)
+    )
+
+
+@pytest.fixture
+def async_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Point the pipeline at mock skills and a temporary output directory."""
+    from config import get_config
+
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    return temp_dir / "outputs"
+
+
+class TestRunTranslationWithSkillAsync:
+    """Test the single-stage async translation"""
+
+    def test_translation_success(self, async_env):
+        """Test that the async call returns text and token usage"""
+        client = Mock()
+        client.messages.create = AsyncMock(return_value=make_response("Bonjour"))
+
+        text, input_tokens, output_tokens = asyncio.run(
+            run_translation_with_skill_async(
+                client, "english-to-french-translator", "Hello", stage=1
+            )
+        )
+
+        assert text == "Bonjour"
+        assert input_tokens == 100
+        assert output_tokens == 50
+        kwargs = client.messages.create.call_args.kwargs
+        assert "Hello" in kwargs["messages"][0]["content"]
+
+    def test_translation_api_error(self, async_env):
+        """Test that unexpected errors are wrapped in TranslationError"""
+        from errors import TranslationError
+
+        client = Mock()
+        client.messages.create = AsyncMock(side_effect=RuntimeError("boom"))
+
+        with pytest.raises(TranslationError):
+            asyncio.run(
+                run_translation_with_skill_async(
+                    client, "english-to-french-translator", "Hello", stage=1
+                )
+            )
+
+
+class TestRunTranslationChainAsync:
+    """Test a single asynchronous chain"""
+
+    def test_stages_run_in_order(self, async_env):
+        """Test that each stage consumes the previous stage's output"""
+        client = Mock()
+        client.messages.create = AsyncMock(side_effect=[
+            make_response("french"),
+            make_response("hebrew"),
+            make_response("english")
+        ])
+
+        final = asyncio.run(run_translation_chain_async(client, 0))
+
+        assert final == "english"
+        prompts = [c.kwargs["messages"][0]["content"] for c in client.messages.create.call_args_list]
+        assert prompts[1].endswith("french")
+        assert prompts[2].endswith("hebrew")
+        assert (async_env / "noise_0" / "agent3_english.txt").read_text() == "english\n"
+
+    def test_invalid_noise_level(self, async_env):
+        """Test that unknown noise levels are rejected"""
+        from errors import InvalidNoiseLevel
+
+        with pytest.raises(InvalidNoiseLevel):
+            asyncio.run(run_translation_chain_async(Mock(), 999))
+
+
+class TestRunAllLevelsAsync:
+    """Test concurrent execution across noise levels"""
+
+    def test_concurrency_limit_respected(self, async_env):
+        """Test that no more than max_concurrency requests are in flight"""
+        in_flight = 0
+        peak = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return make_response("out")
+
+        client = Mock()
+        client.messages.create = create
+
+        results = asyncio.run(
+            run_all_levels_async([0, 10, 20, 25, 30], max_concurrency=2, client=client)
+        )
+
+        assert set(results) == {0, 10, 20, 25, 30}
+        assert all(value == "out" for value in results.values())
+        assert peak == 2
+
+    def test_failing_level_does_not_cancel_others(self, async_env):
+        """Test that an error in one chain is reported without stopping the rest"""
+        async def create(**kwargs):
+            if "systm" in kwargs["messages"][0]["content"]:
+                raise RuntimeError("boom")
+            return make_response("out")
+
+        client = Mock()
+        client.messages.create = create
+
+        results = asyncio.run(run_all_levels_async([0, 10], max_concurrency=2, client=client))
+
+        assert results[0] == "out"
+        assert isinstance(results[10], Exception)
+
+    def test_invalid_concurrency(self, async_env):
+        """Test that a non-positive concurrency limit is rejected"""
+        from errors import ConfigurationError
+
+        with pytest.raises(ConfigurationError):
+            asyncio.run(run_all_levels_async([0], max_concurrency=0, client=Mock()))
@@ -0,0 +1,231 @@
+"""
+Unit tests for src/batch_runner.py and src/fake_batch_server.py
+
+Tests cover:
+- custom_id round trip
+- Full batch sweep against the local fake batch server
+- Batch polling until the batch has ended
+- Resume and per-level failure handling
+- Batch pricing, budget admission and sandboxing of fake-server runs
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import anthropic
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from batch_runner import (
+    batch_custom_id,
+    parse_custom_id,
+    run_batch_sweep,
+    run_stage_batch,
+    wait_for_batch
+)
+from fake_batch_server import FakeBatchServer, pseudo_translate
+
+
+@pytest.fixture
+def batch_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Point the pipeline at mock skills and a temporary output directory."""
+    from config import get_config
+
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    return temp_dir / "outputs"
+
+
+@pytest.fixture
+def fake_server():
+    """Run the fake batch server for the duration of a test."""
+    with FakeBatchServer(processing_delay=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def batch_client(fake_server):
+    """Create a real Anthropic client pointed at the fake server."""
+    return anthropic.Anthropic(api_key="test", base_url=fake_server.base_url, max_retries=0)
+
+
+class TestCustomId:
+    """Test batch request identifiers"""
+
+    def test_round_trip(self):
+        """Test that custom_id encodes noise level and stage"""
+        assert batch_custom_id(25, 2) == "noise_25-stage_2"
+        assert parse_custom_id(batch_custom_id(25, 2)) == (25, 2)
+
+    def test_pseudo_translate(self):
+        """Test that the fake translation is deterministic and skill-tagged"""
+        prompt = 'You are using the "english-to-french-translator" skill.\n\nInput text:\nHello'
+        assert pseudo_translate(prompt) == "[english-to-french-translator] Hello"
+
+
+class TestBatchSweep:
+    """Test batch execution against the fake server"""
+
+    def test_sweep_writes_outputs(self, batch_env, batch_client):
+        """Test that every level and stage produces the usual output files"""
+        import pipeline
+
+        results = run_batch_sweep([0, 25], client=batch_client, poll_interval=0.01)
+
+        for level in (0, 25):
+            assert results[level] == (
+                "[hebrew-to-english-translator] [french-to-hebrew-translator] "
+                f"[english-to-french-translator] {pipeline.NOISY_INPUTS[level]}"
+            )
+            for _, _, filename in pipeline.TRANSLATION_STAGES:
+                assert (batch_env / f"noise_{level}" / filename).exists()
+
+        final = (batch_env / "noise_25" / "agent3_english.txt").read_text(encoding="utf-8")
+        assert final == results[25] + "\n"
+
+    def test_one_batch_per_stage(self, batch_env, batch_client, monkeypatch):
+        """Test that each stage is submitted as a single batch over all levels"""
+        created = []
+        original_create = batch_client.messages.batches.create
+
+        def spy_create(**kwargs):
+            created.append(len(kwargs["requests"]))
+            return original_create(**kwargs)
+
+        monkeypatch.setattr(batch_client.messages.batches, "create", spy_create)
+
+        run_batch_sweep([0, 10, 50], client=batch_client, poll_interval=0.01)
+
+        assert created == [3, 3, 3]
+
+    def test_resume_skips_completed_stages(self, batch_env, batch_client, monkeypatch):
+        """Test that a resumed sweep submits nothing when all stages are saved"""
+        run_batch_sweep([0], client=batch_client, poll_interval=0.01)
+
+        monkeypatch.setattr(
+            batch_client.messages.batches, "create", Mock(side_effect=AssertionError("called"))
+        )
+        results = run_batch_sweep([0], client=batch_client, resume=True, poll_interval=0.01)
+
+        assert results[0].startswith("[hebrew-to-english-translator]")
+
+    def test_fake_server_run_is_sandboxed(self, mock_skills_dir, temp_dir, fake_server, monkeypatch):
+        """Test that --batch --base-url keeps outputs and manifest out of the real run state"""
+        import json
+        from unittest.mock import patch
+
+        import pipeline
+
+        monkeypatch.setenv("LLM_BACKEND_SANDBOX_DIR", str(temp_dir / "offline"))
+        monkeypatch.setenv("BATCH_POLL_INTERVAL", "0.01")
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        argv = ["pipeline.py", "--noise", "25", "--batch", "--base-url", fake_server.base_url]
+
+        with patch("pipeline.sys.argv", argv):
+            pipeline.main()
+
+        endpoint = f"batch@127.0.0.1:{fake_server.base_url.rsplit(':', 1)[1]}"
+        sandbox = temp_dir / "offline" / endpoint.replace("@", "_").replace(":", "_")
+        assert pipeline.current_endpoint() == endpoint
+        assert (sandbox / "outputs" / "noise_25" / "agent3_english.txt").exists()
+        manifest = json.loads((sandbox / "outputs" / "run_manifest.json").read_text())
+        assert manifest["units"]["25"]["3"]["endpoint"] == endpoint
+
+    def test_invalid_noise_level(self, batch_env, batch_client):
+        """Test that unknown noise levels are rejected before submitting"""
+        from errors import InvalidNoiseLevel
+
+        with pytest.raises(InvalidNoiseLevel):
+            run_batch_sweep([99], client=batch_client)
+
+
+class TestStageBatch:
+    """Test single-stage batches with a mock client"""
+
+    def test_errored_request_isolated(self, batch_env):
+        """Test that an errored request fails only its own noise level"""
+        from errors import TranslationError
+
+        message = Mock(content=[Mock(text="Bonjour")], usage=Mock(input_tokens=10, output_tokens=5))
+        client = Mock()
+        client.messages.batches.create.return_value = Mock(id="batch_1")
+        client.messages.batches.retrieve.return_value = Mock(processing_status="ended")
+        client.messages.batches.results.return_value = [
+            Mock(custom_id="noise_0-stage_1", result=Mock(type="succeeded", message=message)),
+            Mock(custom_id="noise_10-stage_1", result=Mock(type="errored", error="overloaded"))
+        ]
+
+        outputs = run_stage_batch(
+            client, 1, "english-to-french-translator", {0: "Hello", 10: "Helo"}
+        )
+
+        assert outputs[0] == "Bonjour"
+        assert isinstance(outputs[10], TranslationError)
+
+    def test_results_billed_at_batch_price(self, batch_env, monkeypatch):
+        """Test that batch results are charged at batch.price_ratio of the standard price"""
+        from cost_tracker import CostTracker
+
+        tracker = CostTracker()
+        tracker.enabled = True
+        monkeypatch.setattr("pipeline.cost_tracker", tracker)
+        message = Mock(
+            content=[Mock(text="Bonjour")],
+            usage=Mock(
+                input_tokens=1000, output_tokens=500,
+                cache_creation_input_tokens=0, cache_read_input_tokens=0
+            )
+        )
+        client = Mock()
+        client.messages.batches.create.return_value = Mock(id="batch_1")
+        client.messages.batches.retrieve.return_value = Mock(processing_status="ended")
+        client.messages.batches.results.return_value = [
+            Mock(custom_id="noise_0-stage_1", result=Mock(type="succeeded", message=message))
+        ]
+
+        run_stage_batch(client, 1, "english-to-french-translator", {0: "Hello"})
+
+        standard = tracker._calculate_cost(tracker.config.model_name, 1000, 500)
+        assert tracker.get_total_cost() == pytest.approx(standard * 0.5)
+
+    def test_batch_over_budget_not_submitted(self, batch_env, monkeypatch):
+        """Test that a batch exceeding the budget is refused before it is submitted"""
+        from budget import BudgetController
+        from errors import BudgetExceededError
+
+        monkeypatch.setattr(
+            "batch_runner.get_budget_controller", lambda: BudgetController(max_cost_usd=1e-9)
+        )
+        client = Mock()
+
+        outputs = run_stage_batch(
+            client, 1, "english-to-french-translator", {0: "Hello", 10: "Helo"}
+        )
+
+        client.messages.batches.create.assert_not_called()
+        assert all(isinstance(output, BudgetExceededError) for output in outputs.values())
+
+    def test_wait_polls_until_ended(self):
+        """Test that polling continues while the batch is in progress"""
+        client = Mock()
+        client.messages.batches.retrieve.side_effect = [
+            Mock(processing_status="in_progress"),
+            Mock(processing_status="ended")
+        ]
+
+        batch = wait_for_batch(client, "batch_1", poll_interval=0, max_wait=5)
+
+        assert batch.processing_status == "ended"
+        assert client.messages.batches.retrieve.call_count == 2
+
+    def test_wait_times_out(self):
+        """Test that a batch that never ends raises APIError"""
+        from errors import APIError
+
+        client = Mock()
+        client.messages.batches.retrieve.return_value = Mock(processing_status="in_progress")
+
+        with pytest.raises(APIError):
+            wait_for_batch(client, "batch_1", poll_interval=0, max_wait=0)
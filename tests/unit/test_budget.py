@@ -0,0 +1,263 @@
+"""
+Unit tests for src/budget.py
+
+Tests cover:
+- Local token and cost estimation (prompt cache, output cap)
+- Noise level prioritization
+- Admission, throttling and refusal against USD and token caps
+- Sweep projection and planning in the pipeline
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from budget import (
+    BudgetController,
+    RequestEstimate,
+    TokenEstimator,
+    bisection_order,
+    estimate_text_tokens
+)
+from cost_tracker import CostTracker
+from errors import BudgetExceededError
+
+
+def make_params(system_text="Translate English to French.", user_text="Hello world", max_tokens=2000):
+    """Build Messages API params with a cached system prompt."""
+    return {
+        "model": "claude-sonnet-4-20250514",
+        "max_tokens": max_tokens,
+        "system": [{"type": "text", "text": system_text, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": user_text}]
+    }
+
+
+@pytest.fixture
+def offline_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Run chains against the mock backend with a fresh cost tracker."""
+    import cost_tracker
+    import llm_backend
+    import pipeline
+    from config import get_config
+    from llm_backend import MockBackend, MockLLM
+
+    tracker = CostTracker()
+    monkeypatch.setattr(pipeline, "cost_tracker", tracker)
+    monkeypatch.setattr(cost_tracker, "_tracker", tracker)
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    monkeypatch.setattr(llm_backend, "_backend", MockBackend(MockLLM(latency="constant", latency_ms=1)))
+    return tracker
+
+
+class TestTokenEstimator:
+    """Test local request estimation"""
+
+    def test_text_tokens(self):
+        """Test that tokens are estimated from UTF-8 bytes"""
+        assert estimate_text_tokens("") == 0
+        assert estimate_text_tokens("Hello world") == 3
+        # Hebrew takes two bytes per letter, so it estimates denser than English
+        assert estimate_text_tokens("שלום עולם") > estimate_text_tokens("hello you")
+
+    def test_cache_write_then_read(self):
+        """Test that a cached system prompt is written once and read afterwards"""
+        estimator = TokenEstimator(output_ratio=1.0, tracker=CostTracker())
+
+        first = estimator.estimate(make_params())
+        second = estimator.estimate(make_params())
+
+        assert first.cache_write_tokens > 0 and first.cache_read_tokens == 0
+        assert second.cache_read_tokens == first.cache_write_tokens
+        assert second.cache_write_tokens == 0
+        assert second.cost < first.cost
+        assert first.requests == 1
+
+    def test_output_capped_by_max_tokens(self):
+        """Test that projected output never exceeds max_tokens"""
+        estimator = TokenEstimator(output_ratio=2.0, tracker=CostTracker())
+
+        estimate = estimator.estimate(make_params(user_text="x" * 400, max_tokens=10))
+
+        assert estimate.input_tokens == estimate_text_tokens("x" * 400)
+        assert estimate.output_tokens == 10
+
+    def test_estimates_add_up(self):
+        """Test that estimates combine field by field"""
+        a = RequestEstimate(input_tokens=1, output_tokens=2, cost=0.5, requests=1)
+        b = RequestEstimate(cache_read_tokens=3, cost=0.25, requests=1)
+
+        total = a + b
+
+        assert total.total_tokens == 6
+        assert total.cost == pytest.approx(0.75)
+        assert (total - b) == a
+
+
+class TestPrioritization:
+    """Test noise level ordering"""
+
+    def test_bisection_order(self):
+        """Test that extremes come first, then midpoints"""
+        assert bisection_order([0, 10, 20, 25, 30, 40, 50]) == [0, 50, 25, 10, 30, 20, 40]
+        assert bisection_order([50, 0]) == [0, 50]
+
+    def test_configured_priority_first(self, monkeypatch):
+        """Test that budget.priority levels run before the bisection order"""
+        from config import get_config
+
+        config = get_config()
+        original_get = config.get
+        monkeypatch.setattr(
+            config, "get",
+            lambda key, default=None: [25] if key == "budget.priority" else original_get(key, default)
+        )
+        controller = BudgetController(max_cost_usd=1.0, tracker=CostTracker())
+
+        assert controller.prioritize([0, 10, 25, 50]) == [25, 0, 50, 10]
+
+
+class TestBudgetController:
+    """Test admission against the caps"""
+
+    def test_disabled_without_caps(self):
+        """Test that requests are not tracked without a cap"""
+        controller = BudgetController(tracker=CostTracker())
+
+        assert not controller.enabled
+        assert controller.admit(make_params()) is None
+
+    def test_admit_and_release(self):
+        """Test that in-flight estimates count against the budget until released"""
+        controller = BudgetController(max_cost_usd=1.0, tracker=CostTracker())
+
+        reservation = controller.admit(make_params())
+        in_flight, _ = controller.remaining()
+        controller.release(reservation)
+        released, _ = controller.remaining()
+
+        assert reservation.delay == 0.0
+        assert in_flight == pytest.approx(1.0 - reservation.estimate.cost)
+        assert released == pytest.approx(1.0)
+
+    def test_admit_batch_reserves_discounted_total(self):
+        """Test that a batch is reserved as one summed estimate at the batch price"""
+        requests = [make_params(user_text=text) for text in ("Hello", "Helo", "Hallo")]
+        estimator = TokenEstimator(output_ratio=1.3, tracker=CostTracker())
+        full_price = sum(estimator.estimate(params).cost for params in requests)
+        controller = BudgetController(max_cost_usd=1.0, tracker=CostTracker())
+
+        reservation = controller.admit_batch(requests, price_ratio=0.5)
+
+        assert reservation.estimate.requests == 3
+        assert reservation.estimate.cost == pytest.approx(full_price * 0.5)
+        assert controller.remaining()[0] == pytest.approx(1.0 - full_price * 0.5)
+
+    def test_refuses_past_cap(self):
+        """Test that a request that would exceed the token cap is refused"""
+        controller = BudgetController(max_tokens=5, tracker=CostTracker())
+
+        with pytest.raises(BudgetExceededError) as exc_info:
+            controller.admit(make_params(user_text="x" * 100))
+
+        assert exc_info.value.details["max_tokens"] == 5
+
+    def test_throttles_near_cap(self, capsys):
+        """Test that requests past warn_ratio are delayed and warned about once"""
+        estimate = TokenEstimator(output_ratio=1.3, tracker=CostTracker()).estimate(make_params())
+        controller = BudgetController(
+            max_tokens=int(estimate.total_tokens * 2.2),
+            warn_ratio=0.5,
+            throttle_delay=0.25,
+            tracker=CostTracker()
+        )
+
+        first = controller.admit(make_params())
+        second = controller.admit(make_params())
+
+        assert first.delay == 0.0
+        assert second.delay == 0.25
+        assert capsys.readouterr().out.count("throttling") == 1
+
+    def test_recorded_spend_counts(self):
+        """Test that usage recorded by the cost tracker reduces the budget"""
+        tracker = CostTracker()
+        controller = BudgetController(max_cost_usd=0.01, tracker=tracker)
+        tracker.track_call("claude-sonnet-4-20250514", stage=1, noise_level=0, input_tokens=1000, output_tokens=500)
+
+        cost, _ = controller.remaining()
+
+        assert cost == pytest.approx(0.01 - tracker.get_total_cost())
+
+    def test_plan_skips_levels_over_budget(self):
+        """Test that the plan keeps levels in priority order while they fit"""
+        controller = BudgetController(max_cost_usd=0.25, tracker=CostTracker())
+        projections = {level: RequestEstimate(cost=0.1, requests=3) for level in (0, 25, 50)}
+
+        selected, skipped = controller.plan(projections)
+
+        assert selected == [0, 50]
+        assert skipped == [25]
+
+
+class TestPipelineBudget:
+    """Test the budget in the translation pipeline"""
+
+    def test_project_sweep_shares_memoized_levels(self, offline_env):
+        """Test that levels with identical inputs are projected as free"""
+        from pipeline import project_sweep
+
+        projections = project_sweep([0, 25, 30])
+
+        assert projections[0].requests == 3
+        assert projections[25].requests == 3
+        assert projections[30].requests == 0
+        assert projections[30].cost == 0.0
+
+    def test_chain_stops_at_cap(self, offline_env, monkeypatch):
+        """Test that a chain is refused once the next stage would exceed the cap"""
+        import budget
+        from pipeline import project_sweep, run_translation_chain
+
+        stage_tokens = project_sweep([0])[0].total_tokens // 3
+        controller = BudgetController(
+            max_tokens=int(stage_tokens * 1.5), throttle_delay=0.0, tracker=offline_env
+        )
+        monkeypatch.setattr(budget, "_controller", controller)
+
+        with pytest.raises(BudgetExceededError):
+            run_translation_chain(0)
+
+        assert 1 <= len(offline_env.calls) < 3
+
+    def test_main_estimate_only(self, offline_env, capsys):
+        """Test that --estimate prints the projection without calling the API"""
+        from pipeline import main
+
+        with patch("pipeline.sys.argv", ["pipeline.py", "--all", "--estimate"]), \
+             patch("pipeline.run_translation_chain") as mock_run_chain:
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        assert exc_info.value.code == 0
+        mock_run_chain.assert_not_called()
+        assert "Projected sweep cost" in capsys.readouterr().out
+
+    def test_main_budget_trims_sweep(self, offline_env, capsys):
+        """Test that --budget runs only the levels the budget covers"""
+        from pipeline import main, project_sweep
+
+        per_level = project_sweep([0])[0].cost
+        budget_usd = f"{per_level * 2.5:.6f}"
+        with patch("pipeline.sys.argv", ["pipeline.py", "--all", "--budget", budget_usd]), \
+             patch("pipeline.run_translation_chain") as mock_run_chain:
+            main()
+
+        called = [call.args[0] for call in mock_run_chain.call_args_list]
+        assert called[:2] == [0, 50]
+        assert "skipped: over budget" in capsys.readouterr().out
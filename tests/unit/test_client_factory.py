@@ -0,0 +1,152 @@
+"""
+Unit tests for src/client_factory.py
+
+Tests cover:
+- Client reuse across calls and event loops
+- Pool limits tied to the concurrency limit
+- Connection reuse statistics against a local server
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import anthropic
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from client_factory import ClientFactory, get_client_factory, reset_client_factory
+from fake_batch_server import FakeBatchServer
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Run the fake batch server and point the SDK's default base URL at it."""
+    with FakeBatchServer() as server:
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.base_url)
+        yield server
+
+
+class TestClientFactory:
+    """Test pooled client creation"""
+
+    def test_client_reused(self):
+        """Test that every caller gets the same client"""
+        factory = ClientFactory()
+        assert factory.get_client() is factory.get_client()
+        assert factory.get_client().max_retries == 0
+
+    def test_singleton(self):
+        """Test the global factory and its reset"""
+        factory = get_client_factory()
+        assert get_client_factory() is factory
+        reset_client_factory()
+        assert get_client_factory() is not factory
+
+    def test_limits_follow_concurrency(self, monkeypatch):
+        """Test that the pool size defaults to the concurrency limit plus headroom"""
+        monkeypatch.setenv("EXECUTION_MAX_CONCURRENCY", "16")
+        monkeypatch.setenv("HTTP_CLIENT_HEADROOM", "2")
+
+        factory = ClientFactory(keepalive_expiry=5)
+
+        assert factory.max_connections == 18
+        assert factory.limits.max_keepalive_connections == 18
+        assert factory.limits.keepalive_expiry == 5
+
+    def test_explicit_pool_size(self):
+        """Test that an explicit pool size wins"""
+        assert ClientFactory(max_connections=3).max_connections == 3
+
+    def test_async_client_per_loop(self):
+        """Test that one async client is shared within a loop but not across loops"""
+        factory = ClientFactory()
+
+        async def get_twice():
+            return factory.get_async_client(), factory.get_async_client()
+
+        first, second = asyncio.run(get_twice())
+        third, _ = asyncio.run(get_twice())
+
+        assert first is second
+        assert third is not first
+
+    def test_replaced_async_client_closed(self):
+        """Test that the client of an idle loop is closed when another loop replaces it"""
+        factory = ClientFactory()
+
+        async def get():
+            return factory.get_async_client()
+
+        loop = asyncio.new_event_loop()
+        try:
+            first = loop.run_until_complete(get())
+            second = asyncio.run(get())
+        finally:
+            loop.close()
+
+        assert first.is_closed()
+        assert not second.is_closed()
+
+    def test_aclose_async_client(self):
+        """Test that a run can close its loop's client before the loop ends"""
+        factory = ClientFactory()
+
+        async def use_and_close():
+            client = factory.get_async_client()
+            await factory.aclose_async_client()
+            return client, factory.get_async_client()
+
+        closed, fresh = asyncio.run(use_and_close())
+
+        assert closed.is_closed()
+        assert fresh is not closed
+
+    def test_backend_uses_pooled_client(self):
+        """Test that the Anthropic backend wraps the pooled client"""
+        from llm_backend import AnthropicBackend
+
+        backend = AnthropicBackend()
+        assert backend.create_client().client is get_client_factory().get_client()
+        assert backend.create_client().client is backend.create_client().client
+
+
+class TestConnectionStats:
+    """Test connection reuse accounting"""
+
+    def test_sync_reuse(self, fake_server):
+        """Test that sequential requests reuse one keep-alive connection"""
+        factory = ClientFactory()
+        client = factory.get_client()
+
+        for _ in range(3):
+            with pytest.raises(anthropic.NotFoundError):
+                client.messages.batches.retrieve("msgbatch_missing")
+
+        stats = factory.connection_stats()
+        assert stats["requests"] == 3
+        assert stats["new_connections"] == 1
+        assert stats["reused_connections"] == 2
+        assert stats["reuse_ratio"] == pytest.approx(2 / 3)
+        assert stats["tls_handshakes"] == 0
+
+    def test_async_reuse(self, fake_server):
+        """Test that the async client pools connections too"""
+        factory = ClientFactory()
+
+        async def run():
+            client = factory.get_async_client()
+            for _ in range(3):
+                with pytest.raises(anthropic.NotFoundError):
+                    await client.messages.batches.retrieve("msgbatch_missing")
+
+        asyncio.run(run())
+
+        stats = factory.connection_stats()
+        assert stats["requests"] == 3
+        assert stats["new_connections"] == 1
+
+    def test_empty_stats(self):
+        """Test that a factory without requests reports zero reuse"""
+        assert ClientFactory().connection_stats()["reuse_ratio"] == 0.0
@@ -0,0 +1,227 @@
+"""
+Unit tests for src/corpus_runner.py
+
+Tests cover:
+- Streaming text and JSONL corpora (invalid ids become error rows)
+- Store columns derived from the translation DAG
+- Reproducible noise variants
+- Columnar store row groups
+- Bounded fan-out of a corpus run
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from corpus_runner import (
+    CORPUS_COLUMNS,
+    CorpusStore,
+    iter_corpus,
+    make_noisy_variant,
+    read_corpus_store,
+    run_corpus_async,
+    stage_columns
+)
+
+
+SENTENCE = "The artificial intelligence system can efficiently process natural language."
+
+
+@pytest.fixture
+def corpus_env(mock_skills_dir, monkeypatch):
+    """Point the pipeline at mock skills."""
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+
+
+class TestIterCorpus:
+    """Test corpus streaming"""
+
+    def test_text_corpus(self, temp_dir):
+        """Test that comments and blank lines are skipped and labels stripped"""
+        path = temp_dir / "corpus.txt"
+        path.write_text("# header\n\nCLEAN: First sentence.\nSecond sentence.\n", encoding="utf-8")
+
+        sentences = list(iter_corpus(path))
+
+        assert [s.text for s in sentences] == ["First sentence.", "Second sentence."]
+        assert [s.sentence_id for s in sentences] == [0, 1]
+
+    def test_jsonl_corpus(self, temp_dir):
+        """Test that JSONL records use their text and id fields"""
+        path = temp_dir / "corpus.jsonl"
+        path.write_text(
+            json.dumps({"id": 7, "text": "Hello"}) + "\n" + json.dumps({"sentence": "World"}) + "\n",
+            encoding="utf-8"
+        )
+
+        sentences = list(iter_corpus(path))
+
+        assert [(s.sentence_id, s.text) for s in sentences] == [(7, "Hello"), (1, "World")]
+
+    def test_jsonl_missing_text(self, temp_dir):
+        """Test that records without text are rejected"""
+        from errors import ValidationError
+
+        path = temp_dir / "corpus.jsonl"
+        path.write_text(json.dumps({"id": 1}) + "\n", encoding="utf-8")
+
+        with pytest.raises(ValidationError):
+            list(iter_corpus(path))
+
+
+    def test_jsonl_invalid_id(self, temp_dir):
+        """Test that a non-integer id marks the record instead of aborting the corpus"""
+        path = temp_dir / "corpus.jsonl"
+        path.write_text(
+            json.dumps({"id": "abc", "text": "Hello"}) + "\n"
+            + json.dumps({"id": "3", "text": "World"}) + "\n",
+            encoding="utf-8"
+        )
+
+        sentences = list(iter_corpus(path))
+
+        assert sentences[0].sentence_id == 0
+        assert sentences[0].error.startswith("Invalid sentence id")
+        assert (sentences[1].sentence_id, sentences[1].error) == (3, "")
+
+
+class TestStageColumns:
+    """Test store columns derived from the translation DAG"""
+
+    def test_default_chain(self):
+        """Test that the default chain keeps the language columns"""
+        assert CORPUS_COLUMNS == [
+            "sentence_id", "noise_level", "original", "noisy",
+            "french", "hebrew", "english", "error"
+        ]
+
+    def test_longer_chain_and_clashes(self):
+        """Test that every stage gets its own column"""
+        columns = stage_columns([
+            (1, "a", "agent1_french.txt"),
+            (2, "b", "agent2_english.txt"),
+            (3, "c", "agent3_french.txt"),
+            (4, "d", "noisy.txt")
+        ])
+
+        assert columns == {1: "french", 2: "english", 3: "french_3", 4: "noisy_4"}
+
+
+class TestNoisyVariant:
+    """Test noise variant generation"""
+
+    def test_zero_noise_is_clean(self):
+        """Test that noise level 0 leaves the sentence unchanged"""
+        assert make_noisy_variant(SENTENCE, 0, seed=42, sentence_id=1) == SENTENCE
+
+    def test_reproducible(self):
+        """Test that variants depend only on seed, sentence and level"""
+        first = make_noisy_variant(SENTENCE, 50, seed=42, sentence_id=1)
+        second = make_noisy_variant(SENTENCE, 50, seed=42, sentence_id=1)
+        assert first == second
+
+
+class TestCorpusStore:
+    """Test the columnar store"""
+
+    def test_row_groups(self, temp_dir):
+        """Test that rows are split into parts and read back in order"""
+        store = CorpusStore(temp_dir / "store", row_group_size=2)
+        for i in range(5):
+            store.append({"sentence_id": i, "noise_level": 10, "original": f"s{i}", "english": f"e{i}"})
+        store.close()
+
+        assert len(list((temp_dir / "store").glob("part-*.npz"))) == 3
+        columns = read_corpus_store(temp_dir / "store", ["sentence_id", "english"])
+        assert columns["sentence_id"].tolist() == [0, 1, 2, 3, 4]
+        assert columns["english"].tolist() == ["e0", "e1", "e2", "e3", "e4"]
+
+
+class TestRunCorpus:
+    """Test corpus runs with a mock async client"""
+
+    def test_all_units_translated(self, corpus_env, temp_dir):
+        """Test that every sentence is run at every noise level within the worker limit"""
+        corpus = temp_dir / "corpus.txt"
+        corpus.write_text("\n".join(f"Sentence number {i} about language." for i in range(4)))
+
+        in_flight = 0
+        peak = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            text = kwargs["messages"][0]["content"].rsplit("\n", 1)[-1]
+            return Mock(content=[Mock(text=f"t({text})")], usage=Mock(input_tokens=1, output_tokens=1))
+
+        client = Mock()
+        client.messages.create = create
+
+        counts = asyncio.run(run_corpus_async(
+            corpus, temp_dir / "store", noise_levels=[0, 20],
+            max_concurrency=3, client=client, row_group_size=3
+        ))
+
+        assert counts == {"sentences": 4, "rows": 8, "errors": 0, "skipped": 0}
+        assert peak <= 3
+        columns = read_corpus_store(temp_dir / "store")
+        assert sorted(zip(columns["sentence_id"].tolist(), columns["noise_level"].tolist())) == [
+            (i, level) for i in range(4) for level in (0, 20)
+        ]
+        clean = columns["noise_level"] == 0
+        assert all(
+            english == f"t(t(t({original})))"
+            for english, original in zip(columns["english"][clean], columns["original"][clean])
+        )
+
+    def test_failed_unit_recorded(self, corpus_env, temp_dir):
+        """Test that a failing unit is stored with its error and does not stop the run"""
+        corpus = temp_dir / "corpus.txt"
+        corpus.write_text("Only sentence here for testing.\n")
+
+        async def create(**kwargs):
+            raise RuntimeError("boom")
+
+        client = Mock()
+        client.messages.create = create
+
+        counts = asyncio.run(run_corpus_async(
+            corpus, temp_dir / "store", noise_levels=[0], max_concurrency=1, client=client
+        ))
+
+        assert counts["errors"] == 1
+        assert "boom" in read_corpus_store(temp_dir / "store", ["error"])["error"][0]
+
+    def test_invalid_id_is_a_row_error(self, corpus_env, temp_dir):
+        """Test that a record with a bad id is stored as an error row, not translated"""
+        corpus = temp_dir / "corpus.jsonl"
+        corpus.write_text(
+            json.dumps({"id": "x1", "text": "Bad id."}) + "\n"
+            + json.dumps({"id": 5, "text": "Good id."}) + "\n",
+            encoding="utf-8"
+        )
+
+        async def create(**kwargs):
+            return Mock(content=[Mock(text="t")], usage=Mock(input_tokens=1, output_tokens=1))
+
+        client = Mock()
+        client.messages.create = create
+
+        counts = asyncio.run(run_corpus_async(
+            corpus, temp_dir / "store", noise_levels=[0], max_concurrency=1, client=client
+        ))
+
+        assert counts == {"sentences": 2, "rows": 2, "errors": 1, "skipped": 0}
+        columns = read_corpus_store(temp_dir / "store", ["sentence_id", "english", "error"])
+        rows = dict(zip(columns["sentence_id"].tolist(), zip(columns["english"], columns["error"])))
+        assert rows[5] == ("t", "")
+        assert rows[0][1].startswith("Invalid sentence id")
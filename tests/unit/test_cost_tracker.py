@@ -33,7 +33,7 @@ class TestCostTrackerCreation:
         tracker = CostTracker()
         assert hasattr(tracker, "calls")
         assert hasattr(tracker, "enabled")
-        assert isinstance(tracker.calls, list)
+        assert len(tracker.calls) == 0
 
     def test_cost_tracker_enabled_by_default(self):
         """Test that tracker is enabled by default or can be enabled"""
@@ -348,6 +348,86 @@ class TestCostCalculation:
         
         assert cost > 0
 
+    def test_cost_calculation_prompt_cache_tokens(self):
+        """Test that prompt-cache writes and reads use their own prices"""
+        tracker = CostTracker()
+        tracker.enabled = True
+
+        write_cost = tracker.track_call(
+            model="claude-sonnet-4-20250514",
+            stage=1,
+            noise_level=0,
+            input_tokens=0,
+            output_tokens=0,
+            cache_write_tokens=1_000_000
+        )
+        read_cost = tracker.track_call(
+            model="claude-sonnet-4-20250514",
+            stage=1,
+            noise_level=0,
+            input_tokens=0,
+            output_tokens=0,
+            cache_read_tokens=1_000_000
+        )
+
+        assert write_cost == pytest.approx(3.75)
+        assert read_cost == pytest.approx(0.30)
+
+
+class TestPromptCacheStats:
+    """Test prompt-cache reporting"""
+
+    def test_hit_ratio_in_summary(self):
+        """Test that the summary reports the share of prompt tokens read from cache"""
+        tracker = CostTracker()
+        tracker.enabled = True
+
+        tracker.track_call("claude-sonnet-4", 1, 0, 100, 10, cache_write_tokens=900)
+        tracker.track_call("claude-sonnet-4", 1, 10, 100, 10, cache_read_tokens=900)
+
+        prompt_cache = tracker.get_summary()["prompt_cache"]
+        assert prompt_cache["cache_write_tokens"] == 900
+        assert prompt_cache["cache_read_tokens"] == 900
+        assert prompt_cache["hit_ratio"] == pytest.approx(0.45)
+
+    def test_hit_ratio_without_calls(self):
+        """Test that an empty tracker reports a zero hit ratio"""
+        tracker = CostTracker()
+        assert tracker.get_prompt_cache_stats()["hit_ratio"] == 0.0
+
+
+class TestLatencyByStage:
+    """Test the per-stage latency breakdown"""
+
+    def test_streamed_and_plain_calls(self):
+        """Test mean latency, TTFT and generation throughput per stage"""
+        tracker = CostTracker()
+        tracker.enabled = True
+
+        tracker.track_call("claude-sonnet-4", 1, 0, 100, 100, duration_s=2.0, ttft_s=1.0)
+        tracker.track_call("claude-sonnet-4", 1, 10, 100, 100, duration_s=4.0, ttft_s=1.0)
+        tracker.track_call("claude-sonnet-4", 2, 0, 100, 50, duration_s=1.0)
+        tracker.track_call("claude-sonnet-4", 3, 0, 100, 50)
+
+        latency = tracker.get_summary()["latency_by_stage"]
+
+        assert latency[1] == {
+            "calls": 2, "mean_duration_s": 3.0, "mean_ttft_s": 1.0, "tokens_per_second": 50.0
+        }
+        assert latency[2]["mean_ttft_s"] is None
+        assert latency[2]["tokens_per_second"] == 50.0
+        assert 3 not in latency
+
+    def test_printed(self, capsys):
+        """Test that the latency breakdown is printed"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        tracker.track_call("claude-sonnet-4", 1, 0, 100, 100, duration_s=0.5, ttft_s=0.25)
+
+        tracker.print_summary()
+
+        assert "Stage 1: 500 ms, TTFT 250 ms, 400.0 tokens/s" in capsys.readouterr().out
+
 
 class TestMultipleCalls:
     """Test tracking multiple calls"""
@@ -514,3 +594,181 @@ class TestResetTracker:
         # Should return a valid summary even with no calls
         assert isinstance(summary, dict)
 
+
+
+class TestRunningAggregates:
+    """Test the incrementally maintained totals"""
+
+    def test_aggregates_match_calls(self):
+        """Test that running totals equal a rescan of the recorded calls"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        for i in range(60):
+            tracker.track_call(
+                model="claude-sonnet-4-20250514",
+                stage=i % 3 + 1,
+                noise_level=(i % 6) * 10,
+                input_tokens=100 + i,
+                output_tokens=50 + i,
+                cache_read_tokens=i,
+                duration_s=0.1 if i % 2 else None
+            )
+
+        assert tracker.get_total_cost() == pytest.approx(sum(c.cost for c in tracker.calls))
+        assert tracker.get_total_tokens()["input"] == sum(c.input_tokens for c in tracker.calls)
+        assert tracker.get_prompt_cache_stats()["cache_read_tokens"] == sum(range(60))
+        for level, cost in tracker.get_cost_by_noise_level().items():
+            expected = sum(c.cost for c in tracker.calls if c.noise_level == level)
+            assert cost == pytest.approx(expected)
+        assert sum(s["calls"] for s in tracker.get_latency_by_stage().values()) == 30
+
+    def test_assigning_calls_recomputes_totals(self):
+        """Test that replacing the call list rebuilds every aggregate"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        tracker.track_call("claude-sonnet-4-20250514", 1, 0, 100, 50, duration_s=0.2)
+        kept = list(tracker.calls)
+        tracker.track_call("claude-sonnet-4-20250514", 2, 10, 200, 80)
+
+        tracker.calls = kept
+
+        assert tracker.get_total_tokens() == {"input": 100, "output": 50, "total": 150}
+        assert tracker.get_cost_by_noise_level() == {0: pytest.approx(kept[0].cost)}
+        assert tracker.get_cost_by_stage()[2] == 0.0
+
+    def test_concurrent_tracking(self):
+        """Test that calls tracked from many threads are all counted"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        tracker = CostTracker()
+        tracker.enabled = True
+
+        def track(i):
+            tracker.track_call("claude-sonnet-4-20250514", i % 3 + 1, 0, 10, 5)
+            tracker.get_summary()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(track, range(400)))
+
+        summary = tracker.get_summary()
+        assert summary["total_calls"] == 400
+        assert summary["total_tokens"]["total"] == 400 * 15
+
+
+class TestCostLedger:
+    """Test the append-only JSONL ledger"""
+
+    @staticmethod
+    def track(tracker, count, stage=1):
+        """Track count calls at one stage."""
+        for i in range(count):
+            tracker.track_call("claude-sonnet-4-20250514", stage, i % 7 * 10, 100, 50)
+
+    def test_calls_written_as_tracked(self, tmp_path):
+        """Test that each call is on disk before the tracker is closed"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        self.track(tracker, 3)
+
+        lines = (tmp_path / "cost_ledger.jsonl").read_text(encoding="utf-8").splitlines()
+
+        assert len(lines) == 3
+        record = json.loads(lines[0])
+        assert record["run_id"] == tracker.run_id
+        assert record["input_tokens"] == 100
+
+    def test_memory_bounded_totals_complete(self):
+        """Test that only recent calls stay in memory while totals cover all"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        tracker.max_calls_in_memory = 10
+        self.track(tracker, 50)
+
+        assert len(tracker.calls) == 10
+        assert tracker.get_summary()["total_calls"] == 50
+        assert tracker.get_total_tokens()["total"] == 50 * 150
+        assert sum(1 for _ in tracker.iter_calls()) == 50
+
+    def test_report_streams_every_call(self, tmp_path):
+        """Test that the saved report is valid JSON with calls dropped from memory"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        tracker.max_calls_in_memory = 5
+        self.track(tracker, 20)
+
+        report_path = tracker.save_report(tmp_path / "report.json")
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+
+        assert report["summary"]["total_calls"] == 20
+        assert len(report["calls"]) == 20
+        assert "run_id" not in report["calls"][0]
+
+    def test_runs_share_ledger(self):
+        """Test that trackers only report their own calls from a shared ledger"""
+        first, second = CostTracker(), CostTracker()
+        first.enabled = second.enabled = True
+        self.track(first, 2, stage=1)
+        self.track(second, 3, stage=2)
+        self.track(first, 1, stage=1)
+
+        assert [call["stage"] for call in first.iter_calls()] == [1, 1, 1]
+        assert [call["stage"] for call in second.iter_calls()] == [2, 2, 2]
+
+    def test_reset_starts_new_segment(self):
+        """Test that assigning calls hides earlier ledger entries"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        self.track(tracker, 4)
+
+        tracker.calls = []
+        self.track(tracker, 1)
+
+        assert sum(1 for _ in tracker.iter_calls()) == 1
+
+    def test_assigning_calls_does_not_rewrite_ledger(self, tmp_path):
+        """Test that assigned calls are reported without being appended again"""
+        tracker = CostTracker()
+        tracker.enabled = True
+        self.track(tracker, 4)
+        kept = list(tracker.calls)[:2]
+
+        tracker.calls = kept
+        self.track(tracker, 1)
+
+        lines = (tmp_path / "cost_ledger.jsonl").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 5
+        assert sum(1 for _ in tracker.iter_calls()) == 3
+        assert tracker.get_summary()["total_calls"] == 3
+
+    def test_report_is_valid_json_without_breakdown(self, tmp_path, monkeypatch):
+        """Test that the report stays valid JSON without the call breakdown"""
+        monkeypatch.setenv("COST_TRACKING_REPORT_INCLUDE_BREAKDOWN", "false")
+        tracker = CostTracker()
+        tracker.enabled = True
+        self.track(tracker, 2)
+
+        report_path = tracker.save_report(tmp_path / "report.json")
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+
+        assert report["summary"]["total_calls"] == 2
+        assert report["calls"] == []
+
+    def test_without_ledger(self, monkeypatch, tmp_path):
+        """Test that without a ledger every call stays in memory"""
+        monkeypatch.setenv("COST_TRACKING_LEDGER_FILE", "")
+        tracker = CostTracker()
+        tracker.enabled = True
+        tracker.max_calls_in_memory = 5
+        self.track(tracker, 12)
+
+        assert len(tracker.calls) == 12
+        assert sum(1 for _ in tracker.iter_calls()) == 12
+        assert not (tmp_path / "cost_ledger.jsonl").exists()
+
+    def test_api_call_has_slots(self):
+        """Test that calls carry no per-instance dictionary"""
+        from cost_tracker import APICall
+
+        call = APICall("t", "m", 1, 0, 1, 1, 0.0)
+
+        assert not hasattr(call, "__dict__")
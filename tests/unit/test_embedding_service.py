@@ -0,0 +1,160 @@
+"""
+Unit tests for src/embedding_service.py
+
+Tests cover:
+- Equivalence with a freshly fitted TfidfVectorizer
+- Corpus and token caching
+- Analyzers served by the shared service
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from embedding_service import EmbeddingService, get_embedding_service, sparse_cosine_similarity
+
+
+TEXTS = [
+    "The artificial intelligence system can efficiently process natural language.",
+    "The artifical inteligence systm can eficiently proces natural langauge.",
+    "A completely different sentence about the weather today."
+]
+
+
+class TestEmbed:
+    """Test embeddings against scikit-learn"""
+
+    @pytest.mark.parametrize("params", [
+        {"max_features": 1000, "ngram_range": (1, 3), "lowercase": True},
+        {"max_features": 5},
+        {"ngram_range": (2, 4), "max_features": 8},
+        {"stop_words": "english", "sublinear_tf": True}
+    ])
+    def test_matches_fresh_vectorizer(self, params):
+        """Test that cached embeddings equal a fresh fit_transform"""
+        service = EmbeddingService()
+
+        expected = TfidfVectorizer(**params).fit_transform(TEXTS).toarray()
+        served = service.embed(TEXTS, **params).toarray()
+
+        np.testing.assert_allclose(served, expected)
+
+    def test_similarity(self):
+        """Test that similarity equals the cosine of a two-text fit"""
+        service = EmbeddingService()
+        embeddings = TfidfVectorizer(max_features=500).fit_transform(TEXTS[:2]).toarray()
+
+        similarity = service.similarity(TEXTS[0], TEXTS[1], max_features=500)
+
+        assert similarity == pytest.approx(cosine_similarity(embeddings)[0, 1])
+
+    def test_empty_vocabulary(self):
+        """Test that a corpus without terms fails like TfidfVectorizer"""
+        with pytest.raises(ValueError):
+            EmbeddingService().embed(["", "  "])
+
+
+class TestSparseCosineSimilarity:
+    """Test the sparse normalized dot product"""
+
+    def test_matches_sklearn(self):
+        """Test that similarities equal sklearn's on unnormalized rows"""
+        X = TfidfVectorizer(norm=None).fit_transform(TEXTS)
+
+        np.testing.assert_allclose(sparse_cosine_similarity(X), cosine_similarity(X))
+        np.testing.assert_allclose(
+            sparse_cosine_similarity(X[:1], X[1:]), cosine_similarity(X[:1], X[1:])
+        )
+
+    def test_sparse_output(self):
+        """Test that pairs without shared terms are not stored"""
+        X = EmbeddingService().embed(["alpha beta", "gamma delta", "alpha gamma"])
+
+        similarities = sparse_cosine_similarity(X, dense_output=False)
+
+        assert similarities.format == "csr"
+        assert similarities[0, 1] == 0.0
+        assert similarities.nnz == 7  # 3 diagonal + 2 symmetric pairs
+
+    def test_rows_without_terms(self):
+        """Test that an all-zero row has similarity 0"""
+        from scipy import sparse
+
+        X = sparse.csr_matrix(np.array([[0.0, 0.0], [1.0, 0.0]]))
+
+        np.testing.assert_array_equal(sparse_cosine_similarity(X), [[0.0, 0.0], [0.0, 1.0]])
+
+
+class TestCaching:
+    """Test that work is done once"""
+
+    def test_corpus_fitted_once(self):
+        """Test that a repeated corpus is served from the cache"""
+        service = EmbeddingService()
+
+        first = service.embed(TEXTS, max_features=10)
+        second = service.embed(TEXTS, max_features=10)
+        service.embed(TEXTS, max_features=20)
+
+        assert second is first
+        assert service.get_stats()["hits"] == 1
+        assert service.get_stats()["misses"] == 2
+
+    def test_texts_tokenized_once(self):
+        """Test that a text shared by many corpora is analyzed once per configuration"""
+        service = EmbeddingService()
+
+        for text in TEXTS[1:]:
+            service.embed([TEXTS[0], text])
+            service.embed([TEXTS[0], text], max_features=3)
+        # Only the fitting differs, so the three texts were tokenized once each
+        assert service.get_stats()["texts"] == 3
+
+        service.embed(TEXTS[:2], ngram_range=(1, 2))
+        assert service.get_stats()["texts"] == 5
+
+    def test_lru_eviction(self):
+        """Test that the least recently used corpus is evicted"""
+        service = EmbeddingService(max_entries=2)
+
+        service.embed(TEXTS[:2])
+        service.embed(TEXTS[1:])
+        service.embed(TEXTS[:2])
+        service.embed([TEXTS[0], TEXTS[2]])
+
+        assert service.get_stats()["corpora"] == 2
+        service.embed(TEXTS[:2])
+        assert service.get_stats()["hits"] == 2
+
+
+class TestAnalyzers:
+    """Test the analyzers that use the shared service"""
+
+    def test_local_embedding_uses_service(self):
+        """Test that repeated analysis embeddings are fitted once"""
+        from analysis import get_local_embedding
+
+        first = get_local_embedding(TEXTS)
+        second = get_local_embedding(TEXTS)
+
+        np.testing.assert_array_equal(first, second)
+        assert get_embedding_service().get_stats() == {
+            "hits": 1, "stored": 0, "misses": 1, "corpora": 1, "texts": 3
+        }
+
+    def test_confidence_estimator(self):
+        """Test that semantic confidence is served by the shared service"""
+        from self_healing_agent import ConfidenceEstimator
+
+        estimator = ConfidenceEstimator()
+        confidence = estimator._semantic_confidence(TEXTS[0], TEXTS[1])
+
+        embeddings = TfidfVectorizer(max_features=1000, ngram_range=(1, 3)).fit_transform(TEXTS[:2])
+        assert confidence == pytest.approx(cosine_similarity(embeddings)[0, 1])
+        assert get_embedding_service().get_stats()["misses"] == 1
@@ -0,0 +1,310 @@
+"""
+Unit tests for src/embedding_store.py
+
+Tests cover:
+- Appending and looking up sparse and dense embeddings
+- Memory-mapped, zero-copy reads and reopening from disk
+- Crash safety of the segment index
+- Stores shared by several processes and size-bounded eviction
+- Reuse of stored embeddings by the embedding service for bulk corpora
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from embedding_service import EmbeddingService, text_hash
+from embedding_store import INDEX_FILENAME, EmbeddingStore
+
+
+TEXTS = ["alpha beta", "beta gamma", "gamma delta", "delta alpha"]
+KEYS = [text_hash(text) for text in TEXTS]
+
+
+def is_memory_mapped(array: np.ndarray) -> bool:
+    """Whether an array is (a view of) a memory-mapped file."""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+@pytest.fixture
+def embeddings():
+    """TF-IDF-like sparse embeddings, one row per text."""
+    rng = np.random.default_rng(0)
+    return sparse.random(len(TEXTS), 50, density=0.1, format="csr", random_state=rng)
+
+
+class TestAppendAndGet:
+    """Test the store round trip"""
+
+    def test_sparse_round_trip_is_exact(self, temp_dir, embeddings):
+        """Test that CSR embeddings come back unchanged"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+
+        store.append("space", KEYS, embeddings)
+        loaded = store.get("space", KEYS)
+
+        assert sparse.issparse(loaded)
+        assert loaded.dtype == embeddings.dtype
+        np.testing.assert_array_equal(loaded.toarray(), embeddings.toarray())
+
+    def test_dense_stored_as_float32(self, temp_dir):
+        """Test that dense embeddings are stored as float32"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        dense = np.arange(8, dtype=np.float64).reshape(4, 2) / 3
+
+        store.append("space", KEYS, dense)
+        loaded = store.get("space", KEYS)
+
+        assert loaded.dtype == np.float32
+        np.testing.assert_allclose(loaded, dense, rtol=1e-6)
+
+    def test_reordered_and_cross_segment_rows(self, temp_dir, embeddings):
+        """Test lookups of rows out of order and from several segments"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        store.append("space", KEYS[:2], embeddings[:2])
+        store.append("space", KEYS[2:], embeddings[2:])
+
+        loaded = store.get("space", [KEYS[3], KEYS[0], KEYS[2]])
+
+        np.testing.assert_array_equal(loaded.toarray(), embeddings[[3, 0, 2]].toarray())
+
+    def test_missing_key_or_space(self, temp_dir, embeddings):
+        """Test that lookups with any unknown row return None"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        store.append("space", KEYS[:2], embeddings[:2])
+
+        assert store.get("space", KEYS) is None
+        assert store.get("other", KEYS[:2]) is None
+        assert store.get_stats()["misses"] == 2
+
+    def test_key_count_mismatch(self, temp_dir, embeddings):
+        """Test that keys must match the rows"""
+        with pytest.raises(ValueError):
+            EmbeddingStore(temp_dir, enabled=True).append("space", KEYS[:2], embeddings)
+
+    def test_disabled(self, temp_dir, embeddings):
+        """Test that a disabled store writes and serves nothing"""
+        store = EmbeddingStore(temp_dir, enabled=False)
+
+        assert store.append("space", KEYS, embeddings) is None
+        assert store.get("space", KEYS) is None
+        assert not (temp_dir / INDEX_FILENAME).exists()
+
+
+class TestMemoryMapping:
+    """Test that segments are read from disk without copying"""
+
+    def test_contiguous_rows_are_memory_mapped(self, temp_dir, embeddings):
+        """Test that a stored corpus is served as a view of the mapped files"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        store.append("space", KEYS, embeddings)
+
+        loaded = EmbeddingStore(temp_dir, enabled=True).get("space", KEYS[1:3])
+
+        assert is_memory_mapped(loaded.data)
+        assert is_memory_mapped(loaded.indices)
+        np.testing.assert_array_equal(loaded.toarray(), embeddings[1:3].toarray())
+
+    def test_reopen_and_append(self, temp_dir, embeddings):
+        """Test that a reopened store continues the segment sequence"""
+        EmbeddingStore(temp_dir, enabled=True).append("space", KEYS[:2], embeddings[:2])
+
+        store = EmbeddingStore(temp_dir, enabled=True)
+        name = store.append("space", KEYS[2:], embeddings[2:])
+
+        assert name.startswith("seg-")
+        assert store.get_stats()["rows"] == 4
+        keys, segment = next(store.iter_segments("space"))
+        assert keys.tolist() == KEYS[:2]
+        assert segment.shape == (2, 50)
+
+    def test_unindexed_segment_ignored(self, temp_dir, embeddings):
+        """Test that arrays written without an index line are not served"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        store.append("space", KEYS, embeddings)
+        index = temp_dir / INDEX_FILENAME
+        index.write_text("", encoding="utf-8")  # Interrupted before the index line
+
+        assert EmbeddingStore(temp_dir, enabled=True).get("space", KEYS) is None
+
+
+class TestSharedStore:
+    """Test stores shared by several processes"""
+
+    def test_concurrent_writers_use_distinct_names(self, temp_dir, embeddings):
+        """Test that two writers of one directory never reuse a segment name"""
+        first = EmbeddingStore(temp_dir, enabled=True)
+        second = EmbeddingStore(temp_dir, enabled=True)
+        first.get_stats()
+        second.get_stats()  # Both have read the same (empty) index
+
+        names = {
+            first.append("space", KEYS[:2], embeddings[:2]),
+            second.append("space", KEYS[2:], embeddings[2:])
+        }
+
+        assert len(names) == 2
+        assert EmbeddingStore(temp_dir, enabled=True).get_stats()["segments"] == 2
+
+    def test_segments_of_other_writers_are_served(self, temp_dir, embeddings):
+        """Test that an open store picks up segments appended by another one"""
+        reader = EmbeddingStore(temp_dir, enabled=True)
+        assert reader.get("space", KEYS) is None
+
+        EmbeddingStore(temp_dir, enabled=True).append("space", KEYS, embeddings)
+
+        np.testing.assert_array_equal(
+            reader.get("space", KEYS).toarray(), embeddings.toarray()
+        )
+
+
+    def test_eviction_keeps_lines_of_other_writers(self, temp_dir, embeddings):
+        """Test that an eviction rereads the index under the lock before rewriting it"""
+        evicting = EmbeddingStore(temp_dir, enabled=True)
+        evicting.append("space", KEYS[:1], embeddings[:1])
+        evicting.max_size_bytes = evicting.get_stats()["bytes"] * 2
+
+        other = EmbeddingStore(temp_dir, enabled=True)
+        other.append("space", KEYS[1:2], embeddings[1:2])  # Not yet read by evicting
+        evicting.append("space", KEYS[2:3], embeddings[2:3])
+
+        indexed = EmbeddingStore(temp_dir, enabled=True).get_stats()["segments"]
+        on_disk = len(list(temp_dir.glob("*.keys.npy")))
+        assert indexed == on_disk
+        assert evicting.get("space", KEYS[2:3]) is not None
+
+    def test_threads_with_separate_stores(self, temp_dir, embeddings):
+        """Test that concurrent appends and evictions leave no unindexed segments"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        size = EmbeddingStore(temp_dir / "probe", enabled=True)
+        size.append("space", KEYS[:1], embeddings[:1])
+        limit = size.get_stats()["bytes"] * 3
+
+        def write(worker):
+            store = EmbeddingStore(temp_dir / "shared", enabled=True, max_size_bytes=limit)
+            for i in range(10):
+                store.append(f"space-{worker}-{i}", KEYS[:1], embeddings[:1])
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(write, range(4)))
+
+        stats = EmbeddingStore(temp_dir / "shared", enabled=True).get_stats()
+        assert stats["segments"] == len(list((temp_dir / "shared").glob("*.keys.npy")))
+        assert stats["bytes"] <= limit
+
+    def test_reader_sees_compaction_of_same_size(self, temp_dir, embeddings):
+        """Test that a rewritten index is read again even when it did not shrink"""
+        writer = EmbeddingStore(temp_dir, enabled=True)
+        writer.append("space", KEYS[:2], embeddings[:2])
+        reader = EmbeddingStore(temp_dir, enabled=True)
+        assert reader.get("space", KEYS[:2]) is not None
+
+        writer.max_size_bytes = writer.get_stats()["bytes"] * 2
+        writer.append("space", KEYS[2:], embeddings[2:])
+        writer.append("other", KEYS[2:], embeddings[2:])  # Evicts the first segment
+
+        assert reader.get("space", KEYS[:2]) is None
+        assert reader.get("other", KEYS[2:]) is not None
+
+    def test_segment_deleted_by_another_process(self, temp_dir, embeddings):
+        """Test that indexed segments whose files are gone are misses"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        name = store.append("space", KEYS, embeddings)
+        for path in temp_dir.glob(f"{name}.*"):
+            path.unlink()
+
+        assert store.get("space", KEYS) is None
+        assert EmbeddingStore(temp_dir, enabled=True).get("space", KEYS) is None
+        assert list(store.iter_segments("space")) == []
+
+
+class TestEviction:
+    """Test the size limit of the store"""
+
+    def test_oldest_segments_evicted(self, temp_dir, embeddings):
+        """Test that the oldest segments are deleted once the store is too large"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        oldest = store.append("space", KEYS[:2], embeddings[:2])
+        segment_bytes = store.get_stats()["bytes"]
+        store.max_size_bytes = segment_bytes * 2
+
+        store.append("other", KEYS[:2], embeddings[:2])
+        store.append("space", KEYS[2:], embeddings[2:])
+
+        stats = store.get_stats()
+        assert stats["segments"] == 2
+        assert stats["bytes"] <= store.max_size_bytes
+        assert store.get("space", KEYS[:2]) is None
+        assert store.get("space", KEYS[2:]) is not None
+        assert not list(temp_dir.glob(f"{oldest}.*"))
+
+    def test_newest_segment_kept(self, temp_dir, embeddings):
+        """Test that a segment over the whole limit is still stored"""
+        store = EmbeddingStore(temp_dir, enabled=True, max_size_bytes=1)
+        store.append("space", KEYS[:2], embeddings[:2])
+        store.append("space", KEYS[2:], embeddings[2:])
+
+        assert store.get_stats()["segments"] == 1
+        assert store.get("space", KEYS[2:]) is not None
+
+
+class TestServiceIntegration:
+    """Test the embedding service backed by the store"""
+
+    def test_fitted_corpus_reused_across_services(self, temp_dir):
+        """Test that a second service maps the corpus instead of fitting it"""
+        first = EmbeddingService(store=EmbeddingStore(temp_dir, enabled=True))
+        first.store_min_texts = len(TEXTS)
+        fitted = first.embed(TEXTS, ngram_range=(1, 2))
+
+        second = EmbeddingService(store=EmbeddingStore(temp_dir, enabled=True))
+        second.store_min_texts = len(TEXTS)
+        loaded = second.embed(TEXTS, ngram_range=(1, 2))
+
+        np.testing.assert_array_equal(loaded.toarray(), fitted.toarray())
+        assert second.get_stats()["stored"] == 1
+        assert second.get_stats()["misses"] == 0
+        assert second.get_stats()["texts"] == 0  # Nothing was tokenized
+
+    def test_spaces_are_separate(self, temp_dir):
+        """Test that a different configuration or corpus is fitted again"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        first = EmbeddingService(store=store)
+        first.store_min_texts = 3
+        first.embed(TEXTS)
+
+        service = EmbeddingService(store=store)
+        service.store_min_texts = 3
+        service.embed(TEXTS, max_features=3)
+        service.embed(TEXTS[:3])
+
+        assert service.get_stats()["misses"] == 2
+        assert store.get_stats()["segments"] == 3
+
+    def test_small_corpora_not_stored(self, temp_dir):
+        """Test that corpora below the size threshold stay in memory only"""
+        store = EmbeddingStore(temp_dir, enabled=True)
+        service = EmbeddingService(store=store)
+        service.store_min_texts = 3
+
+        service.similarity(TEXTS[0], TEXTS[1])
+
+        assert store.get_stats()["segments"] == 0
+        assert store.get_stats()["misses"] == 0
+
+    def test_store_disabled_by_default(self, temp_dir, embeddings):
+        """Test that the store is opt-in"""
+        store = EmbeddingStore(temp_dir)
+
+        assert store.append("space", KEYS, embeddings) is None
+        assert not (temp_dir / INDEX_FILENAME).exists()
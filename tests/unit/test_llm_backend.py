@@ -0,0 +1,238 @@
+"""
+Unit tests for src/llm_backend.py
+
+Tests cover:
+- Deterministic pseudo-translations and simulated prompt caching
+- Latency distributions
+- Error and 429 injection retried by the resilient clients
+- Backend selection and offline pipeline runs
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import anthropic
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from llm_backend import (
+    AnthropicBackend,
+    AsyncMockAnthropic,
+    LLMBackend,
+    MockAnthropic,
+    MockBackend,
+    MockLLM,
+    get_llm_backend,
+    set_llm_backend
+)
+from rate_limiter import AsyncResilientClient, RateLimiter, ResilientClient
+
+
+def make_params(text="Hello world", skill="english-to-french-translator"):
+    """Build pipeline-shaped request parameters."""
+    return {
+        "model": "mock-model",
+        "max_tokens": 100,
+        "system": [{
+            "type": "text",
+            "text": f'You are using the "{skill}" skill.',
+            "cache_control": {"type": "ephemeral"}
+        }],
+        "messages": [{"role": "user", "content": f"Translate.\n\nInput text:\n{text}"}]
+    }
+
+
+@pytest.fixture
+def limiter():
+    """Create a fast limiter with no real backoff delay."""
+    return RateLimiter(
+        requests_per_minute=60000,
+        tokens_per_minute=1e9,
+        max_retries=5,
+        retry_delay=0,
+        timeout=5
+    )
+
+
+class TestMockLLM:
+    """Test the fake model"""
+
+    def test_deterministic_translation(self):
+        """Test that the response text depends only on the request"""
+        client = MockAnthropic(MockLLM(latency="constant", latency_ms=0))
+
+        first = client.messages.create(**make_params())
+        second = client.messages.create(**make_params())
+
+        assert first.content[0].text == "[english-to-french-translator] Hello world"
+        assert second.content[0].text == first.content[0].text
+
+    def test_prompt_cache_simulation(self):
+        """Test that a repeated cached system prompt is reported as a cache read"""
+        client = MockAnthropic(MockLLM(latency="constant", latency_ms=0))
+
+        first = client.messages.create(**make_params("One"))
+        second = client.messages.create(**make_params("Two"))
+
+        assert first.usage.cache_creation_input_tokens > 0
+        assert first.usage.cache_read_input_tokens == 0
+        assert second.usage.cache_read_input_tokens == first.usage.cache_creation_input_tokens
+
+    @pytest.mark.parametrize("latency", ["constant", "uniform", "exponential", "lognormal"])
+    def test_latency_mean(self, latency):
+        """Test that every distribution has the configured mean"""
+        llm = MockLLM(latency=latency, latency_ms=100, seed=1)
+        samples = [llm.sample_latency() for _ in range(4000)]
+        assert sum(samples) / len(samples) == pytest.approx(0.1, rel=0.1)
+        assert min(samples) >= 0
+
+    def test_unknown_latency_rejected(self):
+        """Test that an unknown distribution is a configuration error"""
+        from errors import ConfigurationError
+
+        with pytest.raises(ConfigurationError):
+            MockLLM(latency="gaussian")
+
+    def test_failure_injection_rates(self):
+        """Test that injected failures follow the configured rates"""
+        llm = MockLLM(error_rate=0.1, rate_limit_rate=0.2, seed=3)
+        errors = [llm.check_failure() for _ in range(5000)]
+
+        rate_limited = sum(isinstance(e, anthropic.RateLimitError) for e in errors)
+        assert rate_limited / 5000 == pytest.approx(0.2, abs=0.02)
+        assert llm.stats["errors"] / 5000 == pytest.approx(0.1, abs=0.02)
+        assert llm.stats["calls"] == 5000
+
+    def test_injected_429_has_retry_after(self):
+        """Test that injected 429s carry a retry-after header"""
+        error = MockLLM(rate_limit_rate=1.0, retry_after=2).check_failure()
+        assert error.status_code == 429
+        assert error.response.headers["retry-after"] == "2"
+
+
+class TestResilience:
+    """Test injected failures against the retrying clients"""
+
+    def test_sync_retries(self, limiter):
+        """Test that injected errors are retried until success"""
+        llm = MockLLM(latency="constant", latency_ms=0, error_rate=0.2, rate_limit_rate=0.2, retry_after=0)
+        client = ResilientClient(MockAnthropic(llm), limiter)
+
+        for i in range(50):
+            response = client.messages.create(**make_params(f"sentence {i}"))
+            assert response.content[0].text.endswith(f"sentence {i}")
+
+        assert llm.stats["succeeded"] == 50
+        assert client.retries == llm.stats["errors"] + llm.stats["rate_limited"] > 0
+
+    def test_async_retries(self, limiter):
+        """Test that concurrent async calls survive injected failures"""
+        llm = MockLLM(latency="exponential", latency_ms=1, rate_limit_rate=0.1, retry_after=0)
+        client = AsyncResilientClient(AsyncMockAnthropic(llm), limiter)
+
+        async def run():
+            return await asyncio.gather(
+                *(client.messages.create(**make_params(f"s{i}")) for i in range(100))
+            )
+
+        responses = asyncio.run(run())
+
+        assert [r.content[0].text for r in responses] == [
+            f"[english-to-french-translator] s{i}" for i in range(100)
+        ]
+        assert llm.stats["rate_limited"] > 0
+        assert limiter.concurrency.in_flight == 0
+
+
+class TestBackendSelection:
+    """Test backend configuration"""
+
+    def test_default_backend(self):
+        """Test that the Anthropic API is the default backend"""
+        backend = get_llm_backend()
+        assert isinstance(backend, AnthropicBackend)
+        assert backend.requires_api_key
+
+    def test_set_backend(self):
+        """Test that the backend can be switched by name"""
+        backend = set_llm_backend("mock")
+        assert isinstance(backend, MockBackend)
+        assert get_llm_backend() is backend
+        assert isinstance(backend.create_client(), ResilientClient)
+
+    def test_base_backend_is_abstract(self):
+        """Test that a backend must implement both client factories"""
+        with pytest.raises(TypeError):
+            LLMBackend()
+
+        class SyncOnlyBackend(LLMBackend):
+            def create_client(self):
+                return None
+
+        with pytest.raises(TypeError):
+            SyncOnlyBackend()
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
+        from errors import ConfigurationError
+
+        with pytest.raises(ConfigurationError):
+            set_llm_backend("openai")
+
+    def test_pipeline_chain_offline(self, mock_skills_dir, temp_dir, monkeypatch):
+        """Test a full chain against the mock backend without an API key"""
+        import llm_backend
+        from config import get_config
+        from pipeline import NOISY_INPUTS, run_translation_chain
+
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+        backend = MockBackend(MockLLM(latency="constant", latency_ms=0))
+        monkeypatch.setattr(llm_backend, "_backend", backend)
+
+        run_translation_chain(25)
+
+        english = (temp_dir / "outputs" / "noise_25" / "agent3_english.txt").read_text(encoding="utf-8")
+        assert NOISY_INPUTS[25] in english
+        assert backend.llm.stats["calls"] == 3
+
+    def test_offline_run_is_sandboxed(self, mock_skills_dir, temp_dir, monkeypatch):
+        """Test that --backend mock keeps outputs, manifest and cost report out of the real run state"""
+        import json
+        from unittest.mock import patch
+
+        import pipeline
+
+        monkeypatch.setenv("LLM_BACKEND_SANDBOX_DIR", str(temp_dir / "offline"))
+        monkeypatch.setenv("LLM_BACKEND_MOCK_LATENCY", "constant")
+        monkeypatch.setenv("LLM_BACKEND_MOCK_LATENCY_MS", "0")
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        real_output_dir = pipeline.config.output_dir
+
+        with patch("pipeline.sys.argv", ["pipeline.py", "--noise", "25", "--backend", "mock"]):
+            pipeline.main()
+
+        sandbox = temp_dir / "offline" / "mock"
+        assert pipeline.config.output_dir == sandbox / "outputs"
+        assert (sandbox / "outputs" / "noise_25" / "agent3_english.txt").exists()
+        manifest = json.loads((sandbox / "outputs" / "run_manifest.json").read_text())
+        assert manifest["units"]["25"]["1"]["endpoint"] == "mock"
+        assert (sandbox / "results" / "cost_analysis.json").exists()
+        assert pipeline.response_cache.cache_dir == sandbox / ".cache" / "responses"
+        assert real_output_dir != pipeline.config.output_dir
+
+    def test_cache_keys_differ_per_backend(self, monkeypatch):
+        """Test that a mock response is never served to a real-backend request"""
+        import llm_backend
+        import pipeline
+        from response_cache import ResponseCache
+
+        monkeypatch.setattr(pipeline, "response_cache", ResponseCache(enabled=True))
+        params = pipeline.build_message_params("skill", "Translate.", "Hello")
+        real_key = pipeline.translation_cache_key(params)
+        monkeypatch.setattr(llm_backend, "_backend", MockBackend(MockLLM(latency_ms=0)))
+
+        assert pipeline.translation_cache_key(params) != real_key
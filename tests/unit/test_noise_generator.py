@@ -0,0 +1,117 @@
+"""
+Unit tests for src/noise_generator.py
+
+Tests cover:
+- Reproducibility and variant counts
+- Error rates and error types
+- Chunked generation
+- Pipeline-shaped noisy inputs
+"""
+
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from noise_generator import NoiseGenerator, generate_noisy_inputs
+
+SENTENCE = (
+    "The artificial intelligence system can efficiently process natural language "
+    "and understand complex semantic relationships within textual data."
+)
+
+
+def corrupted_words(original, variant):
+    """Count words of the original that differ in the variant."""
+    return sum(1 for a, b in zip(original.split(), variant.split()) if a != b)
+
+
+class TestNoiseGenerator:
+    """Test variant generation"""
+
+    def test_reproducible(self):
+        """Test that the same seed yields the same variants"""
+        first = NoiseGenerator(seed=7).variants(SENTENCE, 0.3, 20)
+        second = NoiseGenerator(seed=7).variants(SENTENCE, 0.3, 20)
+        assert first == second
+
+    def test_variant_count(self):
+        """Test that exactly n variants are returned"""
+        assert len(NoiseGenerator(seed=1).variants(SENTENCE, 0.2, 123)) == 123
+
+    def test_zero_rate_is_clean(self):
+        """Test that a zero error rate leaves the sentence unchanged"""
+        assert NoiseGenerator(seed=1).variants(SENTENCE, 0.0, 3) == [SENTENCE] * 3
+
+    def test_error_rate_matches_word_count(self):
+        """Test that the corrupted word count follows the error rate"""
+        eligible = sum(1 for word in SENTENCE.split() if len(word.strip(".")) >= 3)
+        variants = NoiseGenerator(seed=3).variants(SENTENCE, 0.25, 2000)
+
+        mean = sum(corrupted_words(SENTENCE, v) for v in variants) / len(variants)
+
+        assert mean == pytest.approx(0.25 * eligible, rel=0.05)
+
+    def test_single_error_per_word(self):
+        """Test that each corrupted word is one edit away from the original"""
+        for variant in NoiseGenerator(seed=5).variants(SENTENCE, 1.0, 200):
+            for a, b in zip(SENTENCE.split(), variant.split()):
+                assert abs(len(a) - len(b)) <= 1
+                assert a[0] == b[0]
+
+    def test_substitutions_use_adjacent_keys(self):
+        """Test that substitutions only produce QWERTY neighbours"""
+        from adversarial_robustness import QWERTY_ADJACENT_KEYS
+
+        generator = NoiseGenerator(seed=9, operations=["substitute"])
+        for variant in generator.variants("abcdefghij", 1.0, 200):
+            diffs = [(a, b) for a, b in zip("abcdefghij", variant) if a != b]
+            assert len(diffs) == 1
+            assert diffs[0][1] in QWERTY_ADJACENT_KEYS[diffs[0][0]]
+
+    def test_deletions_only(self):
+        """Test that deletion-only noise shortens each corrupted word by one"""
+        generator = NoiseGenerator(seed=2, operations=["delete"])
+        for variant in generator.variants("hello world", 1.0, 50):
+            assert len(variant) == len("hello world") - 2
+
+    def test_chunked_generation(self):
+        """Test that chunking does not change the number of variants"""
+        generator = NoiseGenerator(seed=4, chunk_size=7)
+        chunks = list(generator.iter_variants(SENTENCE, 0.5, 20))
+        assert [len(chunk) for chunk in chunks] == [7, 7, 6]
+
+    def test_non_ascii_text_preserved(self):
+        """Test that non-ASCII characters survive the code-point round trip"""
+        text = "Système naïve café résumé données"
+        for variant in NoiseGenerator(seed=6).variants(text, 1.0, 20):
+            assert SequenceMatcher(None, text, variant).ratio() > 0.8
+            assert "è" in variant and "é" in variant
+
+    def test_invalid_arguments(self):
+        """Test that invalid operations and rates are rejected"""
+        from errors import ValidationError
+
+        with pytest.raises(ValidationError):
+            NoiseGenerator(operations=["shout"])
+        with pytest.raises(ValidationError):
+            NoiseGenerator().variants(SENTENCE, 1.5)
+
+
+class TestGenerateNoisyInputs:
+    """Test pipeline-shaped noisy inputs"""
+
+    def test_levels(self):
+        """Test that every level gets a variant and level 0 is clean"""
+        inputs = generate_noisy_inputs(SENTENCE, [0, 5, 15, 35])
+
+        assert set(inputs) == {0, 5, 15, 35}
+        assert inputs[0] == SENTENCE
+        assert corrupted_words(SENTENCE, inputs[35]) > corrupted_words(SENTENCE, inputs[5])
+
+    def test_levels_independent(self):
+        """Test that adding a level does not change the others"""
+        assert generate_noisy_inputs(SENTENCE, [10])[10] == generate_noisy_inputs(SENTENCE, [0, 10, 20])[10]
@@ -200,6 +200,35 @@ class TestCosineDistancePerformance:
         throughput = iterations / elapsed
         assert throughput >= 1000, f"Throughput {throughput:.0f}/s, expected >= 1000/s"
 
+    def test_cosine_distance_overhead(self):
+        """
+        Test: Distance throughput within 2x of a bare cosine_similarity call
+        Expected: The wrapper adds little overhead to the sklearn kernel it
+        calls; both are measured in this process, so machine load affects
+        them alike
+        """
+        from analysis import calculate_cosine_distance
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        vec1 = np.random.rand(1000)
+        vec2 = np.random.rand(1000)
+        row1, row2 = vec1.reshape(1, -1), vec2.reshape(1, -1)
+
+        def throughput(fn, iterations=200):
+            fn()  # warm up
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            return iterations / (time.perf_counter() - start_time)
+
+        baseline = max(throughput(lambda: cosine_similarity(row1, row2)) for _ in range(3))
+        measured = max(throughput(lambda: calculate_cosine_distance(vec1, vec2)) for _ in range(3))
+
+        assert measured >= baseline / 2, (
+            f"Throughput {measured:.0f}/s, expected >= half of the "
+            f"cosine_similarity baseline ({baseline:.0f}/s)"
+        )
+
     def test_cosine_distance_large_vectors(self):
         """
         Test: Large vector (10000 dims) distance in < 10ms
@@ -496,6 +525,50 @@ class TestMemoryUsage:
         assert True
 
 
+class TestSparseEmbeddingMemory:
+    """
+    Memory benchmark for sparse TF-IDF embeddings.
+
+    Target: 100k documents embed in < 5% of the dense footprint
+    Purpose: Ensure corpus-scale analysis never materializes the mostly-zero
+             dense matrix (100k × 5000 float64 = 4 GB)
+    """
+
+    @pytest.mark.slow
+    def test_sparse_footprint_100k_documents(self):
+        """
+        Test: 100k short documents with max_features=5000 stay in CSR form
+        Expected: CSR storage and peak allocations are a small fraction of dense
+        """
+        import random
+        import tracemalloc
+        from embedding_service import EmbeddingService, sparse_cosine_similarity
+
+        rng = random.Random(42)
+        words = [f"word{i}" for i in range(6000)]
+        texts = [" ".join(rng.choice(words) for _ in range(20)) for _ in range(100_000)]
+
+        tracemalloc.start()
+        try:
+            embeddings = EmbeddingService(max_entries=100).embed(texts, max_features=5000)
+            similarities = sparse_cosine_similarity(embeddings[:100], embeddings, dense_output=False)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        dense_bytes = embeddings.shape[0] * embeddings.shape[1] * 8
+        sparse_bytes = (
+            embeddings.data.nbytes + embeddings.indices.nbytes + embeddings.indptr.nbytes
+        )
+        print(f"\nTF-IDF {embeddings.shape}: dense {dense_bytes / 1e6:.0f} MB, "
+              f"CSR {sparse_bytes / 1e6:.1f} MB, peak {peak / 1e6:.0f} MB")
+
+        assert embeddings.shape == (100_000, 5000)
+        assert sparse_bytes < dense_bytes * 0.01
+        assert peak < dense_bytes * 0.05
+        assert similarities.shape == (100, 100_000)
+
+
 # Performance test summary
 """
 PERFORMANCE TEST SUMMARY
@@ -538,6 +611,9 @@ Test Categories and Targets:
 8. End-to-End Performance
    - Full analysis: < 5 seconds
 
+9. Sparse Embedding Memory
+   - 100k documents × 5000 features: CSR < 1% and peak < 5% of dense (4 GB)
+
 Run with: pytest tests/unit/test_performance.py -v
 """
 
@@ -0,0 +1,432 @@
+"""
+Unit tests for src/rate_limiter.py
+
+Tests cover:
+- Token bucket accounting
+- AIMD concurrency adaptation
+- Backoff delays and retryable error classification
+- Retry behaviour of the sync and async client wrappers
+- Streamed requests read, corrected, retried and closed under the limits
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import anthropic
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from rate_limiter import (
+    AIMDConcurrencyLimiter,
+    AsyncResilientClient,
+    RateLimiter,
+    ResilientClient,
+    TokenBucket,
+    ensure_resilient,
+    is_retryable
+)
+
+
+def make_status_error(status_code, headers=None, body=None):
+    """Build an Anthropic status error with a mock HTTP response."""
+    response = Mock(status_code=status_code, headers=headers or {})
+    return anthropic.APIStatusError("error", response=response, body=body)
+
+
+class FakeStream:
+    """Closable event stream that can fail after some events."""
+
+    def __init__(self, events, fail_after=None, error=None, on_event=None):
+        self.events = events
+        self.fail_after = fail_after
+        self.error = error
+        self.on_event = on_event
+        self.closed = False
+
+    def __iter__(self):
+        for index, event in enumerate(self.events):
+            if index == self.fail_after:
+                raise self.error
+            if self.on_event is not None:
+                self.on_event()
+            yield event
+
+    async def __aiter__(self):
+        for event in self:
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+def make_stream(**kwargs):
+    """Build a FakeStream of a short message (12 input, 4 output tokens)."""
+    from llm_backend import stream_events
+
+    body = {
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": [{"type": "text", "text": "Bonjour le monde"}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": 12, "output_tokens": 4}
+    }
+    return FakeStream(stream_events(body), **kwargs)
+
+
+def make_response(input_tokens=100, output_tokens=50):
+    """Build a mock Messages API response."""
+    return Mock(
+        content=[Mock(text="ok")],
+        usage=Mock(input_tokens=input_tokens, output_tokens=output_tokens)
+    )
+
+
+@pytest.fixture
+def limiter():
+    """Create a fast limiter with no real backoff delay."""
+    return RateLimiter(
+        requests_per_minute=6000,
+        tokens_per_minute=1_000_000,
+        max_retries=3,
+        retry_delay=0,
+        timeout=5
+    )
+
+
+class TestTokenBucket:
+    """Test token bucket accounting"""
+
+    def test_acquire_within_capacity(self):
+        """Test that units are granted while the bucket has balance"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=2)
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+
+    def test_wait_when_empty(self):
+        """Test that an empty bucket reports the refill wait"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=1)
+        bucket.try_acquire()
+        wait = bucket.try_acquire()
+        assert 0 < wait <= 1.0
+
+    def test_adjust_refunds_unused_reservation(self):
+        """Test that adjust returns over-reserved units"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=100)
+        bucket.try_acquire(80)
+        bucket.adjust(50)
+        assert bucket.available == pytest.approx(70, abs=1)
+
+    def test_amount_clamped_to_capacity(self):
+        """Test that oversized requests can still be granted"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=10)
+        assert bucket.try_acquire(1000) == 0.0
+
+
+class TestAIMDConcurrencyLimiter:
+    """Test adaptive concurrency"""
+
+    def test_multiplicative_decrease(self):
+        """Test that a 429 halves the limit"""
+        aimd = AIMDConcurrencyLimiter(initial_limit=8)
+        aimd.on_rate_limited()
+        assert aimd.limit == 4
+
+    def test_additive_increase(self):
+        """Test that one window of successes raises the limit by about one"""
+        aimd = AIMDConcurrencyLimiter(initial_limit=4)
+        for _ in range(4):
+            aimd.on_success()
+        assert 4.8 < aimd.limit < 5.0
+
+    def test_bounds(self):
+        """Test that the limit stays within [min, max]"""
+        aimd = AIMDConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=3)
+        for _ in range(5):
+            aimd.on_rate_limited()
+        assert aimd.limit == 1
+        for _ in range(100):
+            aimd.on_success()
+        assert aimd.limit == 3
+
+    def test_slots(self):
+        """Test that slots are limited by the current limit"""
+        aimd = AIMDConcurrencyLimiter(initial_limit=2)
+        assert aimd.try_acquire()
+        assert aimd.try_acquire()
+        assert not aimd.try_acquire()
+        aimd.release()
+        assert aimd.try_acquire()
+
+
+    def test_async_waiters_woken_on_release(self):
+        """Test that coroutines wait for a released slot without polling"""
+        import threading
+
+        aimd = AIMDConcurrencyLimiter(initial_limit=1)
+        aimd.acquire()
+
+        async def wait_for_slot():
+            no_polling = Mock(wraps=asyncio, sleep=Mock(side_effect=AssertionError("polled")))
+            with patch("rate_limiter.asyncio", no_polling):
+                waiter = asyncio.ensure_future(aimd.acquire_async())
+                await asyncio.sleep(0)
+                assert not waiter.done()
+                threading.Timer(0.01, aimd.release).start()
+                await asyncio.wait_for(waiter, timeout=5)
+
+        asyncio.run(wait_for_slot())
+
+        assert aimd.in_flight == 1
+        assert not aimd._async_waiters
+
+    def test_cancelled_async_waiter_leaves_no_entry(self):
+        """Test that a cancelled coroutine is removed from the waiters"""
+        aimd = AIMDConcurrencyLimiter(initial_limit=1)
+        aimd.acquire()
+
+        async def cancel_waiter():
+            waiter = asyncio.ensure_future(aimd.acquire_async())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(cancel_waiter())
+
+        assert not aimd._async_waiters
+        assert aimd.in_flight == 1
+
+
+class TestBackoff:
+    """Test backoff delays and error classification"""
+
+    def test_retryable_errors(self):
+        """Test which errors are retried"""
+        assert is_retryable(make_status_error(429))
+        assert is_retryable(make_status_error(529))
+        assert is_retryable(make_status_error(503))
+        assert is_retryable(anthropic.APIConnectionError(request=Mock()))
+        assert not is_retryable(make_status_error(400))
+        assert not is_retryable(ValueError("bad"))
+
+    def test_exponential_backoff_with_jitter(self):
+        """Test that delays stay within the exponential ceiling"""
+        limiter = RateLimiter(retry_delay=1)
+        for attempt in range(4):
+            delay = limiter.backoff_delay(attempt)
+            assert 0 <= delay <= 2 ** attempt
+
+    def test_retry_after_header(self):
+        """Test that the server's retry-after header is honoured"""
+        limiter = RateLimiter(retry_delay=1)
+        error = make_status_error(429, headers={"retry-after": "7"})
+        assert limiter.backoff_delay(0, error) == 7
+
+
+class TestResilientClient:
+    """Test retrying sync wrapper"""
+
+    def test_retries_then_succeeds(self, limiter):
+        """Test that a 429 is retried and the AIMD limit shrinks"""
+        client = Mock()
+        client.messages.create.side_effect = [make_status_error(429), make_response()]
+        wrapped = ResilientClient(client, limiter)
+        initial_limit = limiter.concurrency.limit
+
+        response = wrapped.messages.create(model="m", max_tokens=10, messages=[])
+
+        assert response.content[0].text == "ok"
+        assert client.messages.create.call_count == 2
+        assert wrapped.retries == 1
+        assert limiter.concurrency.limit < initial_limit
+        assert client.messages.create.call_args.kwargs["timeout"] == 5
+
+    def test_retries_counted_on_span(self, limiter):
+        """Test that retries are recorded on the enclosing tracing span"""
+        from tracing import get_tracer
+
+        client = Mock()
+        client.messages.create.side_effect = [
+            make_status_error(429), make_status_error(529), make_response()
+        ]
+        wrapped = ResilientClient(client, limiter)
+
+        with get_tracer().span("api_call") as span:
+            wrapped.messages.create(model="m", max_tokens=10, messages=[])
+
+        assert span.attributes["retries"] == 2
+
+    def test_gives_up_after_max_retries(self, limiter):
+        """Test that persistent overloads are raised after max_retries"""
+        client = Mock()
+        client.messages.create.side_effect = make_status_error(529)
+        wrapped = ResilientClient(client, limiter)
+
+        with pytest.raises(anthropic.APIStatusError):
+            wrapped.messages.create(model="m", max_tokens=10, messages=[])
+
+        assert client.messages.create.call_count == 4
+
+    def test_failed_attempts_refund_tokens(self, limiter):
+        """Test that the token reservation of every failed attempt is returned"""
+        client = Mock()
+        client.messages.create.side_effect = make_status_error(529)
+        wrapped = ResilientClient(client, limiter)
+        request = {"model": "m", "max_tokens": 10, "messages": []}
+        estimated = limiter.estimate_tokens(dict(request, timeout=5))
+
+        with patch.object(limiter.tokens, "adjust") as adjust:
+            with pytest.raises(anthropic.APIStatusError):
+                wrapped.messages.create(**request)
+
+        assert adjust.call_count == 4
+        adjust.assert_called_with(estimated)
+
+    def test_non_retryable_error_raised_immediately(self, limiter):
+        """Test that client errors are not retried"""
+        client = Mock()
+        client.messages.create.side_effect = make_status_error(400)
+        wrapped = ResilientClient(client, limiter)
+
+        with pytest.raises(anthropic.APIStatusError):
+            wrapped.messages.create(model="m", max_tokens=10, messages=[])
+
+        assert client.messages.create.call_count == 1
+
+    def test_ensure_resilient_is_idempotent(self, limiter):
+        """Test that an already wrapped client is not wrapped twice"""
+        wrapped = ResilientClient(Mock(), limiter)
+        assert ensure_resilient(wrapped) is wrapped
+
+    def test_pipeline_retries_overload(self, mock_skills_dir, monkeypatch):
+        """Test that run_translation_with_skill survives a transient overload"""
+        from pipeline import run_translation_with_skill
+
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        client = Mock()
+        client.messages.create.side_effect = [make_status_error(529), make_response()]
+
+        with patch("rate_limiter.time.sleep"):
+            text, _, _ = run_translation_with_skill(
+                client, "english-to-french-translator", "Hello", stage=1
+            )
+
+        assert text == "ok"
+        assert client.messages.create.call_count == 2
+
+
+class TestAsyncResilientClient:
+    """Test retrying async wrapper"""
+
+    def test_async_retry(self, limiter):
+        """Test that the async wrapper retries transient errors"""
+        client = Mock()
+        client.messages.create = AsyncMock(
+            side_effect=[anthropic.APIConnectionError(request=Mock()), make_response()]
+        )
+        wrapped = AsyncResilientClient(client, limiter)
+
+        response = asyncio.run(wrapped.messages.create(model="m", max_tokens=10, messages=[]))
+
+        assert response.content[0].text == "ok"
+        assert client.messages.create.call_count == 2
+        assert limiter.concurrency.in_flight == 0
+
+    def test_async_failed_attempt_refunds_tokens(self, limiter):
+        """Test that the async wrapper returns a failed attempt's reservation"""
+        client = Mock()
+        client.messages.create = AsyncMock(
+            side_effect=[make_status_error(429), make_response(input_tokens=1, output_tokens=1)]
+        )
+        wrapped = AsyncResilientClient(client, limiter)
+
+        with patch.object(limiter.tokens, "adjust") as adjust:
+            asyncio.run(wrapped.messages.create(model="m", max_tokens=10, messages=[]))
+
+        estimated = limiter.estimate_tokens({"model": "m", "max_tokens": 10, "messages": []})
+        assert adjust.call_args_list[0].args == (estimated,)
+        assert adjust.call_args_list[1].args == (estimated - 2,)
+
+
+class TestStreamedRequests:
+    """Test streamed requests inside the rate-limited section"""
+
+    def test_slot_held_until_stream_drained(self, limiter):
+        """Test that the stream is read while holding the slot, then closed"""
+        in_flight = []
+        stream = make_stream(on_event=lambda: in_flight.append(limiter.concurrency.in_flight))
+        client = Mock()
+        client.messages.create.return_value = stream
+
+        message, timing = ResilientClient(client, limiter).messages.create_streamed(
+            model="m", max_tokens=10, messages=[]
+        )
+
+        assert message.content[0].text == "Bonjour le monde"
+        assert timing.output_tokens == 4
+        assert set(in_flight) == {1}
+        assert limiter.concurrency.in_flight == 0
+        assert stream.closed
+        assert client.messages.create.call_args.kwargs["stream"] is True
+
+    def test_tokens_corrected_from_stream_usage(self, limiter):
+        """Test that the token bucket is charged the usage the stream reported"""
+        client = Mock()
+        client.messages.create.return_value = make_stream()
+        request = {"model": "m", "max_tokens": 10, "messages": []}
+        estimated = limiter.estimate_tokens(request)
+
+        with patch.object(limiter.tokens, "adjust") as adjust:
+            ResilientClient(client, limiter).messages.create_streamed(**request)
+
+        adjust.assert_called_once_with(estimated - 16)
+
+    def test_mid_stream_error_retried(self, limiter):
+        """Test that an overloaded error event is retried and the failed stream closed"""
+        overloaded = make_status_error(
+            200, body={"type": "error", "error": {"type": "overloaded_error"}}
+        )
+        failed = make_stream(fail_after=2, error=overloaded)
+        succeeded = make_stream()
+        client = Mock()
+        client.messages.create.side_effect = [failed, succeeded]
+        wrapped = ResilientClient(client, limiter)
+
+        message, _ = wrapped.messages.create_streamed(model="m", max_tokens=10, messages=[])
+
+        assert message.content[0].text == "Bonjour le monde"
+        assert wrapped.retries == 1
+        assert failed.closed and succeeded.closed
+        assert limiter.concurrency.in_flight == 0
+
+    def test_create_with_stream_returns_drained_events(self, limiter):
+        """Test that create(stream=True) returns every event after draining"""
+        stream = make_stream()
+        client = Mock()
+        client.messages.create.return_value = stream
+
+        events = ResilientClient(client, limiter).messages.create(
+            model="m", max_tokens=10, messages=[], stream=True
+        )
+
+        assert [event.type for event in events][0] == "message_start"
+        assert events[-1].type == "message_stop"
+        assert stream.closed
+
+    def test_async_stream_held_and_closed(self, limiter):
+        """Test that the async wrapper drains the stream before releasing the slot"""
+        in_flight = []
+        stream = make_stream(on_event=lambda: in_flight.append(limiter.concurrency.in_flight))
+        client = Mock()
+        client.messages.create = AsyncMock(return_value=stream)
+
+        message, _ = asyncio.run(AsyncResilientClient(client, limiter).messages.create_streamed(
+            model="m", max_tokens=10, messages=[]
+        ))
+
+        assert message.content[0].text == "Bonjour le monde"
+        assert set(in_flight) == {1}
+        assert limiter.concurrency.in_flight == 0
+        assert stream.closed
@@ -0,0 +1,178 @@
+"""
+Unit tests for src/response_cache.py
+
+Tests cover:
+- Key derivation
+- Store and lookup
+- Hit/miss counters
+- LRU eviction by size
+- Pipeline integration (cache hits skip the API and cost ledger; prompt
+  template changes invalidate entries)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from response_cache import ResponseCache, get_response_cache, reset_response_cache
+
+
+ENTRY = {"output": "Bonjour", "input_tokens": 10, "output_tokens": 5}
+
+
+@pytest.fixture
+def cache(temp_dir):
+    """Create an enabled cache in a temporary directory."""
+    return ResponseCache(cache_dir=temp_dir / "cache", max_size_bytes=10_000, enabled=True)
+
+
+class TestMakeKey:
+    """Test cache key derivation"""
+
+    def test_key_is_deterministic(self):
+        """Test that identical requests produce identical keys"""
+        key1 = ResponseCache.make_key("model", 0, 2000, "skill", "Hello")
+        key2 = ResponseCache.make_key("model", 0, 2000, "skill", "Hello")
+        assert key1 == key2
+        assert len(key1) == 64
+
+    def test_key_depends_on_every_field(self):
+        """Test that changing any field changes the key"""
+        base = ResponseCache.make_key("model", 0, 2000, "skill", "Hello")
+        assert base != ResponseCache.make_key("other", 0, 2000, "skill", "Hello")
+        assert base != ResponseCache.make_key("model", 1, 2000, "skill", "Hello")
+        assert base != ResponseCache.make_key("model", 0, 1000, "skill", "Hello")
+        assert base != ResponseCache.make_key("model", 0, 2000, "skill2", "Hello")
+        assert base != ResponseCache.make_key("model", 0, 2000, "skill", "Hello!")
+        assert base != ResponseCache.make_key("model", 0, 2000, "skill", "Hello", endpoint="mock")
+
+
+class TestResponseCache:
+    """Test cache storage, counters and eviction"""
+
+    def test_put_and_get(self, cache):
+        """Test that a stored entry is returned on lookup"""
+        cache.put("abc", ENTRY)
+        assert cache.get("abc") == ENTRY
+
+    def test_hit_and_miss_counters(self, cache):
+        """Test that lookups update hit/miss statistics"""
+        cache.get("missing")
+        cache.put("abc", ENTRY)
+        cache.get("abc")
+        cache.get("abc")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(2 / 3)
+        assert stats["entries"] == 1
+
+    def test_persists_across_instances(self, cache):
+        """Test that entries survive a new cache instance"""
+        cache.put("abc", ENTRY)
+        reopened = ResponseCache(cache_dir=cache.cache_dir, max_size_bytes=10_000, enabled=True)
+        assert reopened.get("abc") == ENTRY
+
+    def test_lru_eviction(self, temp_dir):
+        """Test that least recently used entries are evicted first"""
+        entry_size = len('{"output": "Bonjour", "input_tokens": 10, "output_tokens": 5}')
+        cache = ResponseCache(
+            cache_dir=temp_dir / "cache",
+            max_size_bytes=entry_size * 2,
+            enabled=True
+        )
+        cache.put("a", ENTRY)
+        cache.put("b", ENTRY)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", ENTRY)
+
+        assert cache.get("a") == ENTRY
+        assert cache.get("c") == ENTRY
+        assert cache.get("b") is None
+        assert cache.get_stats()["size_bytes"] <= entry_size * 2
+
+    def test_corrupted_entry_is_a_miss(self, cache):
+        """Test that unreadable entries are discarded"""
+        cache.put("abc", ENTRY)
+        (cache.cache_dir / "abc.json").write_text("not json")
+
+        assert cache.get("abc") is None
+        assert not (cache.cache_dir / "abc.json").exists()
+
+    def test_disabled_cache(self, temp_dir):
+        """Test that a disabled cache neither stores nor returns entries"""
+        cache = ResponseCache(cache_dir=temp_dir / "cache", enabled=False)
+        cache.put("abc", ENTRY)
+
+        assert cache.get("abc") is None
+        assert not (temp_dir / "cache").exists()
+
+    def test_clear(self, cache):
+        """Test that clear removes entries and resets counters"""
+        cache.put("abc", ENTRY)
+        cache.get("abc")
+        cache.clear()
+
+        assert cache.get_stats()["entries"] == 0
+        assert cache.hits == 0
+
+    def test_singleton(self):
+        """Test global cache accessor"""
+        reset_response_cache()
+        assert get_response_cache() is get_response_cache()
+
+
+class TestPipelineIntegration:
+    """Test the cache inside run_translation_with_skill"""
+
+    def test_cache_hit_skips_api_and_cost_tracking(
+        self, cache, mock_anthropic_client, mock_skills_dir, monkeypatch
+    ):
+        """Test that a repeated request is served without an API call or ledger entry"""
+        from pipeline import run_translation_with_skill
+        from cost_tracker import CostTracker
+
+        tracker = CostTracker()
+        tracker.enabled = True
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        monkeypatch.setattr("pipeline.response_cache", cache)
+        monkeypatch.setattr("pipeline.cost_tracker", tracker)
+
+        first = run_translation_with_skill(
+            mock_anthropic_client, "english-to-french-translator", "Hello", stage=1
+        )
+        second = run_translation_with_skill(
+            mock_anthropic_client, "english-to-french-translator", "Hello", stage=1
+        )
+
+        assert mock_anthropic_client.messages.create.call_count == 1
+        assert second[0] == first[0]
+        assert second[1] is None and second[2] is None
+        assert len(tracker.calls) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    def test_prompt_template_change_is_a_miss(
+        self, cache, mock_anthropic_client, mock_skills_dir, monkeypatch
+    ):
+        """Test that responses to the old prompts are not served after a template change"""
+        import pipeline
+
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        monkeypatch.setattr("pipeline.response_cache", cache)
+
+        pipeline.run_translation_with_skill(
+            mock_anthropic_client, "english-to-french-translator", "Hello", stage=1
+        )
+        monkeypatch.setattr(
+            "pipeline.build_translation_prompt", lambda text: f"Translate this:\n\n{text}"
+        )
+        pipeline.run_translation_with_skill(
+            mock_anthropic_client, "english-to-french-translator", "Hello", stage=1
+        )
+
+        assert mock_anthropic_client.messages.create.call_count == 2
+        assert cache.get_stats()["hits"] == 0
@@ -0,0 +1,142 @@
+"""
+Unit tests for src/run_manifest.py
+
+Tests cover:
+- Recording and reusing completed units
+- Invalidation on changed inputs or modified outputs
+- Manifest persistence and corruption handling
+- Resuming a partially completed translation chain
+"""
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from run_manifest import RunManifest, content_hash, get_run_manifest
+
+
+@pytest.fixture
+def manifest(temp_dir):
+    """Create an empty manifest in a temporary output directory."""
+    return get_run_manifest(temp_dir)
+
+
+def write_output(temp_dir, text, name="noise_40/agent1_french.txt"):
+    """Write a stage output the way the pipeline does."""
+    path = temp_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text + "\n", encoding="utf-8")
+    return path
+
+
+class TestRunManifest:
+    """Test manifest bookkeeping"""
+
+    def test_content_hash(self):
+        """Test that hashes are stable SHA-256 digests"""
+        assert content_hash("abc") == content_hash("abc")
+        assert len(content_hash("abc")) == 64
+
+    def test_record_and_load(self, manifest, temp_dir):
+        """Test that a recorded unit is reused for the same input"""
+        path = write_output(temp_dir, "Bonjour")
+        manifest.record(40, 1, path, "Hello", "Bonjour")
+
+        assert manifest.load_completed(40, 1, "Hello") == "Bonjour"
+        assert manifest.completed_units() == [(40, 1)]
+
+    def test_unknown_unit(self, manifest):
+        """Test that unrecorded units are not reused"""
+        assert manifest.load_completed(40, 2, "Hello") is None
+
+    def test_changed_input_invalidates(self, manifest, temp_dir):
+        """Test that a different stage input forces recomputation"""
+        path = write_output(temp_dir, "Bonjour")
+        manifest.record(40, 1, path, "Hello", "Bonjour")
+
+        assert manifest.load_completed(40, 1, "Goodbye") is None
+
+    def test_modified_output_invalidates(self, manifest, temp_dir):
+        """Test that an edited output file forces recomputation"""
+        path = write_output(temp_dir, "Bonjour")
+        manifest.record(40, 1, path, "Hello", "Bonjour")
+        path.write_text("Salut\n", encoding="utf-8")
+
+        assert manifest.load_completed(40, 1, "Hello") is None
+
+    def test_missing_output_invalidates(self, manifest, temp_dir):
+        """Test that a deleted output file forces recomputation"""
+        path = write_output(temp_dir, "Bonjour")
+        manifest.record(40, 1, path, "Hello", "Bonjour")
+        os.remove(path)
+
+        assert manifest.load_completed(40, 1, "Hello") is None
+
+    def test_other_endpoint_invalidates(self, temp_dir):
+        """Test that units of an offline backend are not resumed into a real run"""
+        path = write_output(temp_dir, "[english-to-french-translator] Hello")
+        get_run_manifest(temp_dir, "mock").record(40, 1, path, "Hello", path.read_text().strip())
+
+        assert get_run_manifest(temp_dir).load_completed(40, 1, "Hello") is None
+        assert get_run_manifest(temp_dir, "mock").load_completed(40, 1, "Hello") is not None
+
+    def test_persists_to_disk(self, manifest, temp_dir):
+        """Test that units survive reopening the manifest"""
+        path = write_output(temp_dir, "Bonjour")
+        manifest.record(40, 1, path, "Hello", "Bonjour")
+
+        reopened = get_run_manifest(temp_dir)
+        assert reopened.load_completed(40, 1, "Hello") == "Bonjour"
+
+    def test_corrupted_manifest_is_empty(self, temp_dir):
+        """Test that an unreadable manifest is ignored"""
+        (temp_dir / "run_manifest.json").write_text("{not json")
+
+        assert RunManifest(temp_dir / "run_manifest.json").completed_units() == []
+
+
+class TestResumeChain:
+    """Test --resume behaviour of run_translation_chain"""
+
+    def test_resume_runs_only_missing_stages(self, temp_dir, mock_skills_dir, monkeypatch):
+        """Test that a rerun after a stage-3 failure only calls stage 3"""
+        from client_factory import reset_client_factory
+        from config import get_config
+        from errors import TranslationError
+        from pipeline import run_translation_chain
+
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        monkeypatch.setattr(
+            type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs")
+        )
+
+        def response(text):
+            return Mock(content=[Mock(text=text)], usage=Mock(input_tokens=10, output_tokens=5))
+
+        client = Mock()
+        client.messages.create.side_effect = [
+            response("french"),
+            response("hebrew"),
+            RuntimeError("overloaded")
+        ]
+        with patch("pipeline.anthropic.Anthropic", return_value=client):
+            with pytest.raises(TranslationError):
+                run_translation_chain(40)
+
+        # The rerun happens in a new process, with a new pooled client
+        reset_client_factory()
+        client = Mock()
+        client.messages.create.side_effect = [response("english")]
+        with patch("pipeline.anthropic.Anthropic", return_value=client):
+            run_translation_chain(40, resume=True)
+
+        assert client.messages.create.call_count == 1
+        prompt = client.messages.create.call_args.kwargs["messages"][0]["content"]
+        assert prompt.endswith("hebrew")
+        final = temp_dir / "outputs" / "noise_40" / "agent3_english.txt"
+        assert final.read_text(encoding="utf-8") == "english\n"
@@ -0,0 +1,149 @@
+"""
+Unit tests for src/similarity.py
+
+Tests cover:
+- Bit-parallel LCS against a reference dynamic program
+- Indel ratios against difflib's SequenceMatcher
+- Batched and pairwise APIs, including the vectorized NumPy kernel
+- The optional rapidfuzz backend
+"""
+
+import difflib
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import similarity
+from similarity import indel_ratio, indel_ratio_matrix, indel_ratios, lcs_length
+from tests.fixtures.mock_data import NOISY_SENTENCES, ORIGINAL_CLEAN_SENTENCE
+
+
+def reference_lcs(a: str, b: str) -> int:
+    """Textbook O(len(a) × len(b)) LCS dynamic program."""
+    previous = [0] * (len(b) + 1)
+    for char_a in a:
+        current = [0]
+        for j, char_b in enumerate(b):
+            current.append(previous[j] + 1 if char_a == char_b else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def random_pairs(count=300, alphabet="abcd ", max_length=40):
+    """Random string pairs over a small alphabet (many repeated characters)."""
+    rng = random.Random(7)
+    for _ in range(count):
+        yield tuple(
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+            for _ in range(2)
+        )
+
+
+@pytest.fixture
+def bit_parallel(monkeypatch):
+    """Use the built-in kernel even when rapidfuzz is installed."""
+    monkeypatch.setattr(similarity, "RAPIDFUZZ_AVAILABLE", False)
+
+
+class TestLcsLength:
+    """Test the bit-parallel LCS"""
+
+    def test_known_values(self):
+        """Test textbook examples"""
+        assert lcs_length("kitten", "sitting") == 4
+        assert lcs_length("", "abc") == 0
+        assert lcs_length("abc", "abc") == 3
+
+    def test_matches_reference(self):
+        """Test against the dynamic program, including words longer than 64 characters"""
+        for a, b in random_pairs():
+            assert lcs_length(a, b) == reference_lcs(a, b)
+        for a, b in random_pairs(count=20, max_length=200):
+            assert lcs_length(a, b) == reference_lcs(a, b)
+
+
+class TestIndelRatio:
+    """Test ratios against difflib"""
+
+    def test_equals_difflib_on_noisy_inputs(self, bit_parallel):
+        """Test that the pipeline's noisy inputs score as with SequenceMatcher"""
+        original = ORIGINAL_CLEAN_SENTENCE.lower()
+        for noisy in NOISY_SENTENCES.values():
+            expected = difflib.SequenceMatcher(None, original, noisy.lower()).ratio()
+            assert indel_ratio(original, noisy.lower()) == pytest.approx(expected)
+
+    def test_never_below_difflib(self, bit_parallel):
+        """Test that the optimal LCS ratio bounds difflib's greedy matching"""
+        for a, b in random_pairs():
+            assert indel_ratio(a, b) >= difflib.SequenceMatcher(None, a, b).ratio() - 1e-12
+
+    def test_long_texts_not_junked(self, bit_parallel):
+        """Test that long texts keep their similarity (difflib's autojunk drops it)"""
+        text = ORIGINAL_CLEAN_SENTENCE.lower() * 10
+        edited = text.replace("semantic", "semantik")
+
+        assert indel_ratio(text, edited) > 0.99
+
+    def test_empty_strings(self, bit_parallel):
+        """Test that empty strings behave like difflib"""
+        assert indel_ratio("", "") == 1.0
+        assert indel_ratio("abc", "") == 0.0
+
+
+class TestBatchedApi:
+    """Test one-vs-many and pairwise ratios"""
+
+    def test_ratios_match_single_calls(self, bit_parallel):
+        """Test that batched ratios equal pair by pair ratios"""
+        choices = list(NOISY_SENTENCES.values()) + ["", "xyz"]
+
+        ratios = indel_ratios(ORIGINAL_CLEAN_SENTENCE, choices)
+
+        np.testing.assert_array_equal(
+            ratios, [indel_ratio(ORIGINAL_CLEAN_SENTENCE, choice) for choice in choices]
+        )
+
+    def test_vectorized_kernel_matches_reference(self, bit_parallel, monkeypatch):
+        """Test the lockstep NumPy kernel on patterns spanning several words"""
+        monkeypatch.setattr(similarity, "VECTORIZED_MIN_CHOICES", 1)
+        pairs = list(random_pairs(count=60, max_length=150))
+        choices = [b for _, b in pairs] + [""]
+
+        for query, _ in pairs[:10]:
+            ratios = indel_ratios(query, choices)
+            expected = [
+                2.0 * reference_lcs(query, choice) / (len(query) + len(choice))
+                if query or choice else 1.0
+                for choice in choices
+            ]
+            np.testing.assert_allclose(ratios, expected)
+
+    def test_matrix(self, bit_parallel):
+        """Test that the pairwise matrix is symmetric with a unit diagonal"""
+        texts = [ORIGINAL_CLEAN_SENTENCE] + list(NOISY_SENTENCES.values())
+
+        matrix = indel_ratio_matrix(texts)
+
+        np.testing.assert_array_equal(matrix, matrix.T)
+        np.testing.assert_array_equal(np.diag(matrix), 1.0)
+        assert matrix[0, 2] == indel_ratio(texts[0], texts[2])
+
+
+@pytest.mark.skipif(not similarity.RAPIDFUZZ_AVAILABLE, reason="rapidfuzz not installed")
+class TestRapidfuzzBackend:
+    """Test that the compiled backend returns the same ratios"""
+
+    def test_matches_bit_parallel(self, monkeypatch):
+        """Test both backends on random pairs"""
+        pairs = list(random_pairs())
+        compiled = [indel_ratio(a, b) for a, b in pairs]
+
+        monkeypatch.setattr(similarity, "RAPIDFUZZ_AVAILABLE", False)
+        builtin = [indel_ratio(a, b) for a, b in pairs]
+
+        np.testing.assert_allclose(compiled, builtin)
@@ -0,0 +1,125 @@
+"""
+Unit tests for src/skill_registry.py
+
+Tests cover:
+- Loading skills and precomputed system prompts
+- Serving repeated lookups from memory
+- Reloading on file modification
+- Cached directory listings
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from skill_registry import SkillRegistry, get_skill_registry
+
+
+@pytest.fixture
+def registry(mock_skills_dir):
+    """Create a registry over the mock skills directory."""
+    return SkillRegistry(mock_skills_dir)
+
+
+def touch_later(path, content):
+    """Rewrite a file and move its mtime forward so the change is detectable."""
+    stat = path.stat()
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestSkillRegistry:
+    """Test skill lookups"""
+
+    def test_get_skill(self, registry):
+        """Test that a skill is loaded with its system prompt"""
+        entry = registry.get("english-to-french-translator")
+
+        assert "English to French" in entry.content
+        assert entry.system_prompt.startswith('You are using the "english-to-french-translator" skill.')
+        assert entry.system_prompt.endswith(entry.content)
+
+    def test_missing_skill(self, registry):
+        """Test that unknown skills return None"""
+        assert registry.get("non-existent") is None
+
+    def test_repeated_lookups_read_once(self, registry):
+        """Test that an unchanged file is only read once"""
+        first = registry.get("english-to-french-translator")
+        second = registry.get("english-to-french-translator")
+
+        assert first is second
+        assert registry.loads == 1
+
+    def test_reload_on_modification(self, registry, mock_skills_dir):
+        """Test that an edited SKILL.md is reloaded"""
+        registry.get("english-to-french-translator")
+        touch_later(mock_skills_dir / "english-to-french-translator" / "SKILL.md", "# Updated")
+
+        entry = registry.get("english-to-french-translator")
+
+        assert entry.content == "# Updated"
+        assert registry.loads == 2
+
+    def test_deleted_skill_forgotten(self, registry, mock_skills_dir):
+        """Test that a removed SKILL.md is no longer served"""
+        registry.get("english-to-french-translator")
+        os.remove(mock_skills_dir / "english-to-french-translator" / "SKILL.md")
+
+        assert registry.get("english-to-french-translator") is None
+
+    def test_names(self, registry):
+        """Test the cached directory listing"""
+        assert registry.names() == [
+            "english-to-french-translator",
+            "french-to-hebrew-translator",
+            "hebrew-to-english-translator"
+        ]
+
+    def test_names_sees_new_skill_without_mtime_change(self, registry, mock_skills_dir):
+        """Test that a skill added within the directory's mtime tick is listed"""
+        registry.names()
+        stat = mock_skills_dir.stat()
+        new_skill = mock_skills_dir / "english-to-german-translator"
+        new_skill.mkdir()
+        (new_skill / "SKILL.md").write_text("# German", encoding="utf-8")
+        os.utime(mock_skills_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert "english-to-german-translator" in registry.names()
+
+    def test_names_sees_skill_file_changes(self, registry, mock_skills_dir):
+        """Test that adding or deleting SKILL.md in an existing directory updates names"""
+        skill_file = mock_skills_dir / "french-to-hebrew-translator" / "SKILL.md"
+        assert "french-to-hebrew-translator" in registry.names()
+
+        content = skill_file.read_text(encoding="utf-8")
+        skill_file.unlink()
+        assert "french-to-hebrew-translator" not in registry.names()
+
+        skill_file.write_text(content, encoding="utf-8")
+        assert "french-to-hebrew-translator" in registry.names()
+
+    def test_preload(self, registry):
+        """Test that preload reads every skill once"""
+        assert registry.preload() == 3
+        assert registry.loads == 3
+
+    def test_shared_per_directory(self, mock_skills_dir, temp_dir):
+        """Test that one registry is shared per skills directory"""
+        assert get_skill_registry(mock_skills_dir) is get_skill_registry(mock_skills_dir)
+        assert get_skill_registry(mock_skills_dir) is not get_skill_registry(temp_dir)
+
+    def test_pipeline_load_skill_uses_registry(self, mock_skills_dir, monkeypatch):
+        """Test that pipeline.load_skill stops re-reading the file"""
+        from pipeline import load_skill
+
+        monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+        for _ in range(5):
+            skill = load_skill("english-to-french-translator")
+
+        assert "system_prompt" in skill
+        assert get_skill_registry(mock_skills_dir).loads == 1
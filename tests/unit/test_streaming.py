@@ -0,0 +1,145 @@
+"""
+Unit tests for src/streaming.py
+
+Tests cover:
+- Assembling streamed events into a message
+- Time-to-first-token and tokens/sec measurement
+- Streamed stages in the sync and async pipelines
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from llm_backend import AsyncMockAnthropic, MockBackend, MockLLM, stream_events
+from streaming import StreamTiming, consume_stream, consume_stream_async
+
+
+def make_body(text="Bonjour le monde"):
+    """Build a Message JSON body."""
+    return {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "mock-model",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 12, "output_tokens": 4}
+    }
+
+
+@pytest.fixture
+def streaming_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Use mock skills, a temporary output directory and the mock backend."""
+    import llm_backend
+    from config import get_config
+
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    backend = MockBackend(MockLLM(latency="constant", latency_ms=5))
+    monkeypatch.setattr(llm_backend, "_backend", backend)
+    return temp_dir / "outputs"
+
+
+class TestConsumeStream:
+    """Test stream consumption"""
+
+    def test_message_assembled(self):
+        """Test that deltas are joined into one text block with final usage"""
+        chunks = []
+        message, timing = consume_stream(stream_events(make_body()), on_text=chunks.append)
+
+        assert message.content[0].text == "Bonjour le monde"
+        assert "".join(chunks) == "Bonjour le monde"
+        assert len(chunks) == 3
+        assert message.usage.input_tokens == 12
+        assert message.usage.output_tokens == 4
+        assert message.stop_reason == "end_turn"
+        assert timing.output_tokens == 4
+
+    def test_time_to_first_token(self):
+        """Test that TTFT covers the wait before the first delta"""
+        def slow_events():
+            for event in stream_events(make_body()):
+                if event.type == "content_block_delta":
+                    time.sleep(0.01)
+                yield event
+
+        _, timing = consume_stream(slow_events())
+
+        assert timing.ttft_s >= 0.01
+        assert timing.duration_s >= timing.ttft_s + 0.02
+
+    def test_missing_message_start(self):
+        """Test that a stream without message_start is rejected"""
+        with pytest.raises(ValueError):
+            consume_stream(stream_events(make_body())[1:])
+
+    def test_tokens_per_second(self):
+        """Test that throughput excludes the time to first token"""
+        assert StreamTiming(ttft_s=1.0, duration_s=3.0, output_tokens=100).tokens_per_second == 50
+        assert StreamTiming(ttft_s=None, duration_s=0.0, output_tokens=5).tokens_per_second == 0.0
+
+    def test_async_stream(self):
+        """Test the async consumer against the async mock client"""
+        llm = MockLLM(latency="constant", latency_ms=0, token_latency_ms=1)
+        client = AsyncMockAnthropic(llm)
+        params = {
+            "model": "m",
+            "max_tokens": 10,
+            "messages": [{"role": "user", "content": "Input text:\nun deux trois"}]
+        }
+
+        async def run():
+            events = await client.messages.create(stream=True, **params)
+            return await consume_stream_async(events)
+
+        message, timing = asyncio.run(run())
+
+        assert message.content[0].text == "[translator] un deux trois"
+        assert timing.duration_s > timing.ttft_s
+
+
+class TestStreamingPipeline:
+    """Test streamed stages in the pipeline"""
+
+    def test_sync_chain_streams(self, streaming_env):
+        """Test that a streamed chain saves every stage and records TTFT"""
+        from pipeline import TRANSLATION_STAGES, cost_tracker, run_translation_chain
+
+        cost_tracker.calls = []
+        run_translation_chain(25, stream=True)
+
+        for _, _, filename in TRANSLATION_STAGES:
+            assert (streaming_env / "noise_25" / filename).exists()
+        assert all(call.ttft_s is not None for call in cost_tracker.calls)
+        latency = cost_tracker.get_latency_by_stage()
+        assert sorted(latency) == [1, 2, 3]
+        assert latency[1]["mean_ttft_s"] >= 0.005
+
+    def test_non_streamed_calls_have_duration(self, streaming_env):
+        """Test that regular calls still report their latency"""
+        from pipeline import cost_tracker, run_translation_chain
+
+        cost_tracker.calls = []
+        run_translation_chain(10)
+
+        assert all(call.duration_s >= 0.005 and call.ttft_s is None for call in cost_tracker.calls)
+
+    def test_async_levels_stream(self, streaming_env):
+        """Test that parallel chains can stream"""
+        from async_engine import run_all_levels
+        from pipeline import cost_tracker
+
+        cost_tracker.calls = []
+        results = run_all_levels([0, 50], stream=True)
+
+        assert all(isinstance(output, str) for output in results.values())
+        assert len(cost_tracker.calls) == 6
+        assert all(call.ttft_s is not None for call in cost_tracker.calls)
@@ -0,0 +1,228 @@
+"""
+Unit tests for src/tracing.py
+
+Tests cover:
+- Span nesting, errors and context propagation to threads
+- Latency histograms and JSONL export
+- Spans emitted by the sync and async pipelines
+"""
+
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from tracing import Tracer, current_span, get_tracer, propagate_context, traced
+
+
+@pytest.fixture
+def offline_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Run chains against the mock backend."""
+    import llm_backend
+    from config import get_config
+    from llm_backend import MockBackend, MockLLM
+
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    monkeypatch.setattr(llm_backend, "_backend", MockBackend(MockLLM(latency="constant", latency_ms=1)))
+
+
+def spans_by_name(tracer):
+    """Group a tracer's spans by name."""
+    grouped = {}
+    for span in tracer.spans:
+        grouped.setdefault(span.name, []).append(span)
+    return grouped
+
+
+class TestSpans:
+    """Test span recording"""
+
+    def test_nesting(self):
+        """Test that inner spans are children of the enclosing span"""
+        tracer = Tracer(enabled=True)
+
+        with tracer.span("chain", noise_level=25) as outer:
+            with tracer.span("stage", stage=1) as inner:
+                assert current_span() is inner
+            assert current_span() is outer
+        assert current_span() is None
+
+        assert [span.name for span in tracer.spans] == ["stage", "chain"]
+        assert inner.parent_id == outer.span_id
+        assert inner.trace_id == outer.trace_id
+        assert outer.parent_id is None
+        assert outer.duration_s >= inner.duration_s
+        assert outer.attributes == {"noise_level": 25}
+
+    def test_error_status(self):
+        """Test that a failing block is recorded as an error and re-raised"""
+        tracer = Tracer(enabled=True)
+
+        with pytest.raises(ValueError):
+            with tracer.span("api_call"):
+                raise ValueError("boom")
+
+        assert tracer.spans[0].status == "error"
+        assert tracer.spans[0].attributes["error"] == "ValueError"
+
+    def test_disabled(self):
+        """Test that a disabled tracer still yields spans but records nothing"""
+        tracer = Tracer(enabled=False)
+
+        with tracer.span("api_call") as span:
+            span.set(output_tokens=3)
+
+        assert not tracer.spans
+
+    def test_max_spans(self):
+        """Test that the oldest spans are dropped beyond the limit"""
+        tracer = Tracer(enabled=True, max_spans=2)
+        for name in ("a", "b", "c"):
+            with tracer.span(name):
+                pass
+
+        assert [span.name for span in tracer.spans] == ["b", "c"]
+        assert tracer.dropped == 1
+
+    def test_async_with(self):
+        """Test that spans work as async context managers and nest across awaits"""
+        tracer = Tracer(enabled=True)
+
+        async def run():
+            async with tracer.span("chain") as outer:
+                await asyncio.sleep(0)
+                async with tracer.span("stage") as inner:
+                    await asyncio.sleep(0)
+            return outer, inner
+
+        outer, inner = asyncio.run(run())
+
+        assert [span.name for span in tracer.spans] == ["stage", "chain"]
+        assert inner.parent_id == outer.span_id
+
+    def test_propagate_context_to_threads(self):
+        """Test that spans opened by worker threads keep their parent"""
+        tracer = Tracer(enabled=True)
+
+        def work(_):
+            with tracer.span("stage") as span:
+                return span.parent_id
+
+        with tracer.span("chain") as chain:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                parents = list(pool.map(propagate_context(work), range(2)))
+
+        assert parents == [chain.span_id, chain.span_id]
+
+    def test_traced_decorator(self):
+        """Test that decorated calls record a span in the global tracer"""
+        @traced("analysis.step")
+        def step():
+            return 42
+
+        assert step() == 42
+        assert get_tracer().spans[-1].name == "analysis.step"
+
+
+class TestHistogramsAndExport:
+    """Test latency rollups and export"""
+
+    def make_tracer(self, durations, stage=1):
+        """Build a tracer with api_call spans of the given durations (seconds)."""
+        tracer = Tracer(enabled=True)
+        for duration in durations:
+            with tracer.span("api_call", stage=stage) as span:
+                pass
+            span.duration_s = duration
+        return tracer
+
+    def test_percentiles(self):
+        """Test p50/p95/p99 and buckets per operation and per stage"""
+        tracer = self.make_tracer([i / 1000 for i in range(1, 101)])
+
+        histograms = tracer.get_histograms()
+
+        assert set(histograms) == {"api_call", "api_call.stage1"}
+        histogram = histograms["api_call"]
+        assert histogram["count"] == 100
+        assert histogram["p50_ms"] == pytest.approx(50.5)
+        assert histogram["p95_ms"] == pytest.approx(95.05)
+        assert histogram["p99_ms"] == pytest.approx(99.01)
+        assert histogram["max_ms"] == pytest.approx(100)
+        assert sum(histogram["buckets"].values()) == 100
+        assert histogram["buckets"]["1"] == 1
+        assert histogram["buckets"]["100"] == 50
+
+    def test_export(self, temp_dir):
+        """Test that spans are appended once and histograms are rewritten"""
+        tracer = self.make_tracer([0.01, 0.02])
+        trace_file = temp_dir / "traces.jsonl"
+        histogram_file = temp_dir / "histograms.json"
+
+        tracer.export(trace_file, histogram_file)
+        with tracer.span("file_write"):
+            pass
+        tracer.export(trace_file, histogram_file)
+
+        lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["api_call", "api_call", "file_write"]
+        assert lines[0]["attributes"] == {"stage": 1}
+        report = json.loads(histogram_file.read_text())
+        assert report["spans"] == 3
+        assert report["histograms"]["api_call"]["count"] == 2
+
+    def test_export_nothing(self, temp_dir):
+        """Test that an empty tracer writes no files"""
+        assert Tracer(enabled=True).export(temp_dir / "t.jsonl", temp_dir / "h.json") is None
+        assert not (temp_dir / "t.jsonl").exists()
+
+
+class TestPipelineSpans:
+    """Test spans emitted by the translation pipelines"""
+
+    def test_sync_chain(self, offline_env):
+        """Test the chain → stage → api_call/file_write hierarchy"""
+        from pipeline import run_translation_chain
+
+        run_translation_chain(0)
+
+        spans = spans_by_name(get_tracer())
+        (chain,) = spans["chain"]
+        assert [span.attributes["stage"] for span in spans["stage"]] == [1, 2, 3]
+        assert all(span.parent_id == chain.span_id for span in spans["stage"])
+        stage_ids = {span.span_id for span in spans["stage"]}
+        assert len(spans["api_call"]) == 3
+        assert all(span.parent_id in stage_ids for span in spans["api_call"])
+        assert all(span.attributes["output_tokens"] > 0 for span in spans["api_call"])
+        assert len(spans["file_write"]) == 3
+
+    def test_async_chains(self, offline_env):
+        """Test that async chains get separate traces with nested stages"""
+        from async_engine import run_all_levels
+
+        run_all_levels([0, 10])
+
+        spans = spans_by_name(get_tracer())
+        assert len(spans["chain"]) == 2
+        assert len({span.trace_id for span in spans["chain"]}) == 2
+        chain_ids = {span.span_id for span in spans["chain"]}
+        assert all(span.parent_id in chain_ids for span in spans["stage"])
+        assert len(spans["api_call"]) == 6
+        assert get_tracer().get_histograms()["api_call.stage3"]["count"] == 2
+
+    def test_memoized_stage_has_no_api_call(self, offline_env):
+        """Test that memo hits are marked on the stage span"""
+        from pipeline import run_translation_chain
+
+        run_translation_chain(25)
+        run_translation_chain(30)
+
+        spans = spans_by_name(get_tracer())
+        assert len(spans["api_call"]) == 3
+        assert sum(span.attributes["memoized"] for span in spans["stage"]) == 3
@@ -0,0 +1,158 @@
+"""
+Unit tests for src/translation_dag.py
+
+Tests cover:
+- Building chains and branching graphs from agent definitions
+- Validation of invalid graphs
+- Executing a branching DAG in the sync and async pipelines
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from errors import ConfigurationError
+from translation_dag import SOURCE, DagNode, TranslationDAG, dag_from_agents, load_translation_dag
+
+BRANCHING_AGENTS = {
+    "english_to_french": {"name": "english-to-french-translator", "output": "agent1_french.txt"},
+    "french_to_hebrew": {"name": "french-to-hebrew-translator", "output": "agent2_hebrew.txt"},
+    "hebrew_to_english": {"name": "hebrew-to-english-translator", "output": "agent3_english.txt"},
+    "french_to_hebrew_b": {
+        "name": "french-to-hebrew-translator",
+        "input": "english_to_french",
+        "output": "agent4_hebrew_b.txt"
+    },
+    "hebrew_b_to_english": {"name": "hebrew-to-english-translator", "output": "agent5_english_b.txt"}
+}
+
+
+@pytest.fixture
+def branching_env(mock_skills_dir, temp_dir, monkeypatch):
+    """Run the pipeline on a branching DAG with the mock backend."""
+    import llm_backend
+    from config import get_config
+    from llm_backend import MockBackend, MockLLM
+
+    monkeypatch.setattr("pipeline.SKILLS_DIR", mock_skills_dir)
+    monkeypatch.setattr("pipeline.TRANSLATION_DAG", dag_from_agents(BRANCHING_AGENTS))
+    monkeypatch.setattr(type(get_config()), "output_dir", property(lambda self: temp_dir / "outputs"))
+    # Both branches run the same skills on the same input; count every node
+    monkeypatch.setenv("EXECUTION_STAGE_MEMO", "false")
+    backend = MockBackend(MockLLM(latency="constant", latency_ms=1))
+    monkeypatch.setattr(llm_backend, "_backend", backend)
+    return backend
+
+
+class TestDagConstruction:
+    """Test building DAGs"""
+
+    def test_default_chain(self):
+        """Test that the configured agents form the three-stage round trip"""
+        dag = load_translation_dag()
+
+        assert dag.is_linear()
+        assert [(n.stage, n.skill, n.output) for n in dag.main_path()] == [
+            (1, "english-to-french-translator", "agent1_french.txt"),
+            (2, "french-to-hebrew-translator", "agent2_hebrew.txt"),
+            (3, "hebrew-to-english-translator", "agent3_english.txt")
+        ]
+
+    def test_implicit_inputs_and_stages(self):
+        """Test that inputs default to the previous agent and stages to positions"""
+        dag = dag_from_agents({"a": {"name": "s1"}, "b": {"name": "s2"}})
+
+        assert dag.get("a").input == SOURCE
+        assert dag.get("b").input == "a"
+        assert dag.get("b").stage == 2
+        assert dag.get("b").output == "agent2_b.txt"
+
+    def test_branching(self):
+        """Test levels, leaves and the main path of a branching graph"""
+        dag = dag_from_agents(BRANCHING_AGENTS)
+
+        assert not dag.is_linear()
+        assert [[n.id for n in level] for level in dag.levels()] == [
+            ["english_to_french"],
+            ["french_to_hebrew", "french_to_hebrew_b"],
+            ["hebrew_to_english", "hebrew_b_to_english"]
+        ]
+        assert [n.id for n in dag.leaves()] == ["hebrew_to_english", "hebrew_b_to_english"]
+        assert dag.main_path()[-1].id == "hebrew_to_english"
+        assert dag.depth("hebrew_b_to_english") == 3
+
+    def test_topological_order(self):
+        """Test that nodes listed before their input are reordered"""
+        dag = TranslationDAG([
+            DagNode("b", "s2", 2, "b.txt", input="a"),
+            DagNode("a", "s1", 1, "a.txt")
+        ])
+        assert [n.id for n in dag.nodes] == ["a", "b"]
+
+
+class TestDagValidation:
+    """Test invalid graphs"""
+
+    @pytest.mark.parametrize("nodes", [
+        [],
+        [DagNode("a", "s", 1, "a.txt"), DagNode("a", "s", 2, "b.txt")],
+        [DagNode("a", "s", 1, "a.txt"), DagNode("b", "s", 1, "b.txt")],
+        [DagNode("a", "s", 1, "a.txt", input="missing")],
+        [DagNode("a", "s", 1, "a.txt", input="b"), DagNode("b", "s", 2, "b.txt", input="a")],
+        [DagNode(SOURCE, "s", 1, "a.txt")]
+    ])
+    def test_invalid_graphs(self, nodes):
+        """Test that empty, duplicate, dangling and cyclic graphs are rejected"""
+        with pytest.raises(ConfigurationError):
+            TranslationDAG(nodes)
+
+    def test_agent_without_skill(self):
+        """Test that an agent without a skill name is rejected"""
+        with pytest.raises(ConfigurationError):
+            dag_from_agents({"a": {"stage": 1}})
+
+
+class TestDagExecution:
+    """Test running a branching DAG"""
+
+    def test_sync_branches(self, branching_env, temp_dir):
+        """Test that every node runs once and shared stages feed both branches"""
+        from pipeline import run_translation_chain
+
+        run_translation_chain(25)
+
+        noise_dir = temp_dir / "outputs" / "noise_25"
+        french = (noise_dir / "agent1_french.txt").read_text(encoding="utf-8").strip()
+        for filename in ("agent2_hebrew.txt", "agent4_hebrew_b.txt"):
+            assert french in (noise_dir / filename).read_text(encoding="utf-8")
+        assert (noise_dir / "agent5_english_b.txt").exists()
+        assert branching_env.llm.stats["calls"] == 5
+
+    def test_async_branches(self, branching_env, temp_dir):
+        """Test that the async engine returns the main chain output"""
+        from async_engine import run_all_levels
+
+        results = run_all_levels([0, 50])
+
+        assert all(output.startswith("[hebrew-to-english-translator]") for output in results.values())
+        assert (temp_dir / "outputs" / "noise_50" / "agent5_english_b.txt").exists()
+        assert branching_env.llm.stats["calls"] == 10
+
+    def test_async_failure_propagates(self, branching_env, monkeypatch):
+        """Test that a failing shared stage fails the whole chain"""
+        import asyncio
+
+        import pipeline
+        from async_engine import run_translation_chain_async
+        from llm_backend import MockLLM
+
+        branching_env.llm = MockLLM(latency="constant", latency_ms=0, error_rate=1.0)
+        monkeypatch.setattr("rate_limiter.RateLimiter.backoff_delay", lambda self, attempt, error=None: 0)
+        client = branching_env.create_async_client()
+
+        with pytest.raises(Exception):
+            asyncio.run(run_translation_chain_async(client, 0))
+        assert not (pipeline.config.output_dir / "noise_0" / "agent2_hebrew.txt").exists()